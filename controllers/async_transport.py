@@ -0,0 +1,217 @@
+import asyncio
+import socket
+import threading
+from typing import List, Optional
+
+from controllers.communication_controller import CommunicationController
+from controllers.receive_buffers import set_receive_buffer
+from recording.capture import DIR_RX, DIR_TX
+
+# 等待事件循环线程完成建立/关闭的上限（秒）
+_LOOP_TIMEOUT = 2.0
+
+
+class _ReceiveProtocol(asyncio.DatagramProtocol):
+    def __init__(self, owner: "AsyncioCommunicationController"):
+        self.owner = owner
+
+    def datagram_received(self, data, addr):
+        self.owner._on_datagram(data, addr)
+
+    def error_received(self, exc):
+        if self.owner.running:
+            self.owner._emit_error(f"接收异常: {exc}")
+
+
+class AsyncioCommunicationController(CommunicationController):
+    """基于 asyncio 的 UDP 传输，接口与 `CommunicationController` 相同。
+
+    所有套接字由一个事件循环线程通过 `create_datagram_endpoint` 管理，
+    接收与发送都在该线程中执行，`send` 不再持锁阻塞调用方。周期发送
+    仍由 `SendScheduler` 线程定时，只把每帧的发送投递到事件循环。
+    停止时直接关闭传输并结束事件循环，无需等待 recv 超时。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._send_transport: Optional[asyncio.DatagramTransport] = None
+        self._recv_transports: List[asyncio.DatagramTransport] = []
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+    def setup(self) -> bool:
+        with self._lock:
+            try:
+                self._teardown(emit_status=False)
+                rcvbuf = int(self.config.get("recv_buffer_bytes") or 0)
+                self.send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self.send_sock.bind(("0.0.0.0", self.config["acu_send_port"]))
+                self.send_sock.setblocking(False)
+                for port in self.receive_ports():
+                    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    self.recv_socks.append(sock)
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                    sock.bind(("0.0.0.0", port))
+                    sock.setblocking(False)
+                    self._rcvbuf[port] = set_receive_buffer(sock, rcvbuf)
+                self.recv_sock = self.recv_socks[0]
+                self._rx_datagrams = 0
+                self._rx_bytes = 0
+                self._start_loop()
+                self._call(self._open_send_endpoint())
+                self.running = True
+                self._emit_status("Socket初始化成功 (asyncio)")
+                return True
+            except Exception as e:
+                self._emit_error(f"Socket初始化失败: {e}")
+                self._teardown(emit_status=False)
+                return False
+
+    def start_receive_loop(self):
+        with self._lock:
+            if not self.running or self._recv_transports:
+                return
+            try:
+                self._call(self._open_recv_endpoints(list(self.recv_socks)))
+            except Exception as e:
+                self._emit_error(f"启动接收失败: {e}")
+                return
+            self._emit_status(f"开始接收数据: 端口 {list(self._rcvbuf)}")
+
+    def send(self, data: bytes):
+        loop = self._loop
+        if loop is None or self._send_transport is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._send_now, bytes(data))
+        except RuntimeError as e:
+            # 事件循环已关闭
+            self._emit_error(f"发送错误: {e}")
+
+    def send_fanout(self, frame) -> None:
+        loop = self._loop
+        if loop is None or self._send_transport is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._fanout_now, frame)
+        except RuntimeError as e:
+            self._emit_error(f"发送错误: {e}")
+
+    # ------------------------------------------------------------------
+    # 事件循环线程内部
+    # ------------------------------------------------------------------
+    def _start_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def _run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            try:
+                loop.run_forever()
+            finally:
+                loop.close()
+
+        self._loop = loop
+        self._loop_thread = threading.Thread(target=_run, daemon=True)
+        self._loop_thread.start()
+        ready.wait(_LOOP_TIMEOUT)
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(
+            timeout=_LOOP_TIMEOUT
+        )
+
+    async def _open_send_endpoint(self) -> None:
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, sock=self.send_sock
+        )
+        self._send_transport = transport
+
+    async def _open_recv_endpoints(self, socks) -> None:
+        loop = asyncio.get_running_loop()
+        for sock in socks:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _ReceiveProtocol(self), sock=sock
+            )
+            self._recv_transports.append(transport)
+
+    def _on_datagram(self, data: bytes, addr) -> None:
+        self._rx_datagrams += 1
+        self._rx_bytes += len(data)
+        capture = self._capture
+        if capture is not None:
+            capture.write(DIR_RX, addr, data)
+        if self.on_receive:
+            try:
+                self.on_receive(data, addr)
+            except Exception as e:
+                self._emit_error(f"接收回调异常: {e}")
+
+    def _send_now(self, data: bytes) -> None:
+        transport = self._send_transport
+        if transport is None:
+            return
+        target = (self.config["target_ip"], self.config["target_receive_port"])
+        try:
+            transport.sendto(data, target)
+        except Exception as e:
+            self._emit_error(f"发送错误: {e}")
+            return
+        capture = self._capture
+        if capture is not None:
+            capture.write(DIR_TX, target, data)
+
+    def _fanout_now(self, frame) -> None:
+        # transport.sendto 在需要排队时会复制数据，复用的补丁缓冲是安全的
+        transport = self._send_transport
+        if transport is not None:
+            self._fanout(transport.sendto, frame)
+
+    async def _close_transports(self) -> None:
+        for transport in self._recv_transports:
+            transport.close()
+        self._recv_transports = []
+        if self._send_transport is not None:
+            self._send_transport.close()
+            self._send_transport = None
+
+    def _teardown(self, emit_status: bool):
+        # 注意：调用此函数时应已持有 self._lock
+        loop, thread = self._loop, self._loop_thread
+        self._loop = None
+        self._loop_thread = None
+        self.running = False
+        if loop is not None and not loop.is_closed():
+            try:
+                if threading.current_thread() is not thread:
+                    asyncio.run_coroutine_threadsafe(
+                        self._close_transports(), loop
+                    ).result(timeout=_LOOP_TIMEOUT)
+                loop.call_soon_threadsafe(loop.stop)
+            except Exception:
+                pass
+        if thread is not None and threading.current_thread() is not thread:
+            thread.join(timeout=_LOOP_TIMEOUT)
+        self._recv_transports = []
+        self._send_transport = None
+        super()._teardown(emit_status)
+
+
+def create_communication_controller(transport: str = "thread"):
+    """按名称创建通信控制器："thread"（默认）或 "asyncio"。"""
+    if transport == "asyncio":
+        return AsyncioCommunicationController()
+    if transport in ("thread", "", None):
+        return CommunicationController()
+    raise ValueError(f"未知的通信传输方式: {transport}")
+
+
+__all__ = [
+    "AsyncioCommunicationController",
+    "create_communication_controller",
+]
@@ -1,6 +1,24 @@
+import queue
+import selectors
 import socket
 import threading
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, List, Optional
+
+from controllers.receive_buffers import (
+    ReceiveBufferPool,
+    read_udp_drops,
+    set_receive_buffer,
+    socket_inode,
+)
+from controllers.replay_controller import ReplayController
+from model.send_target import FanoutFrame, SendTarget
+from recording.capture import DIR_RX, DIR_TX, CaptureWriter
+
+_RECV_BUFSIZE = 2048
+# select 超时只影响停止时的响应速度；有数据时立即唤醒
+_SELECT_TIMEOUT = 0.2
+# 单个就绪套接字一次最多读取的数据报数，避免某个端口独占接收线程
+_DRAIN_LIMIT = 4096
 
 
 class CommunicationController:
@@ -9,26 +27,61 @@ class CommunicationController:
     def __init__(self):
         self.send_sock: Optional[socket.socket] = None
         self.recv_sock: Optional[socket.socket] = None
+        # 所有接收套接字（recv_sock 为其中第一个，即 acu_receive_port）
+        self.recv_socks: List[socket.socket] = []
         self.running = False
         self.config = {
             "acu_ip": "10.2.0.1",
             "acu_send_port": 49152,
             "acu_receive_port": 49156,
+            # 额外监听的本地端口，与 acu_receive_port 共用一个接收线程
+            "extra_receive_ports": [],
             "target_ip": "10.2.0.5",
             "target_receive_port": 49152,
             "period_ms": 100,
+            # "bytes": 每个数据报一个 bytes 对象，接收线程内同步回调
+            # "buffer": recvfrom_into 写入复用的缓冲池，分发线程回调 memoryview
+            "receive_mode": "bytes",
+            # 接收套接字 SO_RCVBUF，0 表示使用系统默认值
+            "recv_buffer_bytes": 0,
+            # buffer 模式下缓冲池的槽位数
+            "recv_pool_slots": 1024,
+            # 扇出发送目标（SendTarget 列表），为空时只发送到 target_ip
+            "send_targets": [],
         }
         self._receive_thread: Optional[threading.Thread] = None
+        self._dispatch_thread: Optional[threading.Thread] = None
+        self._pool: Optional[ReceiveBufferPool] = None
+        # 端口 -> 内核实际采用的 SO_RCVBUF
+        self._rcvbuf: Dict[int, Optional[int]] = {}
+        self._rx_datagrams = 0
+        self._rx_bytes = 0
+        # 扇出：按目标名统计发送次数，补丁帧复用同一块缓冲
+        self._target_stats: Dict[str, Dict[str, int]] = {}
+        self._fanout_scratch = bytearray()
         self._lock = threading.RLock()
         self.on_receive: Optional[Callable[[bytes, tuple], None]] = None
         self.on_error: Optional[Callable[[str], None]] = None
         self.on_status: Optional[Callable[[str], None]] = None
+        # 抓包：收发的每个数据报都写入二进制文件
+        self._capture: Optional[CaptureWriter] = None
+        self._replay: Optional[ReplayController] = None
 
     def update_config(self, **cfg):
         with self._lock:
             self.config.update(cfg)
         self._emit_status(f"通信配置更新: {cfg}")
 
+    def receive_ports(self) -> List[int]:
+        """返回需要监听的本地端口（去重，acu_receive_port 在前）。"""
+        with self._lock:
+            ports = [int(self.config["acu_receive_port"])]
+            for port in self.config.get("extra_receive_ports") or ():
+                port = int(port)
+                if port not in ports:
+                    ports.append(port)
+            return ports
+
     def setup(self) -> bool:
         with self._lock:
             try:
@@ -37,10 +90,24 @@ class CommunicationController:
                 self.send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
                 # 绑定发送端口（本地端口），若配置不合适会抛出异常
                 self.send_sock.bind(("0.0.0.0", self.config["acu_send_port"]))
-                self.recv_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                self.recv_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                self.recv_sock.bind(("0.0.0.0", self.config["acu_receive_port"]))
-                self.recv_sock.settimeout(0.5)
+                rcvbuf = int(self.config.get("recv_buffer_bytes") or 0)
+                for port in self.receive_ports():
+                    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    # 先登记再绑定，绑定失败时 _teardown 也能关闭它
+                    self.recv_socks.append(sock)
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                    sock.bind(("0.0.0.0", port))
+                    # 非阻塞：由 selector 等待就绪，就绪后一次读空
+                    sock.settimeout(0.0)
+                    actual = set_receive_buffer(sock, rcvbuf)
+                    self._rcvbuf[port] = actual
+                    if rcvbuf and actual is not None and actual < rcvbuf:
+                        self._emit_status(
+                            f"端口 {port} SO_RCVBUF 受系统限制: {actual} < {rcvbuf}"
+                        )
+                self.recv_sock = self.recv_socks[0]
+                self._rx_datagrams = 0
+                self._rx_bytes = 0
                 self.running = True
                 self._emit_status("Socket初始化成功")
                 return True
@@ -58,22 +125,134 @@ class CommunicationController:
             if self._receive_thread is not None and self._receive_thread.is_alive():
                 return
 
+            socks = list(self.recv_socks)
+            ports = self.receive_ports()
+            if self.config.get("receive_mode") == "buffer":
+                pool = ReceiveBufferPool(
+                    self.config.get("recv_pool_slots", 1024), _RECV_BUFSIZE
+                )
+                ready: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+                self._pool = pool
+
+                def drain(sock):
+                    self._drain_into(sock, pool, ready)
+
+                self._dispatch_thread = threading.Thread(
+                    target=self._dispatch_loop, args=(pool, ready), daemon=True
+                )
+                self._dispatch_thread.start()
+            else:
+                self._pool = None
+                drain = self._drain
+
             def _loop():
-                self._emit_status("开始接收数据")
-                while self.running:
+                self._emit_status(f"开始接收数据: 端口 {ports}")
+                selector = selectors.DefaultSelector()
+                # 无法注册到 selector 的对象（没有 fileno）退化为逐个轮询
+                polled = []
+                for sock in socks:
+                    try:
+                        selector.register(sock, selectors.EVENT_READ)
+                    except (ValueError, TypeError, OSError):
+                        polled.append(sock)
+                registered = len(polled) < len(socks)
+                try:
+                    while self.running:
+                        try:
+                            for sock in polled:
+                                drain(sock)
+                            if registered:
+                                timeout = 0 if polled else _SELECT_TIMEOUT
+                                for key, _ in selector.select(timeout):
+                                    drain(key.fileobj)
+                        except Exception as e:
+                            if self.running:
+                                self._emit_error(f"接收异常: {e}")
+                finally:
                     try:
-                        data, addr = self.recv_sock.recvfrom(1024)
-                        if self.on_receive:
-                            self.on_receive(data, addr)
-                    except socket.timeout:
-                        continue
-                    except Exception as e:
-                        if self.running:
-                            self._emit_error(f"接收异常: {e}")
+                        selector.close()
+                    except Exception:
+                        pass
 
             self._receive_thread = threading.Thread(target=_loop, daemon=True)
             self._receive_thread.start()
 
+    def _drain(self, sock) -> None:
+        """读空一个就绪套接字（最多 _DRAIN_LIMIT 个数据报）。"""
+        recvfrom = sock.recvfrom
+        for _ in range(_DRAIN_LIMIT):
+            try:
+                data, addr = recvfrom(_RECV_BUFSIZE)
+            except (BlockingIOError, socket.timeout):
+                return
+            self._rx_datagrams += 1
+            self._rx_bytes += len(data)
+            capture = self._capture
+            if capture is not None:
+                capture.write(DIR_RX, addr, data)
+            if self.on_receive:
+                self.on_receive(data, addr)
+
+    def _drain_into(self, sock, pool: ReceiveBufferPool, ready) -> None:
+        """buffer 模式：把就绪套接字读入缓冲池槽位，交给分发线程。"""
+        recvfrom_into = sock.recvfrom_into
+        for _ in range(_DRAIN_LIMIT):
+            # 槽位全部在回调中时不再读取，数据留在内核缓冲区
+            slot = pool.acquire(timeout=_SELECT_TIMEOUT)
+            if slot is None:
+                return
+            try:
+                nbytes, addr = recvfrom_into(pool.view(slot))
+            except (BlockingIOError, socket.timeout):
+                pool.release(slot)
+                return
+            except Exception:
+                pool.release(slot)
+                raise
+            self._rx_datagrams += 1
+            self._rx_bytes += nbytes
+            ready.put((slot, nbytes, addr))
+
+    def _dispatch_loop(self, pool: ReceiveBufferPool, ready) -> None:
+        """buffer 模式的分发线程：回调 memoryview，返回后归还槽位。"""
+        while self.running:
+            try:
+                slot, nbytes, addr = ready.get(timeout=_SELECT_TIMEOUT)
+            except queue.Empty:
+                continue
+            try:
+                data = pool.view(slot)[:nbytes]
+                capture = self._capture
+                if capture is not None:
+                    capture.write(DIR_RX, addr, data)
+                if self.on_receive:
+                    self.on_receive(data, addr)
+            except Exception as e:
+                if self.running:
+                    self._emit_error(f"接收回调异常: {e}")
+            finally:
+                pool.release(slot)
+
+    def receive_stats(self) -> Dict[str, Any]:
+        """接收统计：数据报/字节数、缓冲池等待次数、SO_RCVBUF 与内核丢包数。"""
+        with self._lock:
+            socks = list(zip(self._rcvbuf, self.recv_socks))
+            pool = self._pool
+        table = read_udp_drops()
+        drops_by_port: Dict[int, int] = {}
+        for port, sock in socks:
+            entry = table.get(socket_inode(sock))
+            if entry is not None:
+                drops_by_port[port] = entry[1]
+        return {
+            "datagrams": self._rx_datagrams,
+            "bytes": self._rx_bytes,
+            "pool_waits": pool.waits if pool is not None else 0,
+            "rcvbuf": dict(self._rcvbuf),
+            "kernel_drops": sum(drops_by_port.values()),
+            "kernel_drops_by_port": drops_by_port,
+        }
+
     def send(self, data: bytes):
         try:
             with self._lock:
@@ -83,18 +262,133 @@ class CommunicationController:
                         self.config["target_receive_port"],
                     )
                     self.send_sock.sendto(data, target)
+                    capture = self._capture
+                    if capture is not None:
+                        capture.write(DIR_TX, target, data)
         except Exception as e:
             self._emit_error(f"发送错误: {e}")
 
+    # ------------------------------------------------------------------
+    # 多目标扇出
+    # ------------------------------------------------------------------
+    @property
+    def send_targets(self) -> List[SendTarget]:
+        return list(self.config.get("send_targets") or ())
+
+    def set_send_targets(self, targets) -> None:
+        """设置扇出目标；统计按目标名保留，新目标从 0 开始计数。"""
+        targets = list(targets or ())
+        with self._lock:
+            self.config["send_targets"] = targets
+            self._target_stats = {
+                t.name: self._target_stats.get(t.name, {"sent": 0, "errors": 0})
+                for t in targets
+            }
+        self._emit_status(f"扇出目标: {[t.name for t in targets]}")
+
+    def target_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(st) for name, st in self._target_stats.items()}
+
+    def send_fanout(self, frame: FanoutFrame) -> None:
+        """一次遍历把本周期的帧发给所有目标（公共帧 + 各自补丁）。"""
+        with self._lock:
+            if self.send_sock:
+                self._fanout(self.send_sock.sendto, frame)
+
+    def send_fanout_via(self, sock: socket.socket, frame: FanoutFrame) -> None:
+        """经指定套接字扇出（多个 ACU 共用本控制器、各用自己的发送端口）。"""
+        with self._lock:
+            self._fanout(sock.sendto, frame)
+
+    def _fanout(self, sendto, frame: FanoutFrame) -> None:
+        base = frame.base
+        scratch = self._fanout_scratch
+        if len(scratch) != len(base):
+            scratch = self._fanout_scratch = bytearray(len(base))
+        capture = self._capture
+        stats = self._target_stats
+        for target, patch in zip(frame.targets, frame.patches):
+            if patch:
+                scratch[:] = base
+                for offset, data in patch:
+                    scratch[offset : offset + len(data)] = data
+                data = scratch
+            else:
+                data = base
+            st = stats.get(target.name)
+            if st is None:
+                st = stats[target.name] = {"sent": 0, "errors": 0}
+            addr = target.addr
+            try:
+                sendto(data, addr)
+                st["sent"] += 1
+            except Exception as e:
+                st["errors"] += 1
+                self._emit_error(f"发送错误({target.name}): {e}")
+                continue
+            if capture is not None:
+                capture.write(DIR_TX, addr, data)
+
     def stop(self):
+        self.stop_replay()
         with self._lock:
             self._teardown(emit_status=True)
+        self.stop_capture()
+
+    # ------------------------------------------------------------------
+    # 抓包与回放
+    # ------------------------------------------------------------------
+    @property
+    def capturing(self) -> bool:
+        return self._capture is not None
+
+    def start_capture(self, path) -> bool:
+        """开始抓包，记录之后收发的所有数据报。"""
+        try:
+            writer = CaptureWriter(path)
+        except Exception as e:
+            self._emit_error(f"抓包启动失败: {e}")
+            return False
+        previous, self._capture = self._capture, writer
+        if previous is not None:
+            previous.close()
+        self._emit_status(f"开始抓包: {path}")
+        return True
+
+    def stop_capture(self) -> int:
+        """停止抓包，返回已记录的帧数。"""
+        writer, self._capture = self._capture, None
+        if writer is None:
+            return 0
+        writer.close()
+        self._emit_status(f"抓包已保存: {writer.path} ({writer.frames} 帧)")
+        return writer.frames
+
+    def start_replay(self, path, speed: float = 1.0) -> ReplayController:
+        """把抓包文件回放到 `on_receive`（绕过套接字）。speed<=0 表示全速。"""
+        self.stop_replay()
+        replay = ReplayController(path, speed=speed)
+        # 在调用时取 on_receive，允许回放过程中替换回调
+        replay.on_receive = lambda data, addr: (
+            self.on_receive(data, addr) if self.on_receive else None
+        )
+        replay.on_error = self._emit_error
+        replay.on_status = self._emit_status
+        self._replay = replay
+        return replay.start()
+
+    def stop_replay(self) -> None:
+        replay, self._replay = self._replay, None
+        if replay is not None:
+            replay.stop()
+            replay.wait(timeout=1.0)
 
     def _teardown(self, emit_status: bool):
         # Close sockets/threads safely; emit status optionally.
         # 注意：调用此函数时应已持有 self._lock
         had_resources = any(
-            [self.send_sock, self.recv_sock, self._receive_thread, self.running]
+            [self.send_sock, self.recv_socks, self._receive_thread, self.running]
         )
         self.running = False
         if self.send_sock:
@@ -103,22 +397,23 @@ class CommunicationController:
             except Exception:
                 pass
             self.send_sock = None
-        if self.recv_sock:
+        for sock in self.recv_socks:
             try:
-                self.recv_sock.close()
+                sock.close()
             except Exception:
                 pass
-            self.recv_sock = None
-        try:
-            if (
-                self._receive_thread is not None
-                and threading.current_thread() is not self._receive_thread
-            ):
-                self._receive_thread.join(timeout=1.0)
-        except Exception:
-            pass
-        finally:
-            self._receive_thread = None
+        self.recv_socks = []
+        self.recv_sock = None
+        self._rcvbuf = {}
+        for name in ("_receive_thread", "_dispatch_thread"):
+            thread = getattr(self, name)
+            try:
+                if thread is not None and threading.current_thread() is not thread:
+                    thread.join(timeout=1.0)
+            except Exception:
+                pass
+            finally:
+                setattr(self, name, None)
         if emit_status and had_resources:
             self._emit_status("通信已停止")
 
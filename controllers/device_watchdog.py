@@ -0,0 +1,97 @@
+"""设备在线看门狗：单个最小堆管理所有设备的超时截止时刻。
+
+收到报文时 `LinkMonitor` 已更新 `DeviceState.last_seen_timestamp`，看门狗
+在接收路径上只做一次集合判断（设备已在线则什么都不做），因此每帧 O(1)。
+堆里每台在线设备只有一个条目；`poll` 弹出到期条目时按最新的
+last_seen 重新计算截止时刻，设备仍在发送则重新入堆，否则判定离线。
+超时由实测到达间隔推算（multiplier 倍，限制在 [min_timeout, max_timeout]），
+尚无间隔估计时使用 default_timeout。
+
+`poll` 由界面线程的一个现有定时器驱动，返回状态变化列表，
+成百上千台设备也只需一个定时器。
+"""
+
+import heapq
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from model.device import Device
+
+
+class DeviceWatchdog:
+    """根据最近接收时刻判定设备在线/离线。"""
+
+    def __init__(
+        self,
+        devices: Dict[str, Device],
+        multiplier: float = 5.0,
+        min_timeout: float = 0.5,
+        max_timeout: float = 30.0,
+        default_timeout: float = 3.0,
+    ):
+        self.devices = devices
+        self.multiplier = float(multiplier)
+        self.min_timeout = float(min_timeout)
+        self.max_timeout = float(max_timeout)
+        self.default_timeout = float(default_timeout)
+        self.online: Set[str] = set()
+        self._heap: List[Tuple[float, str]] = []
+        self._arrived: Set[str] = set()
+        self._arrived_lock = threading.Lock()
+
+    def timeout_for(self, device: Device) -> float:
+        interval_ms = device.state.link.interval_ms
+        if interval_ms <= 0:
+            return self.default_timeout
+        timeout = interval_ms * self.multiplier / 1000.0
+        return min(max(timeout, self.min_timeout), self.max_timeout)
+
+    def seen(self, name: str) -> None:
+        """接收线程：设备来帧。已在线时为一次集合查找。"""
+        if name in self.online:
+            return
+        with self._arrived_lock:
+            self._arrived.add(name)
+
+    def poll(self, now: Optional[float] = None) -> List[Tuple[str, bool]]:
+        """界面线程：处理新上线与到期设备，返回 [(设备, 是否在线)]。"""
+        now = time.time() if now is None else now
+        events: List[Tuple[str, bool]] = []
+        with self._arrived_lock:
+            arrived, self._arrived = self._arrived, set()
+        heap = self._heap
+        for name in sorted(arrived):
+            device = self.devices.get(name)
+            if name in self.online or device is None:
+                continue
+            last = device.state.last_seen_timestamp
+            if last is None:
+                continue
+            self.online.add(name)
+            heapq.heappush(heap, (last + self.timeout_for(device), name))
+            events.append((name, True))
+        while heap and heap[0][0] <= now:
+            _, name = heapq.heappop(heap)
+            device = self.devices.get(name)
+            last = None if device is None else device.state.last_seen_timestamp
+            if last is not None:
+                deadline = last + self.timeout_for(device)
+                if deadline > now:
+                    heapq.heappush(heap, (deadline, name))
+                    continue
+            self.online.discard(name)
+            events.append((name, False))
+        return events
+
+    def next_deadline(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def reset(self) -> List[Tuple[str, bool]]:
+        """清空状态，返回此前在线设备的离线事件。"""
+        with self._arrived_lock:
+            self._arrived = set()
+        events = [(name, False) for name in sorted(self.online)]
+        self._heap = []
+        self.online.clear()
+        return events
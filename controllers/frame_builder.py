@@ -1,8 +1,12 @@
 import time
+from typing import Iterable
+
 from model.control_state import ControlState
 from model.device import Device
+from model.send_target import FanoutFrame, SendTarget
 from model.protocols.inv_protocol import InvLikeProtocol
 from protocols.template_runtime.loader import load_template_protocol
+from protocols.template_runtime.registry import default_registry
 from protocols.template_runtime.schema import TemplateConfigError
 
 
@@ -12,16 +16,57 @@ class FrameBuilder:
     def __init__(self, control_state: ControlState, acu_device: Device):
         self.control_state = control_state
         self.acu_device = acu_device
+        # 按 ControlState.version 缓存生命信号为 0 的帧；版本不变时只改写
+        # 生命信号与时间戳，不再重新快照和编码全部控制字段
+        self._cached_version = None
+        self._cached_protocol = None
+        self._cached_frame = b""
         # 当前实现中默认走模板协议，若模板不可用则回退到旧实现
         try:
             self.protocol = load_template_protocol("INV")
         except (FileNotFoundError, TemplateConfigError):
             self.protocol = InvLikeProtocol("INV")
+        else:
+            default_registry().subscribe(self._on_template_reloaded)
+
+    def _on_template_reloaded(self, loader, old=None) -> None:
+        # 缓存帧按协议对象区分，替换后下一帧自动按新模板重新编码；
+        # 外部替换过的协议保持不变
+        if old is None or self.protocol is old.protocol_for_category("INV"):
+            self.protocol = loader.protocol_for_category("INV")
 
     def build(self) -> bytearray:
-        snapshot = self.control_state.snapshot()
         life = self.acu_device.update_life()
-        buf = self.protocol.build_send_frame(snapshot, life)
+        proto = self.protocol
+        versioned = getattr(self.control_state, "snapshot_with_version", None)
+        write_life = getattr(proto, "write_life_signal", None)
+        if versioned is None or write_life is None:
+            snapshot = self.control_state.snapshot()
+            buf = proto.build_send_frame(snapshot, life)
+        else:
+            version, snapshot = versioned()
+            if version != self._cached_version or proto is not self._cached_protocol:
+                self._cached_frame = bytes(proto.build_send_frame(snapshot, 0))
+                self._cached_version = version
+                self._cached_protocol = proto
+            buf = bytearray(self._cached_frame)
+            write_life(buf, life)
+        self._write_timestamp(buf)
+        return buf
+
+    def stamp(self, buf: bytearray) -> bytearray:
+        """给预先编码好的帧写入下一个生命信号与当前时间戳（场景回放用）。"""
+        life = self.acu_device.update_life()
+        write_life = getattr(self.protocol, "write_life_signal", None)
+        if write_life is not None:
+            write_life(buf, life)
+        else:
+            buf[0:2] = (life & 0xFFFF).to_bytes(2, "big")
+        self._write_timestamp(buf)
+        return buf
+
+    @staticmethod
+    def _write_timestamp(buf: bytearray) -> None:
         # 时间戳补充（兼容旧结构）字节2-7 年月日时分秒
         now = time.localtime()
         buf[2] = now.tm_year % 100
@@ -30,4 +75,22 @@ class FrameBuilder:
         buf[5] = now.tm_hour
         buf[6] = now.tm_min
         buf[7] = now.tm_sec
-        return buf
+
+    def build_fanout(self, targets: Iterable[SendTarget]) -> FanoutFrame:
+        """构建一个周期的扇出帧：公共帧只构建一次，各目标只保留差异字节。"""
+        return self.fanout_from(bytes(self.build()), targets)
+
+    @staticmethod
+    def fanout_from(base: bytes, targets: Iterable[SendTarget]) -> FanoutFrame:
+        """以已构建好的公共帧生成扇出帧（场景回放等预编码帧复用）。"""
+        targets = list(targets)
+        patches = []
+        for target in targets:
+            patch = []
+            for offset, data in sorted(target.overrides.items()):
+                data = bytes(data)
+                end = offset + len(data)
+                if 0 <= offset and end <= len(base) and base[offset:end] != data:
+                    patch.append((offset, data))
+            patches.append(tuple(patch))
+        return FanoutFrame(base, targets, patches)
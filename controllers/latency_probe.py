@@ -0,0 +1,247 @@
+"""闭环时延探针：发送帧中的命令位变化 -> 接收帧中对应状态反馈翻转。
+
+规则描述一对 (命令位, 反馈字段)。发送侧每发一帧调用 `on_send`，检测到命令
+位变化时为每台关注的设备记下一个待确认的时刻；接收侧解析后调用
+`on_receive`，反馈字段到达期望值（命令值，或 invert 时取反）即记录一次时延。
+
+时间戳由调用方提供，两侧须使用同一时钟；统计按 (规则, 设备) 给出直方图与
+分位数。所有方法线程安全，可分别在发送线程与接收线程中调用。
+"""
+
+import bisect
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+# 直方图桶上界（毫秒），最后一个桶收纳其余所有样本
+HISTOGRAM_EDGES_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+@dataclass(frozen=True)
+class ProbeRule:
+    """一条探测规则。
+
+    feedback 为解析结果中的字段标签，可写作 "分组/标签"；只写标签时在
+    各分组中查找。devices 为空表示收到该字段的所有设备。
+    """
+
+    name: str
+    byte: int
+    bit: int
+    feedback: str
+    devices: Tuple[str, ...] = ()
+    invert: bool = False
+
+    def command(self, frame) -> Optional[bool]:
+        if self.byte >= len(frame):
+            return None
+        return bool((frame[self.byte] >> self.bit) & 1)
+
+    def feedback_value(self, parsed: Mapping[str, Any]) -> Optional[bool]:
+        group, _, label = self.feedback.rpartition("/")
+        if group:
+            section = parsed.get(group)
+            if isinstance(section, Mapping) and label in section:
+                return bool(section[label])
+            return None
+        if label in parsed and not isinstance(parsed[label], Mapping):
+            return bool(parsed[label])
+        for section in parsed.values():
+            if isinstance(section, Mapping) and label in section:
+                return bool(section[label])
+        return None
+
+
+# 默认规则：停止工作（字节 8 位 1）置位后，工作中状态反馈应变为 0
+DEFAULT_RULES = (ProbeRule("停止工作", 8, 1, "状态信息/工作中状态反馈", invert=True),)
+
+
+class _Series:
+    __slots__ = ("samples", "buckets", "timeouts", "superseded")
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self.buckets = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        self.timeouts = 0
+        self.superseded = 0
+
+    def add(self, latency_ms: float, keep: int) -> None:
+        self.buckets[bisect.bisect_left(HISTOGRAM_EDGES_MS, latency_ms)] += 1
+        self.samples.append(latency_ms)
+        if len(self.samples) > keep:
+            del self.samples[: len(self.samples) - keep]
+
+
+class LatencyProbe:
+    """关联发送帧命令变化与接收帧反馈变化，统计每台设备的命令-反馈时延。"""
+
+    def __init__(
+        self,
+        rules: Sequence[ProbeRule] = DEFAULT_RULES,
+        timeout_s: float = 5.0,
+        keep: int = 10000,
+    ):
+        self.rules = tuple(rules)
+        self.timeout_s = float(timeout_s)
+        self.keep = int(keep)
+        self._lock = threading.Lock()
+        self._last_command: Dict[str, Optional[bool]] = {}
+        # (规则名, 设备) -> (命令变化时刻, 期望反馈值)
+        self._pending: Dict[Tuple[str, str], Tuple[float, bool]] = {}
+        # 规则名 -> 命令变化时刻与期望值，尚未收到过反馈的设备从这里开始等待
+        self._changes: Dict[str, Tuple[float, bool]] = {}
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._seen: Dict[str, set] = {}
+        # 收到过帧但帧中没有任何规则反馈字段的设备
+        self._absent: set = set()
+
+    # ------------------------------------------------------------------
+    # 输入
+    # ------------------------------------------------------------------
+    def on_send(self, frame, ts: Optional[float] = None) -> None:
+        """发送侧：每发出一帧调用一次。"""
+        with self._lock:
+            for rule in self.rules:
+                value = rule.command(frame)
+                last = self._last_command.get(rule.name)
+                self._last_command[rule.name] = value
+                if value is None or last is None or value == last:
+                    continue
+                when = time.perf_counter() if ts is None else ts
+                expected = value != rule.invert
+                self._changes[rule.name] = (when, expected)
+                for device in self._seen.get(rule.name, ()):
+                    key = (rule.name, device)
+                    if key in self._pending:
+                        self._series_for(key).superseded += 1
+                    self._pending[key] = (when, expected)
+
+    def on_receive(
+        self, device: str, parsed: Mapping[str, Any], ts: Optional[float] = None
+    ) -> None:
+        """接收侧：设备帧解析后调用；ts 应取报文到达时刻。"""
+        if not isinstance(parsed, Mapping):
+            return
+        when = time.perf_counter() if ts is None else ts
+        with self._lock:
+            found = False
+            for rule in self.rules:
+                if rule.devices and device not in rule.devices:
+                    continue
+                value = rule.feedback_value(parsed)
+                if value is None:
+                    continue
+                found = True
+                seen = self._seen.setdefault(rule.name, set())
+                key = (rule.name, device)
+                if device not in seen:
+                    seen.add(device)
+                    self._series_for(key)
+                    change = self._changes.get(rule.name)
+                    # 设备在命令变化后才首次出现：同样计入本次变化
+                    if change is not None and change[0] <= when:
+                        self._pending[key] = change
+                pending = self._pending.get(key)
+                if pending is None:
+                    continue
+                start, expected = pending
+                if when - start > self.timeout_s:
+                    del self._pending[key]
+                    self._series_for(key).timeouts += 1
+                elif value == expected:
+                    del self._pending[key]
+                    self._series_for(key).add((when - start) * 1000.0, self.keep)
+            if found:
+                self._absent.discard(device)
+            else:
+                self._absent.add(device)
+
+    def watching(self, device: str) -> bool:
+        """该设备的下一帧是否需要交给 `on_receive`。
+
+        只有首次出现或有待确认变化的设备需要；列式接收据此跳过其余帧的
+        字典还原。
+        """
+        with self._lock:
+            for rule in self.rules:
+                if rule.devices and device not in rule.devices:
+                    continue
+                if (rule.name, device) in self._pending:
+                    return True
+                if device not in self._absent and device not in self._seen.get(
+                    rule.name, ()
+                ):
+                    return True
+        return False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._changes.clear()
+            self._series.clear()
+            self._seen.clear()
+            self._absent.clear()
+
+    def _series_for(self, key: Tuple[str, str]) -> _Series:
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series()
+        return series
+
+    # ------------------------------------------------------------------
+    # 输出
+    # ------------------------------------------------------------------
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """{规则名: {设备: 统计}}；时延单位毫秒，histogram 与
+        `HISTOGRAM_EDGES_MS` 对应（多出的最后一项为超出上界的样本数）。"""
+        with self._lock:
+            items = [
+                (key, sorted(s.samples), list(s.buckets), s.timeouts, s.superseded)
+                for key, s in self._series.items()
+            ]
+            pending = set(self._pending)
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (rule, device), samples, buckets, timeouts, superseded in items:
+            n = len(samples)
+
+            def pct(q: float) -> float:
+                return samples[min(n - 1, int(n * q))] if n else 0.0
+
+            result.setdefault(rule, {})[device] = {
+                "count": n,
+                "min_ms": samples[0] if n else 0.0,
+                "mean_ms": sum(samples) / n if n else 0.0,
+                "p50_ms": pct(0.50),
+                "p95_ms": pct(0.95),
+                "p99_ms": pct(0.99),
+                "max_ms": samples[-1] if n else 0.0,
+                "timeouts": timeouts,
+                "superseded": superseded,
+                "pending": (rule, device) in pending,
+                "histogram": buckets,
+            }
+        return result
+
+    def format_report(self) -> str:
+        """文本报告（每设备一行分位数 + 直方图）。"""
+        lines = []
+        labels = [f"<={e:g}" for e in HISTOGRAM_EDGES_MS] + [
+            f">{HISTOGRAM_EDGES_MS[-1]:g}"
+        ]
+        for rule, devices in sorted(self.stats().items()):
+            lines.append(f"[{rule}]")
+            for device, st in sorted(devices.items()):
+                lines.append(
+                    f"  {device:>6}: n={st['count']} min {st['min_ms']:.3f} "
+                    f"p50 {st['p50_ms']:.3f} p99 {st['p99_ms']:.3f} "
+                    f"max {st['max_ms']:.3f} ms timeouts {st['timeouts']}"
+                )
+                bars = [
+                    f"{label}:{count}"
+                    for label, count in zip(labels, st["histogram"])
+                    if count
+                ]
+                if bars:
+                    lines.append("          " + " ".join(bars))
+        return "\n".join(lines)
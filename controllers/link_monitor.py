@@ -0,0 +1,141 @@
+"""链路监视：按生命信号连续性统计各设备的丢帧、重复与到达抖动。
+
+模板协议的接收帧在字节 0-1 携带 16 位生命信号（`设备信息/生命信号`，大端），
+设备每发一帧加一并在 65535 后回绕。监视器直接从原始报文读取该字段，
+不依赖解析结果，每帧 O(1) 更新对应设备的 `DeviceState`：
+
+* 差值 1 为正常；0 为重复帧；2..max_gap 之间计入丢帧（差值 - 1）；
+* 回绕意义上的负差值（>= 0x8000）视为乱序/迟到帧，不推进计数；
+  若它补上了此前已计入丢帧的缺口，则从 lost 中扣回（最多扣到 0）；
+* 超过 max_gap 的跳变视为设备重启，只重新同步，不计丢帧。
+
+监视器在接收回调中运行，与 UI 线程无关：界面卡顿只会让显示滞后，
+不会表现为丢帧；生命信号缺口才说明报文在网络或设备侧丢失。
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from model.device import Device, DeviceConfig, DeviceState
+
+# 到达间隔与抖动的指数平均系数
+_EWMA = 1.0 / 16
+
+
+class LinkMonitor:
+    """各设备的生命信号连续性与到达间隔统计。"""
+
+    def __init__(
+        self,
+        life_offset: int = 0,
+        max_gap: int = 1024,
+        devices: Optional[Dict[str, Device]] = None,
+    ):
+        self.life_offset = int(life_offset)
+        self.max_gap = int(max_gap)
+        # 缺口位图只记录最近 max_gap 个生命信号
+        self._missing_mask = (1 << (self.max_gap + 1)) - 1
+        # 可与 ParseController.devices 共享，路由记录直接指向同一 DeviceState
+        self.devices: Dict[str, Device] = {} if devices is None else devices
+        self._lock = threading.Lock()
+
+    def device(self, name: str, port: Optional[int] = None) -> Device:
+        dev = self.devices.get(name)
+        if dev is None:
+            dev = self.devices[name] = Device(
+                DeviceConfig(name=name, ip="", send_port=port or 0, receive_port=port)
+            )
+        return dev
+
+    def on_frame(
+        self, name: str, frame, ts: Optional[float] = None, port: Optional[int] = None
+    ) -> Optional[Device]:
+        """登记一帧；报文过短（无生命信号）时返回 None。"""
+        if len(frame) < self.life_offset + 2:
+            return None
+        with self._lock:
+            dev = self.device(name, port)
+        return self.on_device_frame(dev, frame, ts)
+
+    def on_device_frame(
+        self, dev: Device, frame, ts: Optional[float] = None
+    ) -> Optional[Device]:
+        """同 `on_frame`，设备已由路由解析出来时省去按名查找。"""
+        o = self.life_offset
+        if len(frame) < o + 2:
+            return None
+        life = (frame[o] << 8) | frame[o + 1]
+        now = time.time() if ts is None else ts
+        with self._lock:
+            state = dev.state
+            link = state.link
+            last_ts = state.last_seen_timestamp
+            if link.frames == 0 or last_ts is None:
+                link.frames = 1
+                state.life_signal = life
+                state.last_seen_timestamp = now
+                return dev
+            delta = (life - state.life_signal) & 0xFFFF
+            if delta == 0:
+                link.duplicates += 1
+            elif delta >= 0x8000:
+                link.reordered += 1
+                behind = 0x10000 - delta
+                bit = 1 << behind if behind <= self.max_gap else 0
+                if link.missing & bit:
+                    link.missing ^= bit
+                    if link.lost > 0:
+                        link.lost -= 1
+            else:
+                if delta > self.max_gap:
+                    link.resets += 1
+                    link.missing = 0
+                elif delta > 1:
+                    link.lost += delta - 1
+                    # 新缺口为第 1..delta-1 位
+                    link.missing = (
+                        (link.missing << delta) | ((1 << delta) - 2)
+                    ) & self._missing_mask
+                elif link.missing:
+                    link.missing = (link.missing << 1) & self._missing_mask
+                state.life_signal = life
+            link.frames += 1
+            dt = (now - last_ts) * 1000.0
+            if link.interval_ms <= 0:
+                link.interval_ms = dt
+            else:
+                link.jitter_ms += (abs(dt - link.interval_ms) - link.jitter_ms) * _EWMA
+                link.interval_ms += (dt - link.interval_ms) * _EWMA
+            state.last_seen_timestamp = now
+            return dev
+
+    def reset(self) -> None:
+        """清零所有设备的链路状态（设备记录保留，路由仍指向它们）。"""
+        with self._lock:
+            for dev in self.devices.values():
+                dev.state = DeviceState()
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """供界面展示的统计副本；age_s 为距最近一帧的秒数。"""
+        now = time.time() if now is None else now
+        with self._lock:
+            result = {}
+            for name, dev in self.devices.items():
+                link = dev.state.link
+                last = dev.state.last_seen_timestamp
+                if last is None:
+                    continue
+                result[name] = {
+                    "frames": link.frames,
+                    "lost": link.lost,
+                    "duplicates": link.duplicates,
+                    "reordered": link.reordered,
+                    "resets": link.resets,
+                    "loss_ratio": link.loss_ratio,
+                    "rate_hz": link.rate_hz,
+                    "jitter_ms": link.jitter_ms,
+                    "life_signal": dev.state.life_signal,
+                    "age_s": now - last,
+                }
+            return result
@@ -1,22 +1,76 @@
-from typing import Dict, Any
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from model.device import Device, DeviceConfig
 from model.protocols.inv_protocol import InvLikeProtocol
 from model.protocols.dummy_protocol import DummyProtocol
-from protocols.template_runtime.loader import load_template_protocol
+from protocols.template_runtime.library import (
+    LazyProtocol,
+    TemplateLibrary,
+    default_library,
+)
 from protocols.template_runtime.schema import TemplateConfigError
 
+# 自动发现按帧长匹配类别；多个类别帧长相同时按此顺序暂取第一个并标记为
+# 待定（Route.candidates），其余模板类别随后按模板库索引顺序匹配
+DISCOVERY_ORDER = ("INV", "CHU", "BCC", "DUMMY")
+# 内置模板提供的类别；模板缺失或无效时回退到 InvLikeProtocol
+TEMPLATE_CATEGORIES = ("INV", "CHU", "BCC")
+# 代码实现的协议族（示例），模板库未提供同名类别时注册
+BUILTIN_PROTOCOLS = {"DUMMY": DummyProtocol}
+# 路由表上限：超过后未知来源不再登记，避免被随机源地址撑爆
+MAX_ROUTES = 4096
+# 无法识别的来源在此时间（秒）内不再重复匹配，之后重新尝试自动发现
+NEGATIVE_TTL_S = 5.0
+
+
+@dataclass(eq=False)
+class Route:
+    """一个来源地址解析后的预绑定记录：设备、协议与设备状态。"""
+
+    device_id: str
+    category: str
+    protocol: Any
+    device: Optional[Device]
+    discovered: bool = False
+    # 帧长匹配到多个类别时的全部候选；非空表示类别待定
+    candidates: Tuple[str, ...] = ()
+
+    @property
+    def state(self):
+        return None if self.device is None else self.device.state
+
 
 class ParseController:
-    """解析控制器：集中管理协议实例与解析。后续可注册多协议。"""
+    """解析控制器：集中管理协议实例与解析。后续可注册多协议。
 
-    def __init__(self):
-        self._protocols = {}
-        for cat in ("INV", "CHU", "BCC"):
-            try:
-                self._protocols[cat] = load_template_protocol(cat)
-            except (FileNotFoundError, TemplateConfigError):
+    接收路径通过 `route(addr, data)` 按 (ip, port) 一次字典查找得到
+    `Route`；未登记的来源按帧长匹配模板类别自动登记，之后同样 O(1)。
+
+    INV/CHU/BCC 帧长相同，仅凭帧长发现的路由类别待定：收到第一段连续的
+    生命信号（相邻两帧加一，说明确是周期设备）时，按同一 IP 上已确定的
+    路由类别复核一次；之后端口表登记该端口时自动发现的路由让位给端口表。
+    无法识别的来源只在 `negative_ttl_s` 内被忽略，不占路由表容量。
+
+    模板类别来自模板库（`protocols/templates/` 下全部模板）的索引，初始只是
+    `LazyProtocol` 占位；某类别第一帧到达时才加载、编译其模板族并重绑路由，
+    启动开销不随模板数量增长。
+    """
+
+    def __init__(self, library: Optional[TemplateLibrary] = None):
+        self._library = library if library is not None else default_library()
+        self._load_lock = threading.RLock()
+        self._subscribed: List[Any] = []
+        self._protocols = {
+            cat: self._placeholder(cat) for cat in self._library.categories()
+        }
+        for cat in TEMPLATE_CATEGORIES:
+            if cat not in self._protocols:
                 self._protocols[cat] = InvLikeProtocol(cat)
-        # 示例协议注册
-        self._protocols["DUMMY"] = DummyProtocol()
+        for cat, factory in BUILTIN_PROTOCOLS.items():
+            self._protocols.setdefault(cat, factory())
         # 端口映射（与旧实现保持一致）
         self._port_map = {
             49153: "INV1",
@@ -32,21 +86,274 @@ class ParseController:
             # 示例设备端口 -> DUMMY
             49999: "DUMMY1",
         }
+        self.auto_discover = True
+        self.negative_ttl_s = NEGATIVE_TTL_S
+        self.devices: Dict[str, Device] = {}
+        self._categories: Dict[str, str] = {}
+        # (ip, port) -> Route；端口表作为任意 IP 的回退
+        self._routes: Dict[Tuple[str, int], Route] = {}
+        self._port_routes: Dict[int, Route] = {}
+        self._unknown = Route("UNKNOWN", "UNKNOWN", None, None)
+        # 负缓存：(ip, port) -> 过期时刻（time.monotonic）
+        self._rejected: Dict[Tuple[str, int], float] = {}
+        # 类别待定路由的上一帧生命信号
+        self._pending_life: Dict[Tuple[str, int], int] = {}
+        for port, device_id in self._port_map.items():
+            self._port_routes[port] = self._make_route(device_id, port=port)
+
+    # ------------------------------------------------------------------
+    # 模板族按需加载
+    # ------------------------------------------------------------------
+    def _placeholder(self, category: str) -> LazyProtocol:
+        return LazyProtocol(
+            category, self._library.frame_length(category), self._load_protocol
+        )
+
+    def _load_protocol(self, category: str):
+        """占位协议首次被使用时加载其模板族，替换占位并重绑路由。"""
+        with self._load_lock:
+            current = self._protocols.get(category)
+            if current is not None and not isinstance(current, LazyProtocol):
+                return current
+            registry = None
+            try:
+                registry = self._library.registry_for(category)
+                proto = registry.protocol_for_category(category)
+            except (FileNotFoundError, TemplateConfigError):
+                if category not in TEMPLATE_CATEGORIES:
+                    raise
+                proto = InvLikeProtocol(category)
+            if registry is not None and not any(
+                registry is r for r in self._subscribed
+            ):
+                # 模板热加载后替换协议（弱引用订阅，不延长本对象生命周期）
+                registry.subscribe(self._on_template_reloaded)
+                self._subscribed.append(registry)
+            if current is not None:
+                self.set_protocols({category: proto})
+            return proto
 
+    def protocol_for(self, category: str):
+        """类别当前的协议；尚未加载的模板族在此加载。"""
+        proto = self._protocols.get(category)
+        if isinstance(proto, LazyProtocol):
+            proto = self._load_protocol(category)
+        return proto
+
+    # ------------------------------------------------------------------
+    # 协议替换
+    # ------------------------------------------------------------------
+    def _on_template_reloaded(self, loader, old=None) -> None:
+        # 只替换仍在使用旧模板的类别，外部注入的协议和未加载的占位保持不变
+        old_categories = () if old is None else old.spec().categories
+        self.set_protocols(
+            {
+                cat: loader.protocol_for_category(cat)
+                for cat in loader.spec().categories
+                if old is None
+                or (
+                    cat in old_categories
+                    and self._protocols.get(cat) is old.protocol_for_category(cat)
+                )
+            }
+        )
+
+    def set_protocols(self, protocols: Dict[str, Any]) -> None:
+        """替换若干类别的协议并重绑已有路由。
+
+        每个路由的 protocol 是一次属性赋值；正在解析的帧沿用它开始时取到的
+        协议对象，不会出现新旧模板混用。帧长可能变化，自动发现的负缓存清空。
+        """
+        self._protocols = {**self._protocols, **protocols}
+        routes = list(self._port_routes.values()) + list(self._routes.values())
+        for route in routes:
+            if route.category in protocols:
+                route.protocol = protocols[route.category]
+        self._rejected.clear()
+
+    # ------------------------------------------------------------------
+    # 设备名 / 类别
+    # ------------------------------------------------------------------
     def device_type_from_port(self, port: int) -> str:
-        return self._port_map.get(port, "UNKNOWN")
+        route = self._port_routes.get(port)
+        return "UNKNOWN" if route is None else route.device_id
 
     def category_from_device(self, device_type: str) -> str:
-        if device_type.startswith("INV"):
-            return "INV"
-        if device_type.startswith("CHU"):
-            return "CHU"
-        if device_type.startswith("BCC"):
-            return "BCC"
-        if device_type.startswith("DUMMY"):
-            return "DUMMY"
+        category = self._categories.get(device_type)
+        if category is None:
+            category = self._category_by_prefix(device_type)
+            if len(self._categories) < MAX_ROUTES:
+                self._categories[device_type] = category
+        return category
+
+    def _category_by_prefix(self, device_type: str) -> str:
+        # 最长类别名优先，避免短类别名吞掉以它开头的长类别名
+        for category in sorted(self._protocols, key=len, reverse=True):
+            if device_type.startswith(category):
+                return category
         return "UNKNOWN"
 
+    # ------------------------------------------------------------------
+    # 路由
+    # ------------------------------------------------------------------
+    def _make_route(
+        self,
+        device_id: str,
+        category: Optional[str] = None,
+        ip: str = "",
+        port: int = 0,
+        discovered: bool = False,
+    ) -> Route:
+        category = category or self.category_from_device(device_id)
+        self._categories[device_id] = category
+        device = self.devices.get(device_id)
+        if device is None:
+            device = self.devices[device_id] = Device(
+                DeviceConfig(
+                    name=device_id,
+                    ip=ip,
+                    send_port=port,
+                    receive_port=port,
+                    category=category,
+                )
+            )
+        return Route(
+            device_id, category, self._protocols.get(category), device, discovered
+        )
+
+    def register(
+        self, ip: str, port: int, device_id: str, category: Optional[str] = None
+    ) -> Route:
+        """显式登记一个来源地址；ip 为空串时作为该端口的任意 IP 回退。"""
+        route = self._make_route(device_id, category, ip, port)
+        if ip:
+            self._routes[(ip, port)] = route
+            self._forget(ip, port)
+        else:
+            self._port_routes[port] = route
+            self._port_map[port] = device_id
+            # 端口表优先于此前按帧长自动发现的同端口路由
+            for addr, known in list(self._routes.items()):
+                if addr[1] == port and known.discovered:
+                    self._routes.pop(addr, None)
+                    self._forget(*addr)
+        return route
+
+    def _forget(self, ip: str, port: int) -> None:
+        self._rejected.pop((ip, port), None)
+        self._pending_life.pop((ip, port), None)
+
+    def routes(self) -> List[Tuple[Tuple[str, int], Route]]:
+        items = [(("", port), r) for port, r in self._port_routes.items()]
+        items.extend(self._routes.items())
+        return items
+
+    def route(self, addr, data=None) -> Route:
+        """按来源地址解析路由；未知来源在给出报文时按帧长自动登记。"""
+        route = self._routes.get(addr)
+        if route is not None:
+            if route.candidates and data is not None:
+                return self._recheck(addr, route, data)
+            return route
+        try:
+            ip, port = addr[0], int(addr[1])
+        except (TypeError, ValueError, IndexError):
+            return self._unknown
+        route = self._port_routes.get(port)
+        if route is not None:
+            return route
+        if data is None or not self.auto_discover:
+            return self._unknown
+        now = time.monotonic()
+        expires = self._rejected.get((ip, port))
+        if expires is not None:
+            if now < expires:
+                return self._unknown
+            del self._rejected[(ip, port)]
+        if len(self._routes) >= MAX_ROUTES:
+            return self._unknown
+        candidates = self._discover_categories(len(data))
+        if not candidates:
+            self._reject((ip, port), now)
+            return self._unknown
+        route = self._make_route(
+            f"{candidates[0]}@{ip}:{port}", candidates[0], ip, port, discovered=True
+        )
+        if len(candidates) > 1:
+            route.candidates = candidates
+            self._recheck((ip, port), route, data)
+        self._routes[(ip, port)] = route
+        return route
+
+    def _reject(self, addr: Tuple[str, int], now: float) -> None:
+        """负缓存：同一来源在 negative_ttl_s 内不再重复匹配。"""
+        rejected = self._rejected
+        if len(rejected) >= MAX_ROUTES:
+            for key in [k for k, t in rejected.items() if t <= now]:
+                del rejected[key]
+            if len(rejected) >= MAX_ROUTES:
+                return
+        rejected[addr] = now + self.negative_ttl_s
+
+    def _recheck(self, addr: Tuple[str, int], route: Route, data) -> Route:
+        """类别待定的路由：首段连续生命信号到达后按同 IP 的已定路由复核。"""
+        if len(data) < 2:
+            return route
+        life = (data[0] << 8) | data[1]
+        last = self._pending_life.get(addr)
+        self._pending_life[addr] = life
+        if last is None or (life - last) & 0xFFFF != 1:
+            return route
+        del self._pending_life[addr]
+        ip, port = addr
+        hints = {
+            known.category
+            for (known_ip, _port), known in self._routes.items()
+            if known_ip == ip and not known.candidates
+        }
+        hints.intersection_update(route.candidates)
+        route.candidates = ()
+        if len(hints) != 1:
+            return route
+        category = hints.pop()
+        if category == route.category:
+            return route
+        rebound = self._make_route(
+            f"{category}@{ip}:{port}", category, ip, port, discovered=True
+        )
+        self._routes[addr] = rebound
+        self.devices.pop(route.device_id, None)
+        return rebound
+
+    def _discover_categories(self, length: int) -> Tuple[str, ...]:
+        """帧长为 length 的全部类别，按匹配优先级排列。"""
+        found = [
+            category
+            for category in DISCOVERY_ORDER
+            if getattr(self._protocols.get(category), "frame_length_receive", None)
+            == length
+        ]
+        for category in self._library.categories_for_length(length):
+            if category in found:
+                continue
+            proto = self._protocols.get(category)
+            if proto is None:
+                # 运行中新增的模板：登记占位，首帧解析时加载
+                proto = self._placeholder(category)
+                self._protocols = {**self._protocols, category: proto}
+            if getattr(proto, "frame_length_receive", None) == length:
+                found.append(category)
+        return tuple(found)
+
+    # ------------------------------------------------------------------
+    # 解析
+    # ------------------------------------------------------------------
+    def parse_route(self, route: Route, data: bytes) -> Dict[str, Any]:
+        proto = route.protocol
+        if proto is None:
+            return {"错误": f"未知设备类型: {route.device_id}"}
+        return proto.parse_receive_frame(data)
+
     def parse(self, data: bytes, port: int) -> Dict[str, Any]:
         dev_type = self.device_type_from_port(port)
         cat = self.category_from_device(dev_type)
@@ -0,0 +1,450 @@
+"""多进程解析后端：原始帧经共享内存环送入解析进程，列式结果经第二个环送回。
+
+接收线程调用 `ProcessParseEngine.submit` 把报文写入某个工作进程的输入环
+（按路由序号分配，同一设备的帧始终由同一进程按序处理）；工作进程用模板
+解析器解析后，按该类别的 `ColumnSchema` 把结果写成定长 float64 列；
+界面进程的解析线程调用 `drain` 取回列并还原为与 `parse_receive_frame`
+相同的字典，或调用 `drain_blocks` 直接取回按类别分块的列（`ColumnBlock`），
+只为真正需要的帧（最新值、表格显示）还原字典。解析本身不再占用界面进程的
+GIL，吞吐随进程数（核数）扩展。
+
+工作进程以 spawn 方式启动，避免 fork 带 Qt 状态的进程。输入环为空时
+工作进程阻塞在各自的唤醒事件上，`submit` 只在环由空变为非空时置位，
+空闲的工作进程不占用 CPU。
+"""
+
+import multiprocessing as mp
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from controllers.parse_controller import ParseController, Route
+from controllers.shm_ring import ShmRing
+
+# 槽位头：时间戳、路由序号、报文长度、类别序号（输入/输出环相同）
+_HEAD = struct.Struct("<dIHH")
+_HEAD_SIZE = 16
+# 输出环满时的退避间隔（等待界面进程取走结果）
+_FULL_SLEEP = 0.0005
+# 空闲等待的上限：唤醒丢失（见 shm_ring 的内存序说明）时最多延迟这么久
+_IDLE_WAIT = 0.05
+
+
+class ColumnSchema:
+    """一个类别解析结果的列布局。
+
+    由零帧的解析结果推导：数值/布尔叶子各占一列，非数值常量（如 "备注"）
+    原样保留；列表叶子（模板协议的故障列表）按 `fault_bits` 每位一列。
+    """
+
+    def __init__(self, protocol, frame_length: Optional[int] = None):
+        length = int(frame_length or protocol.frame_length_receive)
+        sample = protocol.parse_receive_frame(bytes(length))
+        if "错误" in sample:
+            raise ValueError(f"零帧解析失败: {sample['错误']}")
+        get_bits = getattr(protocol, "fault_bits", None)
+        self.frame_length = length
+        self.fault_bits: List[Tuple[int, int, str]] = get_bits() if get_bits else []
+        self.columns: List[Tuple[str, str]] = []
+        # [(分段, None, 常量)] 或 [(分段, [(字段, 类型, 参数)])]
+        self.layout: List[Tuple[str, Any]] = []
+        for section, value in sample.items():
+            if not isinstance(value, dict):
+                if isinstance(value, (bool, int, float)):
+                    raise ValueError(f"顶层数值字段不支持列式: {section}")
+                self.layout.append((section, None, value))
+                continue
+            items = []
+            for label, leaf in value.items():
+                if isinstance(leaf, bool):
+                    items.append((label, "bool", len(self.columns)))
+                    self.columns.append((section, label))
+                elif isinstance(leaf, int):
+                    items.append((label, "int", len(self.columns)))
+                    self.columns.append((section, label))
+                elif isinstance(leaf, float):
+                    items.append((label, "float", len(self.columns)))
+                    self.columns.append((section, label))
+                elif isinstance(leaf, list):
+                    if not self.fault_bits:
+                        raise ValueError(f"列表字段缺少位定义: {section}/{label}")
+                    items.append((label, "faults", tuple(leaf)))
+                else:
+                    items.append((label, "const", leaf))
+            self.layout.append((section, items))
+        self.width = len(self.columns) + len(self.fault_bits)
+        self.struct = struct.Struct(f"<{self.width}d")
+
+    def encode(self, parsed: Dict[str, Any], data: bytes) -> List[float]:
+        values = [float(parsed[section][label]) for section, label in self.columns]
+        n = len(data)
+        values.extend(
+            float((data[byte] >> bit) & 1) if byte < n else 0.0
+            for byte, bit, _label in self.fault_bits
+        )
+        return values
+
+    def decode(self, values) -> Dict[str, Any]:
+        base = len(self.columns)
+        result: Dict[str, Any] = {}
+        for entry in self.layout:
+            section, items = entry[0], entry[1]
+            if items is None:
+                result[section] = entry[2]
+                continue
+            out: Dict[str, Any] = {}
+            for label, kind, arg in items:
+                if kind == "float":
+                    out[label] = values[arg]
+                elif kind == "bool":
+                    out[label] = values[arg] != 0.0
+                elif kind == "int":
+                    out[label] = int(values[arg])
+                elif kind == "faults":
+                    active = [
+                        bit[2]
+                        for bit, v in zip(self.fault_bits, values[base:])
+                        if v != 0.0
+                    ]
+                    out[label] = active or list(arg)
+                else:
+                    out[label] = arg
+            result[section] = out
+        return result
+
+
+class ColumnBlock:
+    """一个输出环中同一类别的一批解析结果，每行一帧，保持环中的顺序。
+
+    `route_ids`、`timestamps`、`lengths` 为每行一个元素的数组，`values`
+    为 (行数, schema.width) 的 float64 矩阵；字典只在调用 `parsed` /
+    `record` 时按行还原。
+    """
+
+    __slots__ = (
+        "schema",
+        "route_ids",
+        "timestamps",
+        "lengths",
+        "values",
+        "_routes",
+        "_addresses",
+    )
+
+    def __init__(self, schema, rows: np.ndarray, routes, addresses):
+        self.schema = schema
+        self.route_ids = rows["route"]
+        self.timestamps = rows["ts"]
+        self.lengths = rows["length"]
+        self.values = rows["values"][:, : schema.width]
+        self._routes = routes
+        self._addresses = addresses
+
+    def __len__(self) -> int:
+        return int(self.route_ids.shape[0])
+
+    def route(self, row: int) -> Route:
+        return self._routes[int(self.route_ids[row])]
+
+    def rows_by_route(self) -> List[Tuple[Route, np.ndarray]]:
+        """[(路由, 该路由的行号数组)]，行号按到达顺序。"""
+        ids = self.route_ids
+        return [
+            (self._routes[int(index)], np.flatnonzero(ids == index))
+            for index in np.unique(ids)
+        ]
+
+    def parsed(self, row: int) -> Dict[str, Any]:
+        return self.schema.decode(self.values[row].tolist())
+
+    def record(self, row: int) -> Tuple[Route, Dict[str, Any], float, str, int]:
+        """与 `ProcessParseEngine.drain` 相同的记录元组。"""
+        index = int(self.route_ids[row])
+        return (
+            self._routes[index],
+            self.parsed(row),
+            float(self.timestamps[row]),
+            self._addresses[index],
+            int(self.lengths[row]),
+        )
+
+
+def build_schemas(parser: ParseController) -> Dict[str, ColumnSchema]:
+    """为支持列式传输的类别构建布局；不支持的类别留在进程内解析。
+
+    工作进程需要预先知道每个类别的布局，因此这里会加载全部模板族。
+    """
+    schemas = {}
+    for category in list(parser._protocols):
+        try:
+            schemas[category] = ColumnSchema(parser.protocol_for(category))
+        except Exception:
+            continue
+    return schemas
+
+
+def _worker_main(
+    in_name: str,
+    out_name: str,
+    slots: int,
+    in_size: int,
+    out_size: int,
+    categories: List[str],
+    ready,
+    stop,
+    wake,
+) -> None:
+    parser = ParseController()
+    schemas = build_schemas(parser)
+    table = [(parser.protocol_for(c), schemas[c]) for c in categories]
+    rin = ShmRing(slots, in_size, in_name)
+    rout = ShmRing(slots, out_size, out_name)
+    ibuf, obuf = rin.buf, rout.buf
+    head = _HEAD
+    ready.set()
+    try:
+        while not stop.is_set():
+            if rin.available() == 0:
+                # 先清除再复查：复查之后提交的帧使环由空变为非空，会重新置位
+                wake.clear()
+                if rin.available() == 0:
+                    wake.wait(_IDLE_WAIT)
+                continue
+            while rin.available():
+                off = rin.peek()
+                ts, route, length, cat = head.unpack_from(ibuf, off)
+                start = off + _HEAD_SIZE
+                data = bytes(ibuf[start : start + length])
+                rin.release()
+                proto, schema = table[cat]
+                values = schema.encode(proto.parse_receive_frame(data), data)
+                out = rout.reserve()
+                while out is None:
+                    if stop.is_set():
+                        return
+                    time.sleep(_FULL_SLEEP)
+                    out = rout.reserve()
+                head.pack_into(obuf, out, ts, route, length, cat)
+                schema.struct.pack_into(obuf, out + _HEAD_SIZE, *values)
+                rout.commit()
+    finally:
+        ibuf = obuf = None
+        rin.close()
+        rout.close()
+
+
+class ProcessParseEngine:
+    """解析进程池：`submit` 由接收线程调用，`drain` 由单个消费线程调用。"""
+
+    def __init__(
+        self,
+        parse_controller: ParseController,
+        workers: int = 2,
+        slots: int = 4096,
+        max_frame: int = 256,
+    ):
+        self.parse_controller = parse_controller
+        self.workers = max(int(workers), 1)
+        self.slots = int(slots)
+        self.max_frame = int(max_frame)
+        self.schemas = build_schemas(parse_controller)
+        self.categories = sorted(self.schemas)
+        # 工作进程按启动时的模板解析；模板热加载后换了协议的路由回到进程内
+        self._protocols = {c: parse_controller.protocol_for(c) for c in self.categories}
+        self._cat_index = {c: i for i, c in enumerate(self.categories)}
+        self._in_size = _HEAD_SIZE + self.max_frame
+        width = max((s.width for s in self.schemas.values()), default=0)
+        self._out_size = _HEAD_SIZE + 8 * width
+        # 输出槽位的结构化视图，与 _HEAD 加 width 个 float64 一致
+        self._out_dtype = np.dtype(
+            [
+                ("ts", "<f8"),
+                ("route", "<u4"),
+                ("length", "<u2"),
+                ("cat", "<u2"),
+                ("values", "<f8", (width,)),
+            ]
+        )
+        self._routes: List[Route] = []
+        self._route_index: Dict[Route, int] = {}
+        self._addresses: List[str] = []
+        self._in: List[ShmRing] = []
+        self._out: List[ShmRing] = []
+        self._procs: list = []
+        self._ready: list = []
+        # 每个工作进程一个唤醒事件，与 _in 一一对应
+        self._wake: list = []
+        self._stop = None
+        self.submitted = 0
+        self.dropped = 0
+        self.drained = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._procs)
+
+    def start(self) -> "ProcessParseEngine":
+        if self._procs:
+            return self
+        ctx = mp.get_context("spawn")
+        self._stop = ctx.Event()
+        for _ in range(self.workers):
+            rin = ShmRing(self.slots, self._in_size)
+            rout = ShmRing(self.slots, self._out_size)
+            ready = ctx.Event()
+            wake = ctx.Event()
+            proc = ctx.Process(
+                target=_worker_main,
+                args=(
+                    rin.name,
+                    rout.name,
+                    self.slots,
+                    self._in_size,
+                    self._out_size,
+                    self.categories,
+                    ready,
+                    self._stop,
+                    wake,
+                ),
+                daemon=True,
+                name="ParseProcess",
+            )
+            proc.start()
+            self._in.append(rin)
+            self._out.append(rout)
+            self._ready.append(ready)
+            self._wake.append(wake)
+            self._procs.append(proc)
+        return self
+
+    def wait_ready(self, timeout: float = 30.0) -> bool:
+        deadline = time.monotonic() + timeout
+        for ready in self._ready:
+            if not ready.wait(max(deadline - time.monotonic(), 0)):
+                return False
+        return True
+
+    def stop(self, timeout: float = 2.0) -> None:
+        if self._stop is not None:
+            self._stop.set()
+        for wake in self._wake:
+            wake.set()
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(timeout)
+        for ring in self._in + self._out:
+            ring.close()
+        self._in, self._out, self._procs, self._ready = [], [], [], []
+        self._wake = []
+
+    # ------------------------------------------------------------------
+    # 生产者（接收线程）
+    # ------------------------------------------------------------------
+    def submit(self, route: Route, data, ts: float, address: str = "") -> bool:
+        """写入一帧；类别不支持、帧长不符或环满时返回 False，由调用方处理。"""
+        cat = self._cat_index.get(route.category)
+        if cat is None or not self._in:
+            return False
+        if route.protocol is not self._protocols[route.category]:
+            return False
+        length = len(data)
+        if length < self.schemas[route.category].frame_length or (
+            length > self.max_frame
+        ):
+            return False
+        index = self._route_index.get(route)
+        if index is None:
+            index = self._route_index[route] = len(self._routes)
+            self._routes.append(route)
+            self._addresses.append(address)
+        elif address:
+            self._addresses[index] = address
+        worker = index % len(self._in)
+        ring = self._in[worker]
+        off = ring.reserve()
+        if off is None:
+            self.dropped += 1
+            return False
+        _HEAD.pack_into(ring.buf, off, ts, index, length, cat)
+        start = off + _HEAD_SIZE
+        ring.buf[start : start + length] = data
+        ring.commit()
+        # 提交后只剩这一帧未读：工作进程可能已在等待，唤醒它
+        if ring.backlog() == 1:
+            self._wake[worker].set()
+        self.submitted += 1
+        return True
+
+    # ------------------------------------------------------------------
+    # 消费者
+    # ------------------------------------------------------------------
+    def drain(
+        self, limit: Optional[int] = None
+    ) -> List[Tuple[Route, Dict[str, Any], float, str, int]]:
+        """取回已解析的帧：[(路由, 解析结果, 时间戳, 地址, 报文长度)]。"""
+        records = []
+        categories = self.categories
+        schemas = self.schemas
+        for ring in self._out:
+            buf = ring.buf
+            n = ring.available()
+            if limit is not None:
+                n = min(n, limit - len(records))
+            for k in range(n):
+                off = ring.peek(k)
+                ts, index, length, cat = _HEAD.unpack_from(buf, off)
+                schema = schemas[categories[cat]]
+                values = schema.struct.unpack_from(buf, off + _HEAD_SIZE)
+                records.append(
+                    (
+                        self._routes[index],
+                        schema.decode(values),
+                        ts,
+                        self._addresses[index],
+                        length,
+                    )
+                )
+            if n:
+                ring.release(n)
+        self.drained += len(records)
+        return records
+
+    def drain_blocks(self) -> List[ColumnBlock]:
+        """取回各输出环中当前全部已解析的帧，按 (环, 类别) 分块、不还原字典。
+
+        同一路由的帧总在同一个环、同一个块中，块内保持到达顺序。
+        """
+        blocks: List[ColumnBlock] = []
+        total = 0
+        for ring in self._out:
+            n = ring.available()
+            if not n:
+                continue
+            rows = ring.read(self._out_dtype, n)
+            ring.release(n)
+            total += n
+            cats = rows["cat"]
+            present = np.unique(cats)
+            for cat in present:
+                part = rows if len(present) == 1 else rows[cats == cat]
+                schema = self.schemas[self.categories[int(cat)]]
+                blocks.append(ColumnBlock(schema, part, self._routes, self._addresses))
+        self.drained += total
+        return blocks
+
+    def pending(self) -> int:
+        return sum(ring.available() for ring in self._in) + sum(
+            ring.available() for ring in self._out
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": len(self._procs),
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "drained": self.drained,
+        }
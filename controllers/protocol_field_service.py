@@ -5,9 +5,10 @@ import json
 import struct
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 from protocols.template_runtime.loader import ProtocolTemplateLoader
+from protocols.template_runtime.registry import default_registry
 from protocols.template_runtime.schema import (
     FaultMapSpec,
     SendLayoutFieldSpec,
@@ -21,6 +22,9 @@ from protocols.template_runtime.schema import (
 from infra.app_paths import resource_path
 
 PREF_VERSION = 1
+# Name (and version) of the field index stored in the compiled template cache;
+# bump the suffix whenever the index layout or the dataclasses below change.
+FIELD_INDEX_ARTIFACT = "protocol_field_index/1"
 PREF_STORAGE_KEY = "protocol_field_selection"
 SEND_PREF_CATEGORY = "__send__"
 
@@ -117,6 +121,63 @@ class ReceiveFieldInfo:
     size: Optional[int] = None
 
 
+@dataclass(frozen=True)
+class ReceiveProjection:
+    """Receive fields of one category under a preference set.
+
+    ``hidden`` holds the (section, label) pairs the preferences deselect.
+    Anything the template does not describe (errors, scalar entries, fields
+    of other protocols) stays visible.
+    """
+
+    category: str
+    hidden: FrozenSet[Tuple[str, str]] = frozenset()
+
+    def is_visible(self, section: str, label: str) -> bool:
+        return (section, label) not in self.hidden
+
+    def apply(self, parsed: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a parse result without hidden fields or emptied sections."""
+        hidden = self.hidden
+        filtered: Dict[str, Any] = {}
+        for section, value in parsed.items():
+            if isinstance(value, dict):
+                kept = {
+                    label: field_value
+                    for label, field_value in value.items()
+                    if (section, label) not in hidden
+                }
+                if kept:
+                    filtered[section] = kept
+            else:
+                filtered[section] = value
+        return filtered
+
+
+class ReceiveProjections:
+    """``ReceiveProjection`` of every category, compiled from one preference set."""
+
+    def __init__(
+        self,
+        common_hidden: FrozenSet[Tuple[str, str]],
+        category_hidden: Dict[str, FrozenSet[Tuple[str, str]]],
+    ) -> None:
+        self._common_hidden = common_hidden
+        self._category_hidden = category_hidden
+        self._projections: Dict[str, ReceiveProjection] = {}
+
+    def for_category(self, category: str) -> ReceiveProjection:
+        projection = self._projections.get(category)
+        if projection is None:
+            hidden = self._common_hidden | self._category_hidden.get(
+                category, frozenset()
+            )
+            projection = self._projections[category] = ReceiveProjection(
+                category, hidden
+            )
+        return projection
+
+
 class ProtocolFieldService:
     """Expose protocol template metadata and persisted user selections."""
 
@@ -125,7 +186,7 @@ class ProtocolFieldService:
         loader: Optional[ProtocolTemplateLoader] = None,
         config_path: Optional[Path] = None,
     ) -> None:
-        self._loader = loader or ProtocolTemplateLoader.default()
+        self._loader = loader or default_registry().loader
         default_config = resource_path("acu_config.json", prefer_write=True)
         if not default_config.exists():
             template_config = resource_path("acu_config.json", must_exist=True)
@@ -141,14 +202,22 @@ class ProtocolFieldService:
         self._send_fields: Dict[str, SendFieldInfo] = {}
         self._receive_fields: Dict[str, ReceiveFieldInfo] = {}
         self._receive_lookup: Dict[Tuple[str, str, str], ReceiveFieldInfo] = {}
+        self._index: Optional[Dict[str, Any]] = None
         self._default_preferences_cache: Optional[Dict[str, Any]] = None
         self._cached_preferences: Optional[Dict[str, Any]] = None
+        self._projections: Optional[Tuple[str, ReceiveProjections]] = None
 
     # ------------------------------------------------------------------
     # Metadata API
     # ------------------------------------------------------------------
     def get_send_sections(self) -> List[FieldSection]:
-        spec = self._loader.spec()
+        return list(self._field_index()["send_sections"])
+
+    def get_receive_meta(self) -> Tuple[List[FieldSection], List[ReceiveCategoryMeta]]:
+        index = self._field_index()
+        return list(index["common_sections"]), list(index["category_sections"])
+
+    def _build_send_sections(self, spec: TemplateSpec) -> List[FieldSection]:
         layout = spec.send_layout
         if layout is None:
             return []
@@ -299,15 +368,6 @@ class ProtocolFieldService:
 
         return sections
 
-    def get_receive_meta(self) -> Tuple[List[FieldSection], List[ReceiveCategoryMeta]]:
-        spec = self._loader.spec()
-        common_sections = self._build_common_sections(spec)
-        category_sections = [
-            self._build_category_sections(cat_spec)
-            for cat_spec in spec.categories.values()
-        ]
-        return common_sections, category_sections
-
     def send_field_infos(self) -> Dict[str, SendFieldInfo]:
         self._ensure_indexes()
         return dict(self._send_fields)
@@ -316,6 +376,21 @@ class ProtocolFieldService:
         self._ensure_indexes()
         return dict(self._receive_fields)
 
+    def reload(self, loader: ProtocolTemplateLoader) -> bool:
+        """Switch to a reloaded template; return True if any field changed.
+
+        Cached preferences are re-merged against the new fields on the next
+        call, so saved selections of removed fields drop out automatically.
+        """
+        old_send, old_receive = self._send_fields, self._receive_fields
+        self._loader = loader
+        self._index = None
+        self._ensure_indexes()
+        self._default_preferences_cache = None
+        self._cached_preferences = None
+        self._projections = None
+        return old_send != self._send_fields or old_receive != self._receive_fields
+
     def find_receive_field(
         self, category: str, section: str, label: str
     ) -> Optional[ReceiveFieldInfo]:
@@ -367,13 +442,85 @@ class ProtocolFieldService:
         self.save_preferences(defaults)
         return copy.deepcopy(defaults)
 
+    def receive_projections(
+        self, prefs: Optional[Dict[str, Any]] = None
+    ) -> ReceiveProjections:
+        """Compile the receive selection of ``prefs`` (default: active ones).
+
+        The result is cached until the selection or the template changes, so
+        callers can ask for it whenever preferences are applied and filter
+        parsed data with set lookups instead of per-field metadata queries.
+        ``设备信息`` follows the ``common`` selection; a category without a
+        selection keeps all of its fields.
+        """
+        if prefs is None:
+            prefs = self._cached_preferences or self.get_active_preferences()
+        receive = prefs.get("receive", {}) or {}
+        key = json.dumps(
+            {cat: sorted(keys) for cat, keys in receive.items()},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        if self._projections is not None and self._projections[0] == key:
+            return self._projections[1]
+        self._ensure_indexes()
+        selected = {category: set(keys) for category, keys in receive.items()}
+        common = selected.get("common", set())
+        common_hidden = set()
+        category_hidden: Dict[str, set] = {}
+        for (category, section, label), info in self._receive_lookup.items():
+            if category == "common":
+                if section == "设备信息" and info.key not in common:
+                    common_hidden.add((section, label))
+                continue
+            chosen = selected.get(category)
+            if section != "设备信息" and chosen is not None and info.key not in chosen:
+                category_hidden.setdefault(category, set()).add((section, label))
+        projections = ReceiveProjections(
+            frozenset(common_hidden),
+            {cat: frozenset(hidden) for cat, hidden in category_hidden.items()},
+        )
+        self._projections = (key, projections)
+        return projections
+
     # ------------------------------------------------------------------
     # Internal helpers - metadata
     # ------------------------------------------------------------------
     def _ensure_indexes(self) -> None:
-        if not self._send_fields or not self._receive_fields:
-            self.get_send_sections()
-            self.get_receive_meta()
+        self._field_index()
+
+    def _field_index(self) -> Dict[str, Any]:
+        """Sections and field indexes, read from the template cache if present."""
+        if self._index is None:
+            artifact = getattr(self._loader, "artifact", None)
+            if artifact is not None:
+                index = artifact(FIELD_INDEX_ARTIFACT, self._build_field_index)
+            else:
+                index = self._build_field_index(self._loader.spec())
+            self._send_fields = dict(index["send_fields"])
+            self._receive_fields = dict(index["receive_fields"])
+            self._receive_lookup = dict(index["receive_lookup"])
+            self._index = index
+        return self._index
+
+    def _build_field_index(self, spec: TemplateSpec) -> Dict[str, Any]:
+        self._send_fields = {}
+        self._receive_fields = {}
+        self._receive_lookup = {}
+        send_sections = self._build_send_sections(spec)
+        common_sections = self._build_common_sections(spec)
+        category_sections = [
+            self._build_category_sections(cat_spec)
+            for cat_spec in spec.categories.values()
+        ]
+        return {
+            "send_sections": send_sections,
+            "common_sections": common_sections,
+            "category_sections": category_sections,
+            "send_fields": dict(self._send_fields),
+            "receive_fields": dict(self._receive_fields),
+            "receive_lookup": dict(self._receive_lookup),
+        }
 
     def _field_meta_from_layout_field(
         self, field: SendLayoutFieldSpec, source: Optional[str]
@@ -760,4 +907,6 @@ __all__ = [
     "ReceiveCategoryMeta",
     "SendFieldInfo",
     "ReceiveFieldInfo",
+    "ReceiveProjection",
+    "ReceiveProjections",
 ]
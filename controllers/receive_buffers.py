@@ -0,0 +1,94 @@
+import os
+import queue
+import socket
+from typing import Dict, Iterable, Optional, Tuple
+
+PROC_NET_UDP = ("/proc/net/udp", "/proc/net/udp6")
+
+
+class ReceiveBufferPool:
+    """一整块预分配内存切成的可复用接收缓冲区。
+
+    接收线程 `acquire` 一个槽位，用 `recvfrom_into` 写入后交给分发线程；
+    回调处理完毕后 `release` 归还。回调拿到的是槽位的 memoryview，
+    只在回调期间有效，需要保留数据时应自行 `bytes(view)` 复制。
+    """
+
+    def __init__(self, slots: int = 1024, slot_size: int = 2048):
+        self.slots = max(1, int(slots))
+        self.slot_size = max(1, int(slot_size))
+        self._slab = bytearray(self.slots * self.slot_size)
+        slab = memoryview(self._slab)
+        size = self.slot_size
+        self._views = [slab[i * size : (i + 1) * size] for i in range(self.slots)]
+        self._free: "queue.SimpleQueue[int]" = queue.SimpleQueue()
+        for i in range(self.slots):
+            self._free.put(i)
+        # 槽位耗尽、接收线程需要等待回调归还的次数
+        self.waits = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[int]:
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        self.waits += 1
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def release(self, slot: int) -> None:
+        self._free.put(slot)
+
+    def view(self, slot: int) -> memoryview:
+        return self._views[slot]
+
+    @property
+    def available(self) -> int:
+        return self._free.qsize()
+
+
+def socket_inode(sock) -> Optional[int]:
+    """套接字在 /proc/net/udp 中对应的 inode；取不到时返回 None。"""
+    try:
+        return os.fstat(sock.fileno()).st_ino
+    except (AttributeError, OSError, TypeError, ValueError):
+        return None
+
+
+def read_udp_drops(paths: Iterable[str] = PROC_NET_UDP) -> Dict[int, Tuple[int, int]]:
+    """读取内核 UDP 丢包计数，返回 {inode: (本地端口, drops)}。
+
+    非 Linux 或文件不可读时返回空字典。drops 是套接字接收缓冲区满时
+    内核丢弃的数据报数，应用层无法从 recvfrom 感知。
+    """
+    result: Dict[int, Tuple[int, int]] = {}
+    for path in paths:
+        try:
+            with open(path, "r", encoding="ascii", errors="replace") as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            parts = line.split()
+            if len(parts) < 13:
+                continue
+            try:
+                port = int(parts[1].rsplit(":", 1)[1], 16)
+                inode = int(parts[9])
+                drops = int(parts[-1])
+            except (IndexError, ValueError):
+                continue
+            result[inode] = (port, drops)
+    return result
+
+
+def set_receive_buffer(sock, size: int) -> Optional[int]:
+    """设置 SO_RCVBUF 并返回内核实际采用的大小（Linux 会翻倍并受 rmem_max 限制）。"""
+    if size and size > 0:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, int(size))
+    try:
+        return sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+    except (AttributeError, OSError):
+        return None
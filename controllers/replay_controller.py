@@ -0,0 +1,103 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from recording.capture import DIR_RX, iter_capture
+
+
+class ReplayController:
+    """将抓包文件回放到 `on_receive` 回调，不经过套接字。
+
+    `speed` 为 1.0 时按原始帧间隔回放，N 表示 N 倍速，
+    `speed <= 0` 表示尽可能快（用作整条解析/缓冲/绘制链路的吞吐基准）。
+    帧的发送时刻按抓包起点计算，不累计 sleep 误差。
+    """
+
+    def __init__(
+        self,
+        path,
+        speed: float = 1.0,
+        directions: Iterable[int] = (DIR_RX,),
+    ):
+        self.path = path
+        self.speed = float(speed or 0.0)
+        self.directions = frozenset(directions)
+        self.on_receive: Optional[Callable[[bytes, tuple], None]] = None
+        self.on_error: Optional[Callable[[str], None]] = None
+        self.on_status: Optional[Callable[[str], None]] = None
+        self.on_finished: Optional[Callable[[Dict[str, float]], None]] = None
+        self.frames = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._done.is_set()
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = self.elapsed
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "elapsed": elapsed,
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def start(self) -> "ReplayController":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def run(self) -> Dict[str, float]:
+        """同步回放整个文件，返回统计信息。"""
+        self._emit_status(f"开始回放: {self.path}")
+        started = time.perf_counter()
+        first_ts = None
+        try:
+            for record in iter_capture(self.path):
+                if self._stop.is_set():
+                    break
+                if record.direction not in self.directions:
+                    continue
+                if self.speed > 0:
+                    if first_ts is None:
+                        first_ts = record.timestamp
+                    due = started + (record.timestamp - first_ts) / self.speed
+                    delay = due - time.perf_counter()
+                    if delay > 0 and self._stop.wait(delay):
+                        break
+                if self.on_receive:
+                    self.on_receive(record.payload, record.addr)
+                self.frames += 1
+                self.bytes += len(record.payload)
+        except Exception as e:
+            self._emit_error(f"回放异常: {e}")
+        finally:
+            self.elapsed = time.perf_counter() - started
+            self._done.set()
+        stats = self.stats()
+        self._emit_status(
+            f"回放结束: {stats['frames']} 帧, {stats['elapsed']:.3f}s, "
+            f"{stats['fps']:.0f} 帧/秒"
+        )
+        if self.on_finished:
+            self.on_finished(stats)
+        return stats
+
+    def _emit_error(self, msg):
+        if self.on_error:
+            self.on_error(msg)
+
+    def _emit_status(self, msg):
+        if self.on_status:
+            self.on_status(msg)
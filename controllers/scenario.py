@@ -0,0 +1,288 @@
+"""发送场景：把 ControlState 变化时间线预编译为逐周期的帧补丁。
+
+场景文件（YAML 或 JSON）示例::
+
+    name: 频率爬升
+    period_ms: 10
+    initial:
+      bool_commands: {"8:0": true}
+    steps:
+      - set: {start_commands: {1: true}}
+      - ramp: {field: freq_controls, key: 10, from: 0, to: 50, duration: 5}
+      - wait: 2
+      - repeat: 3
+        steps:
+          - set: {isolation_commands: {0: true}}
+          - wait: 0.5
+          - set: {isolation_commands: {0: false}}
+          - wait: 0.5
+
+步骤按顺序推进一个时间游标（以发送周期为单位）：`set` 在当前周期生效，
+`wait` 推进游标，`ramp` 在 duration 内逐周期线性插值并推进游标，
+`repeat` 重复其子步骤。位命令的键写作 "字节:位"，其余字典字段的键为偏移。
+
+编译在一个私有 ControlState 上逐周期执行，用协议编码出帧并只保留与上一帧
+不同的字节段；回放时每个周期只做补丁拷贝、生命信号与时间戳，不触碰 UI。
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from model.control_state import DICT_FIELDS, ControlState
+from model.send_target import Patch
+
+# 键为 (字节, 位) 元组的字段
+_TUPLE_KEY_FIELDS = ("bool_commands", "chu_controls", "redundant_commands")
+_SCALAR_FIELDS = ("battery_temp",)
+
+
+class ScenarioError(ValueError):
+    """场景文件格式错误。"""
+
+
+@dataclass
+class CompiledScenario:
+    name: str
+    period_ms: float
+    base: bytes
+    # patches[i] 为第 i 帧相对前一帧的差异；patches[0] 相对 base（起始状态）
+    patches: List[Patch] = field(default_factory=list)
+
+    @property
+    def frames(self) -> int:
+        return len(self.patches)
+
+    @property
+    def duration_s(self) -> float:
+        return self.frames * self.period_ms / 1000.0
+
+    def frame_at(self, index: int) -> bytes:
+        """第 index 帧的完整内容（生命信号与时间戳未写入），测试与预览用。"""
+        buf = bytearray(self.base)
+        for patch in self.patches[: index + 1]:
+            for offset, data in patch:
+                buf[offset : offset + len(data)] = data
+        return bytes(buf)
+
+
+# ----------------------------------------------------------------------
+# 解析
+# ----------------------------------------------------------------------
+def load_scenario(path) -> Dict[str, Any]:
+    """读取 YAML/JSON 场景文件，返回原始字典。"""
+    path = os.fspath(path)
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith(".json"):
+        data = json.loads(text)
+    else:
+        import yaml
+
+        data = yaml.safe_load(text)
+    if not isinstance(data, dict):
+        raise ScenarioError(f"场景文件应为映射: {path}")
+    data.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return data
+
+
+def _parse_key(source: str, key):
+    if source in _SCALAR_FIELDS:
+        return None
+    if source not in DICT_FIELDS:
+        raise ScenarioError(f"未知控制字段: {source}")
+    if source in _TUPLE_KEY_FIELDS:
+        if isinstance(key, str) and ":" in key:
+            byte, bit = key.split(":", 1)
+            return (int(byte), int(bit))
+        if isinstance(key, (list, tuple)) and len(key) == 2:
+            return (int(key[0]), int(key[1]))
+        raise ScenarioError(f"{source} 的键应为 '字节:位': {key!r}")
+    try:
+        return int(key)
+    except (TypeError, ValueError) as exc:
+        raise ScenarioError(f"{source} 的键应为偏移: {key!r}") from exc
+
+
+def _apply(state: ControlState, source: str, key, value) -> None:
+    if source in _SCALAR_FIELDS:
+        state.set_value(source, None, int(value))
+    elif isinstance(value, bool):
+        state.set_flag(source, key, value)
+    else:
+        state.set_value(source, key, value)
+
+
+def _set_actions(mapping) -> List[Tuple[str, Any, Any]]:
+    if not isinstance(mapping, dict):
+        raise ScenarioError(f"set 应为映射: {mapping!r}")
+    actions = []
+    for source, values in mapping.items():
+        if source in _SCALAR_FIELDS:
+            actions.append((source, None, values))
+            continue
+        if not isinstance(values, dict):
+            raise ScenarioError(f"{source} 应为 键: 值 映射")
+        for key, value in values.items():
+            actions.append((source, _parse_key(source, key), value))
+    return actions
+
+
+def apply_controls(state: ControlState, mapping) -> None:
+    """把 `set` 形式的映射（键同场景文件）写入控制状态。"""
+    for source, key, value in _set_actions(mapping):
+        _apply(state, source, key, value)
+
+
+def _ticks(seconds, period_s: float) -> int:
+    try:
+        seconds = float(seconds)
+    except (TypeError, ValueError) as exc:
+        raise ScenarioError(f"时长无效: {seconds!r}") from exc
+    if seconds < 0:
+        raise ScenarioError(f"时长不能为负: {seconds}")
+    return int(round(seconds / period_s))
+
+
+def _timeline(steps, period_s: float, cursor: int, events: list) -> int:
+    """把步骤展开为 (周期序号, source, key, value) 事件，返回新的游标。"""
+    if not isinstance(steps, list):
+        raise ScenarioError("steps 应为列表")
+    for step in steps:
+        if not isinstance(step, dict) or not step:
+            raise ScenarioError(f"无效步骤: {step!r}")
+        if "set" in step:
+            for source, key, value in _set_actions(step["set"]):
+                events.append((cursor, source, key, value))
+        elif "wait" in step:
+            cursor += _ticks(step["wait"], period_s)
+        elif "ramp" in step:
+            ramp = step["ramp"]
+            try:
+                source = ramp["field"]
+                start, end = float(ramp["from"]), float(ramp["to"])
+            except (KeyError, TypeError, ValueError) as exc:
+                raise ScenarioError(f"ramp 需要 field/from/to: {ramp!r}") from exc
+            key = _parse_key(source, ramp.get("key"))
+            n = max(_ticks(ramp.get("duration", 0), period_s), 1)
+            for k in range(n + 1):
+                value = start + (end - start) * k / n
+                events.append((cursor + k, source, key, value))
+            cursor += n
+        elif "repeat" in step:
+            try:
+                count = int(step["repeat"])
+            except (TypeError, ValueError) as exc:
+                raise ScenarioError(f"repeat 次数无效: {step['repeat']!r}") from exc
+            for _ in range(max(count, 0)):
+                cursor = _timeline(step.get("steps", []), period_s, cursor, events)
+        else:
+            raise ScenarioError(f"未知步骤类型: {sorted(step)}")
+    return cursor
+
+
+# ----------------------------------------------------------------------
+# 编译
+# ----------------------------------------------------------------------
+def _diff(prev: np.ndarray, cur: np.ndarray, cur_bytes: bytes) -> Patch:
+    changed = np.flatnonzero(prev != cur)
+    if changed.size == 0:
+        return ()
+    # 相邻的变化字节合并为一段
+    breaks = np.flatnonzero(np.diff(changed) > 1)
+    starts = np.concatenate(([changed[0]], changed[breaks + 1]))
+    ends = np.concatenate((changed[breaks], [changed[-1]])) + 1
+    return tuple((int(s), cur_bytes[int(s) : int(e)]) for s, e in zip(starts, ends))
+
+
+def compile_scenario(
+    spec: Dict[str, Any],
+    protocol,
+    initial_state: Optional[ControlState] = None,
+    period_ms: Optional[float] = None,
+) -> CompiledScenario:
+    """把场景编译为帧补丁序列。
+
+    `initial_state` 为起始控制状态（通常是当前界面状态，不会被修改），
+    场景的 `initial` 段在其上生效；`period_ms` 缺省取场景文件中的值。
+    """
+    period_ms = float(period_ms or spec.get("period_ms") or 100)
+    if period_ms <= 0:
+        raise ScenarioError(f"period_ms 必须为正: {period_ms}")
+    period_s = period_ms / 1000.0
+    state = ControlState()
+    if initial_state is not None:
+        snap = initial_state.snapshot()
+        for name in DICT_FIELDS:
+            setattr(state, name, dict(snap[name]))
+        state.battery_temp = snap["battery_temp"]
+    for source, key, value in _set_actions(spec.get("initial") or {}):
+        _apply(state, source, key, value)
+
+    events: List[Tuple[int, str, Any, Any]] = []
+    total = _timeline(spec.get("steps") or [], period_s, 0, events)
+    events.sort(key=lambda e: e[0])  # 稳定排序：同一周期内保持书写顺序
+
+    base = bytes(protocol.build_send_frame(state.snapshot(), 0))
+    prev = np.frombuffer(base, dtype=np.uint8)
+    patches: List[Patch] = []
+    version = state.version
+    idx = 0
+    for tick in range(total + 1):
+        while idx < len(events) and events[idx][0] == tick:
+            _, source, key, value = events[idx]
+            _apply(state, source, key, value)
+            idx += 1
+        if state.version == version:
+            patches.append(())
+            continue
+        version = state.version
+        cur_bytes = bytes(protocol.build_send_frame(state.snapshot(), 0))
+        cur = np.frombuffer(cur_bytes, dtype=np.uint8)
+        patches.append(_diff(prev, cur, cur_bytes))
+        prev = cur
+    return CompiledScenario(
+        name=str(spec.get("name", "")), period_ms=period_ms, base=base, patches=patches
+    )
+
+
+# ----------------------------------------------------------------------
+# 回放
+# ----------------------------------------------------------------------
+class ScenarioPlayer:
+    """按调用顺序逐帧输出编译好的场景，供 `SendScheduler` 作为 build_frame。
+
+    每次调用输出下一帧，所有帧按序各发送一次；调度器跳过的周期只会使场景
+    整体后移，不会丢失状态变化。播放结束后保持最后一帧继续发送。
+    """
+
+    def __init__(
+        self,
+        compiled: CompiledScenario,
+        stamp: Callable[[bytearray], bytearray],
+        on_finished: Optional[Callable[[], None]] = None,
+    ):
+        self.compiled = compiled
+        self.stamp = stamp
+        self.on_finished = on_finished
+        self.position = 0
+        self._current = bytearray(compiled.base)
+
+    @property
+    def finished(self) -> bool:
+        return self.position >= self.compiled.frames
+
+    def __call__(self) -> bytes:
+        patches = self.compiled.patches
+        i = self.position
+        if i < len(patches):
+            current = self._current
+            for offset, data in patches[i]:
+                current[offset : offset + len(data)] = data
+            self.position = i + 1
+            if self.position == len(patches) and self.on_finished is not None:
+                self.on_finished()
+        return bytes(self.stamp(bytearray(self._current)))
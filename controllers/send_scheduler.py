@@ -0,0 +1,404 @@
+import heapq
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# 等待到截止时刻前 _SPIN_NS 改为忙等，弥补 Event.wait 的唤醒误差
+_SPIN_NS = 200_000
+# 超过该滞后即计为迟发帧
+_LATE_NS = 1_000_000
+# 发送期间使用的 GIL 切换间隔：默认 5 ms 会让 UI 线程的纯 Python 计算
+# 推迟调度线程的唤醒，使亚 10 ms 周期无法保持在 ±1 ms 内
+_SWITCH_INTERVAL = 0.0005
+
+# 切换间隔是进程级设置：多个调度器共用一个引用计数，
+# 第一个启动时调小、最后一个停止时恢复，停止顺序任意
+_switch_lock = threading.Lock()
+_switch_users = 0
+_switch_saved: Optional[float] = None
+
+
+def _acquire_switch_interval() -> None:
+    global _switch_users, _switch_saved
+    with _switch_lock:
+        if _switch_users == 0:
+            _switch_saved = sys.getswitchinterval()
+            if _switch_saved > _SWITCH_INTERVAL:
+                sys.setswitchinterval(_SWITCH_INTERVAL)
+        _switch_users += 1
+
+
+def _release_switch_interval() -> None:
+    global _switch_users, _switch_saved
+    with _switch_lock:
+        if _switch_users == 0:
+            return
+        _switch_users -= 1
+        if _switch_users == 0 and _switch_saved is not None:
+            sys.setswitchinterval(_switch_saved)
+            _switch_saved = None
+
+
+def _send_stats(sched) -> Dict[str, float]:
+    lags = sorted(sched._lags)
+    count = len(lags)
+    if count:
+        mean = sum(lags) / count / 1000.0
+        p99 = lags[min(count - 1, int(count * 0.99))] / 1000.0
+        worst = lags[-1] / 1000.0
+    else:
+        mean = p99 = worst = 0.0
+    return {
+        "period_ms": sched.period_ms,
+        "sent": sched.sent,
+        "late": sched.late,
+        "missed": sched.missed,
+        "errors": sched.errors,
+        "jitter_mean_us": mean,
+        "jitter_p99_us": p99,
+        "jitter_max_us": worst,
+    }
+
+
+class SendScheduler:
+    """独立线程按绝对截止时刻周期构建并发送帧。
+
+    第 n 帧的截止时刻为 start + n * period（`time.monotonic_ns`），
+    不随 sleep 误差累积漂移；落后整周期时跳过这些周期并计入 `missed`，
+    不会补发成一串。帧的构建与发送都在调度线程中完成，UI 卡顿不影响节拍。
+    """
+
+    def __init__(
+        self,
+        period_ms: float,
+        build_frame: Callable[[], bytes],
+        send: Callable[[bytes], None],
+        on_sent: Optional[Callable[[bytes, float], None]] = None,
+        history: int = 2048,
+    ):
+        self.build_frame = build_frame
+        self.send = send
+        self.on_sent = on_sent
+        self.on_error: Optional[Callable[[str], None]] = None
+        self._period_ns = self._to_ns(period_ms)
+        self._reanchor = False
+        self._stop = threading.Event()
+        # 停止或修改周期时唤醒正在等待截止时刻的线程
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._holds_switch_interval = False
+        # 最近 history 帧的滞后（纳秒），用于抖动统计
+        self._lags: Deque[int] = deque(maxlen=history)
+        self.sent = 0
+        self.late = 0
+        self.missed = 0
+        self.errors = 0
+
+    @staticmethod
+    def _to_ns(period_ms: float) -> int:
+        return max(int(float(period_ms) * 1_000_000), 100_000)
+
+    @property
+    def period_ms(self) -> float:
+        return self._period_ns / 1_000_000
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_period(self, period_ms: float) -> None:
+        """修改周期；从下一帧起以当前时刻重新对齐。"""
+        self._period_ns = self._to_ns(period_ms)
+        self._reanchor = True
+        self._wake.set()
+
+    def start(self) -> "SendScheduler":
+        if self.running:
+            return self
+        self._stop.clear()
+        self._wake.clear()
+        if not self._holds_switch_interval:
+            _acquire_switch_interval()
+            self._holds_switch_interval = True
+        self._thread = threading.Thread(
+            target=self._run, name="SendScheduler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+        if self._holds_switch_interval:
+            self._holds_switch_interval = False
+            _release_switch_interval()
+
+    def stats(self) -> Dict[str, float]:
+        """发送统计；抖动为最近若干帧实际发送时刻相对截止时刻的滞后（微秒）。"""
+        return _send_stats(self)
+
+    def _run(self) -> None:
+        clock = time.monotonic_ns
+        stop = self._stop
+        wake = self._wake
+        period = self._period_ns
+        start = clock()
+        n = 0
+        while not stop.is_set():
+            if self._reanchor:
+                self._reanchor = False
+                period = self._period_ns
+                start = clock()
+                n = 0
+            due = start + n * period
+            remaining = due - clock()
+            if remaining > _SPIN_NS and wake.wait((remaining - _SPIN_NS) / 1e9):
+                wake.clear()
+                continue
+            while clock() < due:
+                pass
+            lag = clock() - due
+            if lag >= period:
+                skipped = lag // period
+                self.missed += skipped
+                n += skipped
+                lag -= skipped * period
+            try:
+                frame = self.build_frame()
+                self.send(frame)
+                self.sent += 1
+                if self.on_sent is not None:
+                    self.on_sent(frame, time.time())
+            except Exception as e:
+                self.errors += 1
+                if self.on_error is not None:
+                    self.on_error(f"周期发送异常: {e}")
+            self._lags.append(lag)
+            if lag > _LATE_NS:
+                self.late += 1
+            n += 1
+
+
+class SendJob:
+    """`MultiSendScheduler` 中的一路周期发送。
+
+    控制与统计接口与 `SendScheduler` 相同（period_ms / running / set_period /
+    stop / stats），调用方可以不区分独占线程还是共享线程。
+    """
+
+    def __init__(
+        self,
+        owner: "MultiSendScheduler",
+        period_ms: float,
+        build_frame: Callable[[], bytes],
+        send: Callable[[bytes], None],
+        on_sent: Optional[Callable[[bytes, float], None]],
+        history: int,
+    ):
+        self.owner = owner
+        self.build_frame = build_frame
+        self.send = send
+        self.on_sent = on_sent
+        self.on_error: Optional[Callable[[str], None]] = None
+        self._period_ns = SendScheduler._to_ns(period_ms)
+        # 截止时刻 = anchor + n * period；generation 变化使堆中旧条目失效
+        self._anchor = 0
+        self._n = 0
+        self._generation = 0
+        self.active = True
+        self._lags: Deque[int] = deque(maxlen=history)
+        self.sent = 0
+        self.late = 0
+        self.missed = 0
+        self.errors = 0
+
+    @property
+    def period_ms(self) -> float:
+        return self._period_ns / 1_000_000
+
+    @property
+    def running(self) -> bool:
+        return self.active and self.owner.running
+
+    def set_period(self, period_ms: float) -> None:
+        """修改周期；从下一帧起以当前时刻重新对齐。"""
+        self._period_ns = SendScheduler._to_ns(period_ms)
+        self.owner._schedule(self)
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self.owner.remove(self)
+
+    def stats(self) -> Dict[str, float]:
+        return _send_stats(self)
+
+
+class MultiSendScheduler:
+    """一个线程按各自周期驱动多路发送（多个仿真 ACU 共用）。
+
+    每一路的截止时刻规则与 `SendScheduler` 相同：绝对时刻、不累积漂移、
+    落后整周期时跳过并计入该路的 `missed`。各路按截止时刻放在一个小顶堆
+    里，线程只等待最早的一个，路数增加不会增加线程与唤醒次数。
+    """
+
+    def __init__(self, history: int = 2048):
+        self.history = history
+        self._heap: List[Tuple[int, int, int, SendJob]] = []
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # 新增、移除或修改周期时唤醒正在等待截止时刻的线程
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._holds_switch_interval = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def jobs(self) -> List[SendJob]:
+        with self._lock:
+            seen = {}
+            for _due, _seq, gen, job in self._heap:
+                if job.active and gen == job._generation:
+                    seen[id(job)] = job
+            return list(seen.values())
+
+    def add(
+        self,
+        period_ms: float,
+        build_frame: Callable[[], bytes],
+        send: Callable[[bytes], None],
+        on_sent: Optional[Callable[[bytes, float], None]] = None,
+    ) -> SendJob:
+        """登记一路发送，立即开始计时（调度线程未启动时在启动后发出）。"""
+        job = SendJob(self, period_ms, build_frame, send, on_sent, self.history)
+        self._schedule(job)
+        return job
+
+    def remove(self, job: SendJob) -> None:
+        with self._lock:
+            job.active = False
+            job._generation += 1
+        self._wake.set()
+
+    def _schedule(self, job: SendJob) -> None:
+        """以当前时刻为起点重新对齐 job 的截止时刻。"""
+        with self._lock:
+            if not job.active:
+                return
+            job._generation += 1
+            job._anchor = time.monotonic_ns()
+            job._n = 0
+            self._seq += 1
+            heapq.heappush(self._heap, (job._anchor, self._seq, job._generation, job))
+        self._wake.set()
+
+    def start(self) -> "MultiSendScheduler":
+        if self.running:
+            return self
+        self._stop.clear()
+        self._wake.clear()
+        if not self._holds_switch_interval:
+            _acquire_switch_interval()
+            self._holds_switch_interval = True
+        self._thread = threading.Thread(
+            target=self._run, name="MultiSendScheduler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+        if self._holds_switch_interval:
+            self._holds_switch_interval = False
+            _release_switch_interval()
+
+    def stats(self) -> Dict[str, float]:
+        """共享线程的汇总：路数与各路发送数之和。"""
+        jobs = self.jobs
+        return {
+            "jobs": len(jobs),
+            "sent": sum(job.sent for job in jobs),
+            "late": sum(job.late for job in jobs),
+            "missed": sum(job.missed for job in jobs),
+            "errors": sum(job.errors for job in jobs),
+        }
+
+    def _next(self) -> Optional[Tuple[int, int, int, SendJob]]:
+        """堆顶的有效条目（丢弃已失效的）；调用方持有锁。"""
+        heap = self._heap
+        while heap:
+            entry = heap[0]
+            job = entry[3]
+            if job.active and entry[2] == job._generation:
+                return entry
+            heapq.heappop(heap)
+        return None
+
+    def _run(self) -> None:
+        clock = time.monotonic_ns
+        stop = self._stop
+        wake = self._wake
+        lock = self._lock
+        while not stop.is_set():
+            with lock:
+                entry = self._next()
+            if entry is None:
+                wake.wait(0.1)
+                wake.clear()
+                continue
+            due = entry[0]
+            remaining = due - clock()
+            if remaining > _SPIN_NS and wake.wait((remaining - _SPIN_NS) / 1e9):
+                wake.clear()
+                continue
+            while clock() < due:
+                pass
+            with lock:
+                if self._next() is not entry:
+                    continue
+                heapq.heappop(self._heap)
+            job = entry[3]
+            period = job._period_ns
+            lag = clock() - due
+            if lag >= period:
+                skipped = lag // period
+                job.missed += skipped
+                job._n += skipped
+                lag -= skipped * period
+            try:
+                frame = job.build_frame()
+                job.send(frame)
+                job.sent += 1
+                if job.on_sent is not None:
+                    job.on_sent(frame, time.time())
+            except Exception as e:
+                job.errors += 1
+                if job.on_error is not None:
+                    job.on_error(f"周期发送异常: {e}")
+            job._lags.append(lag)
+            if lag > _LATE_NS:
+                job.late += 1
+            with lock:
+                if job.active and entry[2] == job._generation:
+                    job._n += 1
+                    self._seq += 1
+                    heapq.heappush(
+                        self._heap,
+                        (
+                            job._anchor + job._n * period,
+                            self._seq,
+                            job._generation,
+                            job,
+                        ),
+                    )
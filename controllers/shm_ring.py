@@ -0,0 +1,113 @@
+"""基于 `multiprocessing.shared_memory` 的单生产者/单消费者定长槽位环形缓冲。
+
+内存布局：64 字节头（两个 uint64 计数：已写入 head、已读取 tail）+ slots 个
+slot_size 字节的槽位。生产者先写槽位内容再递增 head，消费者读完再递增
+tail；两个计数各只有一方写入，不需要跨进程锁。
+
+计数为 8 字节对齐的单次存储，读写不会撕裂；但 Python/NumPy 不提供内存
+屏障，"先写槽位、后写 head" 的可见顺序依赖 x86 的存储顺序（TSO）。
+ARM64 等弱内存序平台上消费者可能先看到新的 head 再看到槽位内容，这个环
+只应在 x86/x86-64 上使用。
+"""
+
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+import numpy as np
+
+_HEADER = 64
+
+
+class ShmRing:
+    """定长槽位 SPSC 环。`name` 为空时创建，否则按名字附加到已有的环。"""
+
+    def __init__(self, slots: int, slot_size: int, name: Optional[str] = None):
+        self.slots = int(slots)
+        self.slot_size = int(slot_size)
+        self.owner = name is None
+        size = _HEADER + self.slots * self.slot_size
+        if self.owner:
+            self.shm = SharedMemory(create=True, size=size)
+        else:
+            # 附加方应为创建方的子进程：共用同一个 resource_tracker，
+            # 重复登记无害，由创建方 unlink 时统一注销
+            self.shm = SharedMemory(name=name)
+        self.buf = self.shm.buf
+        self._counters = np.ndarray((2,), dtype=np.uint64, buffer=self.buf)
+        if self.owner:
+            self._counters[:] = 0
+        self._head = int(self._counters[0])
+        self._tail = int(self._counters[1])
+        self._slot_view: Optional[np.ndarray] = None
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _offset(self, index: int) -> int:
+        return _HEADER + (index % self.slots) * self.slot_size
+
+    # ------------------------------------------------------------------
+    # 生产者
+    # ------------------------------------------------------------------
+    def reserve(self) -> Optional[int]:
+        """返回下一个可写槽位的偏移；环满时返回 None。"""
+        if self._head - int(self._counters[1]) >= self.slots:
+            return None
+        return self._offset(self._head)
+
+    def backlog(self) -> int:
+        """生产者视角下已提交、尚未被消费者释放的槽位数。"""
+        return self._head - int(self._counters[1])
+
+    def commit(self) -> None:
+        self._head += 1
+        self._counters[0] = self._head
+
+    # ------------------------------------------------------------------
+    # 消费者
+    # ------------------------------------------------------------------
+    def available(self) -> int:
+        """可读槽位数量。"""
+        return int(self._counters[0]) - self._tail
+
+    def peek(self, ahead: int = 0) -> int:
+        """第 ahead 个未读槽位的偏移；调用方需先确认 `available()`。"""
+        return self._offset(self._tail + ahead)
+
+    def read(self, dtype: np.dtype, count: int) -> np.ndarray:
+        """把接下来 count 个未读槽位按结构化 dtype 复制成数组（不释放）。
+
+        dtype 的大小须等于 slot_size；返回的是副本，释放后仍可使用。
+        """
+        view = self._slot_view
+        if view is None or view.dtype != dtype:
+            if np.dtype(dtype).itemsize != self.slot_size:
+                raise ValueError("dtype 大小与槽位大小不一致")
+            view = self._slot_view = np.ndarray(
+                (self.slots,), dtype=dtype, buffer=self.buf, offset=_HEADER
+            )
+        start = self._tail % self.slots
+        end = start + count
+        if end <= self.slots:
+            return view[start:end].copy()
+        return np.concatenate((view[start:], view[: end - self.slots]))
+
+    def release(self, count: int = 1) -> None:
+        self._tail += count
+        self._counters[1] = self._tail
+
+    def close(self) -> None:
+        # numpy 视图持有缓冲区导出，必须先释放才能关闭
+        self._counters = None
+        self._slot_view = None
+        self.buf = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -2,12 +2,34 @@
 import time
 import logging
 from collections import deque, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+import numpy as np
 
 # 创建日志记录器
 logger = logging.getLogger("DataBuffer")
 logger.setLevel(logging.INFO)
 
 
+@dataclass
+class BufferSnapshot:
+    """某一时刻缓冲区的一致性副本（按列存储的 NumPy 数组）。"""
+
+    timestamps: np.ndarray
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return int(self.timestamps.shape[0])
+
+
+def _to_column(values) -> np.ndarray:
+    try:
+        return np.asarray(values)
+    except (TypeError, ValueError):
+        return np.asarray(values, dtype=object)
+
+
 class DataBuffer:
     """改进的数据缓冲区，确保数据同步"""
 
@@ -137,6 +159,22 @@ class DataBuffer:
         logger.debug(f"获取时间戳: {len(timestamps)} 个点")
         return timestamps
 
+    def snapshot(self, signal_ids: Optional[Iterable[str]] = None) -> BufferSnapshot:
+        """复制时间戳与指定信号列，供后台线程导出而不受后续写入影响。
+
+        必须在写入缓冲区的线程（UI 线程）调用；之后的读取只访问副本。
+        """
+        ids = list(self.signal_order if signal_ids is None else signal_ids)
+        timestamps = _to_column(self.timestamps)
+        length = timestamps.shape[0]
+        columns: Dict[str, np.ndarray] = {}
+        for signal_id in ids:
+            if signal_id in self.data:
+                columns[signal_id] = _to_column(self.data[signal_id])
+            else:
+                columns[signal_id] = np.full(length, None, dtype=object)
+        return BufferSnapshot(timestamps=timestamps, columns=columns)
+
     def get_time_range_data(self, signal_id, start_time, end_time):
         """获取时间范围内的数据"""
         if signal_id not in self.data:
@@ -0,0 +1,15 @@
+"""Qt-free simulator engine (comm, scheduler, parse, sampling, recording)."""
+
+from engine.config import SessionConfig, SessionConfigError, load_session_config
+from engine.events import Hook
+from engine.fleet import FleetEngine
+from engine.simulator import SimulatorEngine
+
+__all__ = [
+    "FleetEngine",
+    "Hook",
+    "SessionConfig",
+    "SessionConfigError",
+    "SimulatorEngine",
+    "load_session_config",
+]
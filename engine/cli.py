@@ -0,0 +1,213 @@
+"""无界面命令行入口：按会话配置运行仿真，结束时输出统计。
+
+示例::
+
+    python headless.py --config session.yaml
+    python headless.py --target-ip 127.0.0.1 --period-ms 10 --duration 30 \\
+        --set bool_commands.8:0=true --record-dir recordings --json
+
+配置文件含 `acus` 列表时在一个进程内运行多个 ACU（`engine.fleet`）。
+命令行参数覆盖配置文件中的同名项。Ctrl+C / SIGTERM 会正常结束会话并
+输出统计；通信初始化失败时退出码为 2。
+"""
+
+import argparse
+import json
+import logging
+import signal
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+from engine.config import (
+    TRANSPORTS,
+    SessionConfig,
+    SessionConfigError,
+    load_session_config,
+)
+from engine.fleet import FleetEngine
+from engine.simulator import SimulatorEngine
+
+
+def _parse_value(text: str):
+    lowered = text.lower()
+    if lowered in ("true", "on", "yes"):
+        return True
+    if lowered in ("false", "off", "no"):
+        return False
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _parse_sets(items: List[str]) -> Dict[str, Any]:
+    """`字段.键=值`（标量字段为 `字段=值`）转换为 controls 映射。"""
+    controls: Dict[str, Any] = {}
+    for item in items:
+        target, sep, value = item.partition("=")
+        if not sep:
+            raise SessionConfigError(f"--set 应为 字段.键=值: {item}")
+        source, dot, key = target.partition(".")
+        if dot:
+            controls.setdefault(source, {})[key] = _parse_value(value)
+        else:
+            controls[source] = _parse_value(value)
+    return controls
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="ACU 仿真器无界面运行")
+    parser.add_argument("--config", help="会话配置文件 (YAML/JSON)")
+    parser.add_argument("--acu-ip")
+    parser.add_argument("--send-port", type=int, dest="acu_send_port")
+    parser.add_argument("--receive-port", type=int, dest="acu_receive_port")
+    parser.add_argument(
+        "--extra-port",
+        type=int,
+        action="append",
+        dest="extra_receive_ports",
+        help="额外监听的本地端口，可重复",
+    )
+    parser.add_argument("--target-ip")
+    parser.add_argument("--target-port", type=int, dest="target_receive_port")
+    parser.add_argument("--period-ms", type=float)
+    parser.add_argument("--duration", type=float, dest="duration_s")
+    parser.add_argument("--scenario")
+    parser.add_argument("--stop-after-scenario", action="store_true", default=None)
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="FIELD.KEY=VALUE",
+        help="写入控制字段，如 bool_commands.8:0=true、freq_controls.10=50",
+    )
+    parser.add_argument("--no-send", action="store_false", dest="send", default=None)
+    parser.add_argument("--receive-mode", choices=("bytes", "buffer"))
+    parser.add_argument(
+        "--transport", choices=TRANSPORTS, help="UDP 传输方式，默认 thread"
+    )
+    parser.add_argument("--parse-backend", choices=("inline", "process"))
+    parser.add_argument("--parse-workers", type=int)
+    parser.add_argument("--record-dir")
+    parser.add_argument(
+        "--record-signal",
+        action="append",
+        dest="record_signals",
+        help="只采样指定信号 ID，可重复；默认全部",
+    )
+    parser.add_argument("--capture", help="把收发报文写入抓包文件")
+    parser.add_argument("--stats-interval", type=float, dest="stats_interval_s")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出统计")
+    parser.add_argument("--log-level", default="WARNING")
+    return parser
+
+
+def config_from_args(args: argparse.Namespace) -> SessionConfig:
+    base = load_session_config(args.config) if args.config else SessionConfig()
+    data = dict(vars(base))
+    for name in data:
+        value = getattr(args, name, None)
+        if value is not None:
+            data[name] = value
+    if args.set:
+        controls = dict(data.get("controls") or {})
+        for source, values in _parse_sets(args.set).items():
+            if isinstance(values, dict):
+                controls[source] = {**(controls.get(source) or {}), **values}
+            else:
+                controls[source] = values
+        data["controls"] = controls
+    return SessionConfig.from_mapping(data)
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    acus = stats.get("acus")
+    if acus is not None:
+        recv = stats.get("receive") or {}
+        lines = [
+            f"运行 {stats['elapsed_s']:.1f} s | {len(acus)} 个 ACU | "
+            f"接收 {recv.get('frames', 0)} 帧 | "
+            f"内核丢包 {recv.get('kernel_drops', 0)}"
+        ]
+        for name, sub in acus.items():
+            lines.append(f"[{name}]")
+            lines.extend("  " + line for line in format_stats(sub).splitlines())
+        return "\n".join(lines)
+    send = stats.get("send") or {}
+    recv = stats.get("receive") or {}
+    lines = [
+        f"运行 {stats['elapsed_s']:.1f} s",
+        (
+            f"发送 {send.get('sent', 0)} 帧 | 迟发 {send.get('late', 0)} | "
+            f"跳过 {send.get('missed', 0)} | "
+            f"抖动 p99 {send.get('jitter_p99_us', 0.0):.0f} µs"
+        ),
+        (
+            f"接收 {recv.get('frames', 0)} 帧 | 解析 {recv.get('parsed', 0)} | "
+            f"解析错误 {recv.get('parse_errors', 0)} | "
+            f"内核丢包 {recv.get('kernel_drops', 0)}"
+        ),
+    ]
+    for name, dev in sorted((stats.get("devices") or {}).items()):
+        lines.append(
+            f"  {name}: {dev['frames']} 帧 丢失 {dev['lost']} "
+            f"({dev['loss_ratio'] * 100:.2f}%) 重复 {dev['duplicates']} "
+            f"乱序 {dev['reordered']} 速率 {dev['rate_hz']:.1f} Hz "
+            f"抖动 {dev['jitter_ms']:.2f} ms"
+        )
+    for rule, devices in sorted((stats.get("latency") or {}).items()):
+        for name, lat in sorted(devices.items()):
+            if lat.get("count"):
+                lines.append(
+                    f"  {rule} {name}: p50 {lat['p50_ms']:.1f} ms / "
+                    f"p99 {lat['p99_ms']:.1f} ms ({lat['count']})"
+                )
+    rec = stats.get("recording")
+    if rec:
+        lines.append(
+            f"录制 {rec['rows']} 行 / {rec['segments']} 段 -> {rec['run_dir']}"
+            + (f"（丢弃 {rec['dropped']}）" if rec.get("dropped") else "")
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, str(args.log_level).upper(), logging.WARNING),
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    try:
+        config = config_from_args(args)
+    except (OSError, SessionConfigError) as exc:
+        print(f"配置错误: {exc}", file=sys.stderr)
+        return 2
+
+    try:
+        engine = FleetEngine(config) if config.acus else SimulatorEngine(config)
+    except SessionConfigError as exc:
+        print(f"配置错误: {exc}", file=sys.stderr)
+        return 2
+    engine.status.connect(lambda msg: logging.getLogger("ACUSim").info(msg))
+    stop = threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        try:
+            signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        except (AttributeError, ValueError):
+            pass
+
+    def _tick(eng) -> None:
+        print(format_stats(eng.stats()), flush=True)
+
+    try:
+        stats = engine.run(stop_event=stop, on_tick=_tick)
+    except RuntimeError as exc:
+        print(f"启动失败: {exc}", file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False, indent=2, default=str))
+    else:
+        print(format_stats(stats))
+    return 0
@@ -0,0 +1,195 @@
+"""无界面会话配置：端口、发送内容、时长与录制，均可写在 YAML/JSON 文件里。
+
+示例::
+
+    target_ip: 127.0.0.1
+    transport: asyncio
+    period_ms: 10
+    duration_s: 60
+    controls:
+      bool_commands: {"8:0": true}
+      freq_controls: {10: 50}
+    scenario: scenarios/ramp.yaml
+    record_dir: recordings
+    targets:
+      - {name: INV1, ip: 10.2.0.11, port: 49152}
+      - {name: INV2, ip: 10.2.0.12, port: 49152, overrides: {10: "01F4"}}
+
+`controls` 与场景文件的 `set` 步骤写法相同；`scenario` 播放完后若
+`stop_after_scenario` 为真则结束会话。未知键直接报错，避免拼写错误被忽略。
+
+`acus` 非空时在一个进程内仿真多个 ACU（见 `engine.fleet`）：每项是对
+顶层配置的覆盖，另加 `name`。各 ACU 自己 `routes` 中登记的设备归它所有（顶层 `routes` 与自动发现的
+设备归第一个 ACU）::
+
+    acus:
+      - {name: ACU1, acu_send_port: 49152, target_ip: 10.2.0.5}
+      - name: ACU2
+        acu_send_port: 49162
+        target_ip: 10.2.0.6
+        routes: [{ip: 10.2.0.6, port: 49153, device: INV1-B, category: INV}]
+"""
+
+import copy
+import json
+import os
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Mapping, Optional, Union
+
+from model.send_target import SendTarget
+
+TRANSPORTS = ("thread", "asyncio")
+
+
+class SessionConfigError(ValueError):
+    """会话配置无法解析。"""
+
+
+@dataclass
+class SessionConfig:
+    name: str = "ACU"
+    acu_ip: str = "10.2.0.1"
+    acu_send_port: int = 49152
+    acu_receive_port: int = 49156
+    extra_receive_ports: List[int] = field(default_factory=list)
+    target_ip: str = "10.2.0.5"
+    target_receive_port: int = 49152
+    receive_mode: str = "bytes"
+    recv_buffer_bytes: int = 0
+    # UDP 传输："thread"（接收线程 + select）或 "asyncio"（事件循环线程）
+    transport: str = "thread"
+    period_ms: float = 100
+    # None 表示一直运行直到被中断
+    duration_s: Optional[float] = None
+    send: bool = True
+    controls: Dict[str, Any] = field(default_factory=dict)
+    scenario: Optional[Union[str, Dict[str, Any]]] = None
+    stop_after_scenario: bool = False
+    targets: List[Dict[str, Any]] = field(default_factory=list)
+    # 额外的来源登记：[{ip, port, device, category}]
+    routes: List[Dict[str, Any]] = field(default_factory=list)
+    auto_discover: bool = True
+    parse_backend: str = "inline"
+    parse_workers: int = 2
+    record_dir: Optional[str] = None
+    # None 采样全部已定义信号
+    record_signals: Optional[List[str]] = None
+    capture: Optional[str] = None
+    stats_interval_s: float = 0.0
+    # 多 ACU：每项为对上面各项的覆盖
+    acus: List[Dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "SessionConfig":
+        known = {f.name for f in fields(cls)}
+        unknown = sorted(set(data) - known)
+        if unknown:
+            raise SessionConfigError(f"未知配置项: {', '.join(unknown)}")
+        cfg = cls(**dict(data))
+        cfg.validate()
+        return cfg
+
+    def validate(self) -> None:
+        if float(self.period_ms) <= 0:
+            raise SessionConfigError("period_ms 必须大于 0")
+        if self.duration_s is not None and float(self.duration_s) < 0:
+            raise SessionConfigError("duration_s 不能为负")
+        if self.parse_backend not in ("inline", "process"):
+            raise SessionConfigError(f"未知解析后端: {self.parse_backend}")
+        if self.receive_mode not in ("bytes", "buffer"):
+            raise SessionConfigError(f"未知接收模式: {self.receive_mode}")
+        if self.transport not in TRANSPORTS:
+            raise SessionConfigError(f"未知通信传输方式: {self.transport}")
+        if self.transport == "asyncio" and self.receive_mode != "bytes":
+            raise SessionConfigError("asyncio 传输只支持 bytes 接收模式")
+        self.send_targets()
+        self.acu_configs()
+
+    def comm_config(self) -> Dict[str, Any]:
+        """`CommunicationController.update_config` 的参数。"""
+        return {
+            "acu_ip": self.acu_ip,
+            "acu_send_port": int(self.acu_send_port),
+            "acu_receive_port": int(self.acu_receive_port),
+            "extra_receive_ports": [int(p) for p in self.extra_receive_ports],
+            "target_ip": self.target_ip,
+            "target_receive_port": int(self.target_receive_port),
+            "period_ms": self.period_ms,
+            "receive_mode": self.receive_mode,
+            "recv_buffer_bytes": int(self.recv_buffer_bytes),
+        }
+
+    def send_targets(self) -> List[SendTarget]:
+        targets = []
+        for i, item in enumerate(self.targets):
+            try:
+                overrides = {
+                    int(offset): (
+                        bytes.fromhex(data) if isinstance(data, str) else bytes(data)
+                    )
+                    for offset, data in (item.get("overrides") or {}).items()
+                }
+                targets.append(
+                    SendTarget(
+                        name=str(item.get("name") or f"target{i + 1}"),
+                        ip=str(item["ip"]),
+                        port=int(item.get("port", self.target_receive_port)),
+                        overrides=overrides,
+                    )
+                )
+            except (KeyError, TypeError, ValueError) as exc:
+                raise SessionConfigError(f"targets[{i}] 无效: {exc}") from exc
+        return targets
+
+    def acu_configs(self) -> List["SessionConfig"]:
+        """展开 `acus`：每个 ACU 的完整配置（录制目录按名称分子目录）。
+
+        解析后端与抓包由多 ACU 引擎统一持有，各 ACU 配置中固定为进程内/关闭。
+        """
+        base = {
+            f.name: copy.deepcopy(getattr(self, f.name))
+            for f in fields(self)
+            if f.name != "acus"
+        }
+        configs: List[SessionConfig] = []
+        names = set()
+        for i, item in enumerate(self.acus):
+            if not isinstance(item, Mapping):
+                raise SessionConfigError(f"acus[{i}] 应为映射")
+            if "acus" in item:
+                raise SessionConfigError(f"acus[{i}] 不能嵌套 acus")
+            data = dict(base)
+            data.update(copy.deepcopy(dict(item)))
+            name = str(item.get("name") or f"ACU{i + 1}")
+            if name in names:
+                raise SessionConfigError(f"ACU 名称重复: {name}")
+            names.add(name)
+            data["name"] = name
+            # 顶层 routes 由多 ACU 引擎登记并归第一个 ACU，不逐个继承
+            data["routes"] = copy.deepcopy(list(item.get("routes") or []))
+            if "record_dir" not in item and self.record_dir is not None:
+                data["record_dir"] = os.path.join(self.record_dir, name)
+            data["parse_backend"] = "inline"
+            data["capture"] = None
+            configs.append(SessionConfig.from_mapping(data))
+        return configs
+
+
+def load_session_config(path) -> SessionConfig:
+    """读取 YAML/JSON 会话配置文件。"""
+    path = os.fspath(path)
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith(".json"):
+        data = json.loads(text)
+    else:
+        import yaml
+
+        data = yaml.safe_load(text) or {}
+    if not isinstance(data, dict):
+        raise SessionConfigError(f"会话配置应为映射: {path}")
+    scenario = data.get("scenario")
+    if isinstance(scenario, str) and not os.path.isabs(scenario):
+        # 场景文件相对于配置文件所在目录
+        data["scenario"] = os.path.join(os.path.dirname(path), scenario)
+    return SessionConfig.from_mapping(data)
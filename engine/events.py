@@ -0,0 +1,33 @@
+"""引擎事件：不依赖 Qt 的回调列表，界面可把它们转接到自己的信号上。"""
+
+import logging
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class Hook:
+    """一个事件的订阅者列表；回调在触发事件的线程中同步执行。"""
+
+    def __init__(self) -> None:
+        self._callbacks: List[Callable[..., None]] = []
+
+    def connect(self, callback: Callable[..., None]) -> None:
+        if callback not in self._callbacks:
+            self._callbacks.append(callback)
+
+    def disconnect(self, callback: Callable[..., None]) -> None:
+        try:
+            self._callbacks.remove(callback)
+        except ValueError:
+            pass
+
+    def emit(self, *args) -> None:
+        for callback in list(self._callbacks):
+            try:
+                callback(*args)
+            except Exception:
+                logger.exception("事件回调失败: %r", callback)
+
+    def __len__(self) -> int:
+        return len(self._callbacks)
@@ -0,0 +1,354 @@
+"""多 ACU 仿真：一个进程内运行 N 个 ACU，共用发送线程、套接字与解析。
+
+每个 ACU 是一个 `SimulatorEngine`，拥有自己的控制状态、生命信号、发送
+目标、时延探针、设备链路统计、录制流与统计。`FleetEngine` 持有共享部分：
+
+* 一个 `MultiSendScheduler` 线程按各 ACU 的周期发送；
+* 一个 `CommunicationController` 监听所有 ACU 的接收端口（一个接收线程），
+  发送套接字按本地端口池化，端口相同的 ACU 共用一个套接字；
+* 一个 `ParseController`（以及可选的解析进程池）。
+
+接收帧按来源设备归属到 ACU：某个 ACU 的 `routes` 中登记的设备归它，
+其余（默认端口映射、顶层 routes 与自动发现的设备）归第一个 ACU。
+"""
+
+import dataclasses
+import logging
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from controllers.async_transport import create_communication_controller
+from controllers.parse_controller import ParseController
+from controllers.send_scheduler import MultiSendScheduler
+from engine.config import SessionConfig, SessionConfigError
+from engine.events import Hook
+from engine.simulator import SimulatorEngine, run_session
+from model.send_target import FanoutFrame, SendTarget
+
+logger = logging.getLogger("ACUSim.fleet")
+
+
+class AcuLink:
+    """一个 ACU 看到的通信接口（作为 `SimulatorEngine.comm`）。
+
+    发送经共享的 `CommunicationController` 与池化套接字完成；套接字的建立、
+    接收线程与关闭由 `FleetEngine` 统一管理，这里的 setup/stop 不做实际工作。
+    目标名加上 ACU 名前缀，使共享控制器中的按目标统计互不混淆。
+    """
+
+    def __init__(self, name: str, comm, default_target: SendTarget):
+        self.name = name
+        self.comm = comm
+        self.sock: Optional[socket.socket] = None
+        self.config: Dict[str, Any] = {}
+        self.on_receive = None
+        self.on_error = None
+        self.on_status = None
+        self._default = default_target
+        self._targets: List[SendTarget] = []
+
+    @property
+    def send_targets(self) -> List[SendTarget]:
+        return list(self._targets) or [self._default]
+
+    def update_config(self, **cfg) -> None:
+        self.config.update(cfg)
+
+    def set_send_targets(self, targets) -> None:
+        self._targets = [
+            dataclasses.replace(t, name=f"{self.name}/{t.name}") for t in targets or ()
+        ]
+
+    def setup(self) -> bool:
+        return self.sock is not None
+
+    def start_receive_loop(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def send(self, data: bytes) -> None:
+        self.send_fanout(FanoutFrame(bytes(data), [self._default], [()]))
+
+    def send_fanout(self, frame: FanoutFrame) -> None:
+        sock = self.sock
+        if sock is not None:
+            self.comm.send_fanout_via(sock, frame)
+
+    def receive_stats(self) -> Dict[str, Any]:
+        # 套接字层统计属于共享接收端，见 FleetEngine.stats()["receive"]
+        return {}
+
+    def target_stats(self) -> Dict[str, Dict[str, int]]:
+        names = {t.name for t in self.send_targets}
+        return {
+            name: st for name, st in self.comm.target_stats().items() if name in names
+        }
+
+
+class FleetEngine:
+    """N 个仿真 ACU 共用一个发送调度线程、一个套接字池与一个解析器。"""
+
+    def __init__(self, config: SessionConfig, *, comm=None):
+        if not config.acus:
+            raise SessionConfigError("多 ACU 会话需要 acus 列表")
+        self.config = config
+        self.comm = comm or create_communication_controller(config.transport)
+        self.parse_controller = ParseController()
+        self.scheduler = MultiSendScheduler()
+        self.parse_engine = None
+        self.acus: Dict[str, SimulatorEngine] = {}
+        self._links: Dict[str, AcuLink] = {}
+        # 设备名 -> 所属 ACU；未登记的设备归第一个 ACU
+        self._owners: Dict[str, SimulatorEngine] = {}
+        # 本地发送端口 -> 套接字（不含共享控制器自己的 send_sock）
+        self._sockets: Dict[int, socket.socket] = {}
+        self._started_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+        # 停止前的接收统计：关闭套接字后 SO_RCVBUF 与内核丢包已无从读取
+        self._final_receive: Optional[Dict[str, Any]] = None
+        self.running = False
+        self.frames_received = 0
+        self.routing_errors = 0
+        self.send_sockets = 0
+
+        # 事件：frame_parsed(acu, route, parsed, ts)、
+        # device_online(acu, name, online)、status(msg)
+        self.frame_parsed = Hook()
+        self.device_online = Hook()
+        self.status = Hook()
+
+        for cfg in config.acu_configs():
+            default = SendTarget(
+                name=f"{cfg.name}/{cfg.target_ip}:{cfg.target_receive_port}",
+                ip=cfg.target_ip,
+                port=int(cfg.target_receive_port),
+            )
+            link = AcuLink(cfg.name, self.comm, default)
+            acu = SimulatorEngine(
+                cfg,
+                comm=link,
+                parse_controller=self.parse_controller,
+                scheduler_pool=self.scheduler,
+                devices={},
+            )
+            self._forward(cfg.name, acu)
+            for item in cfg.routes:
+                self._owners[str(item["device"])] = acu
+            self.acus[cfg.name] = acu
+            self._links[cfg.name] = link
+        self._default = next(iter(self.acus.values()))
+
+    def _forward(self, name: str, acu: SimulatorEngine) -> None:
+        acu.frame_parsed.connect(
+            lambda route, parsed, ts: self.frame_parsed.emit(name, route, parsed, ts)
+        )
+        acu.device_online.connect(
+            lambda dev, online: self.device_online.emit(name, dev, online)
+        )
+        acu.status.connect(lambda msg: self.status.emit(f"[{name}] {msg}"))
+
+    def owner_of(self, device_id: str) -> SimulatorEngine:
+        return self._owners.get(device_id, self._default)
+
+    # ------------------------------------------------------------------
+    # 接收
+    # ------------------------------------------------------------------
+    def handle_frame(self, data, addr) -> None:
+        """共享接收线程：路由一次，交给来源设备所属的 ACU。"""
+        arrived = time.time()
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        self.frames_received += 1
+        try:
+            route = self.parse_controller.route(addr, data)
+        except Exception:
+            self.routing_errors += 1
+            logger.exception("Routing frame from %s failed", addr)
+            return
+        owner = self.owner_of(route.device_id)
+        devices = owner.link_monitor.devices
+        if route.device is not None and route.device_id not in devices:
+            devices[route.device_id] = route.device
+        if owner.admit(data, addr, arrived, route) is None or route.protocol is None:
+            return
+        engine = self.parse_engine
+        if engine is not None and engine.submit(
+            route, data, arrived, f"{addr[0]}:{addr[1]}"
+        ):
+            return
+        owner.parse_and_deliver(route, data, addr, arrived)
+
+    def _drain_engine(self) -> None:
+        engine = self.parse_engine
+        if engine is None:
+            return
+        for route, parsed, arrived, _addr, _length in engine.drain():
+            self.owner_of(route.device_id)._deliver(route, parsed, arrived)
+
+    def poll(self, now: Optional[float] = None) -> List[Tuple[str, str, bool]]:
+        """周期调用：解析进程结果与各 ACU 的在线状态变化。"""
+        self._drain_engine()
+        events = []
+        for name, acu in self.acus.items():
+            events.extend((name, dev, online) for dev, online in acu.poll(now))
+        return events
+
+    # ------------------------------------------------------------------
+    # 会话
+    # ------------------------------------------------------------------
+    def _receive_ports(self) -> List[int]:
+        ports: List[int] = []
+        for acu in self.acus.values():
+            cfg = acu.config
+            for port in [cfg.acu_receive_port, *cfg.extra_receive_ports]:
+                if int(port) not in ports:
+                    ports.append(int(port))
+        return ports
+
+    def _socket_for(self, port: int) -> socket.socket:
+        if port == int(self.comm.config["acu_send_port"]) and self.comm.send_sock:
+            return self.comm.send_sock
+        sock = self._sockets.get(port)
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.bind(("0.0.0.0", port))
+            except OSError:
+                sock.close()
+                raise
+            self._sockets[port] = sock
+        return sock
+
+    def _close_sockets(self) -> None:
+        sockets, self._sockets = self._sockets, {}
+        for sock in sockets.values():
+            try:
+                sock.close()
+            except Exception:
+                pass
+        for link in self._links.values():
+            link.sock = None
+
+    def start(self) -> bool:
+        """建立共享套接字、启动各 ACU 与共享发送线程；失败时返回 False。"""
+        if self.running:
+            return True
+        cfg = self.config
+        first = self._default.config
+        ports = self._receive_ports()
+        self.comm.update_config(
+            acu_ip=first.acu_ip,
+            acu_send_port=int(first.acu_send_port),
+            acu_receive_port=ports[0],
+            extra_receive_ports=ports[1:],
+            receive_mode=cfg.receive_mode,
+            recv_buffer_bytes=int(cfg.recv_buffer_bytes),
+        )
+        if not self.comm.setup():
+            self.status.emit("Socket 初始化失败")
+            return False
+        try:
+            for name, acu in self.acus.items():
+                self._links[name].sock = self._socket_for(int(acu.config.acu_send_port))
+        except OSError as e:
+            self.status.emit(f"发送套接字初始化失败: {e}")
+            self._close_sockets()
+            self.comm.stop()
+            return False
+        self.send_sockets = 1 + len(self._sockets)
+        self.comm.on_receive = self.handle_frame
+        self.comm.on_error = lambda msg: self.status.emit(str(msg))
+        self.comm.on_status = lambda msg: self.status.emit(str(msg))
+        self.parse_controller.auto_discover = bool(cfg.auto_discover)
+        for item in cfg.routes:
+            self.parse_controller.register(
+                str(item.get("ip", "")),
+                int(item["port"]),
+                str(item["device"]),
+                item.get("category"),
+            )
+        if cfg.parse_backend == "process":
+            from controllers.process_parse import ProcessParseEngine
+
+            self.parse_engine = ProcessParseEngine(
+                self.parse_controller, workers=cfg.parse_workers
+            ).start()
+            self.parse_engine.wait_ready()
+        if cfg.capture:
+            self.comm.start_capture(cfg.capture)
+        self.scheduler.start()
+        for acu in self.acus.values():
+            acu.start()
+        self.frames_received = self.routing_errors = 0
+        self.comm.start_receive_loop()
+        self.running = True
+        self._started_at = time.time()
+        self._stopped_at = None
+        self._final_receive = None
+        return True
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.running = False
+        self.scheduler.stop()
+        try:
+            self._final_receive = self.comm.receive_stats()
+        except Exception:
+            self._final_receive = {}
+        try:
+            self.comm.stop()
+        except Exception:
+            logger.exception("comm.stop() failed")
+        engine = self.parse_engine
+        if engine is not None:
+            self._drain_engine()
+            self.parse_engine = None
+            engine.stop()
+        for acu in self.acus.values():
+            acu.stop()
+        self._close_sockets()
+        self._stopped_at = time.time()
+
+    @property
+    def scenario_finished(self) -> bool:
+        """所有回放场景的 ACU 都已播完（没有 ACU 回放场景时为 False）。"""
+        players = [acu.scenario_player for acu in self.acus.values()]
+        players = [p for p in players if p is not None]
+        return bool(players) and all(p.finished for p in players)
+
+    def run(
+        self,
+        duration_s: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None,
+        on_tick: Optional[Callable[["FleetEngine"], None]] = None,
+    ) -> Dict[str, Any]:
+        """运行直到时长结束、全部场景播完（可选）或 stop_event 置位。"""
+        return run_session(self, duration_s, stop_event, on_tick)
+
+    def stats(self) -> Dict[str, Any]:
+        """共享接收端统计与逐个 ACU 的会话统计（结构同 SimulatorEngine.stats）。"""
+        end = self._stopped_at or time.time()
+        elapsed = 0.0 if self._started_at is None else end - self._started_at
+        receive = {}
+        if not self.running and self._final_receive is not None:
+            receive = self._final_receive
+        else:
+            try:
+                receive = self.comm.receive_stats()
+            except Exception:
+                pass
+        return {
+            "elapsed_s": elapsed,
+            "receive": {
+                "frames": self.frames_received,
+                "routing_errors": self.routing_errors,
+                **receive,
+            },
+            "send_sockets": self.send_sockets,
+            "acus": {name: acu.stats() for name, acu in self.acus.items()},
+        }
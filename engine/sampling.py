@@ -0,0 +1,268 @@
+"""信号采样：把发送帧与解析结果换算成 ``{signal_id: value}`` 样本。
+
+提取规则与波形控制器一致（`WaveformController` 直接调用这里的函数），
+不依赖 Qt，无界面引擎也能按相同的信号 ID 写入录制文件。
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("WaveformController")
+
+
+def extract_send_value(data_buffer, signal_info):
+    """从发送数据缓冲区提取信号值 - 修复版本"""
+    try:
+        byte_pos = signal_info.get("byte")
+        if byte_pos is None:
+            logger.warning(f"信号 {signal_info.get('name')} 无字节位置")
+            return None
+
+        if signal_info["type"] == "bool":
+            bit_pos = signal_info.get("bit")
+            if bit_pos is not None and byte_pos < len(data_buffer):
+                value = 1 if (data_buffer[byte_pos] & (1 << bit_pos)) else 0
+                logger.debug(
+                    "提取布尔信号: %s 字节%d位%d = %s",
+                    signal_info["name"],
+                    byte_pos,
+                    bit_pos,
+                    value,
+                )
+                return value
+            else:
+                logger.warning(f"布尔信号 {signal_info['name']} 位位置无效")
+                return 0
+
+        elif signal_info["type"] == "analog":
+            if byte_pos + 1 < len(data_buffer):
+                raw_value = (data_buffer[byte_pos] << 8) | data_buffer[byte_pos + 1]
+
+                scale = signal_info.get("scale")
+                if isinstance(scale, (int, float)) and scale not in (0, 1):
+                    value = raw_value * scale
+                    logger.debug(
+                        "提取模拟信号(带比例): %s 原始=%s 比例=%s 结果=%s",
+                        signal_info.get("name"),
+                        raw_value,
+                        scale,
+                        value,
+                    )
+                    return value
+
+                # 根据信号类型进行转换
+                if "频率" in signal_info["name"]:
+                    value = raw_value * 0.1
+                    logger.debug(
+                        "提取频率信号: %s 原始=%s 转换后=%s Hz",
+                        signal_info["name"],
+                        raw_value,
+                        value,
+                    )
+                    return value
+                elif "电压" in signal_info["name"]:
+                    value = raw_value * 0.25
+                    logger.debug(
+                        "提取电压信号: %s 原始=%s 转换后=%s V",
+                        signal_info["name"],
+                        raw_value,
+                        value,
+                    )
+                    return value
+                elif "温度" in signal_info["name"]:
+                    value = raw_value * 0.1
+                    logger.debug(
+                        "提取温度信号: %s 原始=%s 转换后=%s °C",
+                        signal_info["name"],
+                        raw_value,
+                        value,
+                    )
+                    return value
+                elif (
+                    "生命信号" in signal_info["name"]
+                    or "软件编码" in signal_info["name"]
+                    or "软件版本" in signal_info["name"]
+                ):
+                    # 设备信息类信号（生命信号、软件编码、软件版本等）直接使用原始值
+                    logger.debug(
+                        f"提取设备信息信号: {signal_info['name']} = {raw_value}"
+                    )
+                    return raw_value
+                else:
+                    logger.debug(f"提取模拟信号: {signal_info['name']} = {raw_value}")
+                    return raw_value
+            else:
+                logger.warning(f"模拟信号 {signal_info['name']} 字节位置超出范围")
+                return 0
+
+    except Exception as e:
+        logger.error(f"提取信号值错误 {signal_info.get('name')}: {e}")
+        return 0  # 返回默认值而不是None
+
+
+def extract_receive_value(parsed_data, signal_info, device_type=None):
+    """从解析数据中提取接收信号值"""
+    try:
+        signal_name = signal_info["name"]
+
+        # 在解析数据中查找对应的值
+        for category, items in parsed_data.items():
+            if isinstance(items, dict):
+                for key, value in items.items():
+                    if signal_name == key:  # 精确匹配信号名称
+                        # 布尔信号返回 0 或 1
+                        if signal_info["type"] == "bool":
+                            return 1 if value else 0
+                        else:
+                            return (
+                                float(value)
+                                if isinstance(value, (int, float))
+                                else value
+                            )
+
+        # 对于设备信息类模拟信号（APU生命信号、软件编码、软件版本等），从设备信息中提取
+        if signal_info["type"] == "analog" and signal_info["category"] == "设备信息":
+            device_info = parsed_data.get("设备信息", {})
+            # 去掉信号名称中的"APU"前缀来匹配解析数据中的键名
+            clean_signal_name = signal_name.replace("APU", "").strip()
+            if clean_signal_name in device_info:
+                value = device_info[clean_signal_name]
+                logger.debug(f"提取设备信息信号: {signal_name} = {value}")
+                return float(value) if isinstance(value, (int, float)) else value
+
+        # 对于故障类布尔信号，需要特殊处理
+        if signal_info["type"] == "bool" and signal_info["category"] == "故障信息":
+            # 检查是否在故障列表中
+            fault_list = parsed_data.get("故障信息", {}).get("故障列表", [])
+            if (
+                signal_name in fault_list
+                or signal_name.replace("BCC", "") in fault_list
+                or signal_name.replace("模块", "") in fault_list
+            ):
+                return 1
+            else:
+                return 0
+
+    except (KeyError, ValueError, TypeError) as e:
+        logger.error(f"提取接收信号错误: {e}")
+        pass
+
+    return None
+
+
+def _schema_item(schema, section: str, label: str):
+    for entry in schema.layout:
+        if entry[0] == section and entry[1] is not None:
+            for item in entry[1]:
+                if item[0] == label:
+                    return item
+    return None
+
+
+def _item_column(schema, values, item, as_bool: bool):
+    label, kind, arg = item
+    rows = values.shape[0]
+    if kind in ("float", "int", "bool"):
+        column = values[:, arg]
+        if as_bool:
+            return (column != 0.0).astype(np.int64)
+        return np.trunc(column) if kind == "int" else column
+    if kind == "faults":
+        if not as_bool:
+            return None
+        active = values[:, len(schema.columns) :].any(axis=1)
+        return (active | bool(arg)).astype(np.int64)
+    if as_bool:
+        return np.full(rows, 1 if arg else 0, dtype=np.int64)
+    if isinstance(arg, (int, float)):
+        return np.full(rows, float(arg))
+    return np.full(rows, arg, dtype=object)
+
+
+def receive_column(schema, values, signal_info) -> Optional[np.ndarray]:
+    """按 `extract_receive_value` 的规则从列式解析结果中取整列样本。
+
+    schema 为 `ColumnSchema`，values 为 (帧数, schema.width) 的矩阵；
+    该类别不产生此信号时返回 None。
+    """
+    name = signal_info["name"]
+    as_bool = signal_info["type"] == "bool"
+    for entry in schema.layout:
+        if entry[1] is None:
+            continue
+        for item in entry[1]:
+            if item[0] == name:
+                return _item_column(schema, values, item, as_bool)
+
+    category = signal_info.get("category")
+    if not as_bool and category == "设备信息":
+        item = _schema_item(schema, "设备信息", name.replace("APU", "").strip())
+        if item is not None:
+            return _item_column(schema, values, item, False)
+
+    if as_bool and category == "故障信息":
+        names = {name, name.replace("BCC", ""), name.replace("模块", "")}
+        hit = np.zeros(values.shape[0], dtype=bool)
+        item = _schema_item(schema, "故障信息", "故障列表")
+        if item is not None and item[1] == "faults":
+            base = len(schema.columns)
+            bits = [
+                base + k
+                for k, (_byte, _bit, label) in enumerate(schema.fault_bits)
+                if label in names
+            ]
+            if bits:
+                hit |= values[:, bits].any(axis=1)
+            if names.intersection(item[2]):
+                # 无故障位置位时故障列表取默认值
+                hit |= ~values[:, base:].any(axis=1)
+        elif item is not None and isinstance(item[2], (list, tuple)):
+            hit |= bool(names.intersection(item[2]))
+        return hit.astype(np.int64)
+
+    return None
+
+
+class SignalSampler:
+    """按选中的信号从帧/解析结果中取样；未指定时采样全部已定义信号。"""
+
+    def __init__(self, signal_manager, selected: Optional[Iterable[str]] = None):
+        self.signal_manager = signal_manager
+        self._send: List[Tuple[str, Dict[str, Any]]] = []
+        self._recv: List[Tuple[str, Dict[str, Any]]] = []
+        self.select(selected)
+
+    def select(self, signal_ids: Optional[Iterable[str]] = None) -> None:
+        if signal_ids is None:
+            signal_ids = list(self.signal_manager.signals)
+        self._send, self._recv = [], []
+        for signal_id in signal_ids:
+            info = self.signal_manager.get_signal_info(signal_id)
+            if not info:
+                continue
+            if signal_id.startswith("send_"):
+                self._send.append((signal_id, info))
+            elif signal_id.startswith("recv_"):
+                self._recv.append((signal_id, info))
+
+    @property
+    def signal_ids(self) -> List[str]:
+        return [sid for sid, _ in self._send] + [sid for sid, _ in self._recv]
+
+    def send_values(self, frame) -> Dict[str, Any]:
+        values = {}
+        for signal_id, info in self._send:
+            value = extract_send_value(frame, info)
+            if value is not None:
+                values[signal_id] = value
+        return values
+
+    def receive_values(self, parsed, device_type: str) -> Dict[str, Any]:
+        values = {}
+        for signal_id, info in self._recv:
+            value = extract_receive_value(parsed, info, device_type)
+            if value is not None:
+                values[signal_id] = value
+        return values
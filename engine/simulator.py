@@ -0,0 +1,519 @@
+"""无界面仿真引擎：通信、周期发送、帧构建、解析、采样缓冲与录制。
+
+引擎只用线程与普通回调（`engine.events.Hook`），不导入 Qt，可在没有
+X/GPU 的服务器上跑多个实例。图形界面是它的一个客户端：界面把控件写入
+同一个 `ControlState`，通过 `admit` 复用接收前端（路由、链路统计、在线
+判定），通过 `start_sending` / `play_scenario` 驱动发送，并订阅
+`frame_sent` 把已发送帧转给波形。
+
+无界面运行时 `run()` 完成全部流程：按 `SessionConfig` 建立套接字、
+写入控制字段、开始发送（或回放场景）、在接收线程内直接解析并更新
+最新值表，按选中的信号采样写入内存缓冲与分段录制，到时后返回统计。
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from controllers.async_transport import create_communication_controller
+from controllers.device_watchdog import DeviceWatchdog
+from controllers.frame_builder import FrameBuilder
+from controllers.latency_probe import LatencyProbe
+from controllers.link_monitor import LinkMonitor
+from controllers.parse_controller import ParseController, Route
+from controllers.scenario import (
+    ScenarioPlayer,
+    apply_controls,
+    compile_scenario,
+    load_scenario,
+)
+from controllers.send_scheduler import MultiSendScheduler, SendScheduler
+from data_buffer import DataBuffer
+from engine.config import SessionConfig
+from engine.events import Hook
+from model.control_state import ControlState
+from model.device import Device, DeviceConfig
+from model.latest_values import LatestValueTable
+from model.send_target import FanoutFrame
+
+logger = logging.getLogger("ACUSim.engine")
+
+# 无界面运行时轮询看门狗 / 解析进程结果的间隔
+_TICK_S = 0.05
+
+
+class SimulatorEngine:
+    """一个仿真 ACU 实例的全部非界面状态。"""
+
+    def __init__(
+        self,
+        config: Optional[SessionConfig] = None,
+        *,
+        comm=None,
+        parse_controller=None,
+        control_state: Optional[ControlState] = None,
+        acu_device: Optional[Device] = None,
+        frame_builder: Optional[FrameBuilder] = None,
+        signal_manager=None,
+        scheduler_pool: Optional[MultiSendScheduler] = None,
+        devices: Optional[Dict[str, Device]] = None,
+    ):
+        self.config = config or SessionConfig()
+        self.comm = comm or create_communication_controller(self.config.transport)
+        self.parse_controller = parse_controller or ParseController()
+        if frame_builder is not None:
+            control_state = getattr(frame_builder, "control_state", control_state)
+            acu_device = getattr(frame_builder, "acu_device", acu_device)
+        self.control_state = control_state or ControlState()
+        self.acu_device = acu_device or Device(
+            DeviceConfig(
+                name=self.config.name,
+                ip=self.config.acu_ip,
+                send_port=self.config.acu_send_port,
+                receive_port=self.config.acu_receive_port,
+                category="ACU",
+            )
+        )
+        self.frame_builder = frame_builder or FrameBuilder(
+            self.control_state, self.acu_device
+        )
+        # 链路统计默认与路由表共享设备记录（多 ACU 时各自一份）；
+        # 看门狗由 poll() 驱动
+        if devices is None:
+            devices = getattr(self.parse_controller, "devices", None)
+        self.link_monitor = LinkMonitor(devices=devices)
+        self.watchdog = DeviceWatchdog(self.link_monitor.devices)
+        self.latency_probe = LatencyProbe()
+        self.latest_values = LatestValueTable()
+        self.signal_manager = signal_manager
+        self.sampler = None
+        self.data_buffer: Optional[DataBuffer] = None
+        self.recorder = None
+        self.parse_engine = None
+
+        # 给定时各路发送作为共享调度线程中的一个 SendJob
+        self.scheduler_pool = scheduler_pool
+        self.scheduler = None
+        self.scenario_player: Optional[ScenarioPlayer] = None
+        self._live_build: Optional[Callable[[], bytes]] = None
+        self._last_send_stats: Dict[str, float] = {}
+        self._recorded: Optional[Dict[str, Any]] = None
+        self._buffer_lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+        # 停止前的接收统计：关闭套接字后 SO_RCVBUF 与内核丢包已无从读取
+        self._final_receive: Optional[Dict[str, Any]] = None
+        self.running = False
+        self.frames_received = 0
+        self.frames_parsed = 0
+        self.parse_errors = 0
+
+        # 事件：frame_sent(frame, ts)、frame_parsed(route, parsed, ts)、
+        # device_online(name, online)、status(msg)
+        self.frame_sent = Hook()
+        self.frame_parsed = Hook()
+        self.device_online = Hook()
+        self.status = Hook()
+
+    # ------------------------------------------------------------------
+    # 接收
+    # ------------------------------------------------------------------
+    def admit(
+        self,
+        data,
+        addr,
+        arrived: Optional[float] = None,
+        route: Optional[Route] = None,
+    ) -> Optional[Route]:
+        """接收前端：路由、链路统计与在线登记；路由失败时返回 None。
+
+        route 已由调用方（如 `FleetEngine`）算出时直接使用。
+        """
+        arrived = time.time() if arrived is None else arrived
+        self.frames_received += 1
+        if route is None:
+            try:
+                route = self.parse_controller.route(addr, data)
+            except Exception:
+                logger.exception("Routing frame from %s failed", addr)
+                return None
+        try:
+            if route.device is not None:
+                if self.link_monitor.on_device_frame(route.device, data, arrived):
+                    self.watchdog.seen(route.device_id)
+        except Exception:
+            pass
+        return route
+
+    def handle_frame(
+        self,
+        data,
+        addr,
+        route: Optional[Route] = None,
+        arrived: Optional[float] = None,
+    ) -> None:
+        """无界面接收回调（接收线程内）：解析并分发一帧。"""
+        arrived = time.time() if arrived is None else arrived
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        route = self.admit(data, addr, arrived, route)
+        if route is None or route.protocol is None:
+            return
+        engine = self.parse_engine
+        if engine is not None and engine.submit(
+            route, data, arrived, f"{addr[0]}:{addr[1]}"
+        ):
+            return
+        self.parse_and_deliver(route, data, addr, arrived)
+
+    def parse_and_deliver(self, route: Route, data, addr, arrived: float) -> None:
+        """在当前线程解析一帧已登记的帧并分发给本实例。"""
+        try:
+            parsed = self.parse_controller.parse_route(route, data)
+        except Exception:
+            self.parse_errors += 1
+            logger.exception("Parsing frame from %s failed", addr)
+            return
+        self._deliver(route, parsed, arrived)
+
+    def _deliver(self, route: Route, parsed: Dict[str, Any], arrived: float) -> None:
+        if "错误" in parsed:
+            self.parse_errors += 1
+            return
+        self.frames_parsed += 1
+        device_type = route.device_id
+        self.latest_values.update_parsed(device_type, parsed)
+        self.latency_probe.on_receive(device_type, parsed, arrived)
+        sampler = self.sampler
+        if sampler is not None:
+            self._ingest(sampler.receive_values(parsed, device_type), arrived)
+        self.frame_parsed.emit(route, parsed, arrived)
+
+    def _ingest(self, values: Dict[str, Any], ts: float) -> None:
+        if not values:
+            return
+        if self.data_buffer is not None:
+            with self._buffer_lock:
+                self.data_buffer.add_data_points(values, ts)
+        if self.recorder is not None:
+            self.recorder.submit(values, ts)
+
+    def poll(self, now: Optional[float] = None) -> List[Tuple[str, bool]]:
+        """周期调用：在线状态变化与解析进程结果。"""
+        engine = self.parse_engine
+        if engine is not None:
+            for route, parsed, arrived, _addr, _length in engine.drain():
+                self._deliver(route, parsed, arrived)
+        events = self.watchdog.poll(now)
+        for name, online in events:
+            self.device_online.emit(name, online)
+        return events
+
+    def reset_statistics(self) -> List[Tuple[str, bool]]:
+        """清零时延、链路与在线状态，返回此前在线设备的离线事件。"""
+        self.latency_probe.reset()
+        events = self.watchdog.reset()
+        self.link_monitor.reset()
+        self.frames_received = self.frames_parsed = self.parse_errors = 0
+        for name, online in events:
+            self.device_online.emit(name, online)
+        return events
+
+    # ------------------------------------------------------------------
+    # 发送
+    # ------------------------------------------------------------------
+    def _on_sent(self, frame, ts: float) -> None:
+        """调度线程：时延探针、发送采样与 frame_sent 事件。"""
+        if isinstance(frame, FanoutFrame):
+            frame = frame.base
+        self.latency_probe.on_send(frame, ts)
+        sampler = self.sampler
+        if sampler is not None:
+            self._ingest(sampler.send_values(frame), ts)
+        self.frame_sent.emit(frame, ts)
+
+    def _start_scheduler(self, period_ms: float, build_frame):
+        comm = self.comm
+
+        # 目标每帧从 comm 读取，运行中 set_send_targets 下一帧即生效
+        def build():
+            frame = build_frame()
+            targets = getattr(comm, "send_targets", None)
+            if targets:
+                # 扇出：每周期构建一次公共帧，一次遍历发给所有目标
+                return self.frame_builder.fanout_from(bytes(frame), targets)
+            return frame
+
+        def send(frame) -> None:
+            if isinstance(frame, FanoutFrame):
+                comm.send_fanout(frame)
+            else:
+                comm.send(frame)
+
+        pool = self.scheduler_pool
+        if pool is not None:
+            scheduler = pool.add(period_ms, build, send, on_sent=self._on_sent)
+        else:
+            scheduler = SendScheduler(period_ms, build, send, on_sent=self._on_sent)
+            scheduler.start()
+        scheduler.on_error = lambda msg: logger.warning(msg)
+        self.scheduler = scheduler
+        return scheduler
+
+    def _build_live(self) -> bytes:
+        return bytes(self.frame_builder.build())
+
+    def start_sending(self, period_ms: Optional[float] = None, build_frame=None):
+        """按当前控制状态周期发送；build_frame 可替换帧来源（界面用）。"""
+        self.stop_sending()
+        self._live_build = build_frame or self._build_live
+        period = self.config.period_ms if period_ms is None else period_ms
+        return self._start_scheduler(period, self._live_build)
+
+    def stop_sending(self) -> None:
+        scheduler, self.scheduler = self.scheduler, None
+        self.scenario_player = None
+        if scheduler is not None:
+            try:
+                scheduler.stop()
+            except Exception:
+                logger.exception("Stopping send scheduler failed")
+            self._last_send_stats = scheduler.stats()
+
+    def set_period(self, period_ms: float) -> None:
+        """修改发送周期；场景回放使用编译时的周期，期间忽略。"""
+        scheduler = self.scheduler
+        if scheduler is not None and self.scenario_player is None:
+            scheduler.set_period(period_ms)
+
+    def play_scenario(
+        self,
+        source,
+        default_period_ms: Optional[float] = None,
+        on_finished: Optional[Callable[[], None]] = None,
+    ) -> ScenarioPlayer:
+        """预编译场景并替换实时帧来源；编译失败时抛出异常，发送不受影响。"""
+        spec = source if isinstance(source, dict) else load_scenario(source)
+        period = spec.get("period_ms") or default_period_ms or self.config.period_ms
+        compiled = compile_scenario(
+            spec, self.frame_builder.protocol, self.control_state, period_ms=period
+        )
+
+        def _finished() -> None:
+            logger.info("Scenario %s finished", compiled.name)
+            if on_finished is not None:
+                on_finished()
+
+        player = ScenarioPlayer(compiled, self.frame_builder.stamp, _finished)
+        live = self._live_build or self._build_live
+        self.stop_sending()
+        self._live_build = live
+        self._start_scheduler(compiled.period_ms, player)
+        self.scenario_player = player
+        self.status.emit(
+            f"场景 {compiled.name}: {compiled.frames} 帧 / {compiled.duration_s:.1f} s"
+        )
+        return player
+
+    def stop_scenario(self, resume_period_ms: Optional[float] = None) -> None:
+        """结束场景回放，恢复发送实时控制状态。"""
+        if self.scenario_player is None:
+            return
+        live = self._live_build
+        self.stop_sending()
+        self.start_sending(resume_period_ms, build_frame=live)
+
+    # ------------------------------------------------------------------
+    # 无界面会话
+    # ------------------------------------------------------------------
+    def _apply_config(self) -> None:
+        cfg = self.config
+        self.comm.update_config(**cfg.comm_config())
+        targets = cfg.send_targets()
+        if targets:
+            self.comm.set_send_targets(targets)
+        self.parse_controller.auto_discover = bool(cfg.auto_discover)
+        for item in cfg.routes:
+            self.parse_controller.register(
+                str(item.get("ip", "")),
+                int(item["port"]),
+                str(item["device"]),
+                item.get("category"),
+            )
+        if cfg.controls:
+            apply_controls(self.control_state, cfg.controls)
+
+    def _start_sampling(self) -> None:
+        cfg = self.config
+        if cfg.record_dir is None and cfg.record_signals is None:
+            return
+        from engine.sampling import SignalSampler
+        from recording.recorder import SegmentRecorder
+        from signal_manager import SignalManager
+
+        if self.signal_manager is None:
+            self.signal_manager = SignalManager()
+        self.sampler = SignalSampler(self.signal_manager, cfg.record_signals)
+        self.data_buffer = DataBuffer(max_points=5000)
+        if cfg.record_dir is not None:
+            self.recorder = SegmentRecorder(
+                cfg.record_dir, signal_info=self.signal_manager.get_signal_info
+            ).start()
+
+    def start(self) -> bool:
+        """按配置建立套接字并开始收发；失败时返回 False 且不留下线程。"""
+        if self.running:
+            return True
+        cfg = self.config
+        self._apply_config()
+        if not self.comm.setup():
+            self.status.emit("Socket 初始化失败")
+            return False
+        self.comm.on_receive = self.handle_frame
+        self.comm.on_error = lambda msg: self.status.emit(str(msg))
+        self.comm.on_status = lambda msg: self.status.emit(str(msg))
+        self._start_sampling()
+        if cfg.parse_backend == "process":
+            from controllers.process_parse import ProcessParseEngine
+
+            self.parse_engine = ProcessParseEngine(
+                self.parse_controller, workers=cfg.parse_workers
+            ).start()
+            self.parse_engine.wait_ready()
+        if cfg.capture:
+            self.comm.start_capture(cfg.capture)
+        self.reset_statistics()
+        self.comm.start_receive_loop()
+        self.running = True
+        self._started_at = time.time()
+        self._stopped_at = None
+        self._final_receive = None
+        if cfg.send:
+            self.start_sending(cfg.period_ms)
+            if cfg.scenario:
+                self.play_scenario(cfg.scenario, cfg.period_ms)
+        return True
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.running = False
+        self.stop_sending()
+        try:
+            self._final_receive = self.comm.receive_stats()
+        except Exception:
+            self._final_receive = {}
+        try:
+            self.comm.stop()
+        except Exception:
+            logger.exception("comm.stop() failed")
+        engine, self.parse_engine = self.parse_engine, None
+        if engine is not None:
+            for route, parsed, arrived, _addr, _length in engine.drain():
+                self._deliver(route, parsed, arrived)
+            engine.stop()
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.stop()
+            self._recorded = {
+                "run_dir": str(recorder.run_dir),
+                "rows": recorder.rows_written,
+                "dropped": recorder.dropped,
+                "segments": len(recorder.segments),
+            }
+        self.watchdog.reset()
+        self._stopped_at = time.time()
+
+    def run(
+        self,
+        duration_s: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None,
+        on_tick: Optional[Callable[["SimulatorEngine"], None]] = None,
+    ) -> Dict[str, Any]:
+        """运行一个会话直到时长结束、场景播完（可选）或 stop_event 置位。"""
+        return run_session(self, duration_s, stop_event, on_tick)
+
+    @property
+    def scenario_finished(self) -> bool:
+        player = self.scenario_player
+        return player is not None and player.finished
+
+    def stats(self) -> Dict[str, Any]:
+        """会话统计：发送节拍、接收计数、各设备链路与命令反馈时延。"""
+        scheduler = self.scheduler
+        send = scheduler.stats() if scheduler is not None else self._last_send_stats
+        end = self._stopped_at or time.time()
+        elapsed = 0.0 if self._started_at is None else end - self._started_at
+        receive = {}
+        if not self.running and self._final_receive is not None:
+            receive = self._final_receive
+        else:
+            try:
+                receive = self.comm.receive_stats()
+            except Exception:
+                pass
+        result: Dict[str, Any] = {
+            "elapsed_s": elapsed,
+            "send": dict(send),
+            "receive": {
+                "frames": self.frames_received,
+                "parsed": self.frames_parsed,
+                "parse_errors": self.parse_errors,
+                **receive,
+            },
+            "devices": self.link_monitor.snapshot(),
+            "latency": self.latency_probe.stats(),
+        }
+        try:
+            targets = self.comm.target_stats()
+        except Exception:
+            targets = {}
+        if targets:
+            result["targets"] = targets
+        recorder = self.recorder
+        if recorder is not None:
+            result["recording"] = {
+                "run_dir": str(recorder.run_dir),
+                "rows": recorder.rows_written,
+                "dropped": recorder.dropped,
+                "segments": len(recorder.segments),
+            }
+        elif self._recorded is not None:
+            result["recording"] = dict(self._recorded)
+        return result
+
+
+def run_session(
+    session,
+    duration_s: Optional[float] = None,
+    stop_event: Optional[threading.Event] = None,
+    on_tick: Optional[Callable[[Any], None]] = None,
+) -> Dict[str, Any]:
+    """`SimulatorEngine.run` / `FleetEngine.run` 共用的会话循环。"""
+    config = session.config
+    duration = config.duration_s if duration_s is None else duration_s
+    stop_event = stop_event or threading.Event()
+    if not session.start():
+        raise RuntimeError("通信初始化失败")
+    deadline = None if duration is None else time.monotonic() + float(duration)
+    interval = float(config.stats_interval_s or 0)
+    next_tick = time.monotonic() + interval if interval > 0 else None
+    try:
+        while not stop_event.is_set():
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            if config.stop_after_scenario and session.scenario_finished:
+                break
+            session.poll()
+            if next_tick is not None and now >= next_tick and on_tick is not None:
+                next_tick = now + interval
+                on_tick(session)
+            wait = _TICK_S
+            if deadline is not None:
+                wait = min(wait, max(deadline - now, 0.0))
+            stop_event.wait(wait)
+    finally:
+        session.stop()
+    return session.stats()
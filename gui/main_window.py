@@ -28,10 +28,10 @@ from PySide6.QtWidgets import (
     QDoubleSpinBox,
     QScrollArea,
     QMessageBox,
+    QFileDialog,
     QDockWidget,
     QPlainTextEdit,
-    QTreeWidget,
-    QTreeWidgetItem,
+    QTreeView,
     QListWidget,
     QStackedWidget,
     QCheckBox,
@@ -55,6 +55,7 @@ from waveform_display import WaveformDisplay
 from views.event_bus import ViewEventBus
 from gui.settings_dialog import SettingsDialog
 from gui.protocol_field_browser import ProtocolFieldBrowser
+from gui.recv_tree_model import ReceiveTreeModel
 
 from infra.app_paths import get_app_base_dir, resource_path
 from infra.settings_store import (
@@ -63,31 +64,56 @@ from infra.settings_store import (
     save_device_config,
 )
 
-from controllers.communication_controller import CommunicationController
-from controllers.parse_controller import ParseController
+from controllers.async_transport import create_communication_controller
+from controllers.parse_controller import Route
+from controllers.send_scheduler import SendScheduler
+from controllers.process_parse import ProcessParseEngine
+from controllers.scenario import ScenarioPlayer, load_scenario
+from engine.config import TRANSPORTS
+from engine.simulator import SimulatorEngine
 from controllers.frame_builder import FrameBuilder
+from protocols.template_runtime.library import default_library
+from protocols.template_runtime.registry import default_registry
 from controllers.protocol_field_service import (
     ProtocolFieldService,
     SendFieldInfo,
 )
 from model.control_state import ControlState
 from model.device import Device, DeviceConfig
+from model.latest_values import LatestValueTable, ValueKey
 
 BASE_DIR = get_app_base_dir()
 CONFIG_PATH = resource_path("acu_config.json", prefer_write=True)
 logger = logging.getLogger("ACUSim")
 
-ParseTask = Tuple[bytes, str, int, str]
+ParseTask = Tuple[bytes, str, int, str, Optional[Route]]
 RecordDict = Dict[str, Any]
 
 
 class ParseWorker(QObject):
-    parse_result = Signal(dict)
+    # 每次定时器回调合并发出一次：[记录字典]
+    parse_results = Signal(list)
 
-    def __init__(self, parse_controller, parse_queue, parent=None):
+    def __init__(
+        self,
+        parse_controller,
+        parse_queue,
+        latest_values=None,
+        parent=None,
+        engine=None,
+        on_blocks=None,
+    ):
         super().__init__(parent)
         self.parse_controller = parse_controller
         self.parse_queue = parse_queue
+        # 多进程解析后端：每次定时器回调取空输出环，on_blocks 接收本次的
+        # ColumnBlock 列表，用于时延探针与波形
+        self.engine = engine
+        self.on_blocks = on_blocks
+        # 每次回调最多为多少帧还原记录字典（解析表格只显示最新的帧）
+        self.max_records_per_tick = 64
+        # 最新值表在解析线程中覆盖写入，UI 线程只取变化的键
+        self.latest_values: Optional[LatestValueTable] = latest_values
         self._running = False
         self._timer = QTimer(self)
         self._timer.setInterval(50)
@@ -121,6 +147,7 @@ class ParseWorker(QObject):
             return
         import queue as _queue
 
+        records: List[RecordDict] = []
         loops = 0
         while self._running and loops < 64:
             try:
@@ -133,9 +160,14 @@ class ParseWorker(QObject):
             data = b""
             port = 0
             try:
-                data, address, port, timestamp = item
-                device_type = self.parse_controller.device_type_from_port(port)
-                parsed = self.parse_controller.parse(data, port)
+                data, address, port, timestamp = item[:4]
+                route = item[4] if len(item) > 4 else None
+                if route is None:
+                    device_type = self.parse_controller.device_type_from_port(port)
+                    parsed = self.parse_controller.parse(data, port)
+                else:
+                    device_type = route.device_id
+                    parsed = self.parse_controller.parse_route(route, data)
                 parsed_record = {
                     "timestamp": timestamp,
                     "address": address,
@@ -143,7 +175,9 @@ class ParseWorker(QObject):
                     "data_length": len(data),
                     "parsed_data": parsed,
                 }
-                self.parse_result.emit(parsed_record)
+                if self.latest_values is not None:
+                    self.latest_values.update_parsed(device_type, parsed)
+                records.append(parsed_record)
             except Exception as exc:
                 error_record = {
                     "timestamp": timestamp,
@@ -152,8 +186,76 @@ class ParseWorker(QObject):
                     "data_length": len(data),
                     "parsed_data": {"错误": str(exc)},
                 }
-                self.parse_result.emit(error_record)
+                records.append(error_record)
             loops += 1
+        if self.engine is not None and self._running:
+            records.extend(self._drain_engine())
+        if records:
+            self.parse_results.emit(records)
+
+    def _drain_engine(self) -> List[RecordDict]:
+        """取空解析进程的输出环，返回解析表格需要的最新记录。
+
+        最新值表每台设备只按本次最后一帧更新，时延探针与波形由
+        `on_blocks` 按列处理；只有最新的 `max_records_per_tick` 帧还原成
+        记录字典。
+        """
+        blocks = []
+        # 输出环持续有数据时最多占用一个定时器周期
+        deadline = time.monotonic() + self._timer.interval() / 1000.0
+        try:
+            while self._running:
+                drained = self.engine.drain_blocks()
+                if not drained:
+                    break
+                blocks.extend(drained)
+                if time.monotonic() >= deadline:
+                    break
+        except Exception as exc:
+            logger.debug("Draining parse processes failed: %s", exc)
+        if not blocks:
+            return []
+
+        if self.latest_values is not None:
+            for block in blocks:
+                for route, rows in block.rows_by_route():
+                    try:
+                        self.latest_values.update_parsed(
+                            route.device_id, block.parsed(int(rows[-1]))
+                        )
+                    except Exception:
+                        logger.exception("Updating latest values failed")
+        if self.on_blocks is not None:
+            try:
+                self.on_blocks(blocks)
+            except Exception:
+                logger.exception("Handling parse process results failed")
+
+        limit = self.max_records_per_tick
+        newest = []
+        for block in blocks:
+            n = len(block)
+            for row in range(max(n - limit, 0), n):
+                newest.append((float(block.timestamps[row]), block, row))
+        newest.sort(key=lambda item: item[0])
+        records = []
+        for _ts, block, row in newest[-limit:]:
+            try:
+                route, parsed, arrived, address, length = block.record(row)
+                records.append(
+                    {
+                        "timestamp": datetime.fromtimestamp(arrived).strftime(
+                            "%H:%M:%S.%f"
+                        )[:-3],
+                        "address": address,
+                        "device_type": route.device_id,
+                        "data_length": length,
+                        "parsed_data": parsed,
+                    }
+                )
+            except Exception:
+                logger.exception("Handling parse process result failed")
+        return records
 
 
 class FormatWorker(QObject):
@@ -209,6 +311,11 @@ class FormatWorker(QObject):
 
 
 class ACUSimulator(QMainWindow):
+    # 模板文件重新加载（监视线程发出，排队到 UI 线程处理）
+    template_reloaded = Signal(object)
+    # 场景回放结束（调度线程发出，排队到 UI 线程恢复实时发送）
+    scenario_finished = Signal()
+
     def __init__(
         self,
         *,
@@ -219,6 +326,9 @@ class ACUSimulator(QMainWindow):
         frame_builder=None,
         view_bus=None,
         enable_dialogs: bool = True,
+        parse_backend: str = "thread",
+        parse_workers: int = 2,
+        transport: str = "thread",
     ):
         super().__init__()
         self._cleanup_done = False
@@ -228,16 +338,54 @@ class ACUSimulator(QMainWindow):
             self.destroyed.connect(self._on_destroyed)
         except Exception:
             pass
-        self.comm = comm or CommunicationController()
+        self.comm = comm or create_communication_controller(transport)
+        self.transport = transport
         self._enable_dialogs = enable_dialogs
         self.worker_thread = None
+        # 周期发送由 SendScheduler 线程完成；send_timer 只在 UI 线程同步
+        # 控制状态、把已发送帧转发给波形并刷新发送统计
         self.send_timer = QTimer()
+        self.send_sync_interval = 50
+        self._sent_frames: Deque[Tuple[bytes, float]] = deque(maxlen=4096)
+        self._send_stats_at = 0.0
         self.send_data_buffer = bytearray(320)
 
+        cs = control_state or ControlState()
+        dev = acu_device or Device(
+            DeviceConfig(
+                name="ACU",
+                ip="10.2.0.1",
+                send_port=49152,
+                receive_port=49156,
+                category="ACU",
+            )
+        )
+        self._frame_builder = frame_builder or FrameBuilder(cs, dev)
+        self._control_state_model = getattr(self._frame_builder, "control_state", cs)
+        self._acu_device = getattr(self._frame_builder, "acu_device", dev)
+
+        # 无界面引擎持有通信、发送调度、路由/链路/在线与时延统计；
+        # 界面只负责控件、解析线程与显示
+        self.engine = SimulatorEngine(
+            comm=self.comm,
+            parse_controller=parse_controller,
+            frame_builder=self._frame_builder,
+        )
+        self.engine.frame_sent.connect(self._on_frame_sent)
         self.parse_queue: queue.Queue[ParseTask] = queue.Queue()
-        self.parse_controller = parse_controller or ParseController()
+        self.parse_controller = self.engine.parse_controller
+        # 命令 -> 反馈时延探针（发送/接收时间戳均为 time.time()）
+        self.latency_probe = self.engine.latency_probe
+        # 各设备生命信号连续性 / 到达抖动（接收线程更新），与路由表共享设备记录
+        self.link_monitor = self.engine.link_monitor
+        # 在线看门狗：由 recv_tree_timer 驱动，不为每台设备建定时器
+        self.device_watchdog = self.engine.watchdog
         self.parse_worker = None
         self.parse_worker_thread = None
+        # "process"：模板帧经共享内存环交给解析进程池，其余仍走 parse_queue
+        self.parse_backend = parse_backend
+        self.parse_workers = parse_workers
+        self.parse_engine: Optional[ProcessParseEngine] = None
 
         self.format_queue: queue.Queue[RecordDict] = queue.Queue()
         self.formatted_queue: queue.Queue[RecordDict] = queue.Queue()
@@ -255,13 +403,13 @@ class ACUSimulator(QMainWindow):
         self.ui_update_timer.setInterval(self.ui_update_interval)
         self.ui_update_timer.timeout.connect(self._drain_parse_table)
 
-        # Receive tree incremental update
-        self.recv_tree_buffer: Deque[RecordDict] = deque()
+        # Receive tree: parse worker overwrites latest values off the UI thread,
+        # the timer only renders keys that changed since the previous tick.
+        self.recv_latest_values = LatestValueTable()
         self.recv_tree_timer = QTimer()
         self.recv_tree_timer.setInterval(120)
         self.recv_tree_timer.timeout.connect(self._drain_recv_tree)
-        self._recv_tree_categories: Dict[str, Any] = {}
-        self._recv_tree_keys: Dict[str, Dict[str, Any]] = {}
+        self.recv_tree_timer.timeout.connect(self._poll_device_watchdog)
 
         self._rebuild_timer = QTimer()
         self._rebuild_timer.setInterval(20)
@@ -286,30 +434,14 @@ class ACUSimulator(QMainWindow):
             "battery_temp": 25,
         }
 
-        cs = control_state or ControlState()
-        dev = acu_device or Device(
-            DeviceConfig(
-                name="ACU",
-                ip="10.2.0.1",
-                send_port=49152,
-                receive_port=49156,
-                category="ACU",
-            )
-        )
-        self._frame_builder = frame_builder or FrameBuilder(cs, dev)
-        self._control_state_model = getattr(self._frame_builder, "control_state", cs)
-        self._acu_device = getattr(self._frame_builder, "acu_device", dev)
-
         # Protocol field metadata & preferences
-        self._protocol_field_service = ProtocolFieldService()
+        self._protocol_field_service = ProtocolFieldService(default_registry().loader)
         self._protocol_field_prefs = (
             self._protocol_field_service.get_active_preferences()
         )
         self._send_field_infos = self._protocol_field_service.send_field_infos()
         self._receive_field_infos = self._protocol_field_service.receive_field_infos()
         self._send_field_widgets: Dict[str, QWidget] = {}
-        self._receive_selection_cache: Dict[str, set[str]] = {}
-        self._common_receive_selection: set[str] = set()
         self._update_receive_selection_cache()
 
         self.memory_check_timer = QTimer()
@@ -329,6 +461,14 @@ class ACUSimulator(QMainWindow):
         self.setup_memory_management()
         self._setup_workers()
 
+        # 协议模板热加载：模板库监视线程轮询已加载的模板族，解析与发送
+        # 在该线程中已切换协议，这里只刷新字段元数据、信号与界面
+        self.template_reloaded.connect(self._apply_template_reload)
+        self._template_registry = default_registry()
+        self._template_registry.subscribe(self._on_template_file_reloaded)
+        self._template_library = default_library().start_watching()
+        self.scenario_finished.connect(self._on_scenario_finished)
+
     def _rebuild_tick(self):
         """分块填充表格的定时器回调
 
@@ -392,6 +532,10 @@ class ACUSimulator(QMainWindow):
         self.acu_receive_port_edit = QLineEdit("49156")
         self.target_ip_edit = QLineEdit("10.2.0.5")
         self.target_receive_port_edit = QLineEdit("49152")
+        self.transport_combo = QComboBox()
+        self.transport_combo.addItems(TRANSPORTS)
+        self.transport_combo.setCurrentText(self.transport)
+        self.transport_combo.setToolTip("UDP 传输方式，停止通信后切换")
 
         # Device preset/type selector (自动填充 IP/端口)
         try:
@@ -412,6 +556,7 @@ class ACUSimulator(QMainWindow):
         device_form.addRow(QLabel("ACU Receive Port"), self.acu_receive_port_edit)
         device_form.addRow(QLabel("Target IP"), self.target_ip_edit)
         device_form.addRow(QLabel("Target Receive Port"), self.target_receive_port_edit)
+        device_form.addRow(QLabel("Transport"), self.transport_combo)
 
         # Apply / Save buttons for device config
         btns = QWidget()
@@ -492,6 +637,8 @@ class ACUSimulator(QMainWindow):
         # Status (still part of left panel)
         self.status_label = QLabel("Ready")
         left_layout.addWidget(self.status_label)
+        self.send_stats_label = QLabel("")
+        left_layout.addWidget(self.send_stats_label)
 
         # Do not add the legacy left_panel to the central splitter; its
         # content moves into the sidebar dock pages.
@@ -627,11 +774,18 @@ class ACUSimulator(QMainWindow):
         """Wire up internal signals and communication callbacks."""
         # Timer for periodic send
         try:
-            self.send_timer.timeout.connect(self.send_periodic_data)
+            self.send_timer.timeout.connect(self._sync_send_side)
+        except Exception:
+            pass
+        try:
+            self.period_spin.valueChanged.connect(self._on_period_changed)
         except Exception:
             pass
 
-        # Communication controller callbacks
+        self._wire_comm_callbacks()
+
+    def _wire_comm_callbacks(self):
+        """Communication controller callbacks."""
         try:
             self.comm.on_receive = lambda data, addr: self.on_data_received_comm(
                 data, addr
@@ -641,6 +795,33 @@ class ACUSimulator(QMainWindow):
         except Exception:
             pass
 
+    def set_transport(self, transport: str) -> bool:
+        """Switch the UDP transport; only while communication is stopped.
+
+        The new controller (see ``create_communication_controller``) takes
+        over the current configuration and send targets and replaces the
+        engine's controller.
+        """
+        transport = str(transport or "thread")
+        if transport == self.transport:
+            return True
+        if getattr(self, "is_sending", False):
+            self._show_error("请先停止通信再切换传输方式", title="配置错误")
+            return False
+        try:
+            comm = create_communication_controller(transport)
+        except ValueError as exc:
+            self._show_error(str(exc), title="配置错误")
+            return False
+        old = self.comm
+        comm.update_config(**old.config)
+        comm.set_send_targets(old.send_targets)
+        self.comm = self.engine.comm = comm
+        self.transport = transport
+        self._wire_comm_callbacks()
+        logger.info("通信传输方式切换为 %s", transport)
+        return True
+
     def load_device_settings(self):
         """Load persisted device configuration into the sidebar fields."""
         try:
@@ -673,6 +854,11 @@ class ACUSimulator(QMainWindow):
                 self.target_receive_port_edit.setText(str(config.target_receive_port))
             except Exception:
                 pass
+            try:
+                if config.transport in TRANSPORTS:
+                    self.transport_combo.setCurrentText(config.transport)
+            except Exception:
+                pass
             # apply device preset selection if available
             try:
                 if getattr(self, "device_type_combo", None) is not None:
@@ -713,6 +899,7 @@ class ACUSimulator(QMainWindow):
                 target_ip=str(self.target_ip_edit.text()),
                 target_receive_port=str(self.target_receive_port_edit.text()),
                 device_preset=preset,
+                transport=str(self.transport_combo.currentText()),
             )
             save_device_config(data)
             try:
@@ -757,6 +944,8 @@ class ACUSimulator(QMainWindow):
                     title="配置错误",
                 )
                 return False
+            if not self.set_transport(self.transport_combo.currentText()):
+                return False
 
             # Update comm config (validated)
             try:
@@ -960,6 +1149,9 @@ class ACUSimulator(QMainWindow):
         self.sc_preview_btn = QPushButton("生成预览")
         sc_actions.layout().addWidget(self.sc_apply_btn)
         sc_actions.layout().addWidget(self.sc_preview_btn)
+        self.sc_scenario_btn = QPushButton("运行场景…")
+        self.sc_scenario_btn.clicked.connect(self._toggle_scenario)
+        sc_actions.layout().addWidget(self.sc_scenario_btn)
         sendcfg_layout.addWidget(sc_actions)
         # 预览区域
         self.sc_preview_edit = QPlainTextEdit()
@@ -973,10 +1165,31 @@ class ACUSimulator(QMainWindow):
         # Page 3: 接收数据（树）
         recv_page = QWidget()
         recv_layout = QVBoxLayout(recv_page)
-        self.recv_tree = QTreeWidget()
-        self.recv_tree.setHeaderLabels(["类别/键", "值"])
-        self.recv_tree.setColumnCount(2)
+        self.recv_tree_model = ReceiveTreeModel(self)
+        self.recv_tree = QTreeView()
+        self.recv_tree.setModel(self.recv_tree_model)
+        self.recv_tree.setUniformRowHeights(True)
+        self.recv_tree_model.rowsInserted.connect(
+            lambda parent, _first, _last: self.recv_tree.expand(parent)
+        )
         recv_layout.addWidget(self.recv_tree)
+        link_group = QGroupBox("链路状态")
+        link_layout = QVBoxLayout(link_group)
+        link_layout.setContentsMargins(4, 8, 4, 4)
+        self.link_table = QTableWidget(0, len(self.LINK_COLUMNS))
+        self.link_table.setHorizontalHeaderLabels(
+            [title for _key, title in self.LINK_COLUMNS]
+        )
+        self.link_table.verticalHeader().setVisible(False)
+        self.link_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.link_table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeToContents
+        )
+        link_layout.addWidget(self.link_table)
+        # 本地积压：解析队列与内核丢包，用于区分界面/本机处理慢与网络丢包
+        self.link_backlog_label = QLabel("")
+        link_layout.addWidget(self.link_backlog_label)
+        recv_layout.addWidget(link_group)
 
         # Page 4: 解析表头
         header_page = QWidget()
@@ -1115,6 +1328,9 @@ class ACUSimulator(QMainWindow):
                 widget = self._create_word_group(group_title, infos)
             if widget is not None:
                 container_layout.addWidget(widget)
+        # Fields that lost their widget fall back to unset, as before; from
+        # here on each widget pushes its own changes (_on_send_field_changed).
+        self._update_control_state_from_ui()
 
     def _group_selected_send_fields(self) -> "OrderedDict[str, List[SendFieldInfo]]":
         selected = self._protocol_field_prefs.get("send", []) or []
@@ -1142,6 +1358,9 @@ class ACUSimulator(QMainWindow):
         for idx, info in enumerate(infos):
             chk = QCheckBox(info.label or info.key)
             chk.setChecked(self._is_send_field_checked(info))
+            chk.toggled.connect(
+                lambda checked, info=info: self._on_send_field_changed(info, checked)
+            )
             layout.addWidget(chk, idx // columns, idx % columns)
             self._send_field_widgets[info.key] = chk
         group.setLayout(layout)
@@ -1157,6 +1376,9 @@ class ACUSimulator(QMainWindow):
         form.setContentsMargins(8, 8, 8, 8)
         for info in infos:
             widget = self._create_word_widget(info)
+            widget.valueChanged.connect(
+                lambda value, info=info: self._on_send_field_changed(info, value)
+            )
             label = info.label or info.key
             form.addRow(label, widget)
             self._send_field_widgets[info.key] = widget
@@ -1211,6 +1433,40 @@ class ACUSimulator(QMainWindow):
             elif child_layout is not None:
                 self._clear_layout(child_layout)
 
+    def _on_send_field_changed(self, info: SendFieldInfo, value) -> None:
+        """Apply a single widget change to the control state.
+
+        Only the touched entry is written, so the state version (and with it
+        the cached snapshot/frame) changes only when something really changed.
+        """
+        cs = getattr(self, "_control_state_model", None)
+        if cs is None:
+            return
+        try:
+            if info.kind == "bool_bitset":
+                if info.byte is None or info.bit is None:
+                    return
+                cs.set_flag(info.source, (info.byte, info.bit), bool(value))
+            elif info.kind == "packed_bit":
+                if info.bit is None:
+                    return
+                cs.set_flag(info.source, info.bit, bool(value))
+            elif info.kind == "scalar_word" and info.source == "battery_temp":
+                cs.set_value(info.source, None, int(value))
+            elif info.offset is not None:
+                if info.source == "start_times":
+                    cs.set_value(info.source, info.offset, int(value))
+                else:
+                    cs.set_value(info.source, info.offset, float(value))
+            else:
+                return
+            current = getattr(cs, info.source)
+            self.control_values[info.source] = (
+                dict(current) if isinstance(current, dict) else current
+            )
+        except Exception:
+            logger.exception("Applying send field %s failed", info.key)
+
     def _is_send_field_checked(self, info: SendFieldInfo) -> bool:
         cs = getattr(self, "_control_state_model", None)
         if cs is None:
@@ -1238,13 +1494,12 @@ class ACUSimulator(QMainWindow):
         return 0.0
 
     def _update_receive_selection_cache(self) -> None:
-        receive = self._protocol_field_prefs.get("receive", {}) or {}
-        self._common_receive_selection = set(receive.get("common", []))
-        self._receive_selection_cache = {
-            category: set(keys)
-            for category, keys in receive.items()
-            if category != "common"
-        }
+        # 字段选择编译为按类别的隐藏集合，仅在偏好变化时重建；
+        # 接收树刷新时每个键只做一次集合查找
+        self._receive_projections = self._protocol_field_service.receive_projections(
+            self._protocol_field_prefs
+        )
+        self._device_hidden_fields: Dict[str, frozenset] = {}
 
     def _on_protocol_field_preferences_changed(self, prefs: Dict[str, object]) -> None:
         try:
@@ -1264,60 +1519,75 @@ class ACUSimulator(QMainWindow):
         except Exception:
             logger.exception("Failed to refresh waveform signal preferences")
 
+    def _on_template_file_reloaded(self, loader, _old=None) -> None:
+        """Watcher thread: hand the new template over to the UI thread."""
+        if not self._cleanup_done:
+            self.template_reloaded.emit(loader)
+
+    def _apply_template_reload(self, loader) -> None:
+        """Refresh field metadata, signals and views after a template reload.
+
+        Views are only rebuilt when the set of fields changed; edits that
+        touch scaling or fault texts only take effect in parsing.
+        """
+        try:
+            changed = self._protocol_field_service.reload(loader)
+            spec = loader.spec()
+        except Exception:
+            logger.exception("Failed to apply reloaded protocol template")
+            return
+        self.on_status_updated(f"协议模板已重新加载: {spec.name} v{spec.version}")
+        if not changed:
+            return
+        prefs = self._protocol_field_service.get_active_preferences()
+        browser = getattr(self, "protocol_field_browser", None)
+        if browser is not None:
+            try:
+                browser.on_template_reloaded(prefs)
+            except Exception:
+                logger.exception("Failed to refresh protocol field browser")
+        self._on_protocol_field_preferences_changed(prefs)
+
     def _reset_recv_tree_view(self) -> None:
-        tree = getattr(self, "recv_tree", None)
-        if tree is not None:
+        model = getattr(self, "recv_tree_model", None)
+        if model is not None:
             try:
-                tree.clear()
+                model.clear()
             except Exception:
                 pass
-        self._recv_tree_categories = {}
-        self._recv_tree_keys = {}
+        # re-render every known key under the current field selection
+        self.recv_latest_values.mark_all_dirty()
+        self._drain_recv_tree()
 
     def _filter_parsed_record(self, record: RecordDict) -> Dict[str, Any]:
         parsed = record.get("parsed_data", {}) or {}
         device_type = str(record.get("device_type", ""))
-        try:
-            category = self.parse_controller.category_from_device(device_type)
-        except Exception:
-            category = ""
-        if not category:
-            category = "generic"
-        return self._filter_parsed_data(parsed, category)
+        return self._filter_parsed_data(parsed, self._category_of_device(device_type))
 
     def _filter_parsed_data(
         self, parsed: Dict[str, Any], category: str
     ) -> Dict[str, Any]:
-        filtered: Dict[str, Any] = {}
-        category_selected = self._receive_selection_cache.get(category)
-        common_selected = self._common_receive_selection
-
-        for section_name, value in parsed.items():
-            if isinstance(value, dict):
-                selection_category = (
-                    "common" if section_name == "设备信息" else category
-                )
-                selected_keys = (
-                    common_selected
-                    if selection_category == "common"
-                    else category_selected
-                )
-                section_result: Dict[str, Any] = {}
-                for label, field_value in value.items():
-                    info = self._protocol_field_service.find_receive_field(
-                        selection_category, section_name, label
-                    )
-                    if info is None:
-                        section_result[label] = field_value
-                        continue
-                    if selected_keys is None or info.key in selected_keys:
-                        section_result[label] = field_value
-                if section_result:
-                    filtered[section_name] = section_result
-            else:
-                filtered[section_name] = value
+        return self._receive_projections.for_category(category).apply(parsed)
+
+    def _category_of_device(self, device: str) -> str:
+        try:
+            category = self.parse_controller.category_from_device(device)
+        except Exception:
+            category = ""
+        return category or "generic"
+
+    def _hidden_fields_for(self, device: str) -> frozenset:
+        hidden = self._device_hidden_fields.get(device)
+        if hidden is None:
+            category = self._category_of_device(device)
+            hidden = self._receive_projections.for_category(category).hidden
+            self._device_hidden_fields[device] = hidden
+        return hidden
 
-        return filtered
+    def _is_receive_value_visible(self, key: ValueKey) -> bool:
+        """Apply the protocol field selection to a single latest-value key."""
+        device, section, label = key
+        return (section, label) not in self._hidden_fields_for(device)
 
     def _setup_workers(self):
         """Create worker placeholders used by start/stop logic.
@@ -1339,6 +1609,8 @@ class ACUSimulator(QMainWindow):
             acu_receive_port = int(self.acu_receive_port_edit.text())
             target_ip = self.target_ip_edit.text()
             target_receive_port = int(self.target_receive_port_edit.text())
+            if not self.set_transport(self.transport_combo.currentText()):
+                return False
 
             self.comm.update_config(
                 acu_ip=acu_ip,
@@ -1379,8 +1651,10 @@ class ACUSimulator(QMainWindow):
                     return False
 
                 period = int(self.period_spin.value())
-                self.send_timer.start(period)
                 self.is_sending = True
+                self._apply_device_online(self.engine.reset_statistics())
+                self._start_send_scheduler(period)
+                self.send_timer.start(self.send_sync_interval)
 
                 self.start_btn.setEnabled(False)
                 self.stop_btn.setEnabled(True)
@@ -1464,6 +1738,8 @@ class ACUSimulator(QMainWindow):
             self.send_timer.stop()
         except Exception:
             pass
+        self._stop_send_scheduler()
+        self._apply_device_online(self.device_watchdog.reset())
 
         try:
             self.comm.stop()
@@ -1516,40 +1792,295 @@ class ACUSimulator(QMainWindow):
         except Exception:
             pass
 
+    # ---- Send scheduler ----
+    def _build_send_frame(self) -> bytes:
+        """Build one frame on the scheduler thread (no widget access)."""
+        if getattr(self, "_frame_builder", None) is not None:
+            frame = self._frame_builder.build()
+            self.send_data_buffer = frame
+            return bytes(frame)
+        return bytes(self.send_data_buffer)
+
+    def _start_send_scheduler(self, period_ms: int) -> None:
+        self._sent_frames.clear()
+        self.engine.start_sending(period_ms, build_frame=self._build_send_frame)
+
+    @property
+    def send_scheduler(self) -> Optional[SendScheduler]:
+        return self.engine.scheduler
+
+    @property
+    def scenario_player(self) -> Optional[ScenarioPlayer]:
+        return self.engine.scenario_player
+
+    # ---- Send scenarios ----
+    def _toggle_scenario(self) -> None:
+        if self.scenario_player is not None:
+            self.stop_scenario()
+        else:
+            self._choose_scenario()
+
+    def _update_scenario_button(self) -> None:
+        btn = getattr(self, "sc_scenario_btn", None)
+        if btn is not None:
+            running = self.scenario_player is not None
+            btn.setText("停止场景" if running else "运行场景…")
+
+    def _choose_scenario(self) -> None:
+        path, _ = QFileDialog.getOpenFileName(
+            self, "选择发送场景", "", "场景文件 (*.yaml *.yml *.json)"
+        )
+        if path:
+            self.run_scenario(path)
+
+    def run_scenario(self, source) -> bool:
+        """Precompile a send scenario and play it through the scheduler.
+
+        ``source`` is a YAML/JSON path or an already-loaded dict. The current
+        control state is the starting point; playback replaces the live
+        frame source until it finishes or :meth:`stop_scenario` is called,
+        after which the live control state (and period) is sent again.
+        """
+        if not getattr(self, "is_sending", False):
+            self._show_error("请先开始通信再运行场景")
+            return False
+        try:
+            spec = source if isinstance(source, dict) else load_scenario(source)
+            self._sent_frames.clear()
+            player = self.engine.play_scenario(
+                spec,
+                default_period_ms=int(self.period_spin.value()),
+                on_finished=self.scenario_finished.emit,
+            )
+        except Exception as exc:
+            logger.exception("Compiling scenario failed")
+            self._show_error(f"场景加载失败: {exc}")
+            return False
+        compiled = player.compiled
+        self._update_scenario_button()
+        try:
+            self.on_status_updated(
+                f"场景 {compiled.name}: {compiled.frames} 帧 / "
+                f"{compiled.duration_s:.1f} s"
+            )
+        except Exception:
+            pass
+        return True
+
+    def stop_scenario(self) -> None:
+        """Stop scenario playback and resume sending the live control state."""
+        if self.scenario_player is None:
+            return
+        self.engine.stop_scenario(int(self.period_spin.value()))
+        self._update_scenario_button()
+
+    def _on_scenario_finished(self) -> None:
+        # 排队处理时场景可能已被停止或换成新场景，只结束已播完的那个
+        player = self.scenario_player
+        if player is not None and player.finished:
+            self.stop_scenario()
+
+    def _on_frame_sent(self, frame: bytes, ts: float) -> None:
+        """Scheduler-thread hook (engine.frame_sent): queue the frame for the UI."""
+        self._sent_frames.append((frame, ts))
+
+    def _stop_send_scheduler(self) -> None:
+        try:
+            self.engine.stop_sending()
+        except Exception:
+            logger.exception("Stopping send scheduler failed")
+        self._sent_frames.clear()
+        self._update_scenario_button()
+
+    def _on_period_changed(self, value: int) -> None:
+        # 场景回放使用编译时的周期，引擎在回放期间忽略
+        self.engine.set_period(int(value))
+
+    def _sync_send_side(self) -> None:
+        """UI-thread half of periodic sending.
+
+        Widgets already push their changes into the control state, so this
+        only forwards frames the scheduler sent to the waveform and refreshes
+        the jitter line.
+        """
+        if not getattr(self, "is_sending", False):
+            return
+        frames = self._sent_frames
+        try:
+            while frames:
+                frame, ts = frames.popleft()
+                self.view_bus.waveform_send.emit(bytearray(frame), ts)
+        except IndexError:
+            pass
+        except Exception:
+            logger.exception("Forwarding sent frames failed")
+        scheduler = self.send_scheduler
+        now = time.monotonic()
+        if now - self._send_stats_at < 1.0:
+            return
+        self._send_stats_at = now
+        self._refresh_link_table()
+        if scheduler is not None:
+            st = scheduler.stats()
+            text = (
+                f"发送 {st['sent']} 帧 | 迟发 {st['late']} | "
+                f"跳过 {st['missed']} | 抖动 p99 {st['jitter_p99_us']:.0f} µs"
+            )
+            worst = None
+            for devices in self.latency_probe.stats().values():
+                for device, lat in devices.items():
+                    if lat["count"] and (worst is None or lat["p99_ms"] > worst[1]):
+                        worst = (device, lat["p99_ms"], lat["p50_ms"])
+            if worst is not None:
+                text += (
+                    f" | 命令反馈 {worst[0]} p50 {worst[2]:.1f} / "
+                    f"p99 {worst[1]:.1f} ms"
+                )
+            try:
+                self.send_stats_label.setText(text)
+            except Exception:
+                pass
+
+    LINK_COLUMNS = (
+        ("device", "设备"),
+        ("frames", "帧数"),
+        ("lost", "丢帧"),
+        ("loss_ratio", "丢帧率"),
+        ("duplicates", "重复"),
+        ("reordered", "乱序"),
+        ("rate_hz", "速率 Hz"),
+        ("jitter_ms", "抖动 ms"),
+        ("age_s", "最近 s"),
+    )
+
+    def _refresh_link_table(self) -> None:
+        """Show per-device link statistics and the local receive backlog."""
+        table = getattr(self, "link_table", None)
+        if table is None:
+            return
+        stats = self.link_monitor.snapshot()
+        online = self.device_watchdog.online
+        online_brush = table.palette().text()
+        stale = ReceiveTreeModel.STALE_BRUSH
+        try:
+            table.setRowCount(len(stats))
+            for row, (name, st) in enumerate(sorted(stats.items())):
+                st = dict(st, device=name)
+                for col, (key, _title) in enumerate(self.LINK_COLUMNS):
+                    value = st[key]
+                    if key == "loss_ratio":
+                        text = f"{value * 100:.2f}%"
+                    elif key == "age_s":
+                        text = "-" if value is None else f"{value:.1f}"
+                    elif isinstance(value, float):
+                        text = f"{value:.1f}"
+                    else:
+                        text = str(value)
+                    item = table.item(row, col)
+                    if item is None:
+                        item = QTableWidgetItem(text)
+                        table.setItem(row, col, item)
+                    elif item.text() != text:
+                        item.setText(text)
+                    item.setForeground(online_brush if name in online else stale)
+        except Exception:
+            logger.exception("Refreshing link table failed")
+        backlog = f"解析队列积压 {self.parse_queue.qsize()}"
+        try:
+            rx = self.comm.receive_stats()
+            backlog += f" | 内核丢包 {rx.get('kernel_drops') or 0}"
+        except Exception:
+            pass
+        try:
+            self.link_backlog_label.setText(backlog)
+        except Exception:
+            pass
+
+    def _poll_device_watchdog(self) -> None:
+        try:
+            events = self.device_watchdog.poll()
+        except Exception:
+            logger.exception("Device watchdog poll failed")
+            return
+        if events:
+            self._apply_device_online(events)
+            self._refresh_link_table()
+
+    def _apply_device_online(self, events) -> None:
+        """Gray out / restore receive views and publish online changes."""
+        model = getattr(self, "recv_tree_model", None)
+        for name, online in events:
+            logger.info("Device %s %s", name, "online" if online else "offline")
+            try:
+                if model is not None:
+                    model.set_device_stale(name, not online)
+                self.view_bus.device_online.emit(name, online)
+            except Exception:
+                logger.exception("Applying device online state failed")
+
     def on_data_received_comm(self, data: bytes, addr: tuple):
         """Callback adapter for CommunicationController receive events."""
+        arrived = time.time()
         try:
             ip, port = addr[0], addr[1]
         except Exception:
             ip = str(addr)
             port = 0
         timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+        # buffer 接收模式下 data 是复用槽位的 memoryview，入队前必须复制
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+
+        # (ip, port) -> 预绑定路由（未知来源按帧长自动登记）、链路统计与在线登记
+        route = self.engine.admit(data, (ip, port), arrived)
+        if route is None:
+            return
+        device_type = route.device_id
+
+        # 解析进程池接收了该帧时，解析、时延探针与波形都由 ParseWorker 完成
+        engine = self.parse_engine
+        if engine is not None:
+            try:
+                if engine.submit(route, data, arrived, f"{ip}:{port}"):
+                    return
+            except Exception:
+                logger.exception("Submitting frame to parse processes failed")
 
         # Enqueue for parsing
         try:
-            self.parse_queue.put((data, f"{ip}:{port}", port, timestamp))
+            self.parse_queue.put((data, f"{ip}:{port}", port, timestamp, route))
         except Exception:
             pass
 
         # Quick waveform emit if parse controller can handle it
         try:
-            device_type = self.parse_controller.device_type_from_port(port)
-            device_category = self.parse_controller.category_from_device(device_type)
-            if device_category in ["INV", "CHU", "BCC", "DUMMY"]:
-                parsed_data = self.parse_controller.parse(data, port)
+            if route.protocol is not None:
+                parsed_data = self.parse_controller.parse_route(route, data)
+                self.latency_probe.on_receive(device_type, parsed_data, arrived)
                 self.view_bus.waveform_receive.emit(
                     parsed_data, device_type, time.time()
                 )
         except Exception:
             pass
 
+    def _on_engine_blocks(self, blocks):
+        """解析进程池结果（ParseWorker 线程）：波形按列取样，时延探针只还原
+        仍在等待反馈的设备的帧。"""
+        probe = self.latency_probe
+        for block in blocks:
+            for route, rows in block.rows_by_route():
+                device_type = route.device_id
+                for row in rows.tolist():
+                    if not probe.watching(device_type):
+                        break
+                    probe.on_receive(
+                        device_type, block.parsed(row), float(block.timestamps[row])
+                    )
+        self.view_bus.waveform_receive_blocks.emit(blocks)
+
     def prepare_send_data(self):
         """Prepare the send buffer using frame_builder if available."""
         try:
-            try:
-                self._update_control_state_from_ui()
-            except Exception:
-                pass
             if getattr(self, "_frame_builder", None) is not None:
                 frame = self._frame_builder.build()
                 self.send_data_buffer = frame
@@ -1582,6 +2113,11 @@ class ACUSimulator(QMainWindow):
     # brevity in the patch preview. The implementation in this file mirrors
     # the original logic from the repository's `ACU_simulation.py`.
 
+    def _on_parse_results(self, records: List[RecordDict]):
+        """Handle one batch of parse worker results."""
+        for record in records:
+            self._on_parse_result(record)
+
     def _on_parse_result(self, record: RecordDict):
         """Handle parse worker results: record into history and forward to formatter."""
         try:
@@ -1610,15 +2146,6 @@ class ACUSimulator(QMainWindow):
         except Exception:
             pass
 
-        # Buffer for receive tree updates
-        try:
-            if getattr(self, "recv_tree", None) is not None:
-                self.recv_tree_buffer.append(record)
-                if not self.recv_tree_timer.isActive():
-                    self.recv_tree_timer.start()
-        except Exception:
-            pass
-
     def _drain_parse_table(self):
         """Drain a limited number of buffered parse records into the table.
 
@@ -1688,86 +2215,56 @@ class ACUSimulator(QMainWindow):
             pass
 
     def _drain_recv_tree(self):
-        """Incrementally update the receive tree with parsed records."""
+        """Render receive-tree keys whose latest value changed since last tick.
+
+        Intermediate values are overwritten in `recv_latest_values` by the
+        parse worker, so each tick costs O(changed keys) regardless of the
+        incoming frame rate.
+        """
         try:
-            if not getattr(self, "recv_tree", None):
+            model = getattr(self, "recv_tree_model", None)
+            if model is None:
                 self.recv_tree_timer.stop()
                 return
-            processed = 0
-            max_per_tick = 50
-            while self.recv_tree_buffer and processed < max_per_tick:
-                try:
-                    record = self.recv_tree_buffer.popleft()
-                except Exception:
-                    break
-                try:
-                    filtered = self._filter_parsed_record(record)
-                except Exception:
-                    filtered = record.get("parsed_data", {}) or {}
-                try:
-                    self._update_recv_tree(filtered)
-                except Exception:
-                    pass
-                processed += 1
-            if not self.recv_tree_buffer:
-                self.recv_tree_timer.stop()
-        except Exception:
-            try:
-                self.recv_tree_timer.stop()
-            except Exception:
-                pass
-
-    def _get_or_create_category_item(self, category: str):
-        tree = self.recv_tree
-        cat = self._recv_tree_categories.get(category)
-        if cat is None:
-            cat = QTreeWidgetItem(tree, [category, ""])
-            cat.setExpanded(True)
-            self._recv_tree_categories[category] = cat
-            self._recv_tree_keys[category] = {}
-        return cat
-
-    def _get_or_create_key_item(self, category: str, key: str):
-        parent = self._get_or_create_category_item(category)
-        d = self._recv_tree_keys.get(category) or {}
-        item = d.get(key)
-        if item is None:
-            item = QTreeWidgetItem(parent, [key, "--"])
-            d[key] = item
-            self._recv_tree_keys[category] = d
-        return item
-
-    def _update_recv_tree(self, parsed: Dict[str, Any]):
-        """Merge a parsed_data dict into the recv_tree items.
-
-        Supports top-level categories mapping to dicts of key->value. For deeper
-        nesting, value is stringified.
-        """
-        for category, value in parsed.items():
-            if isinstance(value, dict):
-                for k, v in value.items():
-                    item = self._get_or_create_key_item(category, str(k))
-                    try:
-                        item.setText(1, str(v))
-                    except Exception:
-                        pass
-            else:
-                # Put non-dict values under a special category
-                item = self._get_or_create_key_item(str(category), "值")
-                try:
-                    item.setText(1, str(value))
-                except Exception:
-                    pass
+            dirty = self.recv_latest_values.take_dirty()
+            if not dirty:
+                return
+            hidden_for = self._device_hidden_fields
+            visible = {}
+            for key, value in dirty.items():
+                hidden = hidden_for.get(key[0])
+                if hidden is None:
+                    hidden = self._hidden_fields_for(key[0])
+                if (key[1], key[2]) not in hidden:
+                    visible[key] = value
+            if visible:
+                model.apply_updates(visible)
+        except Exception:
+            logger.exception("刷新接收数据树失败")
 
     def _start_workers(self):
         """Create and start parse/format workers in separate QThreads."""
         # Parse worker
         if getattr(self, "parse_worker", None) is None:
-            self.parse_worker = ParseWorker(self.parse_controller, self.parse_queue)
+            if self.parse_backend == "process" and self.parse_engine is None:
+                try:
+                    self.parse_engine = ProcessParseEngine(
+                        self.parse_controller, workers=self.parse_workers
+                    ).start()
+                except Exception:
+                    logger.exception("Starting parse processes failed")
+                    self.parse_engine = None
+            self.parse_worker = ParseWorker(
+                self.parse_controller,
+                self.parse_queue,
+                latest_values=self.recv_latest_values,
+                engine=self.parse_engine,
+                on_blocks=self._on_engine_blocks,
+            )
             self.parse_worker_thread = QThread()
             self.parse_worker.moveToThread(self.parse_worker_thread)
             # connect signals
-            self.parse_worker.parse_result.connect(self._on_parse_result)
+            self.parse_worker.parse_results.connect(self._on_parse_results)
             self.parse_worker_thread.started.connect(self.parse_worker.start)
             self.parse_worker_thread.start()
 
@@ -1779,6 +2276,9 @@ class ACUSimulator(QMainWindow):
             self.format_worker_thread.started.connect(self.format_worker.start)
             self.format_worker_thread.start()
 
+        if not self.recv_tree_timer.isActive():
+            self.recv_tree_timer.start()
+
     def _stop_workers(self):
         """Stop and clean up parse/format worker threads."""
         # Stop parse worker
@@ -1801,6 +2301,12 @@ class ACUSimulator(QMainWindow):
                 self.parse_worker.deleteLater()
             except Exception:
                 pass
+        engine, self.parse_engine = getattr(self, "parse_engine", None), None
+        if engine is not None:
+            try:
+                engine.stop()
+            except Exception:
+                logger.exception("Stopping parse processes failed")
 
         # Stop format worker
         if getattr(self, "format_worker", None) is not None:
@@ -1856,6 +2362,19 @@ class ACUSimulator(QMainWindow):
         self._cleanup_done = True
         self._cleanup_in_progress = True
 
+        registry = getattr(self, "_template_registry", None)
+        if registry is not None:
+            try:
+                registry.unsubscribe(self._on_template_file_reloaded)
+            except Exception:
+                pass
+        library = getattr(self, "_template_library", None)
+        if library is not None:
+            try:
+                library.stop_watching()
+            except Exception:
+                pass
+
         try:
             self.stop_communication()
         except Exception:
@@ -125,6 +125,15 @@ class ProtocolFieldBrowser(QWidget):
         self._updating_tree = False
         self._update_button_state()
 
+    def on_template_reloaded(
+        self, preferences: Optional[Dict[str, object]] = None
+    ) -> None:
+        """Re-read field metadata after the service switched templates."""
+        self._send_info_cache = self._service.send_field_infos()
+        self._receive_info_cache = self._service.receive_field_infos()
+        self._dirty = False
+        self.refresh(preferences=preferences)
+
     def _populate_section_group(
         self,
         parent_item: QTreeWidgetItem,
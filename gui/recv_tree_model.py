@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, Qt
+from PySide6.QtGui import QBrush, QColor
+
+from model.latest_values import ValueKey
+
+
+class _Node:
+    __slots__ = ("name", "value", "parent", "children", "row")
+
+    def __init__(self, name: str, parent: Optional["_Node"], row: int):
+        self.name = name
+        self.value: Any = None
+        self.parent = parent
+        self.children: List["_Node"] = []
+        self.row = row
+
+
+class ReceiveTreeModel(QAbstractItemModel):
+    """接收数据树模型：设备 -> 分段 -> 字段。
+
+    `apply_updates` 只为传入的键发出 `dataChanged`（新键则插入行），
+    视图因此只重绘值发生变化的单元格。
+    """
+
+    HEADERS = ("设备/类别/键", "值")
+    STALE_BRUSH = QBrush(QColor("#9a9a9a"))
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._root = _Node("", None, 0)
+        self._devices: Dict[str, _Node] = {}
+        self._sections: Dict[Tuple[str, str], _Node] = {}
+        self._fields: Dict[ValueKey, _Node] = {}
+        # 离线设备：其下所有行以灰色显示，保留最后的值
+        self._stale: Set[str] = set()
+
+    # ------------------------------------------------------------------
+    # Update API
+    # ------------------------------------------------------------------
+    def apply_updates(self, updates: Dict[ValueKey, Any]) -> None:
+        for key, value in updates.items():
+            node = self._fields.get(key)
+            if node is None:
+                self._create_field_node(key, value)
+                continue
+            node.value = value
+            idx = self.createIndex(node.row, 1, node)
+            self.dataChanged.emit(idx, idx, [Qt.DisplayRole])
+
+    def set_device_stale(self, device: str, stale: bool) -> None:
+        """标记设备离线（灰显）或恢复在线。"""
+        if stale == (device in self._stale):
+            return
+        if stale:
+            self._stale.add(device)
+        else:
+            self._stale.discard(device)
+        node = self._devices.get(device)
+        if node is not None:
+            self._emit_subtree_changed(node)
+
+    def is_device_stale(self, device: str) -> bool:
+        return device in self._stale
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._root.children = []
+        self._devices.clear()
+        self._sections.clear()
+        self._fields.clear()
+        self.endResetModel()
+
+    def value_for(self, key: ValueKey) -> Any:
+        node = self._fields.get(key)
+        return None if node is None else node.value
+
+    def has_key(self, key: ValueKey) -> bool:
+        return key in self._fields
+
+    # ------------------------------------------------------------------
+    # QAbstractItemModel API
+    # ------------------------------------------------------------------
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()):
+        parent_node = self._node_from_index(parent)
+        if 0 <= row < len(parent_node.children) and 0 <= column < 2:
+            return self.createIndex(row, column, parent_node.children[row])
+        return QModelIndex()
+
+    def parent(self, index: QModelIndex = QModelIndex()):  # type: ignore[override]
+        if not index.isValid():
+            return QModelIndex()
+        node: _Node = index.internalPointer()
+        parent_node = node.parent
+        if parent_node is None or parent_node is self._root:
+            return QModelIndex()
+        return self.createIndex(parent_node.row, 0, parent_node)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid() and parent.column() != 0:
+            return 0
+        return len(self._node_from_index(parent).children)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 2
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node: _Node = index.internalPointer()
+        if role == Qt.ForegroundRole:
+            if self._stale and self._device_of(node) in self._stale:
+                return self.STALE_BRUSH
+            return None
+        if role != Qt.DisplayRole:
+            return None
+        if index.column() == 0:
+            return node.name
+        if node.children:
+            return ""
+        return "--" if node.value is None else str(node.value)
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            if 0 <= section < len(self.HEADERS):
+                return self.HEADERS[section]
+        return None
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _node_from_index(self, index: QModelIndex) -> _Node:
+        if index.isValid():
+            return index.internalPointer()
+        return self._root
+
+    def _device_of(self, node: _Node) -> str:
+        while node.parent is not None and node.parent is not self._root:
+            node = node.parent
+        return node.name
+
+    def _emit_subtree_changed(self, node: _Node) -> None:
+        # 每个父节点一次 dataChanged 覆盖其全部子行
+        self.dataChanged.emit(
+            self.createIndex(node.row, 0, node),
+            self.createIndex(node.row, 1, node),
+            [Qt.ForegroundRole],
+        )
+        pending = [node]
+        while pending:
+            parent = pending.pop()
+            kids = parent.children
+            if not kids:
+                continue
+            self.dataChanged.emit(
+                self.createIndex(0, 0, kids[0]),
+                self.createIndex(len(kids) - 1, 1, kids[-1]),
+                [Qt.ForegroundRole],
+            )
+            pending.extend(kids)
+
+    def _append_child(self, parent: _Node, name: str, value: Any = None) -> _Node:
+        row = len(parent.children)
+        if parent is self._root:
+            parent_index = QModelIndex()
+        else:
+            parent_index = self.createIndex(parent.row, 0, parent)
+        self.beginInsertRows(parent_index, row, row)
+        node = _Node(name, parent, row)
+        node.value = value
+        parent.children.append(node)
+        self.endInsertRows()
+        return node
+
+    def _create_field_node(self, key: ValueKey, value: Any) -> _Node:
+        device, section, field = key
+        device_node = self._devices.get(device)
+        if device_node is None:
+            device_node = self._append_child(self._root, device)
+            self._devices[device] = device_node
+        section_node = self._sections.get((device, section))
+        if section_node is None:
+            section_node = self._append_child(device_node, section)
+            self._sections[(device, section)] = section_node
+        node = self._append_child(section_node, field, value)
+        self._fields[key] = node
+        return node
@@ -0,0 +1,17 @@
+"""无界面入口：不导入 Qt，按会话配置运行仿真并输出统计。
+
+python headless.py --config session.yaml
+python headless.py --help
+"""
+
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from engine.cli import main  # noqa: E402
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -27,6 +27,8 @@ class DeviceConfigSettings:
     target_receive_port: str = ""
     # optional preset name selected by the user (e.g. INV1, INV2)
     device_preset: str = ""
+    # UDP transport used by the communication controller ("thread"/"asyncio")
+    transport: str = "thread"
 
 
 @dataclass
@@ -40,6 +42,7 @@ class WaveformSettings:
     signal_order: List[str] = field(default_factory=list)
     splitter_sizes: Optional[List[int]] = None
     palette: Dict[str, str] = field(default_factory=dict)
+    recording_dir: str = ""
 
 
 @dataclass
@@ -93,6 +96,9 @@ def load_device_config(
             device_preset=str(
                 settings.value("device_preset", getattr(defaults, "device_preset", ""))
             ),
+            transport=str(
+                settings.value("transport", getattr(defaults, "transport", "thread"))
+            ),
         )
     finally:
         settings.endGroup()
@@ -110,6 +116,7 @@ def save_device_config(data: DeviceConfigSettings) -> None:
         settings.setValue("acu_receive_port", data.acu_receive_port)
         settings.setValue("target_ip", data.target_ip)
         settings.setValue("target_receive_port", data.target_receive_port)
+        settings.setValue("transport", data.transport)
         try:
             settings.setValue("device_preset", data.device_preset)
         except Exception:
@@ -134,6 +141,7 @@ def load_waveform_settings() -> WaveformSettings:
         time_range = settings.value("time_range", None)
         auto_range = bool(settings.value("auto_range", True))
         last_export_path = str(settings.value("last_export_path", ""))
+        recording_dir = str(settings.value("recording_dir", "") or "")
         signal_order = list(settings.value("signal_order", []))
         if not isinstance(signal_order, list):
             signal_order = []
@@ -171,6 +179,7 @@ def load_waveform_settings() -> WaveformSettings:
         signal_order=signal_order,
         splitter_sizes=splitter_sizes,
         palette=palette,
+        recording_dir=recording_dir,
     )
 
 
@@ -183,6 +192,7 @@ def save_waveform_settings(data: WaveformSettings) -> None:
             settings.setValue("time_range", data.time_range)
         settings.setValue("auto_range", bool(data.auto_range))
         settings.setValue("last_export_path", data.last_export_path)
+        settings.setValue("recording_dir", data.recording_dir)
         settings.setValue("signal_order", list(data.signal_order))
         if data.splitter_sizes is not None:
             settings.setValue("splitter_sizes", list(data.splitter_sizes))
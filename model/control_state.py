@@ -1,5 +1,79 @@
+import threading
 from dataclasses import dataclass, field
-from typing import Dict, Tuple
+from typing import Any, Dict, Hashable, Tuple
+
+# 以字典保存的控制字段（其余字段为标量，如 battery_temp）
+DICT_FIELDS = (
+    "bool_commands",
+    "freq_controls",
+    "isolation_commands",
+    "start_commands",
+    "chu_controls",
+    "redundant_commands",
+    "start_times",
+    "branch_voltages",
+)
+
+
+class _TrackedDict(dict):
+    """原地修改时递增所属 ControlState 版本号的字典。
+
+    兼容 `cs.freq_controls[10] = 50` 这类直接写法，缓存不会因此过期失效。
+    """
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: "ControlState", *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._owner = owner
+
+    def __reduce__(self):
+        # 复制/序列化时退化为普通 dict
+        return (dict, (dict(self),))
+
+    def __setitem__(self, key, value):
+        with self._owner._lock:
+            if key in self and dict.__getitem__(self, key) == value:
+                return
+            super().__setitem__(key, value)
+            self._owner._bump()
+
+    def __delitem__(self, key):
+        with self._owner._lock:
+            super().__delitem__(key)
+            self._owner._bump()
+
+    def pop(self, key, *default):
+        with self._owner._lock:
+            had = key in self
+            value = super().pop(key, *default)
+            if had:
+                self._owner._bump()
+            return value
+
+    def popitem(self):
+        with self._owner._lock:
+            item = super().popitem()
+            self._owner._bump()
+            return item
+
+    def setdefault(self, key, default=None):
+        with self._owner._lock:
+            if key not in self:
+                super().__setitem__(key, default)
+                self._owner._bump()
+            return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        with self._owner._lock:
+            super().update(*args, **kwargs)
+            self._owner._bump()
+
+    def clear(self):
+        with self._owner._lock:
+            if self:
+                super().clear()
+                self._owner._bump()
 
 
 @dataclass
@@ -14,16 +88,78 @@ class ControlState:
     branch_voltages: Dict[int, int] = field(default_factory=dict)  # volts
     battery_temp: int = 25
 
+    def __post_init__(self):
+        # 任何修改都递增 version；快照按版本缓存，未变化时直接复用
+        object.__setattr__(self, "_lock", threading.RLock())
+        object.__setattr__(self, "_version", 0)
+        object.__setattr__(self, "_snapshot_cache", None)
+        for name in DICT_FIELDS:
+            object.__setattr__(self, name, _TrackedDict(self, getattr(self, name)))
+
+    def __setattr__(self, name, value):
+        if "_lock" not in self.__dict__:
+            # dataclass __init__ 阶段，__post_init__ 会统一包装
+            object.__setattr__(self, name, value)
+            return
+        with self._lock:
+            if name in DICT_FIELDS:
+                if getattr(self, name) == value:
+                    return
+                value = _TrackedDict(self, value)
+            elif name == "battery_temp" and self.battery_temp == value:
+                return
+            object.__setattr__(self, name, value)
+            if name in DICT_FIELDS or name == "battery_temp":
+                self._bump()
+
+    def _bump(self) -> None:
+        object.__setattr__(self, "_version", self._version + 1)
+
+    @property
+    def version(self) -> int:
+        """单调递增的修改计数；相同版本对应相同的快照与帧内容。"""
+        return self._version
+
+    # ------------------------------------------------------------------
+    # 增量修改（供控件信号调用）
+    # ------------------------------------------------------------------
+    def set_flag(self, source: str, key: Hashable, enabled: bool) -> None:
+        """设置位命令；只保存置位的键，与整页同步时的表示一致。"""
+        target = getattr(self, source)
+        if enabled:
+            target[key] = True
+        else:
+            target.pop(key, None)
+
+    def set_value(self, source: str, key: Any, value: float) -> None:
+        """设置数值字段；字典字段中 <=0 视为未设置。"""
+        if source not in DICT_FIELDS:
+            setattr(self, source, value)
+            return
+        target = getattr(self, source)
+        if value > 0:
+            target[key] = value
+        else:
+            target.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # 快照
+    # ------------------------------------------------------------------
+    def snapshot_with_version(self) -> Tuple[int, Dict[str, Any]]:
+        """原子地返回 (version, snapshot)；版本未变时复用同一份快照。
+
+        快照由多个发送周期共享，调用方不得修改。
+        """
+        with self._lock:
+            cached = self._snapshot_cache
+            if cached is not None and cached[0] == self._version:
+                return cached
+            snap = {name: dict(getattr(self, name)) for name in DICT_FIELDS}
+            snap["battery_temp"] = self.battery_temp
+            cached = (self._version, snap)
+            object.__setattr__(self, "_snapshot_cache", cached)
+            return cached
+
     def snapshot(self):
         """返回不可变快照用于构建帧，避免并发写入导致的状态不一致"""
-        return {
-            "bool_commands": dict(self.bool_commands),
-            "freq_controls": dict(self.freq_controls),
-            "isolation_commands": dict(self.isolation_commands),
-            "start_commands": dict(self.start_commands),
-            "chu_controls": dict(self.chu_controls),
-            "redundant_commands": dict(self.redundant_commands),
-            "start_times": dict(self.start_times),
-            "branch_voltages": dict(self.branch_voltages),
-            "battery_temp": self.battery_temp,
-        }
+        return self.snapshot_with_version()[1]
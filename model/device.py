@@ -11,11 +11,36 @@ class DeviceConfig:
     category: str = "UNKNOWN"  # INV / CHU / BCC / ACU
 
 
+@dataclass
+class LinkStats:
+    """按生命信号连续性与到达间隔统计的链路质量（由 LinkMonitor 逐帧更新）。"""
+
+    frames: int = 0
+    lost: int = 0  # 生命信号跳变推算出的丢帧数
+    duplicates: int = 0  # 生命信号重复
+    reordered: int = 0  # 生命信号回退（乱序/迟到）
+    resets: int = 0  # 跳变过大，视为设备重启而不计丢帧
+    interval_ms: float = 0.0  # 到达间隔（指数平均）
+    jitter_ms: float = 0.0  # 到达间隔偏差（指数平均，RFC 3550 风格）
+    # 已计入 lost 的缺口位图：第 i 位表示（当前生命信号 - i）尚未到达
+    missing: int = 0
+
+    @property
+    def rate_hz(self) -> float:
+        return 1000.0 / self.interval_ms if self.interval_ms > 0 else 0.0
+
+    @property
+    def loss_ratio(self) -> float:
+        expected = self.frames + self.lost
+        return self.lost / expected if expected else 0.0
+
+
 @dataclass
 class DeviceState:
     life_signal: int = 0
     last_seen_timestamp: Optional[float] = None
     parsed_cache: Dict[str, Dict] = field(default_factory=dict)
+    link: LinkStats = field(default_factory=LinkStats)
 
 
 @dataclass
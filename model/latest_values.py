@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Tuple
+
+# (device, section, field)
+ValueKey = Tuple[str, str, str]
+
+# 非字典段（如 "备注"、"错误"）统一放在该字段名下
+SCALAR_FIELD = "值"
+
+
+class LatestValueTable:
+    """按 (设备, 分段, 字段) 保存最新值的线程安全表。
+
+    解析线程每帧调用 `update_parsed` 覆盖写入，只记录值真正变化的键；
+    UI 线程定时调用 `take_dirty` 取走自上次刷新以来变化的键及其最新值。
+    中间值被直接覆盖，因此 UI 不会处理过期记录，积压量也不会随帧率增长。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: Dict[ValueKey, Any] = {}
+        self._dirty: Dict[ValueKey, Any] = {}
+
+    def update(self, key: ValueKey, value: Any) -> bool:
+        """写入单个键，值变化时标记为脏并返回 True。"""
+        with self._lock:
+            return self._set_locked(key, value)
+
+    def update_parsed(self, device: str, parsed: Dict[str, Any]) -> int:
+        """合并一条解析结果，返回发生变化的键数量。"""
+        changed = 0
+        with self._lock:
+            for section, value in parsed.items():
+                if isinstance(value, dict):
+                    for field, field_value in value.items():
+                        if self._set_locked((device, section, str(field)), field_value):
+                            changed += 1
+                elif self._set_locked((device, str(section), SCALAR_FIELD), value):
+                    changed += 1
+        return changed
+
+    def take_dirty(self) -> Dict[ValueKey, Any]:
+        """取走并清空自上次调用以来变化的键。"""
+        with self._lock:
+            dirty = self._dirty
+            self._dirty = {}
+        return dirty
+
+    def mark_all_dirty(self) -> None:
+        """将所有已知键重新标记为脏，用于视图重建后的全量重绘。"""
+        with self._lock:
+            self._dirty = dict(self._values)
+
+    def get(self, key: ValueKey, default: Any = None) -> Any:
+        with self._lock:
+            return self._values.get(key, default)
+
+    def snapshot(self) -> Dict[ValueKey, Any]:
+        with self._lock:
+            return dict(self._values)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._dirty.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._values)
+
+    def _set_locked(self, key: ValueKey, value: Any) -> bool:
+        values = self._values
+        if key in values:
+            previous = values[key]
+            if previous is value or previous == value:
+                return False
+        values[key] = value
+        self._dirty[key] = value
+        return True
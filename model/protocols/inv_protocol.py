@@ -16,6 +16,10 @@ class InvLikeProtocol(BaseProtocol):
     def category(self) -> str:
         return self._cat
 
+    def write_life_signal(self, buf: bytearray, life_signal: int) -> None:
+        """只改写已构建帧中的生命信号字节。"""
+        buf[0:2] = struct.pack(">H", life_signal)
+
     def build_send_frame(
         self, control_snapshot: Dict[str, Any], life_signal: int
     ) -> bytearray:
@@ -0,0 +1,41 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+# 一个补丁：在 offset 处覆盖的字节
+Patch = Tuple[Tuple[int, bytes], ...]
+
+
+@dataclass(frozen=True)
+class SendTarget:
+    """扇出发送的一个目标设备；overrides 为该目标相对公共帧的固定差异。"""
+
+    name: str
+    ip: str
+    port: int
+    overrides: Dict[int, bytes] = field(default_factory=dict, hash=False)
+
+    @property
+    def addr(self) -> Tuple[str, int]:
+        return (self.ip, int(self.port))
+
+
+@dataclass
+class FanoutFrame:
+    """一个周期的扇出帧：公共帧 + 与 targets 一一对应的补丁。
+
+    补丁只包含与本周期公共帧不同的字节，无差异的目标直接发送公共帧。
+    """
+
+    base: bytes
+    targets: List[SendTarget]
+    patches: List[Patch]
+
+    def frame_for(self, index: int) -> bytes:
+        """返回第 index 个目标的完整帧（测试与预览用，发送路径不调用）。"""
+        patch = self.patches[index]
+        if not patch:
+            return self.base
+        buf = bytearray(self.base)
+        for offset, data in patch:
+            buf[offset : offset + len(data)] = data
+        return bytes(buf)
@@ -3,23 +3,81 @@
 from __future__ import annotations
 
 import struct
-from typing import Any, Dict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 
 from model.protocols.base import BaseProtocol
 
 from ..schema import (
     CategorySpec,
-    FaultMapSpec,
     SendOperationSpec,
     TemplateSpec,
     ValueFieldSpec,
 )
 
+# (label, offset, end, fmt, scale)
+ValueTable = Tuple[Tuple[str, int, int, str, float], ...]
+
+
+@dataclass(frozen=True)
+class ReceiveTables:
+    """Flattened receive layout of one category.
+
+    Plain tuples only, so the tables can be pickled into the template cache;
+    ``TemplateProtocol`` turns the formats into ``struct.Struct`` objects.
+    """
+
+    device_info: ValueTable
+    run_parameters: ValueTable
+    # (label, byte, mask)
+    status_flags: Tuple[Tuple[str, int, int], ...]
+    # (byte, ((mask, label), ...))
+    faults: Tuple[Tuple[int, Tuple[Tuple[int, str], ...]], ...]
+
+
+def _value_table(fields: List[ValueFieldSpec]) -> ValueTable:
+    return tuple(
+        (f.label, f.offset, f.offset + struct.calcsize(f.fmt), f.fmt, f.scale)
+        for f in fields
+    )
+
+
+def compile_receive_tables(
+    spec: TemplateSpec, category_spec: CategorySpec
+) -> ReceiveTables:
+    return ReceiveTables(
+        device_info=_value_table(spec.device_info),
+        run_parameters=_value_table(category_spec.run_parameters),
+        status_flags=tuple(
+            (flag.label, flag.byte, 1 << flag.bit)
+            for flag in category_spec.status_flags
+        ),
+        faults=tuple(
+            (
+                entry.byte,
+                tuple((1 << bit, label) for bit, label in entry.bit_labels.items()),
+            )
+            for entry in category_spec.faults
+        ),
+    )
+
 
 class TemplateProtocol(BaseProtocol):
-    """Protocol implementation driven entirely by a template specification."""
+    """Protocol implementation driven entirely by a template specification.
+
+    With ``compiled`` (see ``codegen.py``) the generated straight-line
+    functions replace ``parse_receive_frame``, ``build_send_frame`` and
+    ``write_life_signal`` on the instance; the methods below stay the
+    reference implementation they are tested against.
+    """
 
-    def __init__(self, spec: TemplateSpec, category_spec: CategorySpec):
+    def __init__(
+        self,
+        spec: TemplateSpec,
+        category_spec: CategorySpec,
+        tables: Optional[ReceiveTables] = None,
+        compiled: Optional[Any] = None,
+    ):
         self._spec = spec
         self._category_spec = category_spec
         self.name = spec.name
@@ -27,6 +85,23 @@ class TemplateProtocol(BaseProtocol):
         self.frame_length_receive = (
             category_spec.frame_length_receive or spec.frame_length_receive
         )
+        if tables is None:
+            tables = compile_receive_tables(spec, category_spec)
+        self.tables = tables
+        self._device_info = self._bind(tables.device_info)
+        self._run_parameters = self._bind(tables.run_parameters)
+        self.compiled = compiled
+        if compiled is not None:
+            self.parse_receive_frame = compiled.parse_receive_frame
+            self.build_send_frame = compiled.build_send_frame
+            self.write_life_signal = compiled.write_life_signal
+
+    @staticmethod
+    def _bind(table: ValueTable):
+        return tuple(
+            (label, offset, end, struct.Struct(fmt).unpack_from, scale)
+            for label, offset, end, fmt, scale in table
+        )
 
     # ------------------------------------------------------------------
     # BaseProtocol API
@@ -55,6 +130,12 @@ class TemplateProtocol(BaseProtocol):
 
         return buf
 
+    def write_life_signal(self, buf: bytearray, life_signal: int) -> None:
+        """Only rewrite the life-signal bytes of an already built frame."""
+        for op in self._spec.send_operations:
+            if op.op == "life_signal_u16":
+                self._apply_life_signal(buf, op, life_signal)
+
     def parse_receive_frame(self, data: bytes) -> Dict[str, Any]:
         if len(data) < self.frame_length_receive:
             return {"错误": "数据长度不足"}
@@ -66,10 +147,8 @@ class TemplateProtocol(BaseProtocol):
             "故障信息": {},
         }
 
-        self._extract_fields(data, self._spec.device_info, result["设备信息"])
-        self._extract_fields(
-            data, self._category_spec.run_parameters, result["运行参数"]
-        )
+        self._extract_fields(data, self._device_info, result["设备信息"])
+        self._extract_fields(data, self._run_parameters, result["运行参数"])
         self._extract_status_flags(data, result["状态信息"])
         faults = self._extract_faults(data)
         if faults:
@@ -81,6 +160,15 @@ class TemplateProtocol(BaseProtocol):
 
         return result
 
+    def fault_bits(self) -> List[Tuple[int, int, str]]:
+        """(byte, bit, label) for every fault bit, in the order
+        ``parse_receive_frame`` lists active faults."""
+        return [
+            (entry.byte, bit, label)
+            for entry in self._category_spec.faults
+            for bit, label in entry.bit_labels.items()
+        ]
+
     # ------------------------------------------------------------------
     # Send-frame helpers
     # ------------------------------------------------------------------
@@ -173,39 +261,31 @@ class TemplateProtocol(BaseProtocol):
     # ------------------------------------------------------------------
     # Receive-frame helpers
     # ------------------------------------------------------------------
-    def _extract_fields(
-        self, data: bytes, fields: list[ValueFieldSpec], out: Dict[str, Any]
-    ) -> None:
-        for field in fields:
-            start = field.offset
-            end = start + struct.calcsize(field.fmt)
-            if end > len(data):
+    @staticmethod
+    def _extract_fields(data: bytes, fields, out: Dict[str, Any]) -> None:
+        size = len(data)
+        for label, offset, end, unpack_from, scale in fields:
+            if end > size:
                 continue
-            raw = struct.unpack(field.fmt, data[start:end])[0]
-            value = raw * field.scale
-            out[field.label] = value
+            out[label] = unpack_from(data, offset)[0] * scale
 
     def _extract_status_flags(self, data: bytes, out: Dict[str, Any]) -> None:
-        for flag in self._category_spec.status_flags:
-            if flag.byte >= len(data):
+        size = len(data)
+        for label, byte, mask in self.tables.status_flags:
+            if byte >= size:
                 continue
-            byte_val = data[flag.byte]
-            out[flag.label] = bool(byte_val & (1 << flag.bit))
+            out[label] = bool(data[byte] & mask)
 
     def _extract_faults(self, data: bytes) -> list[str]:
         faults: list[str] = []
-        for entry in self._category_spec.faults:
-            self._extract_fault_map(data, entry, faults)
+        size = len(data)
+        for byte, bits in self.tables.faults:
+            if byte >= size:
+                continue
+            value = data[byte]
+            if value == 0:
+                continue
+            for mask, label in bits:
+                if value & mask:
+                    faults.append(label)
         return faults
-
-    def _extract_fault_map(
-        self, data: bytes, spec: FaultMapSpec, faults: list[str]
-    ) -> None:
-        if spec.byte >= len(data):
-            return
-        value = data[spec.byte]
-        if value == 0:
-            return
-        for bit, label in spec.bit_labels.items():
-            if value & (1 << bit):
-                faults.append(label)
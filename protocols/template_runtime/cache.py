@@ -0,0 +1,127 @@
+"""On-disk cache of compiled protocol templates.
+
+Parsing ``acusim.yaml`` and validating it into dataclasses dominates template
+start-up.  The cache stores the result of that work -- the validated
+``TemplateSpec``, the per-category receive tables, the generated parser and
+builder source and any artifacts that consumers derive from the spec (for
+example the field indexes of ``ProtocolFieldService``) -- in one pickle per
+template version.
+
+Entries are keyed by the SHA-256 of the template file plus
+``CACHE_SCHEMA_VERSION``; editing the template or changing the dataclasses in
+``schema.py`` therefore never reuses a stale entry.  The cache directory lives
+next to the writable configuration (``acu_config.json``) and only ever holds
+files written by this process, so loading them is as trusted as loading that
+configuration.  Any cache failure falls back to parsing the YAML.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from infra.app_paths import resource_path
+
+logger = logging.getLogger(__name__)
+
+# Bump when the schema dataclasses, receive tables, generated source (see
+# ``codegen.py``) or artifact layout change.
+CACHE_SCHEMA_VERSION = 2
+
+CACHE_DIR_NAME = ".template_cache"
+
+
+def template_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class TemplateCache:
+    """Directory of pickled compiled templates, one file per (template, hash)."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    @classmethod
+    def default(cls) -> "TemplateCache":
+        return cls(resource_path(CACHE_DIR_NAME, prefer_write=True))
+
+    @staticmethod
+    def _prefix(template_path: Path) -> str:
+        # the location hash keeps templates with the same stem in different
+        # folders (or stems like "acusim" / "acusim-metro") from pruning each
+        # other's entries
+        path = Path(template_path)
+        where = hashlib.sha256(str(path.resolve()).encode("utf-8")).hexdigest()
+        return f"{path.stem}-{where[:8]}-"
+
+    def path_for(self, template_path: Path, digest: str) -> Path:
+        prefix = self._prefix(template_path)
+        return self.directory / f"{prefix}{digest[:16]}-v{CACHE_SCHEMA_VERSION}.pickle"
+
+    def load(self, template_path: Path, digest: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for this template content, if usable."""
+        path = self.path_for(template_path, digest)
+        try:
+            with path.open("rb") as stream:
+                entry = pickle.load(stream)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Ignoring unreadable template cache %s", path)
+            return None
+        if (
+            not isinstance(entry, dict)
+            or entry.get("schema") != CACHE_SCHEMA_VERSION
+            or entry.get("digest") != digest
+        ):
+            return None
+        return entry
+
+    def store(self, template_path: Path, digest: str, entry: Dict[str, Any]) -> bool:
+        """Atomically write an entry; failures are logged and ignored."""
+        entry = dict(entry, schema=CACHE_SCHEMA_VERSION, digest=digest)
+        path = self.path_for(template_path, digest)
+        tmp_name = None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(
+                prefix=path.name, suffix=".tmp", dir=self.directory
+            )
+            with os.fdopen(fd, "wb") as stream:
+                pickle.dump(entry, stream, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_name, path)
+            tmp_name = None
+            self._prune(template_path, keep=path)
+            return True
+        except Exception as exc:
+            logger.debug("Template cache not written (%s): %s", path, exc)
+            return False
+        finally:
+            if tmp_name is not None:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+
+    def _prune(self, template_path: Path, keep: Path) -> None:
+        """Drop entries of older versions of the same template."""
+        prefix = self._prefix(template_path)
+        for old in self.directory.glob(f"{prefix}*.pickle"):
+            if old != keep:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+
+
+__all__ = [
+    "CACHE_DIR_NAME",
+    "CACHE_SCHEMA_VERSION",
+    "TemplateCache",
+    "template_digest",
+]
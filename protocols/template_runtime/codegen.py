@@ -0,0 +1,384 @@
+"""Generate specialised Python source for one template category.
+
+``TemplateProtocol`` interprets the receive tables and send operations field by
+field.  This module turns the same tables into straight-line functions:
+
+* ``parse_receive_frame(data)`` -- one ``unpack_from`` call for all value
+  fields that share a byte order, constant labels and scales, inline bit tests
+  for status flags and faults, and the result built as a dict literal;
+* ``build_send_frame(control_snapshot, life_signal)`` and
+  ``write_life_signal(buf, life_signal)`` -- the send operations unrolled with
+  their offsets, sources and factors as constants.
+
+The generated functions behave exactly like the interpreted ones (including
+the length guard and the handling of fields beyond the receive length); the
+differential tests in ``tests/template_protocol`` hold them to that.  Only
+``repr()`` literals and integers are written into the source, so labels from
+the template can never change the code.
+
+The source is cached with the compiled template, registered with
+``linecache`` so tracebacks and ``inspect.getsource`` show it, and can be
+printed with::
+
+    python -m protocols.template_runtime.codegen [CATEGORY ...] [--template PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import linecache
+import struct
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .adapters.template_protocol import ReceiveTables, ValueTable
+from .schema import SendOperationSpec, TemplateSpec
+
+_STANDARD_ORDERS = "<>!="
+
+# (label, offset, end, fmt, scale)
+_Field = Tuple[str, int, int, str, float]
+
+
+@dataclass(frozen=True)
+class CompiledCategory:
+    """Functions compiled from the generated source of one category."""
+
+    category: str
+    filename: str
+    source: str
+    parse_receive_frame: Callable[[bytes], Dict[str, Any]]
+    build_send_frame: Callable[[Dict[str, Any], int], bytearray]
+    write_life_signal: Callable[[bytearray, int], None]
+
+
+class _Writer:
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.constants: Dict[str, str] = {}
+
+    def line(self, indent: int, text: str) -> None:
+        self.lines.append("    " * indent + text)
+
+    def unpacker(self, fmt: str) -> str:
+        """Name of a module-level ``Struct(fmt).unpack_from``."""
+        for name, existing in self.constants.items():
+            if existing == fmt:
+                return name
+        name = f"_unpack_{len(self.constants)}"
+        self.constants[name] = fmt
+        return name
+
+
+def _single_item_code(fmt: str) -> Optional[Tuple[str, str]]:
+    """(byte order, code) when ``fmt`` can join a combined struct."""
+    if not fmt or fmt[0] not in _STANDARD_ORDERS:
+        return None
+    try:
+        compiled = struct.Struct(fmt)
+        if len(compiled.unpack(bytes(compiled.size))) != 1:
+            return None
+    except struct.error:
+        return None
+    return fmt[0], fmt[1:]
+
+
+def _plan_value_reads(
+    fields: Sequence[_Field], indices: Sequence[int], writer: _Writer, indent: int
+) -> Dict[int, str]:
+    """Emit the unpacks of ``fields[i]`` for ``i`` in ``indices``; map i -> var.
+
+    Non-overlapping fields with the first field's byte order are read by a
+    single ``unpack_from``; anything else gets its own call.
+    """
+    order_of = [(_single_item_code(fields[i][3]), i) for i in indices]
+    combined: List[Tuple[int, str]] = []
+    combined_order: Optional[str] = None
+    position = None
+    names: Dict[int, str] = {}
+    singles: List[int] = []
+    for item, index in sorted(order_of, key=lambda pair: fields[pair[1]][1]):
+        label, offset, end, fmt, scale = fields[index]
+        if item is None:
+            singles.append(index)
+            continue
+        order, code = item
+        if combined_order is None:
+            combined_order = order
+        if order != combined_order or (position is not None and offset < position):
+            singles.append(index)
+            continue
+        gap = offset - (position if position is not None else offset)
+        combined.append((index, f"{gap}x{code}" if gap else code))
+        position = end
+    if combined:
+        start = fields[combined[0][0]][1]
+        fmt = combined_order + "".join(code for _index, code in combined)
+        for index, _code in combined:
+            names[index] = f"v{index}"
+        targets = ", ".join(names[index] for index, _code in combined)
+        if len(combined) == 1:
+            targets = f"({targets},)"
+        writer.line(indent, f"{targets} = {writer.unpacker(fmt)}(data, {start})")
+    for index in sorted(singles):
+        _label, offset, _end, fmt, _scale = fields[index]
+        names[index] = f"v{index}"
+        writer.line(indent, f"v{index} = {writer.unpacker(fmt)}(data, {offset})[0]")
+    return names
+
+
+def _emit_section(
+    writer: _Writer,
+    var: str,
+    items: Sequence[Tuple[str, str, Optional[str]]],
+    indent: int,
+) -> None:
+    """``var = {...}`` for (label, expression, guard) in insertion order.
+
+    Guarded entries (fields past the receive length) become ``if`` blocks;
+    the unguarded prefix stays a dict literal.
+    """
+    prefix = 0
+    while prefix < len(items) and items[prefix][2] is None:
+        prefix += 1
+    if prefix == 0:
+        writer.line(indent, f"{var} = {{}}")
+    else:
+        writer.line(indent, f"{var} = {{")
+        for label, expr, _guard in items[:prefix]:
+            writer.line(indent + 1, f"{label!r}: {expr},")
+        writer.line(indent, "}")
+    for label, expr, guard in items[prefix:]:
+        if guard is None:
+            writer.line(indent, f"{var}[{label!r}] = {expr}")
+        else:
+            writer.line(indent, f"if {guard}:")
+            writer.line(indent + 1, f"{var}[{label!r}] = {expr}")
+
+
+def _value_items(
+    table: ValueTable,
+    first_index: int,
+    names: Dict[int, str],
+    writer: _Writer,
+) -> List[Tuple[str, str, Optional[str]]]:
+    items = []
+    for i, (label, offset, end, fmt, scale) in enumerate(table, first_index):
+        if i in names:
+            items.append((label, f"{names[i]} * {scale!r}", None))
+        else:
+            read = f"{writer.unpacker(fmt)}(data, {offset})[0]"
+            items.append((label, f"{read} * {scale!r}", f"size >= {end}"))
+    return items
+
+
+def _emit_receive(writer: _Writer, tables: ReceiveTables, length: int) -> None:
+    writer.line(0, "def parse_receive_frame(data):")
+    writer.line(1, "size = len(data)")
+    writer.line(1, f"if size < {length}:")
+    writer.line(2, "return {'错误': '数据长度不足'}")
+
+    values = list(tables.device_info) + list(tables.run_parameters)
+    inside = [i for i, field in enumerate(values) if field[2] <= length]
+    names = _plan_value_reads(values, inside, writer, 1)
+    _emit_section(
+        writer, "device", _value_items(tables.device_info, 0, names, writer), 1
+    )
+    _emit_section(
+        writer,
+        "params",
+        _value_items(tables.run_parameters, len(tables.device_info), names, writer),
+        1,
+    )
+
+    status_bytes = sorted(
+        {byte for _label, byte, _mask in tables.status_flags if byte < length}
+    )
+    for byte in status_bytes:
+        writer.line(1, f"s{byte} = data[{byte}]")
+    flags = []
+    for label, byte, mask in tables.status_flags:
+        if byte < length:
+            flags.append((label, f"(s{byte} & {mask}) != 0", None))
+        else:
+            flags.append((label, f"(data[{byte}] & {mask}) != 0", f"size > {byte}"))
+    _emit_section(writer, "status", flags, 1)
+
+    writer.line(1, "faults = []")
+    for index, (byte, bits) in enumerate(tables.faults):
+        if not bits:
+            continue
+        indent = 1
+        if byte >= length:
+            writer.line(indent, f"if size > {byte}:")
+            indent += 1
+        writer.line(indent, f"f{index} = data[{byte}]")
+        writer.line(indent, f"if f{index}:")
+        for mask, label in bits:
+            writer.line(indent + 1, f"if f{index} & {mask}:")
+            writer.line(indent + 2, f"faults.append({label!r})")
+
+    writer.line(1, "return {")
+    writer.line(2, "'设备信息': device,")
+    writer.line(2, "'运行参数': params,")
+    writer.line(2, "'状态信息': status,")
+    writer.line(2, "'故障信息': (")
+    writer.line(3, "{'故障列表': faults, '故障数量': len(faults)}")
+    writer.line(3, "if faults")
+    writer.line(3, "else {'故障列表': ['正常'], '故障数量': 0}")
+    writer.line(2, "),")
+    writer.line(1, "}")
+
+
+def _emit_life_signal(writer: _Writer, op: SendOperationSpec, indent: int) -> None:
+    if op.offset is None:
+        return
+    writer.line(indent, "raw = int(max(0, min(0xFFFF, life_signal)))")
+    writer.line(indent, f"buf[{op.offset}:{op.offset + 2}] = raw.to_bytes(2, 'big')")
+
+
+def _emit_entries(writer: _Writer, op: SendOperationSpec) -> None:
+    writer.line(1, f"entries = control_snapshot.get({op.source or ''!r}, {{}})")
+
+
+def _emit_send_op(writer: _Writer, op: SendOperationSpec, length: int) -> None:
+    writer.line(1, f"# {op.op} {op.source!r}" if op.source else f"# {op.op}")
+    if op.op == "life_signal_u16":
+        _emit_life_signal(writer, op, 1)
+    elif op.op == "dict_bitset":
+        _emit_entries(writer, op)
+        writer.line(1, "if isinstance(entries, dict):")
+        writer.line(2, "for key, enabled in entries.items():")
+        writer.line(3, "if not enabled:")
+        writer.line(4, "continue")
+        writer.line(3, "if not isinstance(key, (tuple, list)) or len(key) != 2:")
+        writer.line(4, "continue")
+        writer.line(3, "byte_idx, bit_idx = key")
+        writer.line(
+            3, "if not isinstance(byte_idx, int) or not isinstance(bit_idx, int):"
+        )
+        writer.line(4, "continue")
+        writer.line(3, f"if 0 <= byte_idx < {length} and 0 <= bit_idx < 8:")
+        writer.line(4, "buf[byte_idx] |= 1 << bit_idx")
+    elif op.op == "dict_u16_scaled":
+        _emit_entries(writer, op)
+        writer.line(1, "if isinstance(entries, dict):")
+        writer.line(2, "for byte_idx, value in entries.items():")
+        writer.line(3, "if not isinstance(byte_idx, int):")
+        writer.line(4, "continue")
+        writer.line(3, f"packed = _pack_u16(int(float(value) * {op.factor!r}))")
+        writer.line(3, f"if 0 <= byte_idx < {length - 1}:")
+        writer.line(4, "buf[byte_idx : byte_idx + 2] = packed")
+    elif op.op == "dict_packed_byte":
+        if op.offset is None:
+            return
+        _emit_entries(writer, op)
+        writer.line(1, "if isinstance(entries, dict):")
+        writer.line(2, "packed = 0")
+        writer.line(2, "for bit_idx, enabled in entries.items():")
+        writer.line(
+            3, "if bool(enabled) and isinstance(bit_idx, int) and 0 <= bit_idx < 8:"
+        )
+        writer.line(4, "packed |= 1 << bit_idx")
+        if 0 <= op.offset < length:
+            writer.line(2, f"buf[{op.offset}] = packed")
+    elif op.op == "scalar_u16_scaled":
+        if op.offset is None or op.source is None:
+            return
+        writer.line(1, f"value = control_snapshot.get({op.source!r}, 0)")
+        writer.line(1, f"packed = _pack_u16(int(float(value) * {op.factor!r}))")
+        if 0 <= op.offset < length - 1:
+            writer.line(1, f"buf[{op.offset}:{op.offset + 2}] = packed")
+    else:  # pragma: no cover - guarded by schema validation
+        raise RuntimeError(f"Unsupported operation: {op.op}")
+
+
+def _emit_send(writer: _Writer, spec: TemplateSpec) -> None:
+    length = spec.frame_length_send
+    writer.line(0, "def build_send_frame(control_snapshot, life_signal):")
+    writer.line(1, f"buf = bytearray({length})")
+    for op in spec.send_operations:
+        _emit_send_op(writer, op, length)
+    writer.line(1, "return buf")
+    writer.line(0, "")
+    writer.line(0, "")
+    writer.line(0, "def write_life_signal(buf, life_signal):")
+    ops = [op for op in spec.send_operations if op.op == "life_signal_u16"]
+    for op in ops:
+        _emit_life_signal(writer, op, 1)
+    if not any(op.offset is not None for op in ops):
+        writer.line(1, "return None")
+
+
+def generate_category_source(
+    spec: TemplateSpec, category: str, tables: ReceiveTables
+) -> str:
+    """Python source of the specialised functions for ``category``."""
+    category_spec = spec.categories[category]
+    length = category_spec.frame_length_receive or spec.frame_length_receive
+    body = _Writer()
+    _emit_receive(body, tables, length)
+    body.line(0, "")
+    body.line(0, "")
+    _emit_send(body, spec)
+
+    header = [
+        f"# generated from template {spec.name!r} v{spec.version!r},"
+        f" category {category!r}",
+        f"# receive frame {length} bytes, send frame {spec.frame_length_send} bytes",
+    ]
+    for name, fmt in body.constants.items():
+        header.append(f"{name} = _Struct({fmt!r}).unpack_from")
+    header.append("_pack_u16 = _Struct('>H').pack")
+    return "\n".join(header + ["", ""] + body.lines) + "\n"
+
+
+def compile_category(category: str, source: str, filename: str) -> CompiledCategory:
+    """Compile generated source and register it for tracebacks/inspect."""
+    code = compile(source, filename, "exec")
+    namespace: Dict[str, Any] = {"_Struct": struct.Struct, "__name__": filename}
+    exec(code, namespace)
+    linecache.cache[filename] = (
+        len(source),
+        None,
+        source.splitlines(keepends=True),
+        filename,
+    )
+    return CompiledCategory(
+        category=category,
+        filename=filename,
+        source=source,
+        parse_receive_frame=namespace["parse_receive_frame"],
+        build_send_frame=namespace["build_send_frame"],
+        write_life_signal=namespace["write_life_signal"],
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from .loader import ProtocolTemplateLoader
+
+    parser = argparse.ArgumentParser(
+        description="Print the generated parser/builder source of template categories."
+    )
+    parser.add_argument("categories", nargs="*", help="default: all categories")
+    parser.add_argument("--template", help="template YAML (default: acusim.yaml)")
+    args = parser.parse_args(argv)
+    loader = (
+        ProtocolTemplateLoader(args.template)
+        if args.template
+        else ProtocolTemplateLoader.default()
+    )
+    for category in args.categories or list(loader.spec().categories):
+        print(loader.generated_source(category))
+    return 0
+
+
+__all__ = [
+    "CompiledCategory",
+    "compile_category",
+    "generate_category_source",
+]
+
+
+if __name__ == "__main__":  # pragma: no cover - manual debugging entry point
+    raise SystemExit(main())
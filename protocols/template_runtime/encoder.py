@@ -0,0 +1,157 @@
+"""Encode receive frames from physical values (the template used in reverse).
+
+`TemplateProtocol.parse_receive_frame` turns a device frame into labelled
+values; :class:`ReceiveFrameEncoder` does the opposite so tools and tests
+can stand in for INV/CHU/BCC devices without hardware.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .schema import CategorySpec, TemplateConfigError, TemplateSpec, ValueFieldSpec
+
+_INT_LIMITS = {
+    "b": (-0x80, 0x7F),
+    "B": (0, 0xFF),
+    "h": (-0x8000, 0x7FFF),
+    "H": (0, 0xFFFF),
+    "i": (-0x80000000, 0x7FFFFFFF),
+    "I": (0, 0xFFFFFFFF),
+}
+
+
+class _FieldPacker:
+    __slots__ = ("label", "offset", "packer", "scale", "lo", "hi", "integral")
+
+    def __init__(self, field: ValueFieldSpec) -> None:
+        self.label = field.label
+        self.offset = field.offset
+        self.packer = struct.Struct(field.fmt)
+        self.scale = field.scale or 1.0
+        code = field.fmt.lstrip("<>!=@")[-1:]
+        self.integral = code in _INT_LIMITS
+        self.lo, self.hi = _INT_LIMITS.get(code, (None, None))
+
+    def raw_range(self) -> Tuple[Optional[float], Optional[float]]:
+        """Physical range representable by the field."""
+        if self.lo is None:
+            return None, None
+        a, b = self.lo * self.scale, self.hi * self.scale
+        return (a, b) if a <= b else (b, a)
+
+    def pack_into(self, buf: bytearray, value: float) -> None:
+        raw = value / self.scale
+        if self.integral:
+            raw = int(round(raw))
+            raw = self.lo if raw < self.lo else self.hi if raw > self.hi else raw
+        self.packer.pack_into(buf, self.offset, raw)
+
+
+class ReceiveFrameEncoder:
+    """Build receive frames for one template category.
+
+    Field packers are precompiled from the spec, so encoding costs one
+    ``struct.pack_into`` per value and is cheap enough for kHz rates.
+    """
+
+    def __init__(self, spec: TemplateSpec, category_spec: CategorySpec) -> None:
+        self.category = category_spec.category
+        self.frame_length = (
+            category_spec.frame_length_receive or spec.frame_length_receive
+        )
+        self._life: Optional[_FieldPacker] = None
+        self._device_info: List[_FieldPacker] = []
+        for field in spec.device_info:
+            packer = _FieldPacker(field)
+            if field.label == "生命信号":
+                self._life = packer
+            else:
+                self._device_info.append(packer)
+        self._run_parameters = [_FieldPacker(f) for f in category_spec.run_parameters]
+        self._flags: Dict[str, Tuple[int, int]] = {
+            flag.label: (flag.byte, flag.bit) for flag in category_spec.status_flags
+        }
+        self._faults: Dict[str, Tuple[int, int]] = {}
+        for fault_map in category_spec.faults:
+            for bit, label in fault_map.bit_labels.items():
+                self._faults.setdefault(label, (fault_map.byte, bit))
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+    @property
+    def run_parameters(self) -> List[str]:
+        return [p.label for p in self._run_parameters]
+
+    @property
+    def device_info(self) -> List[str]:
+        return [p.label for p in self._device_info]
+
+    @property
+    def status_flags(self) -> List[str]:
+        return list(self._flags)
+
+    @property
+    def faults(self) -> List[str]:
+        return list(self._faults)
+
+    def value_range(self, label: str) -> Tuple[Optional[float], Optional[float]]:
+        for packer in self._run_parameters + self._device_info:
+            if packer.label == label:
+                return packer.raw_range()
+        raise KeyError(label)
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+    def encode(
+        self,
+        *,
+        life_signal: int = 0,
+        values: Optional[Mapping[str, float]] = None,
+        flags: Optional[Mapping[str, bool]] = None,
+        faults: Iterable[str] = (),
+        buf: Optional[bytearray] = None,
+    ) -> bytearray:
+        """Return a frame; unknown labels are ignored, missing ones stay 0."""
+        if buf is None or len(buf) != self.frame_length:
+            buf = bytearray(self.frame_length)
+        else:
+            buf[:] = bytes(self.frame_length)
+        if self._life is not None:
+            self._life.pack_into(buf, life_signal & 0xFFFF)
+        values = values or {}
+        for packer in self._device_info:
+            value = values.get(packer.label)
+            if value is not None:
+                packer.pack_into(buf, value)
+        for packer in self._run_parameters:
+            value = values.get(packer.label)
+            if value is not None:
+                packer.pack_into(buf, value)
+        for label, enabled in (flags or {}).items():
+            pos = self._flags.get(label)
+            if pos is not None and enabled:
+                buf[pos[0]] |= 1 << pos[1]
+        for label in faults:
+            pos = self._faults.get(label)
+            if pos is not None:
+                buf[pos[0]] |= 1 << pos[1]
+        return buf
+
+
+def encoder_for_category(
+    category: str, spec: Optional[TemplateSpec] = None
+) -> ReceiveFrameEncoder:
+    """Encoder for ``category`` of ``spec`` (the default template if omitted)."""
+    if spec is None:
+        from .loader import default_template_spec
+
+        spec = default_template_spec()
+    try:
+        category_spec = spec.categories[category]
+    except KeyError as exc:
+        raise TemplateConfigError(f"Unknown category '{category}' in template") from exc
+    return ReceiveFrameEncoder(spec, category_spec)
@@ -0,0 +1,357 @@
+"""Index of every protocol template under ``protocols/templates/``.
+
+``TemplateLibrary`` answers "which template provides category X" and "which
+categories receive N-byte frames" without parsing template bodies: each file
+is read once by ``scan_template_header``, a line scanner that only looks at
+``metadata.base_name``, ``frame_length.receive`` and the category keys (with
+their optional ``frame_length_receive``).  Templates that are not plain block
+style fall back to a full parse.
+
+A family (one template file) is loaded -- through its own
+``TemplateRegistry``, so it is cached and hot-reloadable -- only when one of
+its categories is first asked for, typically by the first frame that arrives
+for it.  Start-up cost therefore stays flat however many vehicle-specific
+templates sit in the directory.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from infra.app_paths import resource_path
+
+from .cache import TemplateCache
+from .loader import parse_template_text
+from .registry import TemplateRegistry, default_registry
+from .schema import TemplateConfigError
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = (".yaml", ".yml")
+
+
+@dataclass(frozen=True)
+class TemplateHeader:
+    """What the index needs from one template file."""
+
+    path: Path
+    name: str
+    # category -> receive frame length, in template order
+    categories: Dict[str, int]
+    stamp: Tuple[int, int]
+
+
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _scalar(text: str) -> str:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+        return text[1:-1]
+    return text
+
+
+def _int(text: str, context: str) -> int:
+    try:
+        return int(_scalar(text))
+    except ValueError as exc:
+        raise TemplateConfigError(f"{context} must be an integer") from exc
+
+
+def scan_template_header(path: Path, text: Optional[str] = None) -> TemplateHeader:
+    """Read name, receive lengths and categories of a block-style template.
+
+    Raises ``TemplateConfigError`` when the file uses YAML the scanner does
+    not follow (flow style, anchors) or lacks one of the keys.
+    """
+    path = Path(path)
+    stamp = _file_stamp(path)
+    if text is None:
+        text = path.read_text(encoding="utf-8")
+    name: Optional[str] = None
+    receive: Optional[int] = None
+    overrides: Dict[str, Optional[int]] = {}
+    section = None
+    cat_indent = field_indent = None
+    current = None
+    for raw in text.splitlines():
+        stripped = raw.lstrip(" ")
+        if not stripped or stripped.startswith("#") or raw.startswith("---"):
+            continue
+        indent = len(raw) - len(stripped)
+        key, colon, value = stripped.partition(":")
+        value = value.split(" #", 1)[0].strip()
+        if indent == 0:
+            section = key.strip() if colon else None
+            if section == "categories" and value:
+                raise TemplateConfigError("categories is not a block mapping")
+            continue
+        if section == "metadata" and key.strip() == "base_name":
+            name = _scalar(value)
+        elif section == "frame_length" and key.strip() == "receive":
+            receive = _int(value, "frame_length.receive")
+        elif section == "categories":
+            if cat_indent is None:
+                cat_indent = indent
+            if indent == cat_indent:
+                if not colon or stripped.startswith(("-", "&", "*", "<<")):
+                    raise TemplateConfigError("unsupported category entry")
+                if value and not value.startswith("#"):
+                    raise TemplateConfigError("category is not a block mapping")
+                current = _scalar(key)
+                overrides[current] = None
+                field_indent = None
+            elif indent > cat_indent and current is not None:
+                if field_indent is None:
+                    field_indent = indent
+                if indent != field_indent:
+                    continue
+                if key.strip() == "<<" or value.startswith(("&", "*")):
+                    raise TemplateConfigError("category uses YAML anchors")
+                if key.strip() == "frame_length_receive":
+                    overrides[current] = _int(
+                        value, f"categories[{current}].frame_length_receive"
+                    )
+    if name is None or receive is None or not overrides:
+        raise TemplateConfigError("template header incomplete")
+    categories = {
+        cat: receive if length is None else length for cat, length in overrides.items()
+    }
+    return TemplateHeader(path, name, categories, stamp)
+
+
+def read_template_header(path: Path) -> TemplateHeader:
+    """``scan_template_header`` with a full parse as fallback."""
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    try:
+        return scan_template_header(path, text)
+    except TemplateConfigError as exc:
+        logger.debug("Parsing %s fully for its header: %s", path, exc)
+    spec = parse_template_text(text)
+    return TemplateHeader(
+        path,
+        spec.name,
+        {
+            cat: cat_spec.frame_length_receive or spec.frame_length_receive
+            for cat, cat_spec in spec.categories.items()
+        },
+        _file_stamp(path),
+    )
+
+
+class TemplateLibrary:
+    """Templates of one directory, indexed by category and receive length."""
+
+    def __init__(
+        self,
+        directory: Path,
+        cache: Optional[TemplateCache] = None,
+        registry_factory: Optional[Callable[[Path], TemplateRegistry]] = None,
+    ):
+        self.directory = Path(directory)
+        self._template_cache = cache
+        self._factory = registry_factory or (lambda path: TemplateRegistry(path, cache))
+        self._lock = threading.RLock()
+        self._headers: Dict[Path, TemplateHeader] = {}
+        self._by_category: Dict[str, TemplateHeader] = {}
+        self._by_length: Dict[int, Tuple[str, ...]] = {}
+        self._registries: Dict[Path, TemplateRegistry] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.scan()
+
+    @classmethod
+    def default(cls) -> "TemplateLibrary":
+        directory = resource_path("protocols", "templates", must_exist=True)
+        shared = default_registry()
+        cache = TemplateCache.default()
+
+        def factory(path: Path) -> TemplateRegistry:
+            # the bundled template shares the registry the GUI follows
+            if path.resolve() == shared.template_path.resolve():
+                return shared
+            return TemplateRegistry(path, cache)
+
+        library = cls(directory, cache, factory)
+        # watched from the start: the send builder and the GUI field metadata
+        # follow the bundled template whether or not a frame used it yet
+        library._registries[shared.template_path] = shared
+        return library
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    def _template_files(self) -> List[Path]:
+        if not self.directory.is_dir():
+            return []
+        return sorted(
+            path
+            for path in self.directory.rglob("*")
+            if path.suffix in TEMPLATE_SUFFIXES and path.is_file()
+        )
+
+    def scan(self) -> bool:
+        """Re-read headers of new or changed files; True if the index changed."""
+        with self._lock:
+            headers: Dict[Path, TemplateHeader] = {}
+            for path in self._template_files():
+                known = self._headers.get(path)
+                try:
+                    if known is not None and known.stamp == _file_stamp(path):
+                        headers[path] = known
+                        continue
+                    headers[path] = read_template_header(path)
+                except Exception as exc:
+                    logger.warning("Skipping protocol template %s: %s", path, exc)
+            if headers == self._headers:
+                return False
+            by_category: Dict[str, TemplateHeader] = {}
+            by_length: Dict[int, List[str]] = {}
+            for header in headers.values():
+                for category, length in header.categories.items():
+                    owner = by_category.get(category)
+                    if owner is not None:
+                        logger.warning(
+                            "Category %s of %s already provided by %s",
+                            category,
+                            header.path,
+                            owner.path,
+                        )
+                        continue
+                    by_category[category] = header
+                    by_length.setdefault(length, []).append(category)
+            self._headers = headers
+            self._by_category = by_category
+            self._by_length = {n: tuple(cats) for n, cats in by_length.items()}
+            return True
+
+    def headers(self) -> List[TemplateHeader]:
+        return list(self._headers.values())
+
+    def categories(self) -> List[str]:
+        return list(self._by_category)
+
+    def frame_length(self, category: str) -> Optional[int]:
+        header = self._by_category.get(category)
+        return None if header is None else header.categories[category]
+
+    def categories_for_length(self, length: int) -> Tuple[str, ...]:
+        return self._by_length.get(length, ())
+
+    # ------------------------------------------------------------------
+    # Families
+    # ------------------------------------------------------------------
+    def registry_for(self, category: str) -> TemplateRegistry:
+        """Registry of the template providing ``category``, created on demand."""
+        header = self._by_category.get(category)
+        if header is None:
+            raise TemplateConfigError(f"No template provides category '{category}'")
+        with self._lock:
+            registry = self._registries.get(header.path)
+            if registry is None:
+                registry = self._registries[header.path] = self._factory(header.path)
+        return registry
+
+    def protocol_for_category(self, category: str):
+        return self.registry_for(category).protocol_for_category(category)
+
+    def loaded(self) -> List[Path]:
+        """Template files with a registry, i.e. loaded (or watched) families."""
+        return list(self._registries)
+
+    # ------------------------------------------------------------------
+    # Reload
+    # ------------------------------------------------------------------
+    def check(self) -> bool:
+        """Rescan the directory and hot-reload loaded families."""
+        changed = self.scan()
+        for registry in list(self._registries.values()):
+            changed = registry.check() or changed
+        return changed
+
+    def start_watching(self, interval: float = 1.0) -> "TemplateLibrary":
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+
+        def _watch() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.check()
+                except Exception:
+                    logger.exception("Template library watcher failed")
+
+        self._thread = threading.Thread(
+            target=_watch, name="TemplateLibraryWatcher", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop_watching(self, timeout: float = 1.0) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+
+
+class LazyProtocol:
+    """Placeholder for a category whose family is not loaded yet.
+
+    Carries what routing needs (``category()``, ``frame_length_receive``);
+    any other attribute -- ``parse_receive_frame`` on the first frame --
+    asks ``resolve(category)`` for the real protocol, which is expected to
+    replace the placeholder wherever it is bound.
+    """
+
+    __slots__ = ("_category", "frame_length_receive", "_resolve")
+
+    def __init__(
+        self,
+        category: str,
+        frame_length_receive: Optional[int],
+        resolve: Callable[[str], object],
+    ):
+        self._category = category
+        self.frame_length_receive = frame_length_receive
+        self._resolve = resolve
+
+    def category(self) -> str:
+        return self._category
+
+    def __getattr__(self, name: str):
+        return getattr(self._resolve(self._category), name)
+
+    def __repr__(self) -> str:
+        return f"<LazyProtocol {self._category}>"
+
+
+_default_library: Optional[TemplateLibrary] = None
+_default_lock = threading.Lock()
+
+
+def default_library() -> TemplateLibrary:
+    """Process-wide library of ``protocols/templates/``."""
+    global _default_library
+    if _default_library is None:
+        with _default_lock:
+            if _default_library is None:
+                _default_library = TemplateLibrary.default()
+    return _default_library
+
+
+__all__ = [
+    "LazyProtocol",
+    "TemplateHeader",
+    "TemplateLibrary",
+    "default_library",
+    "read_template_header",
+    "scan_template_header",
+]
@@ -2,51 +2,190 @@
 
 from __future__ import annotations
 
+import logging
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
 import yaml
 
-from .adapters.template_protocol import TemplateProtocol
+from .adapters.template_protocol import (
+    ReceiveTables,
+    TemplateProtocol,
+    compile_receive_tables,
+)
+from .cache import TemplateCache, template_digest
+from .codegen import CompiledCategory, compile_category, generate_category_source
 from .schema import CategorySpec, TemplateConfigError, TemplateSpec, parse_template_spec
 from infra.app_paths import resource_path
 
+logger = logging.getLogger(__name__)
+
+# libyaml's loader is several times faster; fall back to the pure-Python one.
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def parse_template_text(text: str) -> TemplateSpec:
+    return parse_template_spec(yaml.load(text, Loader=_YamlLoader))
 
-class ProtocolTemplateLoader:
-    """Loads protocol templates from YAML files and caches instantiated protocols."""
 
-    def __init__(self, template_path: Path):
-        self._template_path = template_path
+class ProtocolTemplateLoader:
+    """Loads protocol templates from YAML files and caches instantiated protocols.
+
+    With a ``TemplateCache`` the validated spec, the receive tables, the
+    generated parser/builder source and any registered artifacts are read from
+    the compiled cache when the template content is unchanged, so YAML parsing
+    only happens on the first run.  ``codegen=False`` keeps the interpreted
+    ``TemplateProtocol`` methods.
+    """
+
+    def __init__(
+        self,
+        template_path: Path,
+        cache: Optional[TemplateCache] = None,
+        codegen: bool = True,
+    ):
+        self._template_path = Path(template_path)
+        self._template_cache = cache
+        self._codegen = codegen
         self._spec: Optional[TemplateSpec] = None
+        self._digest: Optional[str] = None
+        self._tables: Dict[str, ReceiveTables] = {}
+        self._sources: Dict[str, str] = {}
+        self._artifacts: Dict[str, Any] = {}
         self._cache: Dict[str, TemplateProtocol] = {}
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
+    @property
+    def template_path(self) -> Path:
+        return self._template_path
+
     def spec(self) -> TemplateSpec:
         if self._spec is None:
-            data = self._template_path.read_text(encoding="utf-8")
-            raw = yaml.safe_load(data)
-            self._spec = parse_template_spec(raw)
+            self._load()
         return self._spec
 
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the template content this loader was built from."""
+        if self._digest is None:
+            self._load()
+        return self._digest
+
     def protocol_for_category(self, category: str) -> TemplateProtocol:
         if category not in self._cache:
             spec = self.spec()
             category_spec = self._get_category_spec(spec, category)
-            self._cache[category] = TemplateProtocol(spec, category_spec)
+            tables = self._tables.get(category)
+            if tables is None:
+                tables = self._tables[category] = compile_receive_tables(
+                    spec, category_spec
+                )
+            compiled = self._compiled(category) if self._codegen else None
+            self._cache[category] = TemplateProtocol(
+                spec, category_spec, tables, compiled
+            )
         return self._cache[category]
 
+    def generated_source(self, category: str) -> str:
+        """Source of the generated parser/builder of ``category``."""
+        spec = self.spec()
+        self._get_category_spec(spec, category)
+        if category not in self._sources:
+            self._sources[category] = self._generate(category)
+            self._store()
+        return self._sources[category]
+
+    def artifact(self, name: str, build: Callable[[TemplateSpec], Any]) -> Any:
+        """Return a value derived from the spec, cached alongside it.
+
+        ``name`` should carry its own version (``"field_index/1"``) so a
+        change in how the artifact is built does not reuse old entries.
+        The value must be picklable.
+        """
+        spec = self.spec()
+        if name not in self._artifacts:
+            self._artifacts[name] = build(spec)
+            self._store()
+        return self._artifacts[name]
+
     @classmethod
     def default(cls) -> "ProtocolTemplateLoader":
         template_path = resource_path(
             "protocols", "templates", "acusim.yaml", must_exist=True
         )
-        return cls(template_path)
+        return cls(template_path, cache=TemplateCache.default())
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
+    def _load(self) -> None:
+        data = self._template_path.read_bytes()
+        digest = template_digest(data)
+        cache = self._template_cache
+        entry = cache.load(self._template_path, digest) if cache else None
+        if entry is not None:
+            self._spec = entry["spec"]
+            self._tables = dict(entry.get("tables") or {})
+            self._sources = dict(entry.get("sources") or {})
+            self._artifacts = dict(entry.get("artifacts") or {})
+            self._digest = digest
+            return
+        spec = parse_template_text(data.decode("utf-8"))
+        self._spec = spec
+        self._tables = {
+            name: compile_receive_tables(spec, category_spec)
+            for name, category_spec in spec.categories.items()
+        }
+        self._sources = {}
+        if self._codegen:
+            for name in spec.categories:
+                try:
+                    self._sources[name] = self._generate(name)
+                except Exception:
+                    logger.exception("Code generation failed for %s", name)
+        self._artifacts = {}
+        self._digest = digest
+        self._store()
+
+    def _generate(self, category: str) -> str:
+        spec = self.spec() if self._spec is None else self._spec
+        tables = self._tables.get(category)
+        if tables is None:
+            tables = self._tables[category] = compile_receive_tables(
+                spec, spec.categories[category]
+            )
+        return generate_category_source(spec, category, tables)
+
+    def _compiled(self, category: str) -> Optional[CompiledCategory]:
+        """Generated functions of ``category``; None keeps the interpreter."""
+        filename = (
+            f"<template {self._template_path.name}@{self._digest[:12]} {category}>"
+        )
+        try:
+            return compile_category(category, self.generated_source(category), filename)
+        except Exception:
+            logger.exception(
+                "Generated parser for %s unusable, interpreting the template",
+                category,
+            )
+            return None
+
+    def _store(self) -> None:
+        if self._template_cache is None or self._digest is None:
+            return
+        self._template_cache.store(
+            self._template_path,
+            self._digest,
+            {
+                "spec": self._spec,
+                "tables": self._tables,
+                "sources": self._sources,
+                "artifacts": self._artifacts,
+            },
+        )
+
     def _get_category_spec(self, spec: TemplateSpec, category: str) -> CategorySpec:
         try:
             return spec.categories[category]
@@ -56,13 +195,20 @@ class ProtocolTemplateLoader:
             ) from exc
 
 
-_default_loader: Optional[ProtocolTemplateLoader] = None
+def _get_default_loader() -> ProtocolTemplateLoader:
+    # the live loader of the default registry follows template reloads
+    from .registry import default_registry
+
+    return default_registry().loader
 
 
 def load_template_protocol(category: str) -> TemplateProtocol:
     """Convenience helper that returns a protocol for the requested category."""
 
-    global _default_loader
-    if _default_loader is None:
-        _default_loader = ProtocolTemplateLoader.default()
-    return _default_loader.protocol_for_category(category)
+    return _get_default_loader().protocol_for_category(category)
+
+
+def default_template_spec() -> TemplateSpec:
+    """Return the spec of the bundled default template (name, version, ...)."""
+
+    return _get_default_loader().spec()
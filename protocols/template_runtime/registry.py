@@ -0,0 +1,188 @@
+"""Live template registry with hot reload.
+
+``TemplateRegistry`` owns the current ``ProtocolTemplateLoader`` of one
+template file.  ``check()`` (or the optional watcher thread) polls the file's
+mtime and size; on a change the new version is parsed, validated and compiled
+for every category *before* it replaces the current loader, so a broken edit
+never reaches the running simulator -- the previous version simply stays
+active and ``last_error`` explains why.
+
+The swap is a single attribute assignment.  Subscribers receive
+``(new_loader, old_loader)`` on the thread that ran ``check()`` and rebind
+their own protocol references; a frame that is already being parsed finishes
+with the protocol object it started with.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from .cache import TemplateCache
+from .loader import ProtocolTemplateLoader
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[ProtocolTemplateLoader, ProtocolTemplateLoader], None]
+
+
+class TemplateRegistry:
+    """Current loader of a template file, swapped atomically when it changes."""
+
+    def __init__(self, template_path: Path, cache: Optional[TemplateCache] = None):
+        self._path = Path(template_path)
+        self._template_cache = cache
+        self._loader = ProtocolTemplateLoader(self._path, cache)
+        self._stamp = self._file_stamp()
+        self._reload_lock = threading.Lock()
+        self._listeners: List[Callable[[], Optional[Listener]]] = []
+        self._listeners_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.generation = 0
+        self.last_error: Optional[str] = None
+
+    @classmethod
+    def default(cls) -> "TemplateRegistry":
+        loader = ProtocolTemplateLoader.default()
+        return cls(loader.template_path, TemplateCache.default())
+
+    # ------------------------------------------------------------------
+    # Current version
+    # ------------------------------------------------------------------
+    @property
+    def loader(self) -> ProtocolTemplateLoader:
+        return self._loader
+
+    @property
+    def template_path(self) -> Path:
+        return self._path
+
+    def spec(self):
+        return self._loader.spec()
+
+    def protocol_for_category(self, category: str):
+        return self._loader.protocol_for_category(category)
+
+    # ------------------------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------------------------
+    def subscribe(self, callback: Listener) -> None:
+        """Call ``callback(new_loader, old_loader)`` after every reload.
+
+        Bound methods are held weakly so short-lived controllers do not stay
+        alive just because they follow the template.
+        """
+        if hasattr(callback, "__self__") and hasattr(callback, "__func__"):
+            ref = weakref.WeakMethod(callback)
+        else:
+
+            def ref(callback=callback):
+                return callback
+
+        with self._listeners_lock:
+            self._listeners.append(ref)
+
+    def unsubscribe(self, callback: Listener) -> None:
+        with self._listeners_lock:
+            self._listeners = [
+                ref for ref in self._listeners if ref() not in (None, callback)
+            ]
+
+    def _live_listeners(self) -> List[Listener]:
+        with self._listeners_lock:
+            pairs = [(ref, ref()) for ref in self._listeners]
+            self._listeners = [ref for ref, cb in pairs if cb is not None]
+        return [cb for _ref, cb in pairs if cb is not None]
+
+    # ------------------------------------------------------------------
+    # Reload
+    # ------------------------------------------------------------------
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self._path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def check(self) -> bool:
+        """Reload if the file changed; return True when a new version is live."""
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        with self._reload_lock:
+            if stamp == self._stamp:
+                return False
+            self._stamp = stamp
+            candidate = ProtocolTemplateLoader(self._path, self._template_cache)
+            try:
+                spec = candidate.spec()
+                for category in spec.categories:
+                    candidate.protocol_for_category(category)
+            except Exception as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.warning(
+                    "Template %s not reloaded, keeping the previous version: %s",
+                    self._path,
+                    self.last_error,
+                )
+                return False
+            self.last_error = None
+            old = self._loader
+            if candidate.digest == old.digest:
+                # touched but unchanged
+                return False
+            self._loader = candidate
+            self.generation += 1
+        logger.info("Template %s reloaded (generation %d)", self._path, self.generation)
+        for callback in self._live_listeners():
+            try:
+                callback(candidate, old)
+            except Exception:
+                logger.exception("Template reload listener failed: %r", callback)
+        return True
+
+    def start_watching(self, interval: float = 1.0) -> "TemplateRegistry":
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+
+        def _watch() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.check()
+                except Exception:
+                    logger.exception("Template watcher failed")
+
+        self._thread = threading.Thread(
+            target=_watch, name="TemplateWatcher", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop_watching(self, timeout: float = 1.0) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+
+
+_default_registry: Optional[TemplateRegistry] = None
+_default_lock = threading.Lock()
+
+
+def default_registry() -> TemplateRegistry:
+    """Process-wide registry of the bundled ``acusim.yaml``."""
+    global _default_registry
+    if _default_registry is None:
+        with _default_lock:
+            if _default_registry is None:
+                _default_registry = TemplateRegistry.default()
+    return _default_registry
+
+
+__all__ = ["TemplateRegistry", "default_registry"]
@@ -0,0 +1 @@
+"""Persistence helpers for waveform data (export, sessions, recording)."""
@@ -0,0 +1,152 @@
+"""Compact binary capture of raw UDP datagrams.
+
+File layout (little-endian)::
+
+    magic    8s   b"ACUCAP\\x00\\x01"
+    wall     d    time.time() when the capture started
+    mono     d    time.monotonic() at the same instant
+    records  ...  repeated:
+        ts       d   time.monotonic() when the datagram was seen
+        dir      B   0 = received, 1 = sent
+        ip       4s  IPv4 address (packed)
+        port     H
+        length   H
+        payload  length bytes
+
+Timestamps are monotonic so replay keeps the original inter-frame gaps even
+if the wall clock jumped during the capture.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+CAPTURE_MAGIC = b"ACUCAP\x00\x01"
+DIR_RX = 0
+DIR_TX = 1
+
+_FILE_HEADER = struct.Struct("<8sdd")
+_RECORD = struct.Struct("<dB4sHH")
+
+
+class CaptureFormatError(ValueError):
+    """Raised when a file is not a capture or is truncated mid-header."""
+
+
+@dataclass(frozen=True)
+class CaptureRecord:
+    timestamp: float
+    direction: int
+    addr: Tuple[str, int]
+    payload: bytes
+
+
+def _pack_ip(ip: str) -> bytes:
+    try:
+        return socket.inet_aton(ip)
+    except (OSError, TypeError):
+        return b"\x00\x00\x00\x00"
+
+
+class CaptureWriter:
+    """Thread-safe appender; receive and send paths share one writer."""
+
+    def __init__(self, path: str | os.PathLike, buffer_size: int = 1 << 16) -> None:
+        self.path = os.fspath(path)
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._file: Optional[BinaryIO] = open(self.path, "wb", buffering=buffer_size)
+        self.start_wall = time.time()
+        self.start_mono = time.monotonic()
+        self._file.write(
+            _FILE_HEADER.pack(CAPTURE_MAGIC, self.start_wall, self.start_mono)
+        )
+
+    def write(
+        self,
+        direction: int,
+        addr: Tuple[str, int],
+        payload: bytes,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        ts = time.monotonic() if timestamp is None else timestamp
+        try:
+            ip, port = addr[0], int(addr[1])
+        except (TypeError, ValueError, IndexError):
+            ip, port = "0.0.0.0", 0
+        payload = bytes(payload)[:0xFFFF]
+        record = _RECORD.pack(ts, direction, _pack_ip(ip), port & 0xFFFF, len(payload))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(record)
+            self._file.write(payload)
+            self.frames += 1
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+
+def iter_capture(path: str | os.PathLike) -> Iterator[CaptureRecord]:
+    """Yield records in file order; a truncated trailing record is ignored."""
+    with open(path, "rb") as f:
+        header = f.read(_FILE_HEADER.size)
+        if len(header) < _FILE_HEADER.size:
+            raise CaptureFormatError(f"Capture header truncated: {path}")
+        magic, _wall, _mono = _FILE_HEADER.unpack(header)
+        if magic != CAPTURE_MAGIC:
+            raise CaptureFormatError(f"Not an ACU capture file: {path}")
+        read = f.read
+        size = _RECORD.size
+        unpack = _RECORD.unpack
+        while True:
+            raw = read(size)
+            if len(raw) < size:
+                return
+            ts, direction, ip, port, length = unpack(raw)
+            payload = read(length)
+            if len(payload) < length:
+                return
+            yield CaptureRecord(ts, direction, (socket.inet_ntoa(ip), port), payload)
+
+
+def read_capture_start(path: str | os.PathLike) -> Tuple[float, float]:
+    """Return ``(wall_time, monotonic_time)`` recorded when the capture began."""
+    with open(path, "rb") as f:
+        header = f.read(_FILE_HEADER.size)
+    if len(header) < _FILE_HEADER.size:
+        raise CaptureFormatError(f"Capture header truncated: {path}")
+    magic, wall, mono = _FILE_HEADER.unpack(header)
+    if magic != CAPTURE_MAGIC:
+        raise CaptureFormatError(f"Not an ACU capture file: {path}")
+    return wall, mono
+
+
+__all__ = [
+    "CAPTURE_MAGIC",
+    "DIR_RX",
+    "DIR_TX",
+    "CaptureFormatError",
+    "CaptureRecord",
+    "CaptureWriter",
+    "iter_capture",
+    "read_capture_start",
+]
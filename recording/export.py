@@ -0,0 +1,219 @@
+"""Streaming CSV/JSON export of `DataBuffer` snapshots.
+
+Exports run on a plain worker thread so they can be used from the GUI and
+from headless tools alike.  Rows are written in chunks straight from the
+NumPy columns of a :class:`data_buffer.BufferSnapshot`, which keeps the cost
+linear in ``rows x signals``.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, List, Mapping, Optional, Sequence
+
+from data_buffer import BufferSnapshot
+
+ProgressCallback = Callable[[int, int], None]
+
+DEFAULT_CHUNK_ROWS = 5000
+
+
+class ExportCancelled(Exception):
+    """Raised inside the worker when the export was cancelled."""
+
+
+def default_csv_encoding() -> str:
+    # UTF-8 with BOM on Windows so Excel recognizes UTF-8 correctly.
+    return "utf-8-sig" if sys.platform.startswith("win") else "utf-8"
+
+
+def _column_lists(
+    snapshot: BufferSnapshot, signal_ids: Sequence[str], start: int, stop: int
+) -> List[list]:
+    columns = [snapshot.timestamps[start:stop].tolist()]
+    for sid in signal_ids:
+        column = snapshot.columns.get(sid)
+        if column is None:
+            columns.append([None] * (stop - start))
+        else:
+            columns.append(column[start:stop].tolist())
+    return columns
+
+
+def _iter_chunks(total: int, chunk_rows: int):
+    chunk_rows = max(1, int(chunk_rows))
+    for start in range(0, total, chunk_rows):
+        yield start, min(total, start + chunk_rows)
+
+
+def _check_cancel(cancel: Optional[threading.Event]) -> None:
+    if cancel is not None and cancel.is_set():
+        raise ExportCancelled()
+
+
+def write_csv(
+    snapshot: BufferSnapshot,
+    path: str | os.PathLike,
+    signal_ids: Sequence[str],
+    headers: Sequence[str],
+    *,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[threading.Event] = None,
+    encoding: Optional[str] = None,
+) -> int:
+    """Write ``timestamp`` plus one column per signal; returns rows written."""
+    total = len(snapshot)
+    with open(path, "w", newline="", encoding=encoding or default_csv_encoding()) as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", *headers])
+        for start, stop in _iter_chunks(total, chunk_rows):
+            _check_cancel(cancel)
+            writer.writerows(zip(*_column_lists(snapshot, signal_ids, start, stop)))
+            if progress is not None:
+                progress(stop, total)
+    return total
+
+
+def write_json(
+    snapshot: BufferSnapshot,
+    path: str | os.PathLike,
+    signal_ids: Sequence[str],
+    headers: Sequence[str],
+    *,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[threading.Event] = None,
+) -> int:
+    """Write a JSON array of ``{"timestamp": ..., <header>: value}`` rows."""
+    total = len(snapshot)
+    keys = ["timestamp", *headers]
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        first = True
+        for start, stop in _iter_chunks(total, chunk_rows):
+            _check_cancel(cancel)
+            rows = zip(*_column_lists(snapshot, signal_ids, start, stop))
+            body = ",\n".join(dumps(dict(zip(keys, row))) for row in rows)
+            if body:
+                f.write("\n" if first else ",\n")
+                f.write(body)
+                first = False
+            if progress is not None:
+                progress(stop, total)
+        f.write("\n]\n")
+    return total
+
+
+class ExportJob:
+    """Run a snapshot export on a background thread with progress and cancel."""
+
+    def __init__(
+        self,
+        snapshot: BufferSnapshot,
+        path: str | os.PathLike,
+        signal_ids: Sequence[str],
+        headers: Sequence[str],
+        fmt: str = "csv",
+        *,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        signal_info: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    ) -> None:
+        if fmt not in ("csv", "json", "session"):
+            raise ValueError(f"Unsupported export format: {fmt}")
+        self.snapshot = snapshot
+        self.path = Path(path)
+        self.signal_ids = list(signal_ids)
+        self.headers = list(headers)
+        self.fmt = fmt
+        self.chunk_rows = chunk_rows
+        self.signal_info = dict(signal_info or {})
+        self.rows_done = 0
+        self.total_rows = len(snapshot)
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ExportJob":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="waveform-export", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.done and self.error is None and not self.cancelled
+
+    def _progress(self, rows_done: int, _total: int) -> None:
+        self.rows_done = rows_done
+
+    def _write(self) -> None:
+        if self.fmt == "session":
+            from recording.session import write_session
+
+            write_session(
+                self.path,
+                self.snapshot,
+                self.signal_ids,
+                self.signal_info,
+                progress=self._progress,
+                cancel=self._cancel,
+            )
+            return
+        writer = write_csv if self.fmt == "csv" else write_json
+        writer(
+            self.snapshot,
+            self.path,
+            self.signal_ids,
+            self.headers,
+            chunk_rows=self.chunk_rows,
+            progress=self._progress,
+            cancel=self._cancel,
+        )
+
+    def _run(self) -> None:
+        try:
+            self._write()
+        except ExportCancelled:
+            self.cancelled = True
+            try:
+                if self.path.is_dir():
+                    shutil.rmtree(self.path)
+                else:
+                    self.path.unlink()
+            except OSError:
+                pass
+        except BaseException as exc:  # surfaced to the caller via `error`
+            self.error = exc
+        finally:
+            self._done.set()
+
+
+__all__ = [
+    "ExportCancelled",
+    "ExportJob",
+    "write_csv",
+    "write_json",
+    "default_csv_encoding",
+]
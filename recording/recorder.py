@@ -0,0 +1,299 @@
+"""Continuous background recording into rotating session segments.
+
+Every sample batch ingested by the waveform controller is queued and
+appended by a dedicated thread to the current segment (a session
+directory, see :mod:`recording.session`).  Segments rotate on size or
+age.  ``index.json`` lists the segments of a run and is replaced
+atomically after every flush, and each segment's data files are
+self-describing, so a killed process still leaves a readable run.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from recording.session import RecordedSession, SessionWriter, open_session
+
+logger = logging.getLogger(__name__)
+
+RECORDING_FORMAT = "acusim-recording"
+RECORDING_VERSION = 1
+INDEX_NAME = "index.json"
+
+SignalInfoLookup = Callable[[str], Optional[Mapping[str, Any]]]
+_Sample = Tuple[float, Dict[str, Any]]
+
+
+def _write_json_atomic(path: Path, payload: Dict[str, Any]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SegmentRecorder:
+    """Append sample batches to size/time rotated segments on a worker thread.
+
+    ``submit`` never blocks the caller: samples go into a bounded queue and
+    are counted in ``dropped`` if the writer falls that far behind.
+    Signals are carried forward between batches (same semantics as
+    :class:`data_buffer.DataBuffer`); a signal appearing for the first time
+    starts a new segment so every segment has a fixed column layout.
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike,
+        *,
+        signal_info: Optional[SignalInfoLookup] = None,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        max_segment_seconds: float = 3600.0,
+        flush_interval: float = 1.0,
+        queue_size: int = 100000,
+        template: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        self.root = Path(root)
+        self.run_dir = self.root / time.strftime("run-%Y%m%d-%H%M%S")
+        self.max_segment_bytes = int(max_segment_bytes)
+        self.max_segment_seconds = float(max_segment_seconds)
+        self.flush_interval = float(flush_interval)
+        self.rows_written = 0
+        self.dropped = 0
+        self._signal_info = signal_info
+        self._template = template
+        self._queue: "queue.Queue[Optional[_Sample]]" = queue.Queue(queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._segments: List[Dict[str, Any]] = []
+        self._writer: Optional[SessionWriter] = None
+        self._segment_start: Optional[float] = None
+        self._row_bytes = 0
+        self._signals: List[str] = []
+        self._last: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def segments(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(s) for s in self._segments]
+
+    def start(self) -> "SegmentRecorder":
+        if self._thread is not None:
+            return self
+        suffix = 1
+        base = self.run_dir
+        while self.run_dir.exists():
+            self.run_dir = base.with_name(f"{base.name}-{suffix}")
+            suffix += 1
+        self.run_dir.mkdir(parents=True)
+        self._write_index()
+        self._thread = threading.Thread(
+            target=self._run, name="segment-recorder", daemon=True
+        )
+        self._thread.start()
+        logger.info("Continuous recording started: %s", self.run_dir)
+        return self
+
+    def submit(self, values: Mapping[str, Any], timestamp: float) -> bool:
+        """Queue one sample batch; returns False if it had to be dropped."""
+        if self._thread is None:
+            return False
+        try:
+            self._queue.put_nowait((float(timestamp), dict(values)))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def stop(self, timeout: float = 5.0) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("Recorder queue full while stopping; data may be lost")
+        thread.join(timeout)
+        self._thread = None
+        logger.info(
+            "Continuous recording stopped: %s (%d rows, %d dropped)",
+            self.run_dir,
+            self.rows_written,
+            self.dropped,
+        )
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+    def _run(self) -> None:
+        pending: List[_Sample] = []
+        last_flush = time.monotonic()
+        stopping = False
+        while not stopping:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is None:
+                    stopping = True
+                else:
+                    pending.append(item)
+                    # drain whatever is already queued without waiting
+                    while True:
+                        item = self._queue.get_nowait()
+                        if item is None:
+                            stopping = True
+                            break
+                        pending.append(item)
+            except queue.Empty:
+                pass
+            if pending and (
+                stopping or time.monotonic() - last_flush >= self.flush_interval
+            ):
+                try:
+                    self._write_rows(pending)
+                except Exception:
+                    logger.exception("Failed to append recording segment")
+                pending = []
+                last_flush = time.monotonic()
+        self._close_segment()
+        self._write_index()
+
+    def _write_rows(self, samples: List[_Sample]) -> None:
+        start = 0
+        for i, (_ts, values) in enumerate(samples):
+            if any(sid not in self._last for sid in values):
+                # 新信号出现：先写完之前的行，再以扩展后的列布局开新段
+                self._append(samples[start:i])
+                start = i
+                for sid in values:
+                    if sid not in self._last:
+                        self._signals.append(sid)
+                        self._last[sid] = np.nan
+                self._close_segment()
+        self._append(samples[start:])
+        self._write_index()
+
+    def _append(self, samples: List[_Sample]) -> None:
+        if not samples:
+            return
+        count = len(samples)
+        timestamps = np.empty(count, dtype=float)
+        columns = {sid: np.empty(count, dtype=float) for sid in self._signals}
+        last = self._last
+        for row, (ts, values) in enumerate(samples):
+            timestamps[row] = ts
+            for sid, value in values.items():
+                try:
+                    last[sid] = float(value)
+                except (TypeError, ValueError):
+                    last[sid] = np.nan
+            for sid, column in columns.items():
+                column[row] = last[sid]
+
+        start = 0
+        while start < count:
+            if self._writer is None:
+                self._open_segment()
+            writer = self._writer
+            if self._segment_start is None:
+                self._segment_start = float(timestamps[start])
+            # 按剩余容量与时长切分本批，保证每段不超过上限
+            room = max(1, self.max_segment_bytes // self._row_bytes - writer.rows)
+            deadline = self._segment_start + self.max_segment_seconds
+            in_time = int(np.searchsorted(timestamps[start:], deadline, "left"))
+            stop = start + max(1, min(room, in_time))
+            stop = min(stop, count)
+            writer.append(
+                timestamps[start:stop],
+                {sid: column[start:stop] for sid, column in columns.items()},
+            )
+            writer.flush()
+            self.rows_written += stop - start
+            with self._lock:
+                entry = self._segments[-1]
+                entry["rows"] = writer.rows
+                entry["first"] = self._segment_start
+                entry["last"] = float(timestamps[stop - 1])
+            if (
+                writer.rows * self._row_bytes >= self.max_segment_bytes
+                or timestamps[stop - 1] - self._segment_start
+                >= self.max_segment_seconds
+                or stop < count
+            ):
+                self._close_segment()
+            start = stop
+
+    def _open_segment(self) -> None:
+        name = f"seg-{len(self._segments):05d}.acusession"
+        lookup = self._signal_info
+        signals = [
+            (sid, (lookup(sid) if lookup else None) or {}) for sid in self._signals
+        ]
+        self._writer = SessionWriter(
+            self.run_dir / name,
+            signals,
+            template=self._template,
+            metadata={"run": self.run_dir.name, "segment": len(self._segments)},
+        )
+        self._row_bytes = 8 + sum(
+            4 if (info.get("type") == "bool") else 8 for _sid, info in signals
+        )
+        self._segment_start = None
+        with self._lock:
+            self._segments.append(
+                {"file": name, "rows": 0, "first": None, "last": None, "closed": False}
+            )
+        self._write_index()
+
+    def _close_segment(self) -> None:
+        writer = self._writer
+        if writer is None:
+            return
+        self._writer = None
+        try:
+            writer.close()
+        finally:
+            with self._lock:
+                self._segments[-1]["closed"] = True
+            self._write_index()
+
+    def _write_index(self) -> None:
+        with self._lock:
+            payload = {
+                "format": RECORDING_FORMAT,
+                "version": RECORDING_VERSION,
+                "segments": [dict(s) for s in self._segments],
+            }
+        try:
+            _write_json_atomic(self.run_dir / INDEX_NAME, payload)
+        except OSError:
+            logger.exception("Failed to update recording index")
+
+
+def open_recording(run_dir: str | os.PathLike) -> List[RecordedSession]:
+    """Open every segment listed in a run's index (unclosed ones included)."""
+    run_dir = Path(run_dir)
+    index = json.loads((run_dir / INDEX_NAME).read_text(encoding="utf-8"))
+    if index.get("format") != RECORDING_FORMAT:
+        raise ValueError(f"Not an ACU recording: {run_dir}")
+    return [open_session(run_dir / seg["file"]) for seg in index.get("segments", [])]
+
+
+__all__ = ["INDEX_NAME", "SegmentRecorder", "open_recording"]
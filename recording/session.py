@@ -0,0 +1,503 @@
+"""Binary waveform session format.
+
+A session is a directory (``*.acusession``) containing:
+
+* ``session.json`` – header with signal metadata, template identity and
+  the column layout;
+* ``timestamps.f64`` – raw little-endian float64 timestamps;
+* ``c<N>.f64`` / ``c<N>.f32`` – one raw column file per signal.
+
+Columns are plain arrays on disk so a session can be reopened with
+``np.memmap`` without parsing or loading it into memory.
+:class:`SessionBuffer` exposes a recorded session through the read API of
+:class:`data_buffer.DataBuffer` so the waveform plot can display it.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from data_buffer import BufferSnapshot
+
+logger = logging.getLogger(__name__)
+
+SESSION_FORMAT = "acusim-session"
+SESSION_VERSION = 1
+SESSION_SUFFIX = ".acusession"
+HEADER_NAME = "session.json"
+TIMESTAMP_FILE = "timestamps.f64"
+
+_DTYPES = {"f64": np.dtype("<f8"), "f32": np.dtype("<f4")}
+
+
+class SessionFormatError(ValueError):
+    """Raised when a session directory is missing files or has a bad header."""
+
+
+@dataclass(frozen=True)
+class SessionColumn:
+    signal_id: str
+    file: str
+    dtype: str
+    info: Dict[str, Any]
+
+
+def session_dir(path: str | os.PathLike) -> Path:
+    """Normalize a user-supplied path (directory or its header) to the directory."""
+    p = Path(path)
+    if p.name == HEADER_NAME:
+        return p.parent
+    return p
+
+
+def _column_dtype(info: Mapping[str, Any]) -> str:
+    # 布尔/状态位信号用 float32 足够，模拟量保留 float64 精度
+    return "f32" if info.get("type") == "bool" else "f64"
+
+
+def _as_float(values: Any, dtype: np.dtype) -> np.ndarray:
+    arr = np.asarray(values)
+    if arr.dtype == object:
+        arr = np.array(
+            [np.nan if v is None else float(v) for v in arr.tolist()], dtype=float
+        )
+    return np.ascontiguousarray(arr, dtype=dtype)
+
+
+def _template_identity() -> Optional[Dict[str, Any]]:
+    try:
+        from protocols.template_runtime.loader import default_template_spec
+
+        spec = default_template_spec()
+        return {"name": spec.name, "version": spec.version}
+    except Exception:
+        logger.debug("Template identity unavailable for session header")
+        return None
+
+
+def _json_safe(info: Mapping[str, Any]) -> Dict[str, Any]:
+    safe: Dict[str, Any] = {}
+    for key, value in info.items():
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            value = str(value)
+        safe[str(key)] = value
+    return safe
+
+
+class SessionWriter:
+    """Append-only writer for a session directory.
+
+    The header is written on open and rewritten on :meth:`flush`/:meth:`close`,
+    so a session interrupted mid-capture can still be reopened (the row count
+    is then derived from the column file sizes).
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        signals: Sequence[Tuple[str, Mapping[str, Any]]],
+        *,
+        template: Optional[Mapping[str, Any]] = None,
+        metadata: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        self.path = session_dir(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.rows = 0
+        self._columns: List[SessionColumn] = []
+        for index, (signal_id, info) in enumerate(signals):
+            dtype = _column_dtype(info)
+            self._columns.append(
+                SessionColumn(
+                    signal_id=str(signal_id),
+                    file=f"c{index}.{dtype}",
+                    dtype=dtype,
+                    info=_json_safe(info),
+                )
+            )
+        self._template = dict(template) if template else _template_identity()
+        self._metadata = dict(metadata or {})
+        self._created = time.time()
+        self._first_ts: Optional[float] = None
+        self._last_ts: Optional[float] = None
+        self._ts_file = open(self.path / TIMESTAMP_FILE, "wb")
+        self._files = {
+            c.signal_id: open(self.path / c.file, "wb") for c in self._columns
+        }
+        self._write_header()
+
+    @property
+    def signal_ids(self) -> List[str]:
+        return [c.signal_id for c in self._columns]
+
+    def append(
+        self, timestamps: Sequence[float], columns: Mapping[str, Sequence[Any]]
+    ) -> int:
+        """Append a block of rows; signals missing from ``columns`` become NaN."""
+        ts = _as_float(timestamps, _DTYPES["f64"])
+        count = int(ts.shape[0])
+        if count == 0:
+            return 0
+        blocks = []
+        for column in self._columns:
+            dtype = _DTYPES[column.dtype]
+            values = columns.get(column.signal_id)
+            if values is None:
+                block = np.full(count, np.nan, dtype=dtype)
+            else:
+                block = _as_float(values, dtype)
+                if block.shape[0] != count:
+                    raise ValueError(
+                        f"Column {column.signal_id} has {block.shape[0]} rows, "
+                        f"expected {count}"
+                    )
+            blocks.append((column.signal_id, block))
+        ts.tofile(self._ts_file)
+        for signal_id, block in blocks:
+            block.tofile(self._files[signal_id])
+        if self._first_ts is None:
+            self._first_ts = float(ts[0])
+        self._last_ts = float(ts[-1])
+        self.rows += count
+        return count
+
+    def flush(self) -> None:
+        self._ts_file.flush()
+        for f in self._files.values():
+            f.flush()
+        self._write_header()
+
+    def close(self) -> None:
+        if self._ts_file.closed:
+            return
+        self.flush()
+        self._ts_file.close()
+        for f in self._files.values():
+            f.close()
+
+    def __enter__(self) -> "SessionWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _write_header(self) -> None:
+        header = {
+            "format": SESSION_FORMAT,
+            "version": SESSION_VERSION,
+            "created": self._created,
+            "rows": self.rows,
+            "time_range": [self._first_ts, self._last_ts],
+            "template": self._template,
+            "metadata": self._metadata,
+            "timestamps": {"file": TIMESTAMP_FILE, "dtype": "f64"},
+            "signals": [
+                {
+                    "id": c.signal_id,
+                    "file": c.file,
+                    "dtype": c.dtype,
+                    "info": c.info,
+                }
+                for c in self._columns
+            ],
+        }
+        tmp = self.path / (HEADER_NAME + ".tmp")
+        tmp.write_text(json.dumps(header, ensure_ascii=False, indent=2), "utf-8")
+        os.replace(tmp, self.path / HEADER_NAME)
+
+
+def write_session(
+    path: str | os.PathLike,
+    snapshot: BufferSnapshot,
+    signal_ids: Sequence[str],
+    signal_info: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    *,
+    template: Optional[Mapping[str, Any]] = None,
+    chunk_rows: int = 50000,
+    progress=None,
+    cancel=None,
+) -> int:
+    """Write a snapshot as a session directory; returns rows written."""
+    from recording.export import ExportCancelled
+
+    signal_info = signal_info or {}
+    signals = [(sid, signal_info.get(sid) or {}) for sid in signal_ids]
+    total = len(snapshot)
+    with SessionWriter(path, signals, template=template) as writer:
+        for start in range(0, total, max(1, int(chunk_rows))):
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            stop = min(total, start + chunk_rows)
+            writer.append(
+                snapshot.timestamps[start:stop],
+                {
+                    sid: snapshot.columns[sid][start:stop]
+                    for sid in signal_ids
+                    if sid in snapshot.columns
+                },
+            )
+            if progress is not None:
+                progress(stop, total)
+    return total
+
+
+class RecordedSession:
+    """Memory-mapped, read-only view of a session directory."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = session_dir(path)
+        header_path = self.path / HEADER_NAME
+        try:
+            self.header: Dict[str, Any] = json.loads(
+                header_path.read_text(encoding="utf-8")
+            )
+        except FileNotFoundError as exc:
+            raise SessionFormatError(
+                f"Session header not found: {header_path}"
+            ) from exc
+        except ValueError as exc:
+            raise SessionFormatError(f"Invalid session header: {header_path}") from exc
+        if self.header.get("format") != SESSION_FORMAT:
+            raise SessionFormatError(f"Not an ACU session: {self.path}")
+        if int(self.header.get("version", 0)) > SESSION_VERSION:
+            raise SessionFormatError(
+                f"Unsupported session version {self.header.get('version')}"
+            )
+        self._columns: Dict[str, SessionColumn] = {}
+        for raw in self.header.get("signals", []):
+            column = SessionColumn(
+                signal_id=str(raw["id"]),
+                file=str(raw["file"]),
+                dtype=str(raw.get("dtype", "f64")),
+                info=dict(raw.get("info") or {}),
+            )
+            self._columns[column.signal_id] = column
+        ts_file = self.header.get("timestamps", {}).get("file", TIMESTAMP_FILE)
+        self._rows = self._infer_rows(ts_file)
+        self.timestamps = self._map(ts_file, "f64")
+        self._maps: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def signal_ids(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def template(self) -> Optional[Dict[str, Any]]:
+        return self.header.get("template")
+
+    def signal_info(self, signal_id: str) -> Dict[str, Any]:
+        column = self._columns.get(signal_id)
+        return dict(column.info) if column else {}
+
+    def column(self, signal_id: str) -> np.ndarray:
+        mapped = self._maps.get(signal_id)
+        if mapped is None:
+            column = self._columns[signal_id]
+            mapped = self._map(column.file, column.dtype)
+            self._maps[signal_id] = mapped
+        return mapped
+
+    def _infer_rows(self, ts_file: str) -> int:
+        # 以实际文件长度为准，兼容未正常关闭（头部行数落后）的会话
+        sizes = [self._file_rows(ts_file, "f64")]
+        sizes.extend(self._file_rows(c.file, c.dtype) for c in self._columns.values())
+        return min(sizes)
+
+    def _file_rows(self, name: str, dtype: str) -> int:
+        try:
+            size = (self.path / name).stat().st_size
+        except FileNotFoundError as exc:
+            raise SessionFormatError(f"Session column missing: {name}") from exc
+        return size // _DTYPES[dtype].itemsize
+
+    def _map(self, name: str, dtype: str) -> np.ndarray:
+        if self._rows == 0:
+            return np.empty(0, dtype=_DTYPES[dtype])
+        return np.memmap(
+            self.path / name, dtype=_DTYPES[dtype], mode="r", shape=(self._rows,)
+        )
+
+
+def open_session(path: str | os.PathLike) -> RecordedSession:
+    return RecordedSession(path)
+
+
+class SessionBuffer:
+    """Read-only stand-in for :class:`DataBuffer` backed by a recorded session.
+
+    The waveform plot reads whole columns through ``get_timestamps`` /
+    ``get_data``; to keep that cheap for multi-hour captures the buffer
+    exposes a *view* (a time range, the whole session by default) of at most
+    ``max_points`` rows.  Longer ranges are cut into equal buckets of rows
+    and each bucket contributes two rows, stamped with its first and last
+    timestamp, holding the bucket's minimum and maximum in the order they
+    occur -- so short spikes survive decimation.  The display re-views the
+    range whenever its window changes; only the pages touched by the view
+    are read from disk.
+    """
+
+    def __init__(self, session: RecordedSession, max_points: int = 5000) -> None:
+        self.session = session
+        self.max_points = max(2, int(max_points))
+        self.signal_order: List[str] = session.signal_ids
+        # 视图的行范围 [lo, hi) 与每个桶的行数（1 表示不抽取）
+        self._lo = self._hi = 0
+        self._step = 1
+        self._ts_cache: List[float] = []
+        self._data_cache: Dict[str, List[Any]] = {}
+        self.set_view()
+
+    # ---- view ---------------------------------------------------------
+    def set_view(
+        self, start_time: Optional[float] = None, end_time: Optional[float] = None
+    ) -> int:
+        """Select the time range exposed through the read API; returns rows."""
+        ts = self.session.timestamps
+        total = len(self.session)
+        lo = 0 if start_time is None else int(np.searchsorted(ts, start_time, "left"))
+        hi = total if end_time is None else int(np.searchsorted(ts, end_time, "right"))
+        lo, hi = max(0, lo), min(total, hi)
+        hi = max(lo, hi)
+        rows = hi - lo
+        self._lo, self._hi = lo, hi
+        if rows <= self.max_points:
+            self._step = 1
+            self._ts_cache = np.asarray(ts[lo:hi]).tolist()
+        else:
+            self._step = math.ceil(rows / float(self.max_points // 2))
+            first = np.arange(lo, hi, self._step, dtype=np.int64)
+            last = np.minimum(first + self._step, hi) - 1
+            self._ts_cache = np.column_stack((ts[first], ts[last])).ravel().tolist()
+        self._data_cache.clear()
+        return len(self._ts_cache)
+
+    def _decimate(self, block: np.ndarray) -> np.ndarray:
+        """Bucket minimum and maximum, in time order, two values per bucket."""
+        step = self._step
+        buckets = -(-block.shape[0] // step)
+        pad = buckets * step - block.shape[0]
+        if pad:
+            block = np.pad(block, (0, pad), mode="edge")
+        block = block.reshape(buckets, step)
+        missing = np.isnan(block)
+        lo_idx = np.where(missing, np.inf, block).argmin(axis=1)
+        hi_idx = np.where(missing, -np.inf, block).argmax(axis=1)
+        rows = np.arange(buckets)
+        lo_val, hi_val = block[rows, lo_idx], block[rows, hi_idx]
+        min_first = lo_idx <= hi_idx
+        return np.column_stack(
+            (
+                np.where(min_first, lo_val, hi_val),
+                np.where(min_first, hi_val, lo_val),
+            )
+        ).ravel()
+
+    def time_bounds(self) -> Tuple[Optional[float], Optional[float]]:
+        ts = self.session.timestamps
+        if len(self.session) == 0:
+            return None, None
+        return float(ts[0]), float(ts[-1])
+
+    # ---- DataBuffer read API -----------------------------------------
+    def get_timestamps(self) -> List[float]:
+        return list(self._ts_cache)
+
+    def get_data(self, signal_id: str) -> List[Any]:
+        cached = self._data_cache.get(signal_id)
+        if cached is None:
+            if signal_id not in self.session.signal_ids or not self._ts_cache:
+                cached = []
+            else:
+                block = np.asarray(self.session.column(signal_id)[self._lo : self._hi])
+                if self._step > 1:
+                    block = self._decimate(block.astype(np.float64))
+                cached = block.tolist()
+            self._data_cache[signal_id] = cached
+        return list(cached)
+
+    def get_latest_value(self, signal_id: str) -> Any:
+        # 最后一个桶给出的是极值，最新值直接读视图末行
+        if signal_id not in self.session.signal_ids or self._hi <= self._lo:
+            return None
+        return float(self.session.column(signal_id)[self._hi - 1])
+
+    def get_time_range_data(self, signal_id, start_time, end_time):
+        if signal_id not in self.session.signal_ids:
+            return [], []
+        ts = self.session.timestamps
+        lo = int(np.searchsorted(ts, start_time, "left"))
+        hi = int(np.searchsorted(ts, end_time, "right"))
+        column = self.session.column(signal_id)
+        return np.asarray(ts[lo:hi]).tolist(), np.asarray(column[lo:hi]).tolist()
+
+    def average_interval(self, recent: int = 20, fallback: float = 0.2) -> float:
+        ts = self.session.timestamps
+        n = len(self.session)
+        if n < 2:
+            return fallback
+        tail = np.diff(np.asarray(ts[max(0, n - recent - 1) :]))
+        tail = tail[tail > 0]
+        return float(tail.mean()) if tail.size else fallback
+
+    def get_window_indices(self, window_seconds: float, max_points: int) -> list:
+        timestamps = self._ts_cache
+        if not timestamps:
+            return []
+        start = timestamps[-1] - float(window_seconds)
+        first = int(np.searchsorted(np.asarray(timestamps), start, "left"))
+        indices = list(range(first, len(timestamps)))
+        if len(indices) <= max_points:
+            return indices
+        step = math.ceil(len(indices) / float(max_points))
+        sampled = indices[::step]
+        if sampled[-1] != indices[-1]:
+            sampled.append(indices[-1])
+        return sampled[-max_points:]
+
+    def snapshot(self, signal_ids: Optional[Iterable[str]] = None) -> BufferSnapshot:
+        """Full-resolution, memory-mapped columns (exports read straight from disk)."""
+        ids = list(self.signal_order if signal_ids is None else signal_ids)
+        n = len(self.session)
+        columns: Dict[str, np.ndarray] = {}
+        for signal_id in ids:
+            if signal_id in self.session.signal_ids:
+                columns[signal_id] = self.session.column(signal_id)
+            else:
+                columns[signal_id] = np.full(n, None, dtype=object)
+        return BufferSnapshot(timestamps=self.session.timestamps, columns=columns)
+
+    # ---- write API (read-only session) -------------------------------
+    def add_data_point(self, signal_id, value, timestamp=None):
+        logger.debug("会话为只读，忽略数据点: %s", signal_id)
+
+    def add_data_points(self, signal_values, timestamp=None):
+        logger.debug("会话为只读，忽略批量数据点")
+
+    def clear(self):
+        self.set_view()
+
+
+__all__ = [
+    "HEADER_NAME",
+    "SESSION_SUFFIX",
+    "RecordedSession",
+    "SessionBuffer",
+    "SessionFormatError",
+    "SessionWriter",
+    "open_session",
+    "session_dir",
+    "write_session",
+]
@@ -6,8 +6,6 @@ import logging
 from pathlib import Path
 from typing import Dict, List, Optional, TYPE_CHECKING
 
-from PySide6.QtCore import QObject
-
 if TYPE_CHECKING:
     from controllers.protocol_field_service import ProtocolFieldService
 
@@ -19,11 +17,10 @@ logger = logging.getLogger(__name__)
 SIGNAL_DEFINITION_PATH = Path(__file__).with_name("signal_definitions.json")
 
 
-class SignalManager(QObject):
+class SignalManager:
     """管理所有可显示的信号定义"""
 
     def __init__(self):
-        super().__init__()
         self.signals: Dict[str, SignalInfo] = {}
         self._category_order: List[str] = []
         self.load_signal_definitions()
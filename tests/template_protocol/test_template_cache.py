@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from controllers.protocol_field_service import ProtocolFieldService
+from protocols.template_runtime import loader as loader_module
+from protocols.template_runtime.cache import TemplateCache
+from protocols.template_runtime.loader import ProtocolTemplateLoader
+
+TEMPLATE = Path(__file__).resolve().parents[2] / "protocols/templates/acusim.yaml"
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "acusim.yaml"
+    shutil.copy(TEMPLATE, path)
+    return path
+
+
+def _no_yaml(monkeypatch):
+    def fail(text):
+        raise AssertionError("template YAML parsed despite a warm cache")
+
+    monkeypatch.setattr(loader_module, "parse_template_text", fail)
+
+
+def test_warm_cache_skips_yaml_and_parses_identically(template, tmp_path, monkeypatch):
+    cache = TemplateCache(tmp_path / "cache")
+    cold = ProtocolTemplateLoader(template, cache=cache)
+    frame = bytes(range(64))
+    expected = cold.protocol_for_category("INV").parse_receive_frame(frame)
+    assert len(list(cache.directory.glob("acusim-*.pickle"))) == 1
+
+    _no_yaml(monkeypatch)
+    warm = ProtocolTemplateLoader(template, cache=cache)
+    assert warm.spec() == cold.spec()
+    assert warm.protocol_for_category("INV").parse_receive_frame(frame) == expected
+
+
+def test_field_index_is_cached_with_the_template(template, tmp_path, monkeypatch):
+    cache = TemplateCache(tmp_path / "cache")
+    config = tmp_path / "acu_config.json"
+    first = ProtocolFieldService(ProtocolTemplateLoader(template, cache), config)
+    sections = first.get_send_sections()
+    infos = first.receive_field_infos()
+
+    _no_yaml(monkeypatch)
+    monkeypatch.setattr(
+        ProtocolFieldService,
+        "_build_field_index",
+        lambda self, spec: pytest.fail("field index rebuilt"),
+    )
+    second = ProtocolFieldService(ProtocolTemplateLoader(template, cache), config)
+    assert second.get_send_sections() == sections
+    assert second.receive_field_infos() == infos
+    assert second.default_preferences() == first.default_preferences()
+
+
+def test_edited_or_corrupt_cache_falls_back_to_yaml(template, tmp_path):
+    cache = TemplateCache(tmp_path / "cache")
+    ProtocolTemplateLoader(template, cache=cache).spec()
+    (entry,) = cache.directory.glob("acusim-*.pickle")
+    entry.write_bytes(b"not a pickle")
+    assert ProtocolTemplateLoader(template, cache=cache).spec().name
+
+    text = template.read_text(encoding="utf-8")
+    template.write_text(text.replace("version: 1", "version: 2", 1), encoding="utf-8")
+    spec = ProtocolTemplateLoader(template, cache=cache).spec()
+    assert spec.version == 2
+    # the entry of the previous template version is pruned
+    assert len(list(cache.directory.glob("acusim-*.pickle"))) == 1
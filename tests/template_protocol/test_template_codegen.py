@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import inspect
+import random
+from pathlib import Path
+
+import pytest
+import yaml
+
+from model.control_state import ControlState
+from model.protocols.inv_protocol import InvLikeProtocol
+from protocols.template_runtime.adapters.template_protocol import TemplateProtocol
+from protocols.template_runtime.cache import TemplateCache
+from protocols.template_runtime.loader import ProtocolTemplateLoader
+from protocols.template_runtime.schema import parse_template_spec
+
+TEMPLATE = Path(__file__).resolve().parents[2] / "protocols/templates/acusim.yaml"
+CATEGORIES = ["INV", "CHU", "BCC"]
+
+
+def _pair(loader: ProtocolTemplateLoader, category: str):
+    generated = loader.protocol_for_category(category)
+    spec = loader.spec()
+    interpreted = TemplateProtocol(spec, spec.categories[category])
+    assert generated.compiled is not None and interpreted.compiled is None
+    return generated, interpreted
+
+
+def _random_snapshot(rng: random.Random) -> dict:
+    state = ControlState()
+    for _ in range(rng.randrange(8)):
+        state.bool_commands[(rng.randrange(8, 64), rng.randrange(8))] = True
+    for pos in rng.sample(range(16, 300, 2), 3):
+        state.freq_controls[pos] = rng.randrange(0, 6000) / 10
+    for bit in range(8):
+        state.isolation_commands[bit] = rng.random() < 0.5
+        state.start_commands[bit] = rng.random() < 0.5
+    state.chu_controls[(66, rng.randrange(8))] = True
+    state.redundant_commands[(67, rng.randrange(8))] = rng.random() < 0.5
+    state.start_times[rng.randrange(100, 200)] = rng.randrange(600)
+    state.branch_voltages[rng.randrange(200, 300)] = rng.randrange(0, 4000) / 4
+    # legacy divides by 0.1 where the template multiplies by 10; whole degrees
+    # keep both roundings equal
+    state.battery_temp = float(rng.randrange(100))
+    return state.snapshot()
+
+
+def _legacy_fault_masks(legacy: InvLikeProtocol) -> dict:
+    masks = {}
+    for byte in (52, 53):
+        masks[byte] = 0
+        for bit in range(8):
+            frame = bytearray(64)
+            frame[byte] = 1 << bit
+            if legacy.parse_receive_frame(bytes(frame))["故障信息"]["故障数量"]:
+                masks[byte] |= 1 << bit
+    return masks
+
+
+@pytest.mark.parametrize("category", CATEGORIES)
+def test_generated_functions_match_interpreter_and_legacy(category):
+    loader = ProtocolTemplateLoader(TEMPLATE)
+    generated, interpreted = _pair(loader, category)
+    legacy = InvLikeProtocol(category)
+    legacy_masks = _legacy_fault_masks(legacy)
+    rng = random.Random(category)
+    for _ in range(300):
+        frame = bytearray(rng.getrandbits(8) for _ in range(64))
+        expected = interpreted.parse_receive_frame(bytes(frame))
+        for data in (bytes(frame), frame, memoryview(frame)):
+            assert generated.parse_receive_frame(data) == expected
+        # compare with the legacy protocol on the fault bits it knows
+        for byte, mask in legacy_masks.items():
+            frame[byte] &= mask
+        frame[54:] = bytes(10)
+        assert generated.parse_receive_frame(bytes(frame)) == (
+            legacy.parse_receive_frame(bytes(frame))
+        )
+        snapshot = _random_snapshot(rng)
+        life = rng.randrange(0x10000)
+        sent = generated.build_send_frame(snapshot, life)
+        assert sent == interpreted.build_send_frame(snapshot, life)
+        assert sent == legacy.build_send_frame(snapshot, life)
+        generated.write_life_signal(sent, life + 1)
+        interpreted.write_life_signal(sent, life + 1)
+    assert generated.parse_receive_frame(b"short") == {"错误": "数据长度不足"}
+
+
+def test_generated_parser_handles_irregular_layouts():
+    raw = yaml.safe_load(TEMPLATE.read_text(encoding="utf-8"))
+    raw["categories"]["INV"]["frame_length_receive"] = 20
+    inv = raw["categories"]["INV"]["receive"]
+    inv["run_parameters"] = [
+        {"label": "小端", "offset": 6, "fmt": "<H", "scale": 0.5},
+        {"label": "重叠", "offset": 7, "fmt": ">H"},
+        {"label": "有符号", "offset": 10, "fmt": ">h", "scale": 2},
+        {"label": "越界", "offset": 30, "fmt": ">I", "scale": 0.01},
+        {"label": "单字节", "offset": 16, "fmt": "B"},
+    ]
+    inv["status_flags"] = [
+        {"label": "越界标志", "byte": 40, "bit": 3},
+        {"label": "标志", "byte": 12, "bit": 0},
+    ]
+    spec = parse_template_spec(raw)
+    loader = ProtocolTemplateLoader(TEMPLATE)
+    loader._spec, loader._digest = spec, "0" * 64
+    generated, interpreted = _pair(loader, "INV")
+    source = loader.generated_source("INV")
+    assert "if size >= 34:" in source and "if size > 40:" in source
+    rng = random.Random(7)
+    for size in (19, 20, 33, 34, 40, 41, 64):
+        for _ in range(50):
+            frame = bytes(rng.getrandbits(8) for _ in range(size))
+            assert generated.parse_receive_frame(frame) == (
+                interpreted.parse_receive_frame(frame)
+            )
+
+
+def test_generated_source_is_cached_and_inspectable(tmp_path, monkeypatch):
+    cache = TemplateCache(tmp_path / "cache")
+    source = ProtocolTemplateLoader(TEMPLATE, cache).generated_source("BCC")
+    assert "def parse_receive_frame(data):" in source
+
+    import protocols.template_runtime.loader as loader_module
+
+    monkeypatch.setattr(
+        loader_module,
+        "generate_category_source",
+        lambda *args: pytest.fail("source regenerated despite a warm cache"),
+    )
+    warm = ProtocolTemplateLoader(TEMPLATE, cache)
+    protocol = warm.protocol_for_category("BCC")
+    assert warm.generated_source("BCC") == source
+    assert inspect.getsource(protocol.parse_receive_frame) in source
+    assert protocol.compiled.filename in repr(protocol.parse_receive_frame.__code__)
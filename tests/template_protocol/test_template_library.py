@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+import yaml
+
+from controllers.parse_controller import ParseController
+from protocols.template_runtime import loader as loader_module
+from protocols.template_runtime.adapters.template_protocol import TemplateProtocol
+from protocols.template_runtime.cache import TemplateCache
+from protocols.template_runtime.library import (
+    LazyProtocol,
+    TemplateLibrary,
+    scan_template_header,
+)
+from protocols.template_runtime.loader import ProtocolTemplateLoader
+
+TEMPLATE = Path(__file__).resolve().parents[2] / "protocols/templates/acusim.yaml"
+
+
+def _tram_template(path: Path) -> None:
+    raw = yaml.safe_load(TEMPLATE.read_text(encoding="utf-8"))
+    raw["metadata"]["base_name"] = "TRAM_LIKE"
+    tram = dict(raw["categories"]["INV"], frame_length_receive=48)
+    raw["categories"] = {"TRAM": tram}
+    path.write_text(
+        yaml.safe_dump(raw, allow_unicode=True, sort_keys=False), encoding="utf-8"
+    )
+
+
+@pytest.fixture
+def library(tmp_path):
+    directory = tmp_path / "templates"
+    (directory / "vehicles").mkdir(parents=True)
+    shutil.copy(TEMPLATE, directory / "acusim.yaml")
+    _tram_template(directory / "vehicles" / "tram.yaml")
+    (directory / "broken.yaml").write_text("categories: [", encoding="utf-8")
+    return TemplateLibrary(directory, TemplateCache(tmp_path / "cache"))
+
+
+def test_header_scan_matches_full_parse():
+    header = scan_template_header(TEMPLATE)
+    spec = ProtocolTemplateLoader(TEMPLATE).spec()
+    assert header.name == spec.name
+    assert header.categories == {
+        cat: c.frame_length_receive or spec.frame_length_receive
+        for cat, c in spec.categories.items()
+    }
+
+
+def test_index_is_built_without_parsing_templates(library, monkeypatch):
+    monkeypatch.setattr(
+        loader_module,
+        "parse_template_text",
+        lambda text: pytest.fail("template body parsed at start-up"),
+    )
+    assert library.categories() == ["INV", "CHU", "BCC", "TRAM"]
+    assert library.categories_for_length(48) == ("TRAM",)
+    assert library.categories_for_length(64) == ("INV", "CHU", "BCC")
+
+    parser = ParseController(library)
+    assert isinstance(parser._protocols["TRAM"], LazyProtocol)
+    assert library.loaded() == []
+
+
+def test_family_loads_on_first_frame(library):
+    parser = ParseController(library)
+    route = parser.route(("10.0.0.9", 40000), bytes(48))
+    assert route.category == "TRAM" and isinstance(route.protocol, LazyProtocol)
+    assert library.loaded() == []
+
+    parsed = parser.parse_route(route, bytes(48))
+    assert "运行参数" in parsed
+    (tram,) = library.loaded()
+    assert tram.name == "tram.yaml"
+    # routes are rebound: later frames skip the placeholder
+    assert isinstance(route.protocol, TemplateProtocol)
+    assert route.protocol is parser._protocols["TRAM"]
+    assert parser.category_from_device("TRAM@10.0.0.9:40000") == "TRAM"
+
+    inv = parser.route(("10.0.0.1", 49153), bytes(64))
+    assert isinstance(inv.protocol, LazyProtocol)
+    parser.parse_route(inv, bytes(64))
+    assert len(library.loaded()) == 2
+
+
+def test_new_template_is_discovered_at_runtime(library, tmp_path):
+    parser = ParseController(library)
+    assert parser.route(("10.0.0.5", 40001), bytes(48)).category == "TRAM"
+
+    raw = yaml.safe_load(TEMPLATE.read_text(encoding="utf-8"))
+    raw["metadata"]["base_name"] = "METRO_LIKE"
+    raw["categories"] = {
+        "METRO": dict(raw["categories"]["BCC"], frame_length_receive=40)
+    }
+    (library.directory / "metro.yaml").write_text(
+        yaml.safe_dump(raw, allow_unicode=True, sort_keys=False), encoding="utf-8"
+    )
+    assert library.check()
+    route = parser.route(("10.0.0.6", 40002), bytes(40))
+    assert route.category == "METRO"
+    assert "故障信息" in parser.parse_route(route, bytes(40))
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from controllers.frame_builder import FrameBuilder
+from controllers.parse_controller import ParseController
+from controllers.protocol_field_service import ProtocolFieldService
+from model.control_state import ControlState
+from model.device import Device, DeviceConfig
+from protocols.template_runtime.cache import TemplateCache
+from protocols.template_runtime.registry import TemplateRegistry
+
+TEMPLATE = Path(__file__).resolve().parents[2] / "protocols/templates/acusim.yaml"
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = tmp_path / "acusim.yaml"
+    shutil.copy(TEMPLATE, path)
+    return TemplateRegistry(path, TemplateCache(tmp_path / "cache"))
+
+
+def _rewrite(path: Path, old: str, new: str) -> None:
+    text = path.read_text(encoding="utf-8")
+    assert old in text
+    path.write_text(text.replace(old, new, 1), encoding="utf-8")
+    st = os.stat(path)
+    # make the change visible even on coarse mtime filesystems
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+# first INV run parameter; send fields use the same ``scale: 0.1`` text
+FREQ_BLOCK = (
+    'label: 输出频率\n          offset: 6\n          fmt: ">H"\n          scale: 0.1'
+)
+
+
+def _freq_scale(spec) -> float:
+    fields = spec.categories["INV"].run_parameters
+    return next(f.scale for f in fields if f.label == "输出频率")
+
+
+def test_reload_swaps_protocols_and_notifies(registry):
+    path = registry.template_path
+    parser = ParseController()
+    route = parser.route(("10.0.0.1", 49153), bytes(64))
+    parser.set_protocols({"INV": registry.protocol_for_category("INV")})
+    acu = Device(DeviceConfig(name="ACU", ip="127.0.0.1", send_port=49152))
+    builder = FrameBuilder(ControlState(), acu)
+    builder.protocol = registry.protocol_for_category("INV")
+    registry.subscribe(parser._on_template_reloaded)
+    registry.subscribe(builder._on_template_reloaded)
+    seen = []
+    registry.subscribe(lambda new, old: seen.append((new, old)))
+    old_protocol = route.protocol
+
+    assert not registry.check()
+    _rewrite(path, FREQ_BLOCK, FREQ_BLOCK.replace("0.1", "1.0"))
+    assert registry.check()
+
+    assert registry.generation == 1 and len(seen) == 1
+    new_loader, old_loader = seen[0]
+    assert old_loader is not new_loader
+    assert _freq_scale(new_loader.spec()) == pytest.approx(1.0)
+    assert route.protocol is new_loader.protocol_for_category("INV")
+    assert route.protocol is not old_protocol
+    assert builder.protocol is route.protocol
+    frame = bytearray(64)
+    frame[6:8] = (100).to_bytes(2, "big")
+    parsed = parser.parse_route(route, bytes(frame))
+    assert old_protocol.parse_receive_frame(bytes(frame)) != parsed
+
+
+def test_invalid_edit_keeps_previous_version(registry):
+    path = registry.template_path
+    before = registry.loader
+    _rewrite(path, "categories:", "categories: [broken")
+    assert not registry.check()
+    assert registry.loader is before and registry.generation == 0
+    assert registry.last_error
+
+
+def test_field_service_reports_only_real_field_changes(registry, tmp_path):
+    path = registry.template_path
+    service = ProtocolFieldService(registry.loader, tmp_path / "acu_config.json")
+    service.get_active_preferences()
+
+    _rewrite(path, FREQ_BLOCK, FREQ_BLOCK.replace("0.1", "1.0"))
+    assert registry.check()
+    assert not service.reload(registry.loader)
+
+    _rewrite(
+        path,
+        "label: 输出频率\n          offset: 6",
+        "label: 新标签\n          offset: 6",
+    )
+    assert registry.check()
+    assert service.reload(registry.loader)
+    assert service.find_receive_field("INV", "运行参数", "新标签") is not None
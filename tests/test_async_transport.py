@@ -0,0 +1,130 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from controllers.async_transport import (
+    AsyncioCommunicationController,
+    create_communication_controller,
+)
+from controllers.communication_controller import CommunicationController
+
+
+def _free_udp_ports(count):
+    socks = []
+    try:
+        for _ in range(count):
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            s.bind(("127.0.0.1", 0))
+            socks.append(s)
+        return [s.getsockname()[1] for s in socks]
+    finally:
+        for s in socks:
+            s.close()
+
+
+@pytest.fixture
+def peer():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(1.0)
+    yield sock
+    sock.close()
+
+
+@pytest.fixture
+def ctrl(peer):
+    send_port, *recv_ports = _free_udp_ports(3)
+    ctrl = AsyncioCommunicationController()
+    ctrl.update_config(
+        acu_send_port=send_port,
+        acu_receive_port=recv_ports[0],
+        extra_receive_ports=recv_ports[1:],
+        target_ip="127.0.0.1",
+        target_receive_port=peer.getsockname()[1],
+    )
+    yield ctrl
+    ctrl.stop()
+
+
+def test_receives_on_every_port_and_sends(ctrl, peer):
+    received = []
+    done = threading.Event()
+
+    def on_receive(data, addr):
+        received.append(data)
+        if len(received) == 2:
+            done.set()
+
+    ctrl.on_receive = on_receive
+    assert ctrl.setup() is True
+    ctrl.start_receive_loop()
+    for port in ctrl.receive_ports():
+        peer.sendto(port.to_bytes(2, "big"), ("127.0.0.1", port))
+    assert done.wait(timeout=1.0)
+    assert sorted(received) == sorted(
+        p.to_bytes(2, "big") for p in ctrl.receive_ports()
+    )
+
+    ctrl.send(b"HELLO")
+    data, addr = peer.recvfrom(64)
+    assert data == b"HELLO" and addr[1] == ctrl.config["acu_send_port"]
+    assert ctrl.receive_stats()["datagrams"] == 2
+
+
+def test_stop_is_immediate(ctrl):
+    assert ctrl.setup() is True
+    ctrl.start_receive_loop()
+    started = time.perf_counter()
+    ctrl.stop()
+    assert time.perf_counter() - started < 0.2
+    assert ctrl.running is False and ctrl.recv_socks == []
+
+
+def test_setup_failure_reports_and_cleans_up(ctrl):
+    blocker = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    blocker.bind(("0.0.0.0", ctrl.config["acu_send_port"]))
+    errors = []
+    ctrl.on_error = errors.append
+    try:
+        assert ctrl.setup() is False
+    finally:
+        blocker.close()
+    assert ctrl.running is False and ctrl.send_sock is None
+    assert any("Socket初始化失败" in msg for msg in errors)
+
+
+def test_factory_selects_transport():
+    assert type(create_communication_controller()) is CommunicationController
+    assert isinstance(
+        create_communication_controller("asyncio"), AsyncioCommunicationController
+    )
+    with pytest.raises(ValueError):
+        create_communication_controller("carrier-pigeon")
+
+
+def test_transport_is_selected_by_session_config_and_gui(qtbot):
+    from engine import SessionConfig, SessionConfigError, SimulatorEngine
+    from engine.cli import build_parser, config_from_args
+    from gui.main_window import ACUSimulator
+    from model.send_target import SendTarget
+
+    config = config_from_args(build_parser().parse_args(["--transport", "asyncio"]))
+    assert config.transport == "asyncio"
+    engine = SimulatorEngine(config)
+    assert isinstance(engine.comm, AsyncioCommunicationController)
+    with pytest.raises(SessionConfigError):
+        SessionConfig.from_mapping({"transport": "asyncio", "receive_mode": "buffer"})
+
+    win = ACUSimulator(enable_dialogs=False)
+    qtbot.addWidget(win)
+    assert type(win.comm) is CommunicationController
+    win.comm.update_config(extra_receive_ports=[50123])
+    win.comm.set_send_targets([SendTarget("A", "127.0.0.1", 1)])
+    win.transport_combo.setCurrentText("asyncio")
+    assert win._on_device_apply() is True
+    assert isinstance(win.comm, AsyncioCommunicationController)
+    assert win.engine.comm is win.comm and win.comm.on_receive is not None
+    assert win.comm.config["extra_receive_ports"] == [50123]
+    assert [t.name for t in win.comm.send_targets] == ["A"]
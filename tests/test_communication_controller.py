@@ -1,9 +1,12 @@
+import os
 import queue
 import socket
 import threading
 import time
 from unittest.mock import patch
 
+import pytest
+
 from controllers.communication_controller import CommunicationController
 
 
@@ -215,3 +218,200 @@ def test_receive_loop_reports_errors():
         ctrl.stop()
 
     assert any("接收异常" in msg for msg in error_messages)
+
+
+def test_capture_records_both_directions_and_replays(tmp_path):
+    from recording.capture import DIR_RX, DIR_TX, iter_capture
+
+    ctrl = CommunicationController()
+    factory = FakeSocketFactory()
+    received = threading.Event()
+    ctrl.on_receive = lambda data, addr: received.set()
+    capture_path = tmp_path / "run.acucap"
+
+    with patch_sockets(factory):
+        assert ctrl.setup() is True
+        assert ctrl.start_capture(capture_path)
+        ctrl.start_receive_loop()
+        factory.instances[1].recv_queue.put((b"RX", ("10.2.0.5", 49999)))
+        assert received.wait(timeout=1.0)
+        ctrl.send(b"TX")
+        ctrl.stop()
+
+    assert not ctrl.capturing
+    records = list(iter_capture(capture_path))
+    assert [(r.direction, r.payload) for r in records] == [
+        (DIR_RX, b"RX"),
+        (DIR_TX, b"TX"),
+    ]
+    assert records[0].addr == ("10.2.0.5", 49999)
+    assert records[1].addr == ("10.2.0.5", 49152)
+
+    replayed = []
+    ctrl.on_receive = lambda data, addr: replayed.append((data, addr))
+    replay = ctrl.start_replay(capture_path, speed=0)
+    assert replay.wait(timeout=1.0)
+    # only received datagrams are fed back, without any socket
+    assert replayed == [(b"RX", ("10.2.0.5", 49999))]
+
+
+def test_replay_keeps_original_frame_spacing(tmp_path):
+    from controllers.replay_controller import ReplayController
+    from recording.capture import DIR_RX, CaptureWriter
+
+    path = tmp_path / "timed.acucap"
+    writer = CaptureWriter(path)
+    for i in range(3):
+        writer.write(DIR_RX, ("127.0.0.1", 49999), bytes([i]), timestamp=10.0 + i * 0.1)
+    writer.close()
+
+    seen = []
+    replay = ReplayController(path, speed=2.0)
+    replay.on_receive = lambda data, addr: seen.append(time.perf_counter())
+    stats = replay.run()
+    assert stats["frames"] == 3
+    # 0.2 s of capture at 2x speed -> about 0.1 s
+    assert 0.08 <= seen[-1] - seen[0] < 0.5
+
+    fast = ReplayController(path, speed=0)
+    assert fast.run()["elapsed"] < 0.08
+
+
+def _free_udp_ports(count):
+    socks = []
+    try:
+        for _ in range(count):
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            s.bind(("127.0.0.1", 0))
+            socks.append(s)
+        return [s.getsockname()[1] for s in socks]
+    finally:
+        for s in socks:
+            s.close()
+
+
+def test_single_thread_listens_on_several_ports():
+    send_port, *recv_ports = _free_udp_ports(4)
+    ctrl = CommunicationController()
+    ctrl.update_config(
+        acu_send_port=send_port,
+        acu_receive_port=recv_ports[0],
+        extra_receive_ports=recv_ports[1:] + [recv_ports[0]],
+    )
+    assert ctrl.receive_ports() == recv_ports
+
+    per_port = 300
+    received = []
+    done = threading.Event()
+
+    def on_receive(data, addr):
+        received.append((data, threading.current_thread()))
+        if len(received) == per_port * len(recv_ports):
+            done.set()
+
+    ctrl.on_receive = on_receive
+    assert ctrl.setup() is True
+    assert len(ctrl.recv_socks) == len(recv_ports)
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        ctrl.start_receive_loop()
+        # short bursts on every port; paced so the default SO_RCVBUF never fills
+        for i in range(per_port):
+            if i % 20 == 0:
+                time.sleep(0.002)
+            for port in recv_ports:
+                client.sendto(
+                    port.to_bytes(2, "big") + bytes([i & 0xFF]), ("127.0.0.1", port)
+                )
+        assert done.wait(timeout=2.0)
+    finally:
+        client.close()
+        ctrl.stop()
+
+    assert len({thread for _, thread in received}) == 1
+    ports_seen = {int.from_bytes(data[:2], "big") for data, _ in received}
+    assert ports_seen == set(recv_ports)
+    assert ctrl.recv_socks == [] and ctrl.recv_sock is None
+
+
+def test_buffer_mode_hands_out_reused_memoryviews():
+    send_port, recv_port = _free_udp_ports(2)
+    ctrl = CommunicationController()
+    ctrl.update_config(
+        acu_send_port=send_port,
+        acu_receive_port=recv_port,
+        receive_mode="buffer",
+        recv_buffer_bytes=1 << 20,
+        recv_pool_slots=8,
+    )
+    count = 200
+    payloads = []
+    kinds = set()
+    done = threading.Event()
+
+    def on_receive(data, addr):
+        kinds.add(type(data))
+        payloads.append(bytes(data))
+        if len(payloads) == count:
+            done.set()
+
+    ctrl.on_receive = on_receive
+    assert ctrl.setup() is True
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        ctrl.start_receive_loop()
+        for i in range(count):
+            if i % 20 == 0:
+                time.sleep(0.002)
+            client.sendto(i.to_bytes(2, "big") * 16, ("127.0.0.1", recv_port))
+        assert done.wait(timeout=2.0)
+        stats = ctrl.receive_stats()
+    finally:
+        client.close()
+        ctrl.stop()
+
+    assert kinds == {memoryview}
+    # only 8 slots were used for 200 datagrams, yet every copy is intact
+    assert payloads == [i.to_bytes(2, "big") * 16 for i in range(count)]
+    assert stats["datagrams"] == count and stats["bytes"] == count * 32
+    assert stats["rcvbuf"][recv_port] > 0
+
+
+def test_read_udp_drops_parses_proc_table(tmp_path):
+    from controllers.receive_buffers import read_udp_drops
+
+    table = tmp_path / "udp"
+    table.write_text(
+        "   sl  local_address rem_address   st tx_queue rx_queue tr tm->when "
+        "retrnsmt   uid  timeout inode ref pointer drops\n"
+        "  1: 00000000:C004 00000000:0000 07 00000000:00000000 00:00000000 "
+        "00000000     0        0 4242 2 0000000000000000 17\n"
+        "  2: garbage\n"
+    )
+    assert read_udp_drops([str(table), str(tmp_path / "missing")]) == {
+        4242: (0xC004, 17)
+    }
+
+
+def test_receive_stats_reports_kernel_drops():
+    from controllers.receive_buffers import PROC_NET_UDP
+
+    if not os.path.exists(PROC_NET_UDP[0]):
+        pytest.skip("/proc/net/udp not available")
+    send_port, recv_port = _free_udp_ports(2)
+    ctrl = CommunicationController()
+    # tiny receive buffer and no receive loop: the kernel has to drop
+    ctrl.update_config(
+        acu_send_port=send_port, acu_receive_port=recv_port, recv_buffer_bytes=1
+    )
+    assert ctrl.setup() is True
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        for _ in range(200):
+            client.sendto(b"x" * 1000, ("127.0.0.1", recv_port))
+        stats = ctrl.receive_stats()
+    finally:
+        client.close()
+        ctrl.stop()
+    assert stats["kernel_drops"] > 0
+    assert stats["kernel_drops_by_port"][recv_port] == stats["kernel_drops"]
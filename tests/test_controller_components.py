@@ -62,3 +62,60 @@ def test_frame_builder_populates_key_fields():
 
     frame_second = builder.build()
     assert frame_second[0:2] == struct.pack(">H", 2)
+
+
+def test_control_state_version_tracks_every_kind_of_change():
+    state = ControlState()
+    v0 = state.version
+    snap = state.snapshot()
+    assert state.snapshot() is snap  # unchanged version -> same cached snapshot
+
+    state.freq_controls[10] = 50  # in-place edits still count
+    assert state.version == v0 + 1
+    state.freq_controls[10] = 50  # same value: no new version
+    state.battery_temp = 25
+    assert state.version == v0 + 1
+
+    state.set_flag("bool_commands", (8, 0), True)
+    state.set_flag("bool_commands", (8, 1), False)  # already unset
+    assert state.version == v0 + 2
+    state.set_value("start_times", 142, 0)  # <=0 means unset
+    assert state.version == v0 + 2
+    state.set_value("battery_temp", None, 30)
+    state.branch_voltages = {154: 100}
+    assert state.version == v0 + 4
+
+    version, snap2 = state.snapshot_with_version()
+    assert version == state.version and snap2 is not snap
+    assert snap2["freq_controls"] == {10: 50} and snap2["battery_temp"] == 30
+    # replaced dicts are tracked too
+    state.branch_voltages[156] = 50
+    assert state.version == v0 + 5
+
+
+def test_frame_builder_reuses_cached_frame_until_state_changes():
+    state = ControlState()
+    state.freq_controls[10] = 50
+    device = Device(DeviceConfig(name="ACU", ip="10.0.0.1", send_port=40000))
+    builder = FrameBuilder(state, device)
+
+    calls = []
+    original = builder.protocol.build_send_frame
+
+    def counting(snapshot, life):
+        calls.append(life)
+        return original(snapshot, life)
+
+    builder.protocol.build_send_frame = counting
+    first = builder.build()
+    second = builder.build()
+    assert len(calls) == 1  # second frame only rewrote life signal/timestamp
+    assert first[0:2] == struct.pack(">H", 1)
+    assert second[0:2] == struct.pack(">H", 2)
+    assert first[8:] == second[8:]
+
+    state.freq_controls[10] = 60
+    third = builder.build()
+    assert len(calls) == 2
+    assert third[0:2] == struct.pack(">H", 3)
+    assert third[10:12] == struct.pack(">H", 600)
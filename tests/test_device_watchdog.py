@@ -0,0 +1,43 @@
+import pytest
+
+from controllers.device_watchdog import DeviceWatchdog
+from controllers.link_monitor import LinkMonitor
+
+
+def _feed(mon, dog, name, life, ts):
+    mon.on_frame(name, life.to_bytes(2, "big") + bytes(62), ts)
+    dog.seen(name)
+
+
+def test_online_offline_with_rate_derived_timeout():
+    mon = LinkMonitor()
+    dog = DeviceWatchdog(mon.devices, multiplier=5, min_timeout=0.05)
+    for i in range(20):
+        _feed(mon, dog, "INV1", i, i * 0.01)  # 100 Hz -> ~50 ms timeout
+    assert dog.poll(now=0.19) == [("INV1", True)]
+    assert dog.poll(now=0.20) == []
+    assert dog.timeout_for(mon.devices["INV1"]) == pytest.approx(0.05, rel=0.1)
+    assert dog.poll(now=0.30) == [("INV1", False)]
+    assert dog.online == set()
+
+    _feed(mon, dog, "INV1", 20, 1.0)
+    assert dog.poll(now=1.0) == [("INV1", True)]
+
+
+def test_heap_entries_are_rescheduled_not_duplicated():
+    mon = LinkMonitor()
+    dog = DeviceWatchdog(mon.devices, default_timeout=1.0, min_timeout=1.0)
+    names = [f"DEV{i}" for i in range(300)]
+    for name in names:
+        _feed(mon, dog, name, 1, 0.0)
+    assert len(dog.poll(now=0.0)) == 300
+    # every device keeps sending: entries are pushed back, nobody goes offline
+    for step in range(1, 6):
+        t = step * 0.5
+        for name in names[:200]:
+            _feed(mon, dog, name, step + 1, t)
+        events = dog.poll(now=t + 0.01)
+        assert all(name in names[200:] for name, online in events)
+    assert len(dog._heap) == 200
+    assert dog.online == set(names[:200])
+    assert len(dog.reset()) == 200
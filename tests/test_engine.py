@@ -0,0 +1,194 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from engine import SessionConfig, SessionConfigError, SimulatorEngine
+from engine.cli import config_from_args, build_parser
+from engine.config import load_session_config
+from recording.recorder import open_recording
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopComm:
+    """Socket-free comm: sent frames are kept, frames are injected by the test."""
+
+    def __init__(self):
+        self.on_receive = None
+        self.on_error = None
+        self.on_status = None
+        self.config = {}
+        self.sent = []
+        self.send_targets = []
+
+    def update_config(self, **cfg):
+        self.config.update(cfg)
+
+    def set_send_targets(self, targets):
+        self.send_targets = list(targets)
+
+    def setup(self):
+        return True
+
+    def start_receive_loop(self):
+        pass
+
+    def send(self, data):
+        self.sent.append(bytes(data))
+
+    def send_fanout(self, frame):
+        self.sent.append(frame.base)
+
+    def stop(self):
+        pass
+
+    def receive_stats(self):
+        return {"datagrams": 0}
+
+    def target_stats(self):
+        return {}
+
+
+def _inv_frame(life: int) -> bytes:
+    frame = bytearray(64)
+    frame[0:2] = life.to_bytes(2, "big")
+    return bytes(frame)
+
+
+def test_engine_import_does_not_load_qt():
+    code = (
+        "import sys, engine, engine.cli, engine.sampling, signal_manager;"
+        "sys.exit(any(m.startswith('PySide6') for m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT)
+    assert result.returncode == 0
+
+
+def test_session_sends_receives_and_records(tmp_path):
+    comm = LoopComm()
+    config = SessionConfig(
+        period_ms=5,
+        controls={"bool_commands": {"8:0": True}, "freq_controls": {10: 50}},
+        record_dir=str(tmp_path),
+    )
+    engine = SimulatorEngine(config, comm=comm)
+    parsed = []
+    engine.frame_parsed.connect(lambda route, p, ts: parsed.append(route.device_id))
+    assert engine.start()
+    for life in range(1, 41):
+        comm.on_receive(_inv_frame(life), ("127.0.0.1", 49153))
+        time.sleep(0.005)
+    engine.stop()
+    stats = engine.stats()
+
+    assert engine.control_state.bool_commands == {(8, 0): True}
+    assert comm.sent and stats["send"]["sent"] == len(comm.sent)
+    assert comm.sent[0][8] & 0x01
+    assert stats["receive"]["parsed"] > 0 and parsed[0] == "INV1"
+    assert stats["devices"]["INV1"]["lost"] == 0
+    assert engine.latest_values.get(("INV1", "设备信息", "生命信号")) > 0
+    rec = stats["recording"]
+    assert rec["rows"] > 0
+    sessions = open_recording(rec["run_dir"])
+    assert sessions and any(sid.startswith("send_") for sid in sessions[0].signal_ids)
+
+
+def test_final_stats_keep_socket_receive_stats():
+    socks = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(2)]
+    for sock in socks:
+        sock.bind(("127.0.0.1", 0))
+    recv_port, peer_port = (sock.getsockname()[1] for sock in socks)
+    socks[0].close()
+    config = SessionConfig(
+        acu_ip="127.0.0.1",
+        acu_send_port=0,
+        acu_receive_port=recv_port,
+        target_ip="127.0.0.1",
+        target_receive_port=peer_port,
+        period_ms=5,
+        duration_s=0.05,
+    )
+    try:
+        stats = SimulatorEngine(config).run()
+    finally:
+        socks[1].close()
+    assert stats["send"]["sent"] > 0
+    assert stats["receive"]["rcvbuf"] and "kernel_drops" in stats["receive"]
+
+
+def test_send_targets_apply_while_sending():
+    from model.send_target import SendTarget
+
+    class FanoutComm(LoopComm):
+        def send_fanout(self, frame):
+            self.sent.append(frame)
+
+    comm = FanoutComm()
+    engine = SimulatorEngine(SessionConfig(period_ms=5), comm=comm)
+    assert engine.start()
+    time.sleep(0.05)
+    comm.set_send_targets([SendTarget("A", "127.0.0.1", 1)])
+    time.sleep(0.05)
+    engine.stop()
+    assert isinstance(comm.sent[0], bytes)
+    assert [t.name for t in comm.sent[-1].targets] == ["A"]
+
+
+def test_scenario_session_can_stop_when_finished():
+    comm = LoopComm()
+    config = SessionConfig(
+        period_ms=5,
+        scenario={
+            "name": "short",
+            "steps": [{"set": {"start_commands": {1: True}}}, {"wait": 0.05}],
+        },
+        stop_after_scenario=True,
+        duration_s=5,
+    )
+    engine = SimulatorEngine(config, comm=comm)
+    started = time.monotonic()
+    stats = engine.run()
+    assert time.monotonic() - started < 2
+    assert stats["send"]["sent"] >= 10
+    assert engine.scheduler is None
+
+
+def test_config_rejects_unknown_keys_and_resolves_scenario(tmp_path):
+    with pytest.raises(SessionConfigError):
+        SessionConfig.from_mapping({"period": 10})
+    path = tmp_path / "session.yaml"
+    path.write_text("scenario: ramp.yaml\nperiod_ms: 20\n", encoding="utf-8")
+    config = load_session_config(path)
+    assert config.period_ms == 20
+    assert config.scenario == os.path.join(str(tmp_path), "ramp.yaml")
+
+
+def test_cli_arguments_override_config(tmp_path):
+    path = tmp_path / "session.json"
+    path.write_text(
+        '{"period_ms": 20, "controls": {"freq_controls": {"10": 40}}}',
+        encoding="utf-8",
+    )
+    args = build_parser().parse_args(
+        [
+            "--config",
+            str(path),
+            "--period-ms",
+            "5",
+            "--set",
+            "freq_controls.12=30",
+            "--set",
+            "battery_temp=30",
+            "--no-send",
+        ]
+    )
+    config = config_from_args(args)
+    assert config.period_ms == 5 and config.send is False
+    assert config.controls == {
+        "freq_controls": {"10": 40, "12": 30},
+        "battery_temp": 30,
+    }
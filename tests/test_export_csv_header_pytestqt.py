@@ -45,7 +45,8 @@ def test_export_csv_header(qtbot, monkeypatch, tmp_path):
     monkeypatch.setattr("PySide6.QtWidgets.QMessageBox.critical", lambda *a, **k: None)
 
     # call export
-    w.on_export_clicked()
+    with qtbot.waitSignal(w.export_finished, timeout=5000):
+        w.on_export_clicked()
 
     # assert file exists and header contains display name
     assert csv_file.exists(), "CSV file was not created"
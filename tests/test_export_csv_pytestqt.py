@@ -1,13 +1,14 @@
 import csv
 
 
-def test_export_csv_basic(tmp_path):
+def test_export_csv_basic(qtbot, tmp_path):
     from waveform_display import WaveformDisplay
     from views.event_bus import ViewEventBus
     from PySide6.QtWidgets import QFileDialog
 
     bus = ViewEventBus()
     w = WaveformDisplay(event_bus=bus)
+    qtbot.addWidget(w)
 
     # prepare data in controller buffer
     sig = "sig_test"
@@ -20,8 +21,9 @@ def test_export_csv_basic(tmp_path):
     # monkeypatch QFileDialog for save path
     QFileDialog.getSaveFileName = lambda *a, **k: (str(out_path), "CSV File (*.csv)")
 
-    # trigger export
-    w.on_export_clicked()
+    # trigger export; the file is written on a worker thread
+    with qtbot.waitSignal(w.export_finished, timeout=5000):
+        w.on_export_clicked()
 
     # read file and assert header
     assert out_path.exists()
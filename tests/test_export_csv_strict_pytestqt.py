@@ -46,7 +46,8 @@ def test_export_csv_and_json_headers_and_rows(qtbot, monkeypatch, tmp_path):
         lambda *a, **k: (str(csv_file), "CSV 文件 (*.csv)"),
     )
 
-    wd.on_export_clicked()
+    with qtbot.waitSignal(wd.export_finished, timeout=5000):
+        wd.on_export_clicked()
 
     assert csv_file.exists(), "CSV file not created"
     with open(csv_file, newline="", encoding="utf-8-sig") as f:
@@ -77,7 +78,8 @@ def test_export_csv_and_json_headers_and_rows(qtbot, monkeypatch, tmp_path):
         lambda *a, **k: (str(json_file), "JSON 文件 (*.json)"),
     )
 
-    wd.on_export_clicked()
+    with qtbot.waitSignal(wd.export_finished, timeout=5000):
+        wd.on_export_clicked()
     assert json_file.exists()
     with open(json_file, encoding="utf-8") as f:
         data = json.load(f)
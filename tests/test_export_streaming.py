@@ -0,0 +1,72 @@
+import csv
+import json
+import threading
+
+from data_buffer import DataBuffer
+from recording.export import ExportCancelled, ExportJob, write_csv, write_json
+
+
+def _filled_buffer(rows=1200, signals=("a", "b", "c")):
+    buf = DataBuffer(max_points=rows)
+    for i in range(rows):
+        buf.add_data_points({sig: i * (n + 1) for n, sig in enumerate(signals)}, i)
+    return buf
+
+
+def test_snapshot_is_isolated_from_later_writes():
+    buf = _filled_buffer(rows=10)
+    snap = buf.snapshot(["a", "missing"])
+    buf.add_data_points({"a": -1}, timestamp=99)
+
+    assert len(snap) == 10
+    assert snap.columns["a"].tolist() == list(range(10))
+    assert snap.columns["missing"].tolist() == [None] * 10
+
+
+def test_chunked_csv_and_json_match_buffer(tmp_path):
+    buf = _filled_buffer()
+    snap = buf.snapshot(["c", "a"])
+    progress = []
+
+    csv_path = tmp_path / "out.csv"
+    write_csv(
+        snap,
+        csv_path,
+        ["c", "a"],
+        ["C", "A"],
+        chunk_rows=500,
+        progress=lambda d, t: progress.append((d, t)),
+    )
+    assert progress == [(500, 1200), (1000, 1200), (1200, 1200)]
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["timestamp", "C", "A"]
+    assert len(rows) == 1201
+    assert rows[-1] == ["1199", str(1199 * 3), "1199"]
+
+    json_path = tmp_path / "out.json"
+    write_json(snap, json_path, ["c", "a"], ["C", "A"], chunk_rows=500)
+    with open(json_path, encoding="utf-8") as f:
+        data = json.load(f)
+    assert len(data) == 1200
+    assert data[7] == {"timestamp": 7, "C": 21, "A": 7}
+
+
+def test_cancel_removes_partial_file(tmp_path):
+    snap = _filled_buffer().snapshot()
+    cancel = threading.Event()
+    cancel.set()
+    path = tmp_path / "cancel.csv"
+    try:
+        write_csv(snap, path, ["a"], ["a"], cancel=cancel)
+    except ExportCancelled:
+        pass
+    else:  # pragma: no cover - defensive
+        raise AssertionError("expected ExportCancelled")
+
+    job = ExportJob(snap, path, ["a"], ["a"], chunk_rows=1)
+    job.cancel()
+    job.start()
+    assert job.wait(5.0)
+    assert job.cancelled and not job.succeeded
+    assert not path.exists()
@@ -0,0 +1,147 @@
+import socket
+import time
+
+import pytest
+
+from controllers.send_scheduler import MultiSendScheduler
+from engine import FleetEngine, SessionConfig, SessionConfigError
+
+
+def _free_udp_ports(count):
+    socks = []
+    try:
+        for _ in range(count):
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            s.bind(("127.0.0.1", 0))
+            socks.append(s)
+        return [s.getsockname()[1] for s in socks]
+    finally:
+        for s in socks:
+            s.close()
+
+
+def _peer():
+    peer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    peer.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    peer.bind(("127.0.0.1", 0))
+    peer.settimeout(0.2)
+    return peer
+
+
+def _drain(peer):
+    frames = []
+    try:
+        while True:
+            frames.append(peer.recv(2048))
+    except socket.timeout:
+        return frames
+
+
+def test_multi_scheduler_keeps_each_period_on_one_thread():
+    sched = MultiSendScheduler().start()
+    sent = {"fast": 0, "slow": 0}
+
+    def sender(name):
+        def send(frame):
+            sent[name] += 1
+
+        return send
+
+    fast = sched.add(5, lambda: b"F", sender("fast"))
+    slow = sched.add(20, lambda: b"S", sender("slow"))
+    time.sleep(0.4)
+    slow.stop()
+    frozen = sent["slow"]
+    time.sleep(0.1)
+    sched.stop()
+
+    assert sent["slow"] == frozen and not slow.running
+    assert 15 <= frozen <= 22
+    assert 85 <= fast.stats()["sent"] + fast.stats()["missed"] <= 102
+    assert fast.stats()["sent"] == sent["fast"]
+    assert set(fast.stats()) >= {"late", "jitter_p99_us", "period_ms"}
+
+
+def test_acu_configs_inherit_top_level_and_keep_routes_separate(tmp_path):
+    config = SessionConfig(
+        period_ms=20,
+        record_dir=str(tmp_path),
+        routes=[{"port": 1, "device": "INV9"}],
+        acus=[{"name": "A"}, {"period_ms": 10, "routes": []}],
+    )
+    a, b = config.acu_configs()
+    assert (a.name, b.name) == ("A", "ACU2")
+    assert (a.period_ms, b.period_ms) == (20, 10)
+    assert a.record_dir.endswith("A") and a.routes == []
+    with pytest.raises(SessionConfigError):
+        SessionConfig(acus=[{"name": "X"}, {"name": "X"}]).validate()
+
+
+def test_fleet_shares_sockets_and_keeps_instances_apart():
+    recv_port, send_port_b = _free_udp_ports(2)
+    peer_a, peer_b, device_b = _peer(), _peer(), _peer()
+    device_a = _peer()
+    config = SessionConfig(
+        acu_ip="127.0.0.1",
+        acu_send_port=0,
+        acu_receive_port=recv_port,
+        target_ip="127.0.0.1",
+        period_ms=5,
+        acus=[
+            {
+                "name": "A",
+                "target_receive_port": peer_a.getsockname()[1],
+                "controls": {"bool_commands": {"8:0": True}},
+            },
+            {
+                "name": "B",
+                "acu_send_port": send_port_b,
+                "target_receive_port": peer_b.getsockname()[1],
+                "routes": [
+                    {
+                        "ip": "127.0.0.1",
+                        "port": device_b.getsockname()[1],
+                        "device": "INV9",
+                        "category": "INV",
+                    }
+                ],
+            },
+        ],
+    )
+    fleet = FleetEngine(config)
+    assert fleet.start()
+    try:
+        for life in range(1, 21):
+            frame = bytearray(64)
+            frame[0:2] = life.to_bytes(2, "big")
+            device_a.sendto(bytes(frame), ("127.0.0.1", recv_port))
+            device_b.sendto(bytes(frame), ("127.0.0.1", recv_port))
+            time.sleep(0.005)
+        time.sleep(0.1)
+    finally:
+        fleet.stop()
+    stats = fleet.stats()
+    frames_a, frames_b = _drain(peer_a), _drain(peer_b)
+    for sock in (peer_a, peer_b, device_a, device_b):
+        sock.close()
+
+    assert stats["send_sockets"] == 2 and fleet.scheduler.stats()["jobs"] == 0
+    # 套接字关闭后最终统计仍保留停止前读到的接收缓冲区与内核丢包
+    assert stats["receive"]["rcvbuf"] and "kernel_drops" in stats["receive"]
+    a, b = fleet.acus["A"], fleet.acus["B"]
+    # 各自的控制状态与生命信号
+    assert frames_a and all(f[8] & 0x01 for f in frames_a)
+    assert frames_b and not any(f[8] & 0x01 for f in frames_b)
+    for frames in (frames_a, frames_b):
+        lives = [int.from_bytes(f[0:2], "big") for f in frames]
+        assert lives == list(range(lives[0], lives[0] + len(lives)))
+    assert stats["acus"]["A"]["send"]["sent"] == len(frames_a)
+    assert stats["acus"]["B"]["send"]["sent"] == len(frames_b)
+    # 接收帧归属来源设备所在的 ACU
+    assert stats["receive"]["frames"] == 40
+    assert list(stats["acus"]["B"]["devices"]) == ["INV9"]
+    assert "INV9" not in stats["acus"]["A"]["devices"]
+    assert stats["acus"]["A"]["receive"]["parsed"] == 20
+    assert stats["acus"]["B"]["receive"]["parsed"] == 20
+    assert b.latest_values.get(("INV9", "设备信息", "生命信号")) == 20
+    assert a.latest_values.get(("INV9", "设备信息", "生命信号")) is None
@@ -0,0 +1,99 @@
+import pytest
+
+from controllers.latency_probe import DEFAULT_RULES, LatencyProbe, ProbeRule
+from tools.latency_benchmark import run
+from tools.load_generator import default_profile
+
+
+def _frame(stop: bool) -> bytes:
+    buf = bytearray(16)
+    if stop:
+        buf[8] |= 0x02
+    return bytes(buf)
+
+
+def _status(working: bool) -> dict:
+    return {"状态信息": {"工作中状态反馈": working, "工作允许反馈": True}}
+
+
+def test_latency_is_measured_per_device_from_command_change():
+    probe = LatencyProbe()
+    probe.on_send(_frame(False), 0.0)
+    probe.on_receive("INV1", _status(True), 0.001)
+    probe.on_receive("INV2", _status(True), 0.001)
+    # unchanged command frames do not start a measurement
+    probe.on_send(_frame(False), 0.010)
+    probe.on_send(_frame(True), 0.020)
+    probe.on_receive("INV1", _status(True), 0.021)
+    probe.on_receive("INV1", _status(False), 0.023)
+    probe.on_receive("INV2", _status(False), 0.025)
+    probe.on_send(_frame(False), 0.100)
+    probe.on_receive("INV1", _status(True), 0.1005)
+
+    stats = probe.stats()[DEFAULT_RULES[0].name]
+    assert stats["INV1"]["count"] == 2
+    assert stats["INV1"]["min_ms"] == pytest.approx(0.5)
+    assert stats["INV1"]["max_ms"] == pytest.approx(3.0)
+    assert stats["INV2"]["count"] == 1
+    assert stats["INV2"]["p50_ms"] == pytest.approx(5.0)
+    assert stats["INV2"]["pending"] is True
+    assert sum(stats["INV1"]["histogram"]) == 2
+
+
+def test_timeouts_superseded_and_device_filter():
+    rule = ProbeRule("stop", 8, 1, "工作中状态反馈", devices=("INV1",), invert=True)
+    probe = LatencyProbe([rule], timeout_s=0.5)
+    probe.on_send(_frame(False), 0.0)
+    probe.on_receive("INV1", _status(True), 0.0)
+    probe.on_receive("CHU3", _status(True), 0.0)
+    probe.on_send(_frame(True), 1.0)
+    probe.on_send(_frame(False), 1.1)
+    probe.on_receive("INV1", _status(True), 2.0)
+
+    stats = probe.stats()["stop"]
+    assert set(stats) == {"INV1"}
+    assert stats["INV1"]["superseded"] == 1
+    assert stats["INV1"]["timeouts"] == 1
+    assert stats["INV1"]["count"] == 0
+    assert "stop" in probe.format_report()
+
+
+def test_stand_in_follows_command_bit():
+    device = default_profile("INV1", 49153, 10.0)
+    device.follows = {"工作中状态反馈": (8, 1, True)}
+    assert device.apply_command(_frame(False)) is True
+    assert device.apply_command(_frame(False)) is False
+    assert device.apply_command(_frame(True)) is True
+    assert device.commanded == {"工作中状态反馈": False}
+
+
+def test_closed_loop_against_stand_in():
+    try:
+        probe = run(
+            ["INV1"],
+            duration=1.0,
+            period_ms=10,
+            toggle_ms=100,
+            rate=20,
+            rule=DEFAULT_RULES[0],
+            acu_receive_port=0,
+        )
+    except (OSError, SystemExit) as exc:
+        pytest.skip(f"loopback sockets unavailable: {exc}")
+    stats = probe.stats()[DEFAULT_RULES[0].name]["INV1"]
+    assert stats["count"] >= 5
+    assert stats["timeouts"] == 0
+
+
+def test_watching_only_while_a_device_owes_feedback():
+    probe = LatencyProbe()
+    assert probe.watching("INV1")
+    probe.on_send(_frame(False), 0.0)
+    probe.on_receive("INV1", _status(True), 0.001)
+    probe.on_receive("DUMMY", {"数据": {"值": 1}}, 0.001)
+    assert not probe.watching("INV1") and not probe.watching("DUMMY")
+    probe.on_send(_frame(True), 0.010)
+    assert probe.watching("INV1") and not probe.watching("DUMMY")
+    probe.on_receive("INV1", _status(False), 0.012)
+    assert not probe.watching("INV1")
+    assert probe.stats()[DEFAULT_RULES[0].name]["INV1"]["count"] == 1
@@ -0,0 +1,65 @@
+import pytest
+
+from controllers.link_monitor import LinkMonitor
+
+
+def _frame(life: int) -> bytes:
+    return life.to_bytes(2, "big") + bytes(62)
+
+
+def test_gaps_duplicates_and_wraparound():
+    mon = LinkMonitor()
+    t = 0.0
+    for life in (65533, 65534, 65535, 0, 2, 2, 1, 3):
+        t += 0.01
+        mon.on_frame("INV1", _frame(life), t)
+    state = mon.devices["INV1"].state
+    link = state.link
+    assert state.life_signal == 3
+    assert state.last_seen_timestamp == pytest.approx(0.08)
+    assert link.frames == 8
+    assert link.lost == 0  # 1 was missing between 0 and 2, then arrived late
+    assert link.duplicates == 1
+    assert link.reordered == 1
+    assert link.loss_ratio == 0
+
+
+def test_late_frame_only_refunds_a_counted_gap():
+    mon = LinkMonitor()
+    for t, life in enumerate((10, 14, 15, 12, 12, 13, 9, 16)):
+        mon.on_frame("INV2", _frame(life), t * 0.01)
+    link = mon.devices["INV2"].state.link
+    # 11..13 missing; 12 and 13 arrive late, the repeated 12 and the
+    # pre-start 9 are not in any counted gap
+    assert link.lost == 1
+    assert link.reordered == 4
+    assert link.missing == 1 << (16 - 11)
+
+
+def test_restart_is_not_counted_as_loss():
+    mon = LinkMonitor(max_gap=100)
+    mon.on_frame("CHU3", _frame(10), 0.0)
+    mon.on_frame("CHU3", _frame(5000), 0.1)
+    mon.on_frame("CHU3", _frame(5001), 0.2)
+    link = mon.devices["CHU3"].state.link
+    assert link.lost == 0 and link.resets == 1
+
+
+def test_rate_and_jitter_estimates():
+    mon = LinkMonitor()
+    t = 0.0
+    for life in range(1, 200):
+        # 10 ms nominal period, alternating +-1 ms
+        t += 0.010 + (0.001 if life % 2 else -0.001)
+        mon.on_frame("BCC1", _frame(life), t)
+    snap = mon.snapshot(now=t + 0.5)["BCC1"]
+    assert snap["rate_hz"] == pytest.approx(100, rel=0.05)
+    assert snap["jitter_ms"] == pytest.approx(1.0, rel=0.2)
+    assert snap["age_s"] == pytest.approx(0.5)
+    assert snap["lost"] == 0
+
+
+def test_short_frames_are_ignored():
+    mon = LinkMonitor()
+    assert mon.on_frame("INV1", b"\x01", 0.0) is None
+    assert mon.devices == {}
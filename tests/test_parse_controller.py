@@ -31,3 +31,80 @@ def test_parse_unknown_device_returns_error():
     parsed = pc.parse(b"\x00" * 16, 40000)
     assert isinstance(parsed, dict)
     assert "错误" in parsed or parsed.get("错误") is not None
+
+
+def test_known_ports_route_from_any_ip_to_prebound_devices():
+    pc = ParseController()
+    route = pc.route(("10.0.0.7", 49153), b"\x00" * 64)
+    assert route.device_id == "INV1"
+    assert route.category == "INV"
+    assert route.state is pc.devices["INV1"].state
+    assert pc.route(("10.0.0.8", 49153)) is route
+    parsed = pc.parse_route(route, b"\x00\x05" + b"\x00" * 62)
+    assert parsed["设备信息"]["生命信号"] == 5
+
+
+def test_unknown_sources_are_discovered_by_frame_length():
+    pc = ParseController()
+    route = pc.route(("10.0.0.9", 50001), b"\x00" * 64)
+    assert route.discovered and route.category == "INV"
+    assert route.device_id == "INV@10.0.0.9:50001"
+    assert pc.route(("10.0.0.9", 50001)) is route
+    assert pc.devices[route.device_id].config.ip == "10.0.0.9"
+
+    dummy = pc.route(("10.0.0.9", 50002), b"\x00" * 16)
+    assert dummy.category == "DUMMY"
+
+    odd = pc.route(("10.0.0.9", 50003), b"\x00" * 7)
+    assert odd.device_id == "UNKNOWN" and odd.protocol is None
+    # negative cache: a later well-sized frame from the same source stays unknown
+    assert pc.route(("10.0.0.9", 50003), b"\x00" * 64) is odd
+    assert "错误" in pc.parse_route(odd, b"\x00" * 7)
+    assert ("10.0.0.9", 50003) not in dict(pc.routes())
+    # ... but only for negative_ttl_s
+    pc.negative_ttl_s = 0.0
+    pc.route(("10.0.0.9", 50005), b"\x00" * 7)
+    assert pc.route(("10.0.0.9", 50005), b"\x00" * 64).category == "INV"
+
+    pc.auto_discover = False
+    assert pc.route(("10.0.0.9", 50004), b"\x00" * 64).device_id == "UNKNOWN"
+
+
+def test_explicit_registration_for_many_devices():
+    pc = ParseController()
+    for i in range(500):
+        pc.register("10.1.0.1", 40000 + i, f"CHU{100 + i}")
+    route = pc.route(("10.1.0.1", 40250))
+    assert route.device_id == "CHU350" and route.category == "CHU"
+    assert pc.route(("10.1.0.2", 40250)).device_id == "UNKNOWN"
+    pc.register("", 40999, "BCC9")
+    assert pc.device_type_from_port(40999) == "BCC9"
+    assert len(pc.routes()) == len(pc._port_map) + 500
+
+
+def _life_frame(life: int) -> bytes:
+    return life.to_bytes(2, "big") + bytes(62)
+
+
+def test_ambiguous_discovery_is_rechecked():
+    pc = ParseController()
+    pc.register("10.0.0.20", 50000, "BCC7")
+    route = pc.route(("10.0.0.20", 50001), _life_frame(5))
+    # INV, CHU and BCC all receive 64-byte frames
+    assert route.category == "INV" and set(route.candidates) >= {"INV", "BCC"}
+    assert pc.route(("10.0.0.20", 50001), _life_frame(9)) is route
+    # first valid life-signal sequence: rebound after the confirmed sibling
+    rebound = pc.route(("10.0.0.20", 50001), _life_frame(10))
+    assert rebound.category == "BCC" and not rebound.candidates
+    assert rebound.device_id == "BCC@10.0.0.20:50001"
+    assert "INV@10.0.0.20:50001" not in pc.devices
+    assert pc.route(("10.0.0.20", 50001), _life_frame(11)) is rebound
+
+    # no hint: the discovery order stands, the route is no longer pending
+    lone = pc.route(("10.0.0.21", 50001), _life_frame(1))
+    assert pc.route(("10.0.0.21", 50001), _life_frame(2)) is lone
+    assert lone.category == "INV" and not lone.candidates
+
+    # a port-map entry takes over discovered routes on that port
+    pc.register("", 50001, "CHU9")
+    assert pc.route(("10.0.0.21", 50001), _life_frame(3)).device_id == "CHU9"
@@ -0,0 +1,186 @@
+import os
+import random
+import time
+
+import numpy as np
+import pytest
+
+from controllers.parse_controller import ParseController
+from controllers.process_parse import ColumnSchema, ProcessParseEngine, build_schemas
+from controllers.shm_ring import ShmRing
+from engine.sampling import extract_receive_value, receive_column
+from signal_manager import SignalManager
+
+
+def test_ring_round_trip_and_full():
+    ring = ShmRing(4, 16)
+    reader = ShmRing(4, 16, ring.name)
+    try:
+        for i in range(4):
+            off = ring.reserve()
+            ring.buf[off] = i
+            ring.commit()
+        assert ring.reserve() is None
+        assert reader.available() == 4
+        assert [reader.buf[reader.peek(k)] for k in range(4)] == [0, 1, 2, 3]
+        reader.release(3)
+        assert ring.reserve() is not None
+        assert reader.available() == 1
+    finally:
+        reader.close()
+        ring.close()
+
+
+@pytest.mark.parametrize("category", ["INV", "CHU", "BCC", "DUMMY"])
+def test_schema_decode_matches_direct_parse(category):
+    proto = ParseController()._protocols[category]
+    schema = ColumnSchema(proto)
+    rng = random.Random(category)
+    frames = [bytes(schema.frame_length), bytes([0xFF]) * schema.frame_length]
+    frames += [
+        bytes(rng.getrandbits(8) for _ in range(schema.frame_length)) for _ in range(50)
+    ]
+    for data in frames:
+        parsed = proto.parse_receive_frame(data)
+        packed = schema.struct.pack(*schema.encode(parsed, data))
+        assert schema.decode(schema.struct.unpack(packed)) == parsed
+
+
+def test_template_schema_carries_fault_bits():
+    schemas = build_schemas(ParseController())
+    assert set(schemas) == {"INV", "CHU", "BCC", "DUMMY"}
+    assert schemas["INV"].fault_bits
+    assert not schemas["DUMMY"].fault_bits
+
+
+def test_engine_parses_in_worker_processes():
+    parser = ParseController()
+    engine = ProcessParseEngine(parser, workers=2, slots=32).start()
+    try:
+        assert engine.wait_ready(60)
+        rng = random.Random(0)
+        routes = [
+            parser.route(("10.0.0.1", port), bytes(64)) for port in (49153, 49161)
+        ]
+        sent = {}
+        records = []
+        for i in range(100):
+            route = routes[i % 2]
+            data = bytes(rng.getrandbits(8) for _ in range(64))
+            while not engine.submit(route, data, float(i), "10.0.0.1:1"):
+                records += engine.drain()
+            sent[float(i)] = (route, data)
+        # 长度不符的帧留给调用方进程内解析
+        assert not engine.submit(routes[0], bytes(10), 0.0)
+        deadline = time.monotonic() + 30
+        while len(records) < len(sent) and time.monotonic() < deadline:
+            records += engine.drain()
+            time.sleep(0.001)
+        assert len(records) == len(sent)
+        for route, parsed, ts, address, length in records:
+            sent_route, data = sent[ts]
+            assert route is sent_route and length == 64
+            assert address == "10.0.0.1:1"
+            assert parsed == parser.parse_route(route, data)
+        # 同一路由的帧保持到达顺序
+        inv = [ts for route, _p, ts, _a, _l in records if route is routes[0]]
+        assert inv == sorted(inv)
+    finally:
+        engine.stop()
+    assert not engine.running
+
+
+@pytest.mark.parametrize("category", ["INV", "CHU", "BCC", "DUMMY"])
+def test_receive_columns_match_extract_receive_value(category):
+    proto = ParseController()._protocols[category]
+    schema = ColumnSchema(proto)
+    rng = random.Random(category)
+    frames = [bytes(schema.frame_length)] + [
+        bytes(rng.getrandbits(8) for _ in range(schema.frame_length)) for _ in range(20)
+    ]
+    parsed = [proto.parse_receive_frame(data) for data in frames]
+    values = np.array(
+        [schema.encode(p, data) for p, data in zip(parsed, frames)], dtype=np.float64
+    )
+    manager = SignalManager()
+    for signal_id in manager.signals:
+        if not signal_id.startswith("recv_"):
+            continue
+        info = manager.get_signal_info(signal_id)
+        column = receive_column(schema, values, info)
+        expected = [extract_receive_value(p, info) for p in parsed]
+        if column is None:
+            assert expected == [None] * len(parsed), signal_id
+        else:
+            assert column.tolist() == expected, signal_id
+
+
+def test_engine_drains_column_blocks():
+    parser = ParseController()
+    engine = ProcessParseEngine(parser, workers=1, slots=64).start()
+    try:
+        assert engine.wait_ready(60)
+        rng = random.Random(1)
+        routes = [
+            parser.route(("10.0.0.1", port), bytes(64)) for port in (49153, 49161)
+        ]
+        sent = {}
+        for i in range(40):
+            data = bytes(rng.getrandbits(8) for _ in range(64))
+            assert engine.submit(routes[i % 2], data, float(i), "10.0.0.1:1")
+            sent[float(i)] = (routes[i % 2], data)
+        blocks = []
+        deadline = time.monotonic() + 30
+        while sum(map(len, blocks)) < len(sent) and time.monotonic() < deadline:
+            blocks += engine.drain_blocks()
+            time.sleep(0.001)
+        assert sum(map(len, blocks)) == len(sent) == engine.drained
+        for block in blocks:
+            assert block.values.shape == (len(block), block.schema.width)
+            for route, rows in block.rows_by_route():
+                assert block.timestamps[rows].tolist() == sorted(
+                    block.timestamps[rows].tolist()
+                )
+                for row in rows.tolist():
+                    got_route, parsed, ts, address, length = block.record(row)
+                    assert got_route is route is sent[ts][0]
+                    assert (address, length) == ("10.0.0.1:1", 64)
+                    assert parsed == parser.parse_route(route, sent[ts][1])
+    finally:
+        engine.stop()
+
+
+def _wakeups(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("voluntary_ctxt_switches:"):
+                return int(line.split()[1])
+    raise AssertionError("no voluntary_ctxt_switches")
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="needs /proc")
+def test_idle_workers_block_instead_of_polling():
+    parser = ParseController()
+    engine = ProcessParseEngine(parser, workers=2, slots=32).start()
+    try:
+        assert engine.wait_ready(60)
+        route = parser.route(("10.0.0.1", 49153), bytes(64))
+        assert engine.submit(route, bytes(64), 0.0)
+        deadline = time.monotonic() + 30
+        while engine.drained == 0 and time.monotonic() < deadline:
+            engine.drain_blocks()
+            time.sleep(0.001)
+        pids = [proc.pid for proc in engine._procs]
+        before = [_wakeups(pid) for pid in pids]
+        time.sleep(0.5)
+        woken = [_wakeups(pid) - start for pid, start in zip(pids, before)]
+        # 轮询 sleep(0.5 ms) 时约 1000 次；阻塞等待只有超时兜底的十来次
+        assert max(woken) < 100
+        # 空闲后提交的帧照常被唤醒处理
+        assert engine.submit(route, bytes(64), 1.0)
+        while engine.drained < 2 and time.monotonic() < deadline:
+            engine.drain_blocks()
+            time.sleep(0.001)
+        assert engine.drained == 2
+    finally:
+        engine.stop()
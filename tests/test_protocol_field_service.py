@@ -27,3 +27,47 @@ def test_receive_meta_contains_inv_run_parameters() -> None:
     )
     labels = [item.label for item in run_section.items]
     assert "输出频率" in labels
+
+
+def _selected_by_lookup(service, prefs, category, section, label) -> bool:
+    # the per-field rule the GUI used before projections were compiled
+    receive = prefs["receive"]
+    selection = "common" if section == "设备信息" else category
+    keys = set(receive.get("common", [])) if selection == "common" else None
+    if selection != "common" and category in receive:
+        keys = set(receive[category])
+    info = service.find_receive_field(selection, section, label)
+    return info is None or keys is None or info.key in keys
+
+
+def test_receive_projection_matches_per_field_selection(tmp_path) -> None:
+    service = ProtocolFieldService(config_path=tmp_path / "acu_config.json")
+    prefs = service.get_active_preferences()
+    receive = prefs["receive"]
+    receive["common"] = receive["common"][1:]
+    receive["INV"] = receive["INV"][::2]
+    receive.pop("BCC")
+
+    projections = service.receive_projections(prefs)
+    assert service.receive_projections(prefs) is projections
+    infos = service.receive_field_infos().values()
+    for category in ("INV", "CHU", "BCC", "DUMMY"):
+        projection = projections.for_category(category)
+        for info in infos:
+            section = info.section
+            expected = _selected_by_lookup(
+                service, prefs, category, section, info.label
+            )
+            assert projection.is_visible(section, info.label) == expected
+        assert projection.is_visible("错误", "值")
+
+    parsed = {
+        "设备信息": {"生命信号": 1, "软件编码": 2},
+        "运行参数": {},
+        "备注": "x",
+    }
+    filtered = projections.for_category("INV").apply(parsed)
+    assert filtered == {"设备信息": {"软件编码": 2}, "备注": "x"}
+
+    receive["common"] = []
+    assert service.receive_projections(prefs) is not projections
@@ -0,0 +1,55 @@
+from gui.main_window import ACUSimulator
+from model.latest_values import LatestValueTable
+
+
+def test_latest_value_table_keeps_only_newest_value():
+    table = LatestValueTable()
+    for life in range(100):
+        table.update_parsed("INV1", {"设备信息": {"生命信号": life}})
+    table.update_parsed("INV1", {"备注": "x"})
+
+    dirty = table.take_dirty()
+    assert dirty == {
+        ("INV1", "设备信息", "生命信号"): 99,
+        ("INV1", "备注", "值"): "x",
+    }
+    assert table.take_dirty() == {}
+
+    # unchanged values are not reported again
+    assert table.update_parsed("INV1", {"设备信息": {"生命信号": 99}}) == 0
+    assert table.take_dirty() == {}
+
+    table.mark_all_dirty()
+    assert len(table.take_dirty()) == 2
+
+
+def test_recv_tree_renders_only_changed_keys(qtbot):
+    win = ACUSimulator(enable_dialogs=False)
+    qtbot.addWidget(win)
+    model = win.recv_tree_model
+
+    table = win.recv_latest_values
+    for life in range(500):
+        table.update_parsed(
+            "DUMMY1", {"设备信息": {"生命信号": life, "示例码": 7}, "备注": "demo"}
+        )
+    win._drain_recv_tree()
+    assert model.value_for(("DUMMY1", "设备信息", "生命信号")) == 499
+    assert model.value_for(("DUMMY1", "设备信息", "示例码")) == 7
+    assert model.rowCount() == 1
+
+    changed = []
+    model.dataChanged.connect(lambda top, _bottom, *_: changed.append(top))
+    table.update_parsed(
+        "DUMMY1", {"设备信息": {"生命信号": 500, "示例码": 7}, "备注": "demo"}
+    )
+    win._drain_recv_tree()
+    assert len(changed) == 1
+    assert model.data(changed[0]) == "500"
+
+    # nothing changed -> no repaint
+    changed.clear()
+    win._drain_recv_tree()
+    assert changed == []
+
+    win.close()
@@ -0,0 +1,153 @@
+import json
+import time
+
+import pytest
+
+from controllers.frame_builder import FrameBuilder
+from controllers.scenario import (
+    ScenarioError,
+    ScenarioPlayer,
+    compile_scenario,
+    load_scenario,
+)
+from controllers.send_scheduler import SendScheduler
+from model.control_state import ControlState
+from model.device import Device, DeviceConfig
+
+
+def _builder(state=None):
+    device = Device(
+        DeviceConfig(
+            name="ACU",
+            ip="127.0.0.1",
+            send_port=40000,
+            receive_port=40001,
+            category="ACU",
+        )
+    )
+    return FrameBuilder(state or ControlState(), device)
+
+
+SPEC = {
+    "name": "ramp",
+    "period_ms": 10,
+    "steps": [
+        {"set": {"bool_commands": {"8:0": True}}},
+        {
+            "ramp": {
+                "field": "freq_controls",
+                "key": 10,
+                "from": 0,
+                "to": 50,
+                "duration": 0.05,
+            }
+        },
+        {"wait": 0.02},
+        {
+            "repeat": 2,
+            "steps": [
+                {"set": {"start_commands": {1: True}}},
+                {"wait": 0.01},
+                {"set": {"start_commands": {1: False}}},
+                {"wait": 0.01},
+            ],
+        },
+    ],
+}
+
+
+def _expected(builder, **fields):
+    state = ControlState(**fields)
+    return bytes(builder.protocol.build_send_frame(state.snapshot(), 0))
+
+
+def test_compiled_frames_match_direct_encoding():
+    builder = _builder()
+    compiled = compile_scenario(SPEC, builder.protocol)
+    # 5 ramp ticks + 2 wait + 2 * 2 repeat ticks + final tick
+    assert compiled.frames == 12
+    assert compiled.period_ms == 10
+    bools = {(8, 0): True}
+    assert compiled.frame_at(0) == _expected(builder, bool_commands=bools)
+    assert compiled.frame_at(3) == _expected(
+        builder, bool_commands=bools, freq_controls={10: 30}
+    )
+    assert compiled.frame_at(7) == _expected(
+        builder,
+        bool_commands=bools,
+        freq_controls={10: 50},
+        start_commands={1: True},
+    )
+    assert compiled.frame_at(8) == compiled.frame_at(6)
+    # unchanged ticks carry no patch, changed ticks only the differing bytes
+    assert compiled.patches[6] == ()
+    assert all(len(data) <= 2 for p in compiled.patches for _, data in p)
+
+
+def test_initial_state_is_copied_not_modified():
+    state = ControlState(freq_controls={12: 40})
+    builder = _builder(state)
+    version = state.version
+    compiled = compile_scenario(
+        {"initial": {"battery_temp": 30}, "steps": [{"wait": 0.3}]},
+        builder.protocol,
+        state,
+        period_ms=100,
+    )
+    assert state.version == version
+    assert compiled.frames == 4
+    assert compiled.base == _expected(builder, freq_controls={12: 40}, battery_temp=30)
+
+
+def test_load_scenario_yaml_and_json(tmp_path):
+    yml = tmp_path / "steps.yaml"
+    yml.write_text(
+        "period_ms: 20\nsteps:\n  - set: {isolation_commands: {0: true}}\n"
+        "  - wait: 0.04\n",
+        encoding="utf-8",
+    )
+    spec = load_scenario(yml)
+    assert spec["name"] == "steps"
+    assert compile_scenario(spec, _builder().protocol).frames == 3
+
+    js = tmp_path / "s.json"
+    js.write_text(json.dumps(SPEC), encoding="utf-8")
+    assert load_scenario(js)["name"] == "ramp"
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [
+        [{"jump": 1}],
+        [{"set": {"unknown": {1: 1}}}],
+        [{"set": {"bool_commands": {8: True}}}],
+        [{"wait": -1}],
+        [{"ramp": {"field": "freq_controls", "key": 10}}],
+    ],
+)
+def test_invalid_steps_raise(steps):
+    with pytest.raises(ScenarioError):
+        compile_scenario({"steps": steps}, _builder().protocol)
+
+
+def test_player_sends_every_frame_in_order_through_scheduler():
+    builder = _builder()
+    compiled = compile_scenario(SPEC, builder.protocol)
+    finished = []
+    player = ScenarioPlayer(compiled, builder.stamp, lambda: finished.append(1))
+    sent = []
+    scheduler = SendScheduler(compiled.period_ms, player, sent.append).start()
+    try:
+        deadline = time.monotonic() + 3
+        while len(sent) < compiled.frames + 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop()
+
+    assert player.finished and finished == [1]
+    for i in range(compiled.frames):
+        # life signal and timestamp are stamped per send; the rest is precompiled
+        assert sent[i][8:] == compiled.frame_at(i)[8:]
+    assert sent[compiled.frames][8:] == sent[compiled.frames - 1][8:]
+    lives = [int.from_bytes(f[0:2], "big") for f in sent[:3]]
+    assert lives[1] != lives[0] and lives[2] != lives[1]
@@ -0,0 +1,57 @@
+import json
+
+from recording.recorder import INDEX_NAME, SegmentRecorder, open_recording
+from waveform_display import WaveformDisplay
+
+
+def test_recorder_rotates_and_indexes_segments(tmp_path):
+    rec = SegmentRecorder(tmp_path, max_segment_bytes=16 * 100, flush_interval=0.01)
+    rec.start()
+    for i in range(250):
+        rec.submit({"a": i}, timestamp=float(i))
+    rec.submit({"a": 250, "b": 1}, timestamp=250.0)
+    rec.stop()
+
+    index = json.loads((rec.run_dir / INDEX_NAME).read_text(encoding="utf-8"))
+    segments = index["segments"]
+    assert all(seg["closed"] for seg in segments)
+    # 16 bytes per row (timestamp + one column) -> at most 100 rows per segment
+    assert all(seg["rows"] <= 100 for seg in segments[:-1])
+    assert sum(seg["rows"] for seg in segments) == 251 == rec.rows_written
+
+    sessions = open_recording(rec.run_dir)
+    assert sessions[0].column("a")[0] == 0
+    # a new signal starts a new segment that carries earlier values forward
+    last = sessions[-1]
+    assert last.signal_ids == ["a", "b"]
+    assert last.column("a")[-1] == 250 and last.column("b")[-1] == 1
+
+
+def test_open_segment_is_readable_before_stop(tmp_path, qtbot):
+    rec = SegmentRecorder(tmp_path, flush_interval=0.01).start()
+    for i in range(20):
+        rec.submit({"a": i}, timestamp=float(i))
+    qtbot.waitUntil(lambda: rec.rows_written == 20, timeout=2000)
+
+    # simulate a killed process: never call stop(), read what is on disk
+    sessions = open_recording(rec.run_dir)
+    assert len(sessions[-1]) == 20
+    rec.stop()
+
+
+def test_waveform_toolbar_recorder_receives_ingested_batches(qtbot, tmp_path):
+    wd = WaveformDisplay()
+    qtbot.addWidget(wd)
+    sig = next(s for s in wd.controller.signal_manager.signals if s.startswith("send_"))
+    wd.controller.select_signal(sig)
+
+    assert wd.start_continuous_recording(tmp_path)
+    assert wd.continuous_btn.isChecked()
+    assert wd.controller.is_recording
+    for i in range(5):
+        wd.controller.add_send_data(bytes(64), timestamp=float(i))
+
+    recorder = wd.recorder
+    wd.stop_continuous_recording()
+    assert recorder.rows_written == 5
+    assert open_recording(recorder.run_dir)[0].signal_ids == [sig]
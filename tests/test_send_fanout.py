@@ -0,0 +1,114 @@
+import socket
+import time
+
+from controllers.communication_controller import CommunicationController
+from controllers.frame_builder import FrameBuilder
+from controllers.send_scheduler import SendScheduler
+from model.control_state import ControlState
+from model.device import Device, DeviceConfig
+from model.send_target import SendTarget
+
+
+def _builder():
+    cs = ControlState()
+    cs.freq_controls[10] = 50
+    dev = Device(DeviceConfig(name="ACU", ip="127.0.0.1", send_port=0))
+    return FrameBuilder(cs, dev), dev
+
+
+def _peers(count):
+    peers = []
+    for _ in range(count):
+        peer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        peer.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        peer.bind(("127.0.0.1", 0))
+        peer.settimeout(0.2)
+        peers.append(peer)
+    return peers
+
+
+def _drain(peer):
+    frames = []
+    try:
+        while True:
+            frames.append(peer.recv(2048))
+    except socket.timeout:
+        return frames
+
+
+def test_build_fanout_shares_base_and_keeps_only_differences():
+    fb, dev = _builder()
+    base = fb.build()
+    targets = [
+        SendTarget("same", "127.0.0.1", 1, {10: bytes(base[10:11])}),
+        SendTarget("diff", "127.0.0.1", 2, {300: b"\x07\x08", 500: b"\x01"}),
+        SendTarget("plain", "127.0.0.1", 3),
+    ]
+    life_before = dev.state.life_signal
+    frame = fb.build_fanout(targets)
+    # one life-signal step per period, however many targets
+    assert dev.state.life_signal == life_before + 1
+    assert frame.patches[0] == () and frame.patches[2] == ()
+    # out-of-range overrides are ignored
+    assert frame.patches[1] == ((300, b"\x07\x08"),)
+    assert frame.frame_for(1)[300:302] == b"\x07\x08"
+    assert frame.frame_for(0) is frame.base
+
+
+def test_send_fanout_delivers_per_target_frames_and_counts():
+    fb, _ = _builder()
+    peers = _peers(3)
+    targets = [
+        SendTarget(f"T{i}", "127.0.0.1", p.getsockname()[1], {300: bytes([i + 1])})
+        for i, p in enumerate(peers)
+    ]
+    targets[0] = SendTarget(targets[0].name, "127.0.0.1", targets[0].port)
+    ctrl = CommunicationController()
+    ctrl.update_config(acu_send_port=0, acu_receive_port=0)
+    ctrl.set_send_targets(targets)
+    assert ctrl.setup() is True
+    try:
+        for _ in range(5):
+            ctrl.send_fanout(fb.build_fanout(ctrl.send_targets))
+        received = [_drain(p) for p in peers]
+    finally:
+        ctrl.stop()
+        for p in peers:
+            p.close()
+
+    assert [len(r) for r in received] == [5, 5, 5]
+    assert {f[300] for f in received[0]} == {0}
+    assert {f[300] for f in received[1]} == {2}
+    assert {f[300] for f in received[2]} == {3}
+    # the patched bytes never leak into the shared base frame
+    assert received[0][0][:300] == received[2][0][:300]
+    assert ctrl.target_stats() == {t.name: {"sent": 5, "errors": 0} for t in targets}
+
+
+def test_ten_targets_at_100hz_from_one_scheduler():
+    fb, _ = _builder()
+    peers = _peers(10)
+    ctrl = CommunicationController()
+    ctrl.update_config(acu_send_port=0, acu_receive_port=0)
+    ctrl.set_send_targets(
+        SendTarget(f"T{i}", "127.0.0.1", p.getsockname()[1], {300: bytes([i])})
+        for i, p in enumerate(peers)
+    )
+    assert ctrl.setup() is True
+    targets = ctrl.send_targets
+    scheduler = SendScheduler(10, lambda: fb.build_fanout(targets), ctrl.send_fanout)
+    try:
+        scheduler.start()
+        time.sleep(0.3)
+        scheduler.stop()
+        counts = [len(_drain(p)) for p in peers]
+    finally:
+        scheduler.stop()
+        ctrl.stop()
+        for p in peers:
+            p.close()
+
+    periods = scheduler.stats()["sent"]
+    assert 20 <= periods <= 32
+    assert counts == [periods] * 10
+    assert all(st["sent"] == periods for st in ctrl.target_stats().values())
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from controllers.send_scheduler import SendScheduler
+
+
+def _collect(period_ms, duration):
+    sent = []
+    scheduler = SendScheduler(
+        period_ms,
+        lambda: b"F",
+        lambda frame: sent.append(time.monotonic()),
+    ).start()
+    time.sleep(duration)
+    scheduler.stop()
+    return scheduler, sent
+
+
+def test_deadlines_do_not_drift():
+    scheduler, sent = _collect(5, 0.5)
+    stats = scheduler.stats()
+    # every period is either sent or explicitly skipped: no accumulated drift
+    assert 95 <= stats["sent"] + stats["missed"] <= 102
+    assert stats["sent"] == len(sent)
+    assert abs((sent[-1] - sent[0]) - (len(sent) - 1 + stats["missed"]) * 0.005) < 0.01
+
+
+def test_stats_and_errors_are_reported():
+    errors = []
+    calls = {"n": 0}
+
+    def build():
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise RuntimeError("boom")
+        return b"F"
+
+    scheduler = SendScheduler(10, build, lambda frame: None)
+    scheduler.on_error = errors.append
+    scheduler.start()
+    time.sleep(0.1)
+    scheduler.stop()
+    stats = scheduler.stats()
+    assert stats["errors"] == 1 and any("boom" in msg for msg in errors)
+    assert stats["sent"] >= 5
+    assert 0 <= stats["jitter_mean_us"] <= stats["jitter_max_us"]
+    assert set(stats) >= {"late", "missed", "jitter_p99_us", "period_ms"}
+
+
+def test_set_period_reanchors_and_stop_restores_switch_interval():
+    import sys
+
+    before = sys.getswitchinterval()
+    on_sent = threading.Event()
+    scheduler = SendScheduler(
+        1000, lambda: b"F", lambda frame: None, on_sent=lambda f, ts: on_sent.set()
+    ).start()
+    assert on_sent.wait(1.0)  # first frame goes out immediately
+    on_sent.clear()
+    scheduler.set_period(10)
+    assert on_sent.wait(0.5)  # no need to wait for the old 1 s deadline
+    assert scheduler.period_ms == 10
+    scheduler.stop()
+    assert not scheduler.running
+    assert sys.getswitchinterval() == before
+
+
+def test_overlapping_schedulers_restore_switch_interval_once():
+    import sys
+
+    from controllers.send_scheduler import MultiSendScheduler
+
+    before = sys.getswitchinterval()
+    first = SendScheduler(10, lambda: b"F", lambda frame: None).start()
+    second = MultiSendScheduler().start()
+    lowered = sys.getswitchinterval()
+    # stopped in start order: the second must not restore the lowered value
+    first.stop()
+    assert sys.getswitchinterval() == lowered
+    second.stop()
+    assert sys.getswitchinterval() == before
+    second.stop()
+    assert sys.getswitchinterval() == before
@@ -0,0 +1,117 @@
+import json
+
+import numpy as np
+import pytest
+
+from data_buffer import DataBuffer
+from recording.session import (
+    HEADER_NAME,
+    SessionBuffer,
+    SessionWriter,
+    open_session,
+    write_session,
+)
+from waveform_display import WaveformDisplay
+
+
+def test_session_roundtrip_is_memory_mapped(tmp_path):
+    buf = DataBuffer(max_points=100)
+    for i in range(100):
+        buf.add_data_points({"recv_a": i * 0.5, "recv_b": i % 2}, timestamp=i)
+    info = {"recv_a": {"name": "A", "type": "analog"}, "recv_b": {"type": "bool"}}
+
+    path = tmp_path / "run.acusession"
+    write_session(path, buf.snapshot(["recv_a", "recv_b"]), ["recv_a", "recv_b"], info)
+
+    header = json.loads((path / HEADER_NAME).read_text(encoding="utf-8"))
+    assert header["rows"] == 100
+    assert [s["dtype"] for s in header["signals"]] == ["f64", "f32"]
+    assert header["signals"][0]["info"]["name"] == "A"
+    assert header["template"]["version"] >= 1
+
+    session = open_session(path / HEADER_NAME)
+    assert isinstance(session.column("recv_a"), np.memmap)
+    assert len(session) == 100
+    assert session.column("recv_a")[-1] == 49.5
+
+    view = SessionBuffer(session, max_points=10)
+    timestamps = view.get_timestamps()
+    assert len(timestamps) <= 11 and timestamps[-1] == 99
+    assert view.get_latest_value("recv_b") == 1.0
+    assert view.get_time_range_data("recv_a", 10, 12) == ([10, 11, 12], [5, 5.5, 6])
+
+
+def test_unclosed_session_reopens_with_written_rows(tmp_path):
+    writer = SessionWriter(tmp_path / "live.acusession", [("s", {})])
+    writer.append([1.0, 2.0, 3.0], {"s": [1, 2, 3]})
+    writer._ts_file.flush()
+    writer._files["s"].flush()
+    # header still says 0 rows, the data files win
+    assert len(open_session(writer.path)) == 3
+    writer.close()
+
+
+def test_waveform_display_opens_session(qtbot, tmp_path):
+    wd = WaveformDisplay()
+    qtbot.addWidget(wd)
+    sig = next(iter(wd.controller.signal_manager.signals))
+    info = wd.controller.signal_manager.get_signal_info(sig)
+
+    path = tmp_path / "view.acusession"
+    with SessionWriter(path, [(sig, info)]) as writer:
+        writer.append(np.arange(50, dtype=float), {sig: np.arange(50) % 2})
+
+    live = wd.controller.data_buffer
+    assert wd.load_session(path)
+    assert wd.is_session_mode
+    assert sig in wd.controller.get_selected_signals()
+    assert wd.controller.get_timestamps()[-1] == 49
+    assert not wd.record_btn.isEnabled()
+
+    wd.close_session()
+    assert wd.controller.data_buffer is live
+    assert wd.record_btn.isEnabled()
+
+
+def test_session_view_keeps_extremes_of_each_bucket(tmp_path):
+    values = np.zeros(10_000)
+    values[5003], values[7001] = 100.0, -50.0
+    values[9000:9010] = np.nan
+    path = tmp_path / "long.acusession"
+    with SessionWriter(path, [("s", {})]) as writer:
+        writer.append(np.arange(10_000) * 0.01, {"s": values})
+
+    view = SessionBuffer(open_session(path), max_points=100)
+    timestamps, data = view.get_timestamps(), view.get_data("s")
+    assert len(timestamps) == len(data) <= 100
+    assert timestamps == sorted(timestamps)
+    assert timestamps[-1] == pytest.approx(99.99)
+    assert max(data) == 100.0 and min(data) == -50.0
+    assert view.get_latest_value("s") == 0.0
+
+    # a narrow window is read at full resolution
+    assert view.set_view(50.0, 50.1) == 11
+    assert view.get_data("s")[3] == 100.0
+
+
+def test_waveform_display_follows_window_and_restores_recording(qtbot, tmp_path):
+    wd = WaveformDisplay()
+    qtbot.addWidget(wd)
+    sig = next(iter(wd.controller.signal_manager.signals))
+    info = wd.controller.signal_manager.get_signal_info(sig)
+    path = tmp_path / "window.acusession"
+    with SessionWriter(path, [(sig, info)]) as writer:
+        writer.append(np.arange(5000, dtype=float), {sig: np.arange(5000) % 7})
+
+    wd.record_btn.setChecked(True)
+    assert wd.load_session(path)
+    assert not wd.controller.is_recording
+    # the default window is the last time range of the session
+    assert wd.controller.get_timestamps()[0] >= 4999 - 600
+
+    wd.waveform_widget.main_plot.setXRange(1000, 1100, padding=0)
+    qtbot.waitUntil(lambda: wd.controller.get_timestamps()[-1] <= 1100, timeout=2000)
+    assert wd.controller.get_timestamps()[0] >= 1000
+
+    wd.close_session()
+    assert wd.record_btn.isChecked() and wd.controller.is_recording
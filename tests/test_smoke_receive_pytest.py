@@ -85,3 +85,81 @@ def test_receive_path_emits_and_threads_stop(qtbot):
     fmt_thread = getattr(win, "format_worker_thread", None)
     assert parse_thread is None or not parse_thread.is_alive()
     assert fmt_thread is None or not fmt_thread.is_alive()
+
+
+def test_receive_path_updates_link_table(qtbot):
+    win = ACUSimulator(comm=DummyComm(), view_bus=ViewEventBus())
+    qtbot.addWidget(win)
+    win.start_communication()
+    try:
+        for life in (1, 2, 5, 5):
+            frame = bytearray(64)
+            frame[0:2] = life.to_bytes(2, "big")
+            win.on_data_received_comm(bytes(frame), ("127.0.0.1", 49153))
+        device = win.link_monitor.devices["INV1"]
+        assert device.state.life_signal == 5
+        assert device.state.last_seen_timestamp is not None
+        win._refresh_link_table()
+        cols = [key for key, _title in win.LINK_COLUMNS]
+        assert win.link_table.rowCount() == 1
+        assert win.link_table.item(0, cols.index("device")).text() == "INV1"
+        assert win.link_table.item(0, cols.index("lost")).text() == "2"
+        assert win.link_table.item(0, cols.index("duplicates")).text() == "1"
+    finally:
+        win.stop_communication()
+
+
+def test_silent_device_goes_offline_and_grays_out(qtbot):
+    from PySide6.QtCore import Qt
+
+    bus = ViewEventBus()
+    win = ACUSimulator(comm=DummyComm(), view_bus=bus)
+    qtbot.addWidget(win)
+    events = []
+    bus.device_online.connect(lambda name, online: events.append((name, online)))
+    win.start_communication()
+    try:
+        win.recv_tree_model.apply_updates({("INV1", "运行参数", "输出频率"): 1.0})
+        win.on_data_received_comm(bytes(64), ("127.0.0.1", 49153))
+        win._poll_device_watchdog()
+        assert events == [("INV1", True)]
+        dev_index = win.recv_tree_model.index(0, 0)
+        assert win.recv_tree_model.data(dev_index, Qt.ForegroundRole) is None
+
+        last = win.link_monitor.devices["INV1"].state.last_seen_timestamp
+        win._apply_device_online(win.device_watchdog.poll(now=last + 10))
+        assert events[1:] == [("INV1", False)]
+        assert win.recv_tree_model.is_device_stale("INV1")
+        field = win.recv_tree_model.index(
+            0, 1, win.recv_tree_model.index(0, 0, dev_index)
+        )
+        assert win.recv_tree_model.data(field, Qt.ForegroundRole) is not None
+    finally:
+        win.stop_communication()
+
+
+def test_process_parse_backend_feeds_latest_values(qtbot):
+    bus = ViewEventBus()
+    win = ACUSimulator(
+        comm=DummyComm(), view_bus=bus, parse_backend="process", parse_workers=1
+    )
+    qtbot.addWidget(win)
+    received = []
+    bus.waveform_receive_blocks.connect(
+        lambda blocks: received.extend(
+            route.device_id for block in blocks for route, _ in block.rows_by_route()
+        )
+    )
+    win.start_communication()
+    try:
+        engine = win.parse_engine
+        assert engine is not None and engine.wait_ready(60)
+        frame = bytearray(64)
+        frame[0:2] = (7).to_bytes(2, "big")
+        win.on_data_received_comm(bytes(frame), ("127.0.0.1", 49153))
+        assert win.parse_queue.empty()
+        qtbot.waitUntil(lambda: "INV1" in received, timeout=10000)
+        assert win.recv_latest_values.get(("INV1", "设备信息", "生命信号")) == 7
+    finally:
+        win.stop_communication()
+    assert win.parse_engine is None
@@ -1,5 +1,6 @@
 import os
 import sys
+import threading
 import pytest
 
 # 保证项目根在路径中（必须在其它本地导入之前）
@@ -84,3 +85,105 @@ def test_periodic_send_emits_and_threads_stop(qtbot, period_ms):
     fmt_thread = getattr(win, "format_worker_thread", None)
     assert parse_thread is None or not parse_thread.is_alive()
     assert fmt_thread is None or not fmt_thread.is_alive()
+
+
+def test_send_scheduler_sends_off_the_ui_thread(qtbot):
+    sent_threads = []
+
+    class RecordingComm(DummyComm):
+        def send(self, data: bytes):
+            sent_threads.append(threading.current_thread())
+
+    comm = RecordingComm()
+    bus = ViewEventBus()
+    win = ACUSimulator(comm=comm, view_bus=bus)
+    qtbot.addWidget(win)
+    forwarded = []
+    bus.waveform_send.connect(lambda frame, ts: forwarded.append(frame))
+
+    win.period_spin.setValue(5)
+    assert win.start_communication() is True
+    try:
+        qtbot.waitUntil(lambda: len(forwarded) >= 20, timeout=3000)
+        scheduler = win.send_scheduler
+        assert scheduler is not None and scheduler.running
+        win.period_spin.setValue(20)
+        assert scheduler.period_ms == 20
+    finally:
+        win.stop_communication()
+
+    assert win.send_scheduler is None
+    assert sent_threads and threading.main_thread() not in sent_threads
+    assert len(forwarded) <= len(sent_threads)
+
+
+def test_send_scheduler_fans_out_when_targets_are_configured(qtbot):
+    from model.send_target import SendTarget
+
+    fanned = []
+
+    class FanoutComm(DummyComm):
+        send_targets = [
+            SendTarget("INV1", "127.0.0.1", 49201, {300: b"\x01"}),
+            SendTarget("INV2", "127.0.0.1", 49202, {300: b"\x02"}),
+        ]
+
+        def send(self, data: bytes):
+            raise AssertionError("single-target send used in fan-out mode")
+
+        def send_fanout(self, frame):
+            fanned.append(frame)
+
+    bus = ViewEventBus()
+    win = ACUSimulator(comm=FanoutComm(), view_bus=bus)
+    qtbot.addWidget(win)
+    forwarded = []
+    bus.waveform_send.connect(lambda frame, ts: forwarded.append(frame))
+    win.period_spin.setValue(10)
+    assert win.start_communication() is True
+    try:
+        qtbot.waitUntil(lambda: len(forwarded) >= 3, timeout=3000)
+    finally:
+        win.stop_communication()
+
+    frame = fanned[0]
+    assert [t.name for t in frame.targets] == ["INV1", "INV2"]
+    assert frame.frame_for(1)[300] == 2
+    assert bytes(forwarded[0]) == frame.base
+
+
+def test_run_scenario_replaces_live_frames_until_stopped(qtbot):
+    sent = []
+
+    class RecordingComm(DummyComm):
+        def send(self, data: bytes):
+            sent.append(bytes(data))
+
+    bus = ViewEventBus()
+    win = ACUSimulator(comm=RecordingComm(), view_bus=bus)
+    qtbot.addWidget(win)
+    assert win.run_scenario({"steps": []}) is False
+
+    win.period_spin.setValue(10)
+    assert win.start_communication() is True
+    try:
+        spec = {
+            "period_ms": 5,
+            "steps": [{"set": {"freq_controls": {10: 50}}}, {"wait": 0.02}],
+        }
+        assert win.run_scenario(spec) is True
+        assert win.sc_scenario_btn.text() == "停止场景"
+        assert win.send_scheduler.period_ms == 5
+        # a finished scenario hands sending back to the live control state
+        qtbot.waitUntil(lambda: win.scenario_player is None, timeout=3000)
+        assert any(frame[10:12] == b"\x01\xf4" for frame in sent)
+        assert win.send_scheduler.period_ms == 10
+        assert win.sc_scenario_btn.text() == "运行场景…"
+
+        spec["steps"][-1] = {"wait": 60}
+        assert win.run_scenario(spec) is True
+        win.sc_scenario_btn.click()
+        assert win.scenario_player is None
+        assert win.send_scheduler.period_ms == 10
+    finally:
+        win.stop_communication()
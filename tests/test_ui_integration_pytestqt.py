@@ -90,3 +90,28 @@ def test_main_window_start_stop(qtbot, monkeypatch):
         pass
 
     win.close()
+
+
+def test_send_field_widgets_update_control_state_incrementally(qtbot):
+    win = ACUSimulator(enable_dialogs=False)
+    qtbot.addWidget(win)
+    cs = win._control_state_model
+    checkbox = win._send_field_widgets["bool_commands:9:0"]
+
+    version = cs.version
+    checkbox.setChecked(True)
+    assert cs.bool_commands.get((9, 0)) is True
+    assert cs.version == version + 1
+    assert win.control_values["bool_commands"] == dict(cs.bool_commands)
+
+    # building frames without any change reuses the cached snapshot/frame
+    win.prepare_send_data()
+    snapshot = cs.snapshot()
+    win.prepare_send_data()
+    assert cs.snapshot() is snapshot
+    assert win.send_data_buffer[9] & 0x01
+
+    checkbox.setChecked(False)
+    assert (9, 0) not in cs.bool_commands
+    win.prepare_send_data()
+    assert not win.send_data_buffer[9] & 0x01
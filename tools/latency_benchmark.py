@@ -0,0 +1,159 @@
+"""Closed-loop command-to-feedback latency against the local device stand-in.
+
+The ACU side (FrameBuilder + SendScheduler + CommunicationController +
+ParseController) toggles a command bit every ``--toggle-ms``; the stand-in
+devices from ``tools/load_generator.py`` follow that bit in a status flag and
+answer immediately.  ``LatencyProbe`` correlates the send-frame change with
+the receive-frame flag change and prints per-device histograms, i.e. the
+latency the simulator itself adds on loopback.
+
+Example::
+
+    python tools/latency_benchmark.py --devices INV1,INV2 --duration 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import socket
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from controllers.async_transport import create_communication_controller  # noqa: E402
+from controllers.frame_builder import FrameBuilder  # noqa: E402
+from controllers.latency_probe import (  # noqa: E402
+    DEFAULT_RULES,
+    LatencyProbe,
+    ProbeRule,
+)
+from controllers.parse_controller import ParseController  # noqa: E402
+from controllers.send_scheduler import SendScheduler  # noqa: E402
+from model.control_state import ControlState  # noqa: E402
+from model.device import Device, DeviceConfig  # noqa: E402
+from tools.load_generator import LoadGenerator, default_profile  # noqa: E402
+
+
+def _free_udp_port(ip: str = "127.0.0.1") -> int:
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.bind((ip, 0))
+        return s.getsockname()[1]
+    finally:
+        s.close()
+
+
+def run(
+    devices,
+    duration: float,
+    period_ms: float,
+    toggle_ms: float,
+    rate: float,
+    rule: ProbeRule,
+    transport: str = "thread",
+    bind_ip: str = "127.0.0.2",
+    acu_receive_port: int = 49156,
+) -> LatencyProbe:
+    """Run one closed-loop session and return the filled probe.
+
+    ``acu_receive_port=0`` picks a free port.
+    """
+    parser = ParseController()
+    ports = {name: port for port, name in parser._port_map.items()}
+    probe = LatencyProbe([rule])
+    perf = time.perf_counter
+
+    state = ControlState()
+    acu = Device(
+        DeviceConfig(
+            name="ACU", ip="127.0.0.1", send_port=0, receive_port=0, category="ACU"
+        )
+    )
+    builder = FrameBuilder(state, acu)
+
+    acu_receive_port = acu_receive_port or _free_udp_port()
+    listen_port = _free_udp_port(bind_ip)
+    comm = create_communication_controller(transport)
+    comm.update_config(
+        acu_send_port=_free_udp_port(),
+        acu_receive_port=acu_receive_port,
+        target_ip=bind_ip,
+        target_receive_port=listen_port,
+    )
+
+    def on_receive(data, addr):
+        ts = perf()
+        data = bytes(data)
+        route = parser.route(addr, data)
+        probe.on_receive(route.device_id, parser.parse_route(route, data), ts)
+
+    comm.on_receive = on_receive
+    if not comm.setup():
+        raise SystemExit("cannot bind ACU sockets")
+    comm.start_receive_loop()
+
+    stand_ins = []
+    for name in devices:
+        device = default_profile(name, ports[name], rate)
+        device.follows = {
+            rule.feedback.rpartition("/")[2]: (rule.byte, rule.bit, rule.invert)
+        }
+        stand_ins.append(device)
+    gen = LoadGenerator(
+        stand_ins, ("127.0.0.1", acu_receive_port), bind_ip, listen_port=listen_port
+    )
+
+    def send(frame):
+        probe.on_send(frame, perf())
+        comm.send(frame)
+
+    scheduler = SendScheduler(period_ms, builder.build, send)
+    gen.start()
+    scheduler.start()
+    try:
+        end = perf() + duration
+        on = False
+        while perf() < end:
+            time.sleep(toggle_ms / 1000.0)
+            on = not on
+            state.set_flag("bool_commands", (rule.byte, rule.bit), on)
+    finally:
+        scheduler.stop()
+        gen.stop()
+        comm.stop()
+    return probe
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--devices", default="INV1,INV2")
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--period-ms", type=float, default=10.0)
+    ap.add_argument("--toggle-ms", type=float, default=100.0)
+    ap.add_argument("--rate", type=float, default=50.0, help="stand-in frames/s")
+    ap.add_argument("--transport", choices=("thread", "asyncio"), default="thread")
+    ap.add_argument("--bind-ip", default="127.0.0.2")
+    ap.add_argument("--acu-receive-port", type=int, default=49156)
+    args = ap.parse_args()
+
+    names = [n.strip() for n in args.devices.split(",") if n.strip()]
+    probe = run(
+        names,
+        args.duration,
+        args.period_ms,
+        args.toggle_ms,
+        args.rate,
+        DEFAULT_RULES[0],
+        transport=args.transport,
+        bind_ip=args.bind_ip,
+        acu_receive_port=args.acu_receive_port,
+    )
+    print(probe.format_report())
+
+
+if __name__ == "__main__":
+    main()
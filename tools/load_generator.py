@@ -0,0 +1,412 @@
+"""Headless device stand-in / UDP load generator.
+
+Encodes INV/CHU/BCC receive frames from ``protocols/templates/acusim.yaml``
+(in reverse) using value generators and sends them over UDP to the
+simulator.  The simulator routes frames by *source* port, so each device
+sends from its own port in ``ParseController._port_map``.
+
+On one host the simulator listens on 0.0.0.0:49156, which is also INV4's
+source port; devices therefore bind to ``--bind-ip`` (127.0.0.2 by default,
+any loopback alias works on Linux) with ``SO_REUSEADDR``.
+
+Example::
+
+    python tools/load_generator.py --rate 2000 --duration 10
+    python tools/load_generator.py --devices INV1,BCC1 --rate INV1=5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import math
+import random
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from controllers.parse_controller import ParseController  # noqa: E402
+from protocols.template_runtime.encoder import (  # noqa: E402
+    ReceiveFrameEncoder,
+    encoder_for_category,
+)
+
+Generator = Callable[[float], float]
+
+
+# ---------------------------------------------------------------------------
+# Value generators: f(t) -> value, t in seconds since start
+# ---------------------------------------------------------------------------
+def sine(center: float, amplitude: float, period: float, phase: float = 0.0):
+    w = 2.0 * math.pi / max(period, 1e-6)
+    return lambda t: center + amplitude * math.sin(w * t + phase)
+
+
+def ramp(lo: float, hi: float, period: float):
+    span = hi - lo
+    period = max(period, 1e-6)
+    return lambda t: lo + span * ((t % period) / period)
+
+
+def random_walk(lo: float, hi: float, step: float, seed: int = 0):
+    rng = random.Random(seed)
+    state = {"value": (lo + hi) / 2.0}
+
+    def _next(_t: float) -> float:
+        value = state["value"] + rng.uniform(-step, step)
+        value = lo if value < lo else hi if value > hi else value
+        state["value"] = value
+        return value
+
+    return _next
+
+
+def toggle(period: float, phase: float = 0.0):
+    half = max(period, 1e-6) / 2.0
+    return lambda t: int((t + phase) / half) % 2 == 1
+
+
+@dataclass
+class DeviceStandIn:
+    """One simulated device: encoder, generators and send statistics."""
+
+    name: str
+    port: int
+    rate: float
+    encoder: ReceiveFrameEncoder
+    values: Dict[str, Generator] = field(default_factory=dict)
+    flags: Dict[str, Callable[[float], bool]] = field(default_factory=dict)
+    faults: Dict[str, Callable[[float], bool]] = field(default_factory=dict)
+    sent: int = 0
+    errors: int = 0
+    late: int = 0
+    life: int = 0
+    sock: Optional[socket.socket] = None
+    # status flag label -> (byte, bit, invert) of the ACU command it follows
+    follows: Dict[str, Tuple[int, int, bool]] = field(default_factory=dict)
+    commanded: Dict[str, bool] = field(default_factory=dict)
+
+    def frame(self, t: float) -> bytearray:
+        self.life = (self.life + 1) & 0xFFFF
+        flags = {label: gen(t) for label, gen in self.flags.items()}
+        flags.update(self.commanded)
+        return self.encoder.encode(
+            life_signal=self.life,
+            values={label: gen(t) for label, gen in self.values.items()},
+            flags=flags,
+            faults=[label for label, gen in self.faults.items() if gen(t)],
+        )
+
+    def apply_command(self, frame: bytes) -> bool:
+        """Update followed flags from an ACU frame; True if any flag changed."""
+        changed = False
+        for label, (byte, bit, invert) in self.follows.items():
+            if byte >= len(frame):
+                continue
+            value = bool((frame[byte] >> bit) & 1) != invert
+            if self.commanded.get(label) != value:
+                self.commanded[label] = value
+                changed = True
+        return changed
+
+
+def default_profile(
+    name: str, port: int, rate: float, seed: int = 0, fault_period: float = 5.0
+) -> DeviceStandIn:
+    """Sine / ramp / random-walk run parameters, toggling flags and faults."""
+    parser = ParseController()
+    category = parser.category_from_device(name)
+    encoder = encoder_for_category(category)
+    device = DeviceStandIn(name=name, port=port, rate=rate, encoder=encoder)
+    rng = random.Random(f"{seed}:{name}")
+    kinds = (sine, ramp, random_walk)
+    for i, label in enumerate(encoder.run_parameters):
+        lo, hi = encoder.value_range(label)
+        lo, hi = (0.0, 100.0) if lo is None else (max(lo, 0.0), min(hi, 1000.0))
+        span = hi - lo
+        kind = kinds[i % len(kinds)]
+        period = rng.uniform(2.0, 10.0)
+        if kind is sine:
+            device.values[label] = sine(lo + span / 2, span / 4, period, rng.random())
+        elif kind is ramp:
+            device.values[label] = ramp(lo + span * 0.1, lo + span * 0.6, period)
+        else:
+            device.values[label] = random_walk(
+                lo + span * 0.2, lo + span * 0.8, span / 200, rng.randrange(1 << 30)
+            )
+    for label in encoder.device_info:
+        device.values[label] = lambda _t, v=rng.randrange(1, 100): v
+    for label in encoder.status_flags:
+        device.flags[label] = toggle(rng.uniform(1.0, 4.0), rng.random())
+    if encoder.faults and fault_period > 0:
+        for label in rng.sample(encoder.faults, min(2, len(encoder.faults))):
+            device.faults[label] = toggle(fault_period, rng.random() * fault_period)
+    return device
+
+
+class LoadGenerator:
+    """Send frames for many devices from one scheduler thread.
+
+    Each device has its own due time computed from the start instant
+    (``start + n / rate``) so rates do not drift; a frame that is more than
+    one period late is still sent, as soon as the thread gets to it, and
+    counted in ``late`` -- the number of frames sent over a run depends only
+    on its duration and rate, not on how busy the machine was.
+    """
+
+    def __init__(
+        self,
+        devices: Sequence[DeviceStandIn],
+        target: tuple,
+        bind_ip: str = "127.0.0.2",
+        listen_port: Optional[int] = None,
+    ) -> None:
+        self.devices = list(devices)
+        self.target = target
+        self.bind_ip = bind_ip
+        # ACU frames arrive on (bind_ip, listen_port); devices with
+        # ``follows`` reply immediately when a followed command bit changes
+        self.listen_port = listen_port
+        self.commands = 0
+        self.replies = 0
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listen_sock: Optional[socket.socket] = None
+        self._listen_thread: Optional[threading.Thread] = None
+        self._send_lock = threading.Lock()
+
+    def open(self) -> None:
+        for device in self.devices:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.bind_ip, device.port))
+            device.sock = sock
+        if self.listen_port is not None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.bind_ip, self.listen_port))
+            sock.settimeout(0.2)
+            self._listen_sock = sock
+            self._listen_thread = threading.Thread(target=self._listen, daemon=True)
+            self._listen_thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._listen_thread is not None:
+            self._listen_thread.join(timeout=2.0)
+            self._listen_thread = None
+        if self._listen_sock is not None:
+            self._listen_sock.close()
+            self._listen_sock = None
+        for device in self.devices:
+            if device.sock is not None:
+                device.sock.close()
+                device.sock = None
+
+    def start(self) -> "LoadGenerator":
+        if self._thread is None:
+            self.open()
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.close()
+
+    def _send(self, device: DeviceStandIn, t: float) -> None:
+        with self._send_lock:
+            try:
+                device.sock.sendto(device.frame(t), self.target)
+                device.sent += 1
+            except OSError:
+                device.errors += 1
+
+    def _listen(self) -> None:
+        followers = [d for d in self.devices if d.follows]
+        sock = self._listen_sock
+        while not self._stop.is_set():
+            try:
+                frame, _addr = sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.commands += 1
+            t = time.perf_counter() - self.started_at
+            for device in followers:
+                if device.apply_command(frame):
+                    self._send(device, t)
+                    self.replies += 1
+
+    def run(self, duration: Optional[float] = None) -> None:
+        perf = time.perf_counter
+        self.started_at = start = perf()
+        end = None if duration is None else start + duration
+        heap = [(start, i, 0) for i in range(len(self.devices))]
+        heapq.heapify(heap)
+        while heap and not self._stop.is_set():
+            due, i, n = heapq.heappop(heap)
+            if end is not None and due >= end:
+                break
+            now = perf()
+            if due > now:
+                wait = due - now
+                if wait > 0.002:
+                    if self._stop.wait(wait - 0.001):
+                        break
+                while perf() < due:
+                    pass
+            device = self.devices[i]
+            period = 1.0 / device.rate
+            if perf() - due > period:
+                device.late += 1
+            self._send(device, due - start)
+            heapq.heappush(heap, (start + (n + 1) * period, i, n + 1))
+        self.stopped_at = perf()
+
+    def report(self) -> List[Dict[str, float]]:
+        elapsed = max((self.stopped_at or time.perf_counter()) - self.started_at, 1e-9)
+        return [
+            {
+                "device": d.name,
+                "target_rate": d.rate,
+                "sent": d.sent,
+                "rate": d.sent / elapsed,
+                "late": d.late,
+                "errors": d.errors,
+            }
+            for d in self.devices
+        ]
+
+
+def _parse_rates(items: Sequence[str], names: Sequence[str]) -> Dict[str, float]:
+    rates: Dict[str, float] = {}
+    default = 100.0
+    for item in items:
+        if "=" in item:
+            name, value = item.split("=", 1)
+            rates[name.strip()] = float(value)
+        else:
+            default = float(item)
+    return {name: rates.get(name, default) for name in names}
+
+
+def _parse_follows(items: Sequence[str]) -> Dict[str, Tuple[int, int, bool]]:
+    """``LABEL=BYTE:BIT[:invert]`` -> {label: (byte, bit, invert)}."""
+    follows: Dict[str, Tuple[int, int, bool]] = {}
+    for item in items:
+        label, _, spec = item.partition("=")
+        parts = spec.split(":")
+        if not label or len(parts) not in (2, 3):
+            raise ValueError(f"bad --follow {item!r}, expected LABEL=BYTE:BIT[:invert]")
+        invert = len(parts) == 3 and parts[2].strip().lower() in ("invert", "1", "inv")
+        follows[label.strip()] = (int(parts[0]), int(parts[1]), invert)
+    return follows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Template-driven device load generator."
+    )
+    parser.add_argument(
+        "--devices",
+        default="",
+        help="Comma-separated device names (default: all INV/CHU/BCC devices).",
+    )
+    parser.add_argument(
+        "--rate",
+        action="append",
+        default=[],
+        help="Frames/s for every device, or NAME=RATE for one device (repeatable).",
+    )
+    parser.add_argument("--target-ip", default="127.0.0.1")
+    parser.add_argument("--target-port", type=int, default=49156)
+    parser.add_argument("--bind-ip", default="127.0.0.2")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--fault-period", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--listen-port",
+        type=int,
+        default=None,
+        help="Receive ACU frames on BIND_IP:PORT so devices can follow commands.",
+    )
+    parser.add_argument(
+        "--follow",
+        action="append",
+        default=[],
+        help="Status flag driven by an ACU command bit: LABEL=BYTE:BIT[:invert] "
+        "(repeatable, needs --listen-port).",
+    )
+    args = parser.parse_args()
+    try:
+        follows = _parse_follows(args.follow)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    port_map = {
+        name: port
+        for port, name in ParseController()._port_map.items()
+        if not name.startswith("DUMMY")
+    }
+    names = [n.strip() for n in args.devices.split(",") if n.strip()] or list(port_map)
+    unknown = [n for n in names if n not in port_map]
+    if unknown:
+        parser.error(f"unknown devices: {', '.join(unknown)}")
+    rates = _parse_rates(args.rate, names)
+    devices = [
+        default_profile(n, port_map[n], rates[n], args.seed, args.fault_period)
+        for n in names
+    ]
+    for device in devices:
+        device.follows = {
+            label: spec
+            for label, spec in follows.items()
+            if label in device.encoder.status_flags
+        }
+
+    gen = LoadGenerator(
+        devices,
+        (args.target_ip, args.target_port),
+        args.bind_ip,
+        listen_port=args.listen_port,
+    )
+    try:
+        gen.open()
+    except OSError as exc:
+        parser.error(f"cannot bind device ports on {args.bind_ip}: {exc}")
+    try:
+        gen.run(duration=args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gen.close()
+
+    total = 0
+    for row in gen.report():
+        total += row["sent"]
+        print(
+            f"{row['device']:>6}: sent {row['sent']:>8} "
+            f"({row['rate']:8.1f}/s of {row['target_rate']:.0f}/s) "
+            f"late {row['late']} errors {row['errors']}"
+        )
+    elapsed = max(gen.stopped_at - gen.started_at, 1e-9)
+    print(f" total: {total} frames in {elapsed:.2f}s ({total / elapsed:.1f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Compare in-process parsing with the shared-memory parse process pool.
+
+Frames are encoded up front with the load generator's device stand-ins, so
+only routing + parsing is timed.  The in-process baseline runs
+``ParseController.parse_route`` on the calling thread; each pool run pushes
+the same frames through ``ProcessParseEngine`` (raw frame ring in, columnar
+result ring out) and stops the clock once every frame has been decoded back
+into a parse dictionary.
+
+Example::
+
+    python tools/parse_pool_benchmark.py --frames 50000 --workers 1,2,4
+
+Scaling is bounded by the number of CPU cores: on a single-core host the
+workers share one core with the producer and the pool cannot beat the
+baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from controllers.parse_controller import ParseController  # noqa: E402
+from controllers.process_parse import ProcessParseEngine  # noqa: E402
+from tools.load_generator import default_profile  # noqa: E402
+
+DEFAULT_DEVICES = ("INV1", "INV2", "INV3", "CHU3", "BCC1", "BCC2")
+
+
+def encode_frames(
+    devices: Sequence[str], frames: int, seed: int = 0
+) -> List[Tuple[Tuple[str, int], bytes]]:
+    """``frames`` receive frames round-robin over ``devices``, 1 ms apart."""
+    parser = ParseController()
+    port_of = {name: port for port, name in parser._port_map.items()}
+    stand_ins = [
+        default_profile(name, port_of[name], 1000.0, seed=seed) for name in devices
+    ]
+    out = []
+    for i in range(frames):
+        dev = stand_ins[i % len(stand_ins)]
+        out.append((("10.2.0.5", dev.port), bytes(dev.frame(i / 1000.0))))
+    return out
+
+
+def run_inline(frames: List[Tuple[Tuple[str, int], bytes]]) -> Dict[str, float]:
+    parser = ParseController()
+    started = time.perf_counter()
+    for addr, data in frames:
+        parser.parse_route(parser.route(addr, data), data)
+    elapsed = time.perf_counter() - started
+    return {"frames": len(frames), "elapsed": elapsed, "fps": len(frames) / elapsed}
+
+
+def run_pool(
+    frames: List[Tuple[Tuple[str, int], bytes]], workers: int, slots: int = 4096
+) -> Dict[str, float]:
+    parser = ParseController()
+    engine = ProcessParseEngine(parser, workers=workers, slots=slots).start()
+    try:
+        if not engine.wait_ready():
+            raise RuntimeError("parse workers did not start")
+        done = 0
+        started = time.perf_counter()
+        for addr, data in frames:
+            route = parser.route(addr, data)
+            while not engine.submit(route, data, 0.0):
+                done += len(engine.drain())
+        while done < len(frames):
+            got = len(engine.drain())
+            if not got:
+                time.sleep(0.0002)
+            done += got
+        elapsed = time.perf_counter() - started
+    finally:
+        engine.stop()
+    return {
+        "frames": len(frames),
+        "elapsed": elapsed,
+        "fps": len(frames) / elapsed,
+        "workers": workers,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parse process pool benchmark.")
+    parser.add_argument("--frames", type=int, default=50000)
+    parser.add_argument(
+        "--workers",
+        default="1,2,4",
+        help="Comma separated worker counts to measure (default: 1,2,4).",
+    )
+    parser.add_argument("--devices", default=",".join(DEFAULT_DEVICES))
+    parser.add_argument("--slots", type=int, default=4096)
+    args = parser.parse_args()
+
+    devices = [d.strip() for d in args.devices.split(",") if d.strip()]
+    frames = encode_frames(devices, args.frames)
+    print(f"{len(frames)} frames over {len(devices)} devices, {os.cpu_count()} CPUs")
+    base = run_inline(frames)
+    print(f"in-process      {base['fps']:>10.0f} frames/s")
+    for count in (int(w) for w in args.workers.split(",") if w.strip()):
+        stats = run_pool(frames, count, args.slots)
+        print(
+            f"{count} worker(s)     {stats['fps']:>10.0f} frames/s "
+            f"({stats['fps'] / base['fps']:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
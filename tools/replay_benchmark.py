@@ -0,0 +1,144 @@
+"""Replay a UDP capture as fast as possible and report pipeline throughput.
+
+Without ``--gui`` the capture goes through parse -> latest-value table only.
+With ``--gui`` it is fed to an offscreen ``ACUSimulator`` through the same
+``on_receive`` callback the socket thread uses, and the run finishes once the
+parse queue is drained and the receive tree / waveform have rendered.
+
+A capture can be recorded with ``CommunicationController.start_capture`` or
+synthesized with ``--synthesize N``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from controllers.parse_controller import ParseController  # noqa: E402
+from controllers.replay_controller import ReplayController  # noqa: E402
+from model.latest_values import LatestValueTable  # noqa: E402
+from recording.capture import DIR_RX, CaptureWriter  # noqa: E402
+
+
+def synthesize_capture(path: Path, frames: int, seed: int = 0) -> None:
+    """Write ``frames`` random receive frames spread over all known devices."""
+    parser = ParseController()
+    rng = random.Random(seed)
+    ports = []
+    for port in sorted(parser._port_map):
+        category = parser.category_from_device(parser.device_type_from_port(port))
+        proto = parser._protocols.get(category)
+        length = getattr(proto, "frame_length_receive", None) or 64
+        ports.append((port, int(length)))
+    writer = CaptureWriter(path)
+    try:
+        ts = time.monotonic()
+        for i in range(frames):
+            port, length = ports[i % len(ports)]
+            payload = bytes(rng.getrandbits(8) for _ in range(length))
+            writer.write(DIR_RX, ("10.2.0.5", port), payload, timestamp=ts)
+            ts += 0.001
+    finally:
+        writer.close()
+
+
+def run_headless(path: Path) -> dict:
+    parser = ParseController()
+    table = LatestValueTable()
+
+    def _on_receive(data: bytes, addr: tuple) -> None:
+        route = parser.route(addr, data)
+        table.update_parsed(route.device_id, parser.parse_route(route, data))
+
+    replay = ReplayController(path, speed=0)
+    replay.on_receive = _on_receive
+    return replay.run()
+
+
+def run_gui(path: Path) -> dict:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+
+    from gui.main_window import ACUSimulator
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    win = ACUSimulator(enable_dialogs=False)
+    win._start_workers()
+    waveform = win.waveform_display
+    for sid in waveform.controller.signal_manager.signals:
+        if sid.startswith("recv_"):
+            waveform.controller.select_signal(sid)
+    waveform.controller.start_recording()
+
+    # Feed from the GUI thread and pump the event loop periodically so that
+    # queued signals are delivered while the capture is replayed.
+    frames = 0
+
+    def _on_receive(data: bytes, addr: tuple) -> None:
+        nonlocal frames
+        win.on_data_received_comm(data, addr)
+        frames += 1
+        if frames % 256 == 0:
+            app.processEvents()
+
+    replay = ReplayController(path, speed=0)
+    replay.on_receive = _on_receive
+    started = time.perf_counter()
+    replay.run()
+    while not win.parse_queue.empty():
+        app.processEvents()
+        time.sleep(0.005)
+    app.processEvents()
+    win._drain_recv_tree()
+    waveform.waveform_widget.last_plt_update = 0
+    waveform.on_data_updated()
+    app.processEvents()
+    stats = replay.stats()
+    stats["end_to_end"] = time.perf_counter() - started
+    win.close()
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay-as-fast-as-possible benchmark."
+    )
+    parser.add_argument("capture", nargs="?", help="Capture file to replay.")
+    parser.add_argument(
+        "--synthesize",
+        type=int,
+        metavar="N",
+        help="Generate a capture with N random receive frames first.",
+    )
+    parser.add_argument(
+        "--gui", action="store_true", help="Drive the offscreen main window too."
+    )
+    args = parser.parse_args()
+
+    if args.capture:
+        path = Path(args.capture)
+    else:
+        path = Path(tempfile.gettempdir()) / "acusim_benchmark.acucap"
+    if args.synthesize or not path.exists():
+        synthesize_capture(path, args.synthesize or 20000)
+
+    stats = run_gui(path) if args.gui else run_headless(path)
+    print(
+        f"{stats['frames']} frames in {stats['elapsed']:.3f}s "
+        f"({stats['fps']:.0f} frames/s)"
+    )
+    if "end_to_end" in stats:
+        print(f"parse -> buffer -> render drained after {stats['end_to_end']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
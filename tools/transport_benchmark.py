@@ -0,0 +1,155 @@
+"""Compare the thread and asyncio UDP transports on loopback.
+
+For each transport the benchmark measures:
+
+* receive: ``--frames`` datagrams blasted at the receive port(s); frames
+  delivered to ``on_receive`` and the time until the last one arrived;
+* send: ``--frames`` calls to ``send``; frames seen by a peer socket;
+* stop: wall time of ``stop()`` with the receive loop running.
+
+Example::
+
+    python tools/transport_benchmark.py --frames 50000 --ports 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from controllers.async_transport import create_communication_controller  # noqa: E402
+
+TRANSPORTS = ("thread", "asyncio")
+
+
+def _free_udp_ports(count: int) -> List[int]:
+    socks = []
+    try:
+        for _ in range(count):
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            s.bind(("127.0.0.1", 0))
+            socks.append(s)
+        return [s.getsockname()[1] for s in socks]
+    finally:
+        for s in socks:
+            s.close()
+
+
+def _drain_peer(peer: socket.socket, expected: int, timeout: float) -> int:
+    seen = 0
+    peer.settimeout(timeout)
+    try:
+        while seen < expected:
+            peer.recv(2048)
+            seen += 1
+    except socket.timeout:
+        pass
+    return seen
+
+
+def run_transport(
+    name: str, frames: int, ports: int, size: int, rcvbuf: int
+) -> Dict[str, float]:
+    send_port, *recv_ports = _free_udp_ports(ports + 1)
+    peer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    peer.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    peer.bind(("127.0.0.1", 0))
+    ctrl = create_communication_controller(name)
+    ctrl.update_config(
+        acu_send_port=send_port,
+        acu_receive_port=recv_ports[0],
+        extra_receive_ports=recv_ports[1:],
+        target_ip="127.0.0.1",
+        target_receive_port=peer.getsockname()[1],
+        recv_buffer_bytes=rcvbuf,
+    )
+    received = 0
+    last_at = 0.0
+    done = threading.Event()
+
+    def on_receive(_data, _addr) -> None:
+        nonlocal received, last_at
+        received += 1
+        if received == frames:
+            last_at = time.perf_counter()
+            done.set()
+
+    ctrl.on_receive = on_receive
+    if not ctrl.setup():
+        raise SystemExit(f"{name}: setup failed")
+    ctrl.start_receive_loop()
+    payload = bytes(size)
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        started = time.perf_counter()
+        for i in range(frames):
+            client.sendto(payload, ("127.0.0.1", recv_ports[i % ports]))
+        done.wait(timeout=5.0)
+        rx_elapsed = (last_at or time.perf_counter()) - started
+        rx_stats = ctrl.receive_stats()
+
+        # the peer is drained concurrently so its own buffer does not drop
+        tx_result: Dict[str, float] = {}
+
+        def _reader() -> None:
+            tx_result["delivered"] = _drain_peer(peer, frames, 0.5)
+            tx_result["at"] = time.perf_counter()
+
+        reader = threading.Thread(target=_reader, daemon=True)
+        reader.start()
+        started = time.perf_counter()
+        for _ in range(frames):
+            ctrl.send(payload)
+        reader.join()
+        delivered = tx_result["delivered"]
+        tx_elapsed = tx_result["at"] - started
+        if delivered < frames:
+            tx_elapsed -= 0.5  # the idle timeout that ended the drain
+
+        started = time.perf_counter()
+        ctrl.stop()
+        stop_elapsed = time.perf_counter() - started
+    finally:
+        client.close()
+        peer.close()
+        ctrl.stop()
+    return {
+        "received": received,
+        "rx_fps": received / max(rx_elapsed, 1e-9),
+        "kernel_drops": rx_stats["kernel_drops"],
+        "sent": delivered,
+        "tx_fps": delivered / max(tx_elapsed, 1e-9),
+        "stop_ms": stop_elapsed * 1000.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Thread vs asyncio UDP transport.")
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--ports", type=int, default=1)
+    parser.add_argument("--size", type=int, default=64)
+    parser.add_argument("--rcvbuf", type=int, default=8 << 20)
+    parser.add_argument("--transport", choices=TRANSPORTS, action="append")
+    args = parser.parse_args()
+
+    for name in args.transport or TRANSPORTS:
+        r = run_transport(name, args.frames, max(args.ports, 1), args.size, args.rcvbuf)
+        print(
+            f"{name:>8}: rx {r['received']:>7}/{args.frames} "
+            f"({r['rx_fps']:9.0f}/s, kernel drops {r['kernel_drops']}) | "
+            f"tx {r['sent']:>7} ({r['tx_fps']:9.0f}/s) | "
+            f"stop {r['stop_ms']:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
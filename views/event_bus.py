@@ -7,7 +7,9 @@ class ViewEventBus(QObject):
 
     waveform_send = Signal(object, float)  # data_buffer, timestamp
     waveform_receive = Signal(object, str, float)  # parsed_data, device_type, timestamp
+    waveform_receive_blocks = Signal(object)  # [ColumnBlock]，解析进程池的列式结果
     recording_toggle = Signal(bool)  # True=开始，False=停止
+    device_online = Signal(str, bool)  # device_type, True=上线 False=离线
 
     def __init__(self):
         super().__init__()
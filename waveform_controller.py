@@ -3,10 +3,13 @@ from __future__ import annotations
 # waveform_controller.py
 import time
 import logging
+
+import numpy as np
 from PySide6.QtCore import QObject
 from PySide6.QtCore import QTimer
 from PySide6.QtCore import Signal
 from data_buffer import DataBuffer
+from engine.sampling import extract_receive_value, extract_send_value, receive_column
 from signal_manager import SignalManager
 
 # 创建日志记录器
@@ -26,6 +29,8 @@ class WaveformController(QObject):
         self.selected_signals = set()
         self.is_recording = False
         self.start_time = time.time()
+        # 每批写入缓冲区的样本都会转发给这些监听者（如持续录制）
+        self._sample_listeners = []
 
         # 使用单个定时器统一更新
         self.update_timer = QTimer(self)
@@ -51,6 +56,26 @@ class WaveformController(QObject):
         self.is_recording = False
         logger.info("波形记录已停止")
 
+    def add_sample_listener(self, callback):
+        """注册样本监听者：callback(signal_values, timestamp)"""
+        if callback not in self._sample_listeners:
+            self._sample_listeners.append(callback)
+
+    def remove_sample_listener(self, callback):
+        """移除样本监听者"""
+        try:
+            self._sample_listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def _ingest(self, signal_values, timestamp):
+        self.data_buffer.add_data_points(signal_values, timestamp)
+        for callback in list(self._sample_listeners):
+            try:
+                callback(signal_values, timestamp)
+            except Exception:
+                logger.exception("样本监听者处理失败")
+
     def shutdown(self):
         """Stop internal timers to avoid killTimer warnings during teardown."""
         try:
@@ -103,7 +128,7 @@ class WaveformController(QObject):
                 "准备批量添加信号值: %s...",
                 [(k, v) for k, v in list(signal_values.items())[:3]],
             )
-            self.data_buffer.add_data_points(signal_values, timestamp)
+            self._ingest(signal_values, timestamp)
         else:
             logger.debug("无有效信号值可添加")
 
@@ -129,150 +154,59 @@ class WaveformController(QObject):
 
         # 一次性添加所有数据
         if signal_values:
-            self.data_buffer.add_data_points(signal_values, timestamp)
+            self._ingest(signal_values, timestamp)
+
+    def add_receive_blocks(self, blocks):
+        """添加解析进程池的列式结果（`ColumnBlock` 列表），每帧一个样本
+
+        按选中信号整列提取，不还原逐帧的解析字典；样本按到达时间排序。
+        """
+        if not self.is_recording or not blocks:
+            return
+
+        infos = []
+        for signal_id in self.selected_signals:
+            if signal_id.startswith("recv_"):
+                signal_info = self.signal_manager.get_signal_info(signal_id)
+                if signal_info:
+                    infos.append((signal_id, signal_info))
+        if not infos:
+            return
+
+        parts = []
+        for block in blocks:
+            columns = []
+            for signal_id, signal_info in infos:
+                column = receive_column(block.schema, block.values, signal_info)
+                if column is not None:
+                    columns.append((signal_id, column.tolist()))
+            if columns:
+                parts.append((block.timestamps, columns))
+        if not parts:
+            return
+
+        timestamps = np.concatenate([ts for ts, _columns in parts])
+        owners = np.concatenate(
+            [np.full(len(ts), k) for k, (ts, _columns) in enumerate(parts)]
+        ).tolist()
+        rows = np.concatenate([np.arange(len(ts)) for ts, _columns in parts]).tolist()
+        order = np.argsort(timestamps, kind="stable").tolist()
+        timestamps = timestamps.tolist()
+        for i in order:
+            columns = parts[owners[i]][1]
+            row = rows[i]
+            self._ingest(
+                {signal_id: column[row] for signal_id, column in columns},
+                timestamps[i],
+            )
 
     def _extract_signal_value(self, data_buffer, signal_info):
-        """从发送数据缓冲区提取信号值 - 修复版本"""
-        try:
-            byte_pos = signal_info.get("byte")
-            if byte_pos is None:
-                logger.warning(f"信号 {signal_info.get('name')} 无字节位置")
-                return None
-
-            if signal_info["type"] == "bool":
-                bit_pos = signal_info.get("bit")
-                if bit_pos is not None and byte_pos < len(data_buffer):
-                    value = 1 if (data_buffer[byte_pos] & (1 << bit_pos)) else 0
-                    logger.debug(
-                        "提取布尔信号: %s 字节%d位%d = %s",
-                        signal_info["name"],
-                        byte_pos,
-                        bit_pos,
-                        value,
-                    )
-                    return value
-                else:
-                    logger.warning(f"布尔信号 {signal_info['name']} 位位置无效")
-                    return 0
-
-            elif signal_info["type"] == "analog":
-                if byte_pos + 1 < len(data_buffer):
-                    raw_value = (data_buffer[byte_pos] << 8) | data_buffer[byte_pos + 1]
-
-                    scale = signal_info.get("scale")
-                    if isinstance(scale, (int, float)) and scale not in (0, 1):
-                        value = raw_value * scale
-                        logger.debug(
-                            "提取模拟信号(带比例): %s 原始=%s 比例=%s 结果=%s",
-                            signal_info.get("name"),
-                            raw_value,
-                            scale,
-                            value,
-                        )
-                        return value
-
-                    # 根据信号类型进行转换
-                    if "频率" in signal_info["name"]:
-                        value = raw_value * 0.1
-                        logger.debug(
-                            "提取频率信号: %s 原始=%s 转换后=%s Hz",
-                            signal_info["name"],
-                            raw_value,
-                            value,
-                        )
-                        return value
-                    elif "电压" in signal_info["name"]:
-                        value = raw_value * 0.25
-                        logger.debug(
-                            "提取电压信号: %s 原始=%s 转换后=%s V",
-                            signal_info["name"],
-                            raw_value,
-                            value,
-                        )
-                        return value
-                    elif "温度" in signal_info["name"]:
-                        value = raw_value * 0.1
-                        logger.debug(
-                            "提取温度信号: %s 原始=%s 转换后=%s °C",
-                            signal_info["name"],
-                            raw_value,
-                            value,
-                        )
-                        return value
-                    elif (
-                        "生命信号" in signal_info["name"]
-                        or "软件编码" in signal_info["name"]
-                        or "软件版本" in signal_info["name"]
-                    ):
-                        # 设备信息类信号（生命信号、软件编码、软件版本等）直接使用原始值
-                        logger.debug(
-                            f"提取设备信息信号: {signal_info['name']} = {raw_value}"
-                        )
-                        return raw_value
-                    else:
-                        logger.debug(
-                            f"提取模拟信号: {signal_info['name']} = {raw_value}"
-                        )
-                        return raw_value
-                else:
-                    logger.warning(f"模拟信号 {signal_info['name']} 字节位置超出范围")
-                    return 0
-
-        except Exception as e:
-            logger.error(f"提取信号值错误 {signal_info.get('name')}: {e}")
-            return 0  # 返回默认值而不是None
+        """从发送数据缓冲区提取信号值"""
+        return extract_send_value(data_buffer, signal_info)
 
     def _extract_receive_signal_value(self, parsed_data, signal_info, device_type):
         """从解析数据中提取接收信号值"""
-        try:
-            signal_name = signal_info["name"]
-
-            # 在解析数据中查找对应的值
-            for category, items in parsed_data.items():
-                if isinstance(items, dict):
-                    for key, value in items.items():
-                        if signal_name == key:  # 精确匹配信号名称
-                            # 布尔信号返回 0 或 1
-                            if signal_info["type"] == "bool":
-                                return 1 if value else 0
-                            else:
-                                return (
-                                    float(value)
-                                    if isinstance(value, (int, float))
-                                    else value
-                                )
-
-            # 对于设备信息类模拟信号（APU生命信号、软件编码、软件版本等），从设备信息中提取
-            if (
-                signal_info["type"] == "analog"
-                and signal_info["category"] == "设备信息"
-            ):
-                device_info = parsed_data.get("设备信息", {})
-                # 去掉信号名称中的"APU"前缀来匹配解析数据中的键名
-                clean_signal_name = signal_name.replace("APU", "").strip()
-                if clean_signal_name in device_info:
-                    value = device_info[clean_signal_name]
-                    logger.debug(f"提取设备信息信号: {signal_name} = {value}")
-                    return float(value) if isinstance(value, (int, float)) else value
-
-            # 对于故障类布尔信号，需要特殊处理
-            if signal_info["type"] == "bool" and signal_info["category"] == "故障信息":
-                # 检查是否在故障列表中
-                fault_list = parsed_data.get("故障信息", {}).get("故障列表", [])
-                if (
-                    signal_name in fault_list
-                    or signal_name.replace("BCC", "") in fault_list
-                    or signal_name.replace("模块", "") in fault_list
-                ):
-                    return 1
-                else:
-                    return 0
-
-        except (KeyError, ValueError, TypeError) as e:
-            logger.error(f"提取接收信号错误: {e}")
-            pass
-
-        return None
+        return extract_receive_value(parsed_data, signal_info, device_type)
 
     def select_signal(self, signal_id):
         """选择要显示的信号"""
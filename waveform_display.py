@@ -14,11 +14,22 @@ from PySide6.QtWidgets import (
     QCheckBox,
     QMessageBox,
     QFileDialog,
+    QProgressDialog,
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer, Signal
 from waveform_controller import WaveformController
 from signal_manager import SignalManager
 from waveform_plot import WaveformPlotWidget
+from recording.export import ExportJob
+from recording.recorder import SegmentRecorder
+from recording.session import (
+    SESSION_SUFFIX,
+    RecordedSession,
+    SessionBuffer,
+    SessionFormatError,
+    open_session,
+)
+from infra.app_paths import resource_path
 from infra.settings_store import (
     WaveformSettings,
     load_waveform_settings,
@@ -33,6 +44,9 @@ logger = logging.getLogger("WaveformDisplay")
 class WaveformDisplay(QWidget):
     """波形显示主界面"""
 
+    # (path, ok) — 后台导出结束（成功、取消或失败）时发出
+    export_finished = Signal(str, bool)
+
     def __init__(
         self,
         parent=None,
@@ -48,6 +62,24 @@ class WaveformDisplay(QWidget):
         self._field_preferences = field_preferences or {}
         self._populating_tree = False
         self._settings_dialog_cls = None
+        self._export_job: Optional[ExportJob] = None
+        self._export_progress: Optional[QProgressDialog] = None
+        self._export_timer = QTimer(self)
+        self._export_timer.setInterval(50)
+        self._export_timer.timeout.connect(self._poll_export)
+        # 会话回放模式：打开录制会话时替换控制器的实时缓冲区
+        self._session: Optional[RecordedSession] = None
+        self._live_buffer = None
+        # 打开会话前的记录/暂停状态，关闭会话时恢复
+        self._recording_before_session = (False, False)
+        # 平移/缩放结束后再按新窗口重新读取会话视图
+        self._session_view_timer = QTimer(self)
+        self._session_view_timer.setSingleShot(True)
+        self._session_view_timer.setInterval(100)
+        self._session_view_timer.timeout.connect(self._on_session_window_changed)
+        # 持续录制（分段写盘）
+        self._recorder: Optional[SegmentRecorder] = None
+        self._recording_dir = ""
         self.init_ui()
         self.setup_connections()
         if field_service is not None:
@@ -104,7 +136,8 @@ class WaveformDisplay(QWidget):
         """Bind or replace the ViewEventBus used to dispatch UI-level events.
 
         The ViewEventBus has signals: `waveform_send`, `waveform_receive`,
-        and `recording_toggle`. When a new event_bus is provided we connect
+        `waveform_receive_blocks` and `recording_toggle`. When a new
+        event_bus is provided we connect
         those signals to local handlers; if `None` is given we simply clear
         the reference.
         """
@@ -125,6 +158,12 @@ class WaveformDisplay(QWidget):
                     )
                 except Exception:
                     pass
+                try:
+                    self.event_bus.waveform_receive_blocks.disconnect(
+                        self._on_bus_waveform_receive_blocks
+                    )
+                except Exception:
+                    pass
                 try:
                     self.event_bus.recording_toggle.disconnect(
                         self._on_bus_recording_toggle
@@ -146,6 +185,12 @@ class WaveformDisplay(QWidget):
             self.event_bus.waveform_receive.connect(self._on_bus_waveform_receive)
         except Exception:
             pass
+        try:
+            self.event_bus.waveform_receive_blocks.connect(
+                self._on_bus_waveform_receive_blocks
+            )
+        except Exception:
+            pass
         try:
             self.event_bus.recording_toggle.connect(self._on_bus_recording_toggle)
         except Exception:
@@ -157,6 +202,9 @@ class WaveformDisplay(QWidget):
     def _on_bus_waveform_receive(self, parsed_data, device_type, timestamp):
         self.controller.add_receive_data(parsed_data, device_type, timestamp)
 
+    def _on_bus_waveform_receive_blocks(self, blocks):
+        self.controller.add_receive_blocks(blocks)
+
     def _on_bus_recording_toggle(self, should_record):
         block = self.record_btn.blockSignals(True)
         self.record_btn.setChecked(should_record)
@@ -199,6 +247,16 @@ class WaveformDisplay(QWidget):
         except Exception:
             pass
 
+        self.continuous_btn = QPushButton("持续录制")
+        self.continuous_btn.setCheckable(True)
+        self.continuous_btn.setMinimumHeight(30)
+        self.continuous_btn.setToolTip(
+            "将所有采集数据持续追加写入分段文件（不受缓冲区容量限制）"
+        )
+        self.session_btn = QPushButton("打开会话")
+        self.session_btn.setMinimumHeight(30)
+        self.session_btn.setToolTip("打开已录制的二进制会话进行回看（再次点击关闭）")
+
         # thumbnail preview button + label
         self.thumb_btn = QPushButton("预览缩略图")
         self.thumb_btn.setMinimumHeight(30)
@@ -224,6 +282,8 @@ class WaveformDisplay(QWidget):
         layout.addWidget(self.pause_btn)
         layout.addWidget(self.clear_btn)
         layout.addWidget(self.export_btn)
+        layout.addWidget(self.continuous_btn)
+        layout.addWidget(self.session_btn)
         layout.addWidget(self.thumb_btn)
         layout.addWidget(self.thumb_label)
         layout.addStretch()
@@ -389,10 +449,15 @@ class WaveformDisplay(QWidget):
         self.pause_btn.toggled.connect(self.on_pause_toggled)
         self.clear_btn.clicked.connect(self.on_clear_clicked)
         self.export_btn.clicked.connect(self.on_export_clicked)
+        self.session_btn.clicked.connect(self.on_session_clicked)
+        self.continuous_btn.toggled.connect(self.on_continuous_toggled)
         self.thumb_btn.clicked.connect(self._on_thumb_clicked)
         self.time_range_combo.currentTextChanged.connect(self.on_time_range_changed)
         self.auto_range_check.toggled.connect(self.on_auto_range_toggled)
         self.signal_tree.itemChanged.connect(self.on_signal_selection_changed)
+        self.waveform_widget.main_plot.sigXRangeChanged.connect(
+            self._on_plot_x_range_changed
+        )
 
         # 改为统一更新
         self.controller.data_updated.connect(self.on_data_updated)
@@ -434,8 +499,16 @@ class WaveformDisplay(QWidget):
         self.waveform_widget.clear_plots()
 
     def on_export_clicked(self):
-        """导出数据为 CSV 或 JSON。导出当前选中信号的全部缓冲数据。"""
+        """导出数据为 CSV 或 JSON。导出当前选中信号的全部缓冲数据。
+
+        在 UI 线程复制缓冲区快照后，由后台线程按块写文件；
+        完成、取消或失败时发出 `export_finished(path, ok)`。
+        """
         try:
+            if self._export_job is not None and not self._export_job.done:
+                QMessageBox.information(self, "导出", "已有导出任务正在进行")
+                return
+
             selected = list(self.controller.get_selected_signals())
             if not selected:
                 QMessageBox.information(self, "导出", "未选择任何信号，无法导出")
@@ -446,73 +519,278 @@ class WaveformDisplay(QWidget):
                 self,
                 "导出数据",
                 "waveform_export.csv",
-                "CSV 文件 (*.csv);;JSON 文件 (*.json)",
+                "CSV 文件 (*.csv);;JSON 文件 (*.json);;ACU 会话 (*.acusession)",
             )
             if not path:
                 return
 
             # 规范格式
-            fmt = (
-                "csv"
-                if path.lower().endswith(".csv") or "csv" in fmt.lower()
-                else "json"
-            )
-
-            timestamps = self.controller.get_timestamps()
+            lower = path.lower()
+            if lower.endswith(SESSION_SUFFIX) or "acusession" in fmt.lower():
+                fmt = "session"
+                if not lower.endswith(SESSION_SUFFIX):
+                    path += SESSION_SUFFIX
+            elif lower.endswith(".csv") or "csv" in fmt.lower():
+                fmt = "csv"
+            else:
+                fmt = "json"
 
-            # 组织数据为行格式（时间戳为第一列）
-            # 使用信号显示名作为 CSV header，便于阅读
+            # 使用信号显示名作为 header，便于阅读
             display_names = []
-            sig_to_name = {}
+            signal_info = {}
             for sig in selected:
                 info = self.controller.signal_manager.get_signal_info(sig) or {}
-                name = info.get("name") or str(sig)
-                display_names.append(name)
-                sig_to_name[sig] = name
-
-            rows = []
-            for i, ts in enumerate(timestamps):
-                row = {"timestamp": ts}
-                for sig in selected:
-                    vals = self.controller.get_signal_data(sig)
-                    row[sig_to_name[sig]] = vals[i] if i < len(vals) else None
-                rows.append(row)
-
-            if fmt == "csv":
-                import csv
-
-                fieldnames = ["timestamp"] + display_names
-
-                # Use UTF-8 with BOM on Windows so Excel recognizes UTF-8 correctly.
-                # On non-Windows platforms keep plain UTF-8 to avoid inserting a BOM.
-                import sys
-
-                csv_encoding = (
-                    "utf-8-sig" if sys.platform.startswith("win") else "utf-8"
-                )
+                display_names.append(info.get("name") or str(sig))
+                signal_info[sig] = info
+
+            snapshot = self.controller.data_buffer.snapshot(selected)
+            self._export_job = ExportJob(
+                snapshot, path, selected, display_names, fmt, signal_info=signal_info
+            ).start()
+            self._show_export_progress(len(snapshot))
+            self._export_timer.start()
+        except Exception as e:
+            logger.exception(f"导出失败: {e}")
+            QMessageBox.critical(self, "导出", f"导出失败: {e}")
 
-                with open(path, "w", newline="", encoding=csv_encoding) as f:
-                    writer = csv.DictWriter(f, fieldnames=fieldnames)
-                    writer.writeheader()
-                    for r in rows:
-                        writer.writerow(r)
-            else:
-                import json
+    def cancel_export(self) -> None:
+        """取消正在进行的导出（已写入的部分文件会被删除）。"""
+        if self._export_job is not None:
+            self._export_job.cancel()
+
+    def _show_export_progress(self, total_rows: int) -> None:
+        dialog = QProgressDialog("正在导出数据...", "取消", 0, max(1, total_rows), self)
+        dialog.setWindowTitle("导出")
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        # 小数据量导出很快完成，不必弹出进度框
+        dialog.setMinimumDuration(500)
+        dialog.canceled.connect(self.cancel_export)
+        self._export_progress = dialog
+
+    def _poll_export(self) -> None:
+        job = self._export_job
+        if job is None:
+            self._export_timer.stop()
+            return
+        dialog = self._export_progress
+        if dialog is not None and not job.done:
+            dialog.setValue(job.rows_done)
+            return
 
-                with open(path, "w", encoding="utf-8") as f:
-                    json.dump(rows, f, ensure_ascii=False, indent=2)
+        self._export_timer.stop()
+        self._export_job = None
+        self._export_progress = None
+        if dialog is not None:
+            try:
+                dialog.canceled.disconnect(self.cancel_export)
+            except Exception:
+                pass
+            dialog.close()
+            dialog.deleteLater()
 
+        path = str(job.path)
+        if job.succeeded:
             # remember last export path for convenience
             try:
                 self._last_export_path = path
                 self.save_settings()
             except Exception:
                 pass
-
             QMessageBox.information(self, "导出", f"导出成功: {path}")
+        elif job.cancelled:
+            logger.info("导出已取消: %s", path)
+        else:
+            logger.error("导出失败: %s", job.error)
+            QMessageBox.critical(self, "导出", f"导出失败: {job.error}")
+        self.export_finished.emit(path, job.succeeded)
+
+    # ---- 持续录制 -----------------------------------------------------------
+    @property
+    def recorder(self) -> Optional[SegmentRecorder]:
+        return self._recorder
+
+    def on_continuous_toggled(self, checked):
+        """持续录制按钮切换"""
+        if not checked:
+            self.stop_continuous_recording()
+            return
+        start_dir = self._recording_dir or str(
+            resource_path("recordings", prefer_write=True)
+        )
+        directory = QFileDialog.getExistingDirectory(self, "选择录制目录", start_dir)
+        if not directory or not self.start_continuous_recording(directory):
+            block = self.continuous_btn.blockSignals(True)
+            self.continuous_btn.setChecked(False)
+            self.continuous_btn.blockSignals(block)
+
+    def start_continuous_recording(self, directory) -> bool:
+        """开始把每批采集样本追加写入 `directory` 下的分段文件。"""
+        if self._recorder is not None:
+            return True
+        try:
+            recorder = SegmentRecorder(
+                directory, signal_info=self.controller.signal_manager.get_signal_info
+            ).start()
         except Exception as e:
-            logger.exception(f"导出失败: {e}")
-            QMessageBox.critical(self, "导出", f"导出失败: {e}")
+            logger.exception(f"启动持续录制失败: {e}")
+            QMessageBox.critical(self, "持续录制", f"启动持续录制失败: {e}")
+            return False
+        self._recorder = recorder
+        self._recording_dir = str(directory)
+        self.controller.add_sample_listener(recorder.submit)
+        block = self.continuous_btn.blockSignals(True)
+        self.continuous_btn.setChecked(True)
+        self.continuous_btn.blockSignals(block)
+        self.continuous_btn.setToolTip(f"正在录制到: {recorder.run_dir}")
+        # 只有处于记录状态时样本才会进入缓冲区
+        if not self.controller.is_recording and self.record_btn.isEnabled():
+            self.record_btn.setChecked(True)
+        try:
+            self.save_settings()
+        except Exception:
+            pass
+        return True
+
+    def stop_continuous_recording(self) -> None:
+        recorder = self._recorder
+        if recorder is None:
+            return
+        self._recorder = None
+        self.controller.remove_sample_listener(recorder.submit)
+        recorder.stop()
+        block = self.continuous_btn.blockSignals(True)
+        self.continuous_btn.setChecked(False)
+        self.continuous_btn.blockSignals(block)
+        self.continuous_btn.setToolTip(f"上次录制: {recorder.run_dir}")
+
+    # ---- 会话回放 -----------------------------------------------------------
+    @property
+    def is_session_mode(self) -> bool:
+        return self._session is not None
+
+    def on_session_clicked(self):
+        """打开或关闭录制会话"""
+        if self.is_session_mode:
+            self.close_session()
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "打开会话", "", "ACU 会话头 (session.json)"
+        )
+        if path:
+            self.load_session(path)
+
+    def load_session(self, path) -> bool:
+        """以只读方式打开会话（内存映射），通过 DataBuffer 读取接口绘制。"""
+        try:
+            session = open_session(path)
+        except (SessionFormatError, OSError) as e:
+            logger.error(f"打开会话失败: {e}")
+            QMessageBox.critical(self, "打开会话", f"打开会话失败: {e}")
+            return False
+
+        if self._live_buffer is None:
+            self._live_buffer = self.controller.data_buffer
+            self._recording_before_session = (
+                self.record_btn.isChecked(),
+                self.pause_btn.isChecked(),
+            )
+            # 回放期间不接收实时数据
+            self._on_bus_recording_toggle(False)
+        self._session = session
+        # 视图只覆盖显示窗口、点数与绘图点数一致，绘图层不再二次抽取
+        self.controller.data_buffer = SessionBuffer(
+            session, max_points=self.waveform_widget.max_display_points
+        )
+        self.stop_continuous_recording()
+        self.record_btn.setEnabled(False)
+        self.continuous_btn.setEnabled(False)
+        self.session_btn.setText("关闭会话")
+        self.session_btn.setToolTip(f"当前会话: {session.path}")
+
+        self._select_signals(session.signal_ids)
+        # 横轴以会话起点为 0，视图换到后段时坐标不变
+        self.waveform_widget._origin_timestamp = (
+            self.controller.data_buffer.time_bounds()[0]
+        )
+        # 按下拉框的时间范围显示会话末段（清除上次的手动窗口）
+        self.on_time_range_changed(self.time_range_combo.currentText())
+        logger.info("已打开会话 %s（%d 行）", session.path, len(session))
+        return True
+
+    def close_session(self) -> None:
+        """关闭会话并恢复实时缓冲区与打开前的记录状态。"""
+        self._session_view_timer.stop()
+        restore = self._live_buffer is not None
+        if restore:
+            self.controller.data_buffer = self._live_buffer
+        self._live_buffer = None
+        self._session = None
+        self.record_btn.setEnabled(True)
+        self.continuous_btn.setEnabled(True)
+        self.session_btn.setText("打开会话")
+        self.session_btn.setToolTip("打开已录制的二进制会话进行回看（再次点击关闭）")
+        for curve_info in self.waveform_widget.curves.values():
+            for key in ("curve", "band_upper", "band_lower"):
+                item = curve_info.get(key)
+                if item is not None:
+                    try:
+                        item.setData([], [])
+                    except Exception:
+                        pass
+        self.waveform_widget._origin_timestamp = None
+        self.on_time_range_changed(self.time_range_combo.currentText())
+        if restore:
+            recording, paused = self._recording_before_session
+            self._recording_before_session = (False, False)
+            if recording:
+                self._on_bus_recording_toggle(True)
+                if paused:
+                    self.pause_btn.setChecked(True)
+        self._refresh_plots()
+
+    def _apply_session_window(self, start=None, end=None) -> None:
+        """按显示窗口（绝对时间）重新读取会话视图；默认为会话末尾一个时间范围。"""
+        buffer = self.controller.data_buffer
+        if not self.is_session_mode or not isinstance(buffer, SessionBuffer):
+            return
+        if start is None or end is None:
+            _first, end = buffer.time_bounds()
+            if end is None:
+                return
+            start = end - float(self.waveform_widget.current_time_range)
+        buffer.set_view(start, end)
+
+    def _on_plot_x_range_changed(self, *args) -> None:
+        # 只跟随用户的平移/缩放；绘图自身的调整不会改变窗口
+        if self.is_session_mode and not self.waveform_widget._programmatic_x_change:
+            self._session_view_timer.start()
+
+    def _on_session_window_changed(self) -> None:
+        widget = self.waveform_widget
+        origin = widget._origin_timestamp
+        if not self.is_session_mode or origin is None:
+            return
+        x0, x1 = widget.main_plot.getViewBox().viewRange()[0]
+        # 数据选择按窗口宽度进行，使整个可见范围都有数据
+        widget.current_time_range = max(x1 - x0, 1e-3)
+        self._apply_session_window(origin + x0, origin + x1)
+        self._refresh_plots()
+
+    def _select_signals(self, signal_ids) -> None:
+        wanted = set(signal_ids)
+        for i in range(self.signal_tree.topLevelItemCount()):
+            category_item = self.signal_tree.topLevelItem(i)
+            for j in range(category_item.childCount()):
+                item = category_item.child(j)
+                if item.data(0, Qt.UserRole) in wanted:
+                    item.setCheckState(0, Qt.Checked)
+
+    def _refresh_plots(self) -> None:
+        # 绕过绘图的 200ms 节流，立即按当前缓冲区重绘
+        self.waveform_widget.last_plt_update = 0
+        self.on_data_updated()
 
     def on_time_range_changed(self, text):
         """时间范围改变"""
@@ -525,6 +803,9 @@ class WaveformDisplay(QWidget):
         }
         seconds = time_ranges.get(text, 600)
         self.waveform_widget.set_time_range(seconds)
+        if self.is_session_mode:
+            self._apply_session_window()
+            self._refresh_plots()
 
     def on_auto_range_toggled(self, checked):
         """自动范围切换"""
@@ -929,6 +1210,14 @@ class WaveformDisplay(QWidget):
 
     def shutdown(self) -> None:
         """Release resources ahead of application shutdown."""
+        job = getattr(self, "_export_job", None)
+        if job is not None:
+            job.cancel()
+            job.wait(2.0)
+        try:
+            self.stop_continuous_recording()
+        except Exception:
+            logger.exception("停止持续录制失败")
         try:
             if getattr(self, "controller", None) is not None:
                 self.controller.shutdown()
@@ -976,6 +1265,7 @@ class WaveformDisplay(QWidget):
                 signal_order=order,
                 splitter_sizes=splitter_sizes,
                 palette=palette,
+                recording_dir=getattr(self, "_recording_dir", ""),
             )
             save_waveform_settings(state)
         except Exception:
@@ -1014,6 +1304,7 @@ class WaveformDisplay(QWidget):
                     self._last_export_path = last_export
             except Exception:
                 pass
+            self._recording_dir = stored.recording_dir or ""
 
             # apply selected signals: find items in tree and check them
             if sel: